@@ -0,0 +1,120 @@
+"""
+Benchmark decoding rows into Memory objects.
+
+Compares the original plain Memory class, which kept embeddings as given
+and called the enums for every row, with the current slotted Memory and
+its read-only float32 embeddings. Decodes the same PostgreSQL-shaped rows
+with both, and builds memories from float lists as the embedding
+generator returns them. Needs no database:
+    
+    python benchmarks/memory_objects.py --rows 20000 --dim 384
+"""
+
+from datetime import datetime
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+import numpy as np
+from memory_system import Memory, MemoryLevel, MemoryType
+from memory_system.memory_store import _row_to_memory
+from memory_system.vectors import decode_embedding, encode_embedding
+
+class BaselineMemory:
+    """The Memory model before slots and read-only embeddings."""
+    
+    def __init__(
+        self, id, content, embedding, level, memory_type, timestamp, metadata=None,
+        relevance_score=1.0, access_count=0, last_accessed=None, tags=None, similarity=None
+    ):
+        self.id = id
+        self.content = content
+        self.embedding = embedding
+        self.level = level
+        self.memory_type = memory_type
+        self.timestamp = timestamp
+        self.metadata = metadata or {}
+        self.relevance_score = relevance_score
+        self.access_count = access_count
+        self.last_accessed = last_accessed
+        self.tags = tags or []
+        self.similarity = similarity
+
+def baseline_row_to_memory(row: tuple) -> BaselineMemory:
+    """Decode a row the way the store did before interning and enum lookups."""
+    return BaselineMemory(
+        id=row[0],
+        content=row[1],
+        embedding=decode_embedding(row[2]) if row[2] is not None else None,
+        level=MemoryLevel(row[3]) if isinstance(row[3], str) else row[3],
+        memory_type=MemoryType(row[4]) if isinstance(row[4], str) else row[4],
+        timestamp=row[5],
+        metadata=row[6],
+        relevance_score=row[7],
+        access_count=row[8],
+        last_accessed=row[9],
+        tags=row[10],
+        similarity=row[11] if len(row) > 11 else None
+    )
+
+def make_rows(count: int, dim: int) -> list:
+    """Return rows as the driver hands them over, with fresh tag strings per row."""
+    rng = np.random.default_rng(0)
+    blobs = [encode_embedding(vector) for vector in rng.standard_normal((count, dim))]
+    now = datetime.now()
+    return [
+        (f"bench-{i}", f"Benchmark memory {i}", blob, "team", "experience", now, {},
+         1.0, 0, None, json.loads('["project", "deploy"]'), 0.5)
+        for i, blob in enumerate(blobs)
+    ]
+
+def decode_time(runs: int, rows: int, dim: int, decode) -> float:
+    """Return the fastest of ``runs`` timings of decoding fresh rows, in milliseconds."""
+    timings = []
+    for _ in range(runs):
+        # Tag lists are interned in place, so every run decodes new rows
+        batch = make_rows(rows, dim)
+        start = time.perf_counter()
+        [decode(row) for row in batch]
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def retained(build) -> float:
+    """Return the bytes per object retained by the objects ``build`` returns.
+    
+    Row data already allocated, such as embedding blobs, is not counted.
+    """
+    gc.collect()
+    tracemalloc.start()
+    objects = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return size / len(objects)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    
+    print(f"{args.rows} rows x {args.dim} dims, best of {args.runs}")
+    for name, decode in (("plain Memory (original)", baseline_row_to_memory), ("slotted Memory", _row_to_memory)):
+        timing = decode_time(args.runs, args.rows, args.dim, decode)
+        rows = make_rows(args.rows, args.dim)
+        size = retained(lambda: [decode(row) for row in rows])
+        print(f"  decode, {name + ':':25} {timing:8.1f} ms {size:8.0f} B per memory")
+    
+    vectors = np.random.default_rng(1).standard_normal((min(args.rows, 2000), args.dim))
+    now = datetime.now()
+    for name, model in (("plain Memory (original)", BaselineMemory), ("slotted Memory", Memory)):
+        # Each memory gets new float objects, as from a decoded API response
+        size = retained(lambda: [
+            model(f"bench-{i}", "Benchmark memory", vector.tolist(), MemoryLevel.TEAM, MemoryType.EXPERIENCE, now)
+            for i, vector in enumerate(vectors)
+        ])
+        print(f"  float list, {name + ':':21} {size / 1024:17.1f} KB per memory")
+
+if __name__ == "__main__":
+    main()
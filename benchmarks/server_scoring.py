@@ -0,0 +1,143 @@
+"""
+Benchmark PostgreSQL server-side similarity scoring.
+
+Compares the original PL/pgSQL loop over FLOAT[] embeddings with the
+current scoring over the REAL[] ``embedding`` column, on the same rows,
+reports the stored size of both, and times a full
+``execution_mode="server"`` search through the store. Run against a
+scratch database:
+    
+    python benchmarks/server_scoring.py --host localhost --port 5433 \\
+        --database memory_system_bench --user memory_system --password ...
+"""
+
+from datetime import datetime
+import argparse
+import time
+import numpy as np
+import psycopg2
+from psycopg2.extras import execute_values
+from memory_system import Memory, MemoryLevel, MemoryType, MemoryStore, DatabaseConfig, DatabaseProvider
+
+# The scorer the FLOAT[] schema shipped with
+_BASELINE_SQL = """
+    CREATE OR REPLACE FUNCTION bench_float_array_similarity(a FLOAT[], b FLOAT[]) RETURNS FLOAT AS $$
+    DECLARE
+        dot_product FLOAT := 0;
+        norm_a FLOAT := 0;
+        norm_b FLOAT := 0;
+        i INTEGER;
+    BEGIN
+        IF array_length(a, 1) != array_length(b, 1) THEN
+            RETURN 0;
+        END IF;
+        
+        FOR i IN 1..array_length(a, 1) LOOP
+            dot_product := dot_product + (a[i] * b[i]);
+            norm_a := norm_a + (a[i] * a[i]);
+            norm_b := norm_b + (b[i] * b[i]);
+        END LOOP;
+        
+        IF norm_a = 0 OR norm_b = 0 THEN
+            RETURN 0;
+        END IF;
+        
+        RETURN dot_product / (sqrt(norm_a) * sqrt(norm_b));
+    END;
+    $$ LANGUAGE plpgsql IMMUTABLE
+"""
+
+def best_of(runs: int, run) -> float:
+    """Return the fastest of ``runs`` timings of ``run``, in milliseconds."""
+    run()
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - start)
+    return min(timings) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=5432)
+    parser.add_argument("--database", default="memory_system_bench")
+    parser.add_argument("--user", default="memory_system")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    
+    store = MemoryStore(DatabaseConfig(
+        provider=DatabaseProvider.POSTGRESQL,
+        host=args.host,
+        port=args.port,
+        database=args.database,
+        username=args.user,
+        password=args.password
+    ))
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.rows, args.dim)).astype(np.float32)
+    store.store_memories([
+        Memory(
+            id=f"bench-{i}",
+            content=f"Benchmark memory {i}",
+            embedding=vector,
+            level=MemoryLevel.TEAM,
+            memory_type=MemoryType.EXPERIENCE,
+            timestamp=datetime.now()
+        )
+        for i, vector in enumerate(vectors)
+    ])
+    
+    connection = psycopg2.connect(
+        host=args.host, port=args.port, database=args.database, user=args.user, password=args.password
+    )
+    cursor = connection.cursor()
+    cursor.execute(_BASELINE_SQL)
+    cursor.execute("CREATE TEMPORARY TABLE bench_float_arrays (id TEXT, embedding FLOAT[])")
+    execute_values(
+        cursor,
+        "INSERT INTO bench_float_arrays VALUES %s",
+        [(f"bench-{i}", vector.tolist()) for i, vector in enumerate(vectors)]
+    )
+    query = rng.standard_normal(args.dim).astype(np.float32).tolist()
+    
+    def baseline():
+        cursor.execute(
+            "SELECT id FROM bench_float_arrays "
+            "ORDER BY bench_float_array_similarity(embedding, %s::float8[]) DESC LIMIT 10",
+            (query,)
+        )
+        cursor.fetchall()
+    
+    def current():
+        cursor.execute(
+            "SELECT id FROM memories "
+            "ORDER BY vector_similarity(embedding, %s::real[]) DESC LIMIT 10",
+            (query,)
+        )
+        cursor.fetchall()
+    
+    def search():
+        store.search_memories(np.asarray(query), max_results=10, execution_mode="server")
+    
+    def stored_size(table: str) -> float:
+        cursor.execute(f"SELECT avg(pg_column_size(embedding)) FROM {table}")
+        return float(cursor.fetchone()[0])
+    
+    print(f"{args.rows} rows x {args.dim} dims, best of {args.runs}")
+    print(f"  FLOAT[] embedding size (original): {stored_size('bench_float_arrays'):7.0f} B")
+    print(f"  REAL[] embedding size:             {stored_size('memories'):7.0f} B")
+    print(f"  FLOAT[] PL/pgSQL loop (original): {best_of(args.runs, baseline):8.1f} ms")
+    print(f"  REAL[] scoring:                   {best_of(args.runs, current):8.1f} ms")
+    print(f"  store search, server mode:        {best_of(args.runs, search):8.1f} ms")
+    
+    connection.rollback()
+    connection.close()
+    store.delete_memories([f"bench-{i}" for i in range(args.rows)])
+    store.close()
+
+if __name__ == "__main__":
+    main()
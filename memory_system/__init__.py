@@ -3,8 +3,18 @@
 from .models import Memory, MemoryLevel, MemoryType, MemoryQuery
 from .memory_manager import MemoryManager
 from .memory_store import MemoryStore
+from .tiered_store import TieredMemoryStore
+from .sharded_store import ShardedMemoryStore, ShardSearchReport
+from .async_memory_manager import AsyncMemoryManager
+from .async_memory_store import AsyncMemoryStore
 from .config import DatabaseConfig, LLMConfig, DatabaseProvider
 from .embeddings import EmbeddingGenerator
+from .ingestion import IngestionPipeline
+from .query_cache import QueryCache, SemanticCacheStore
+from .consolidation import ConsolidationJob
+from .dedup import DuplicateIndex
+from .lexical import LexicalIndex
+from .pagination import PageToken
 
 __all__ = [
     'Memory',
@@ -13,8 +23,20 @@ __all__ = [
     'MemoryQuery',
     'MemoryManager',
     'MemoryStore',
+    'TieredMemoryStore',
+    'ShardedMemoryStore',
+    'ShardSearchReport',
+    'AsyncMemoryManager',
+    'AsyncMemoryStore',
     'DatabaseConfig',
     'LLMConfig',
     'DatabaseProvider',
-    'EmbeddingGenerator'
+    'EmbeddingGenerator',
+    'IngestionPipeline',
+    'QueryCache',
+    'SemanticCacheStore',
+    'ConsolidationJob',
+    'DuplicateIndex',
+    'LexicalIndex',
+    'PageToken'
 ]
@@ -0,0 +1,169 @@
+"""
+Access tracking module.
+"""
+
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime
+import threading
+import time
+
+class AccessTracker:
+    """Accumulate memory accesses and write them back in bulk.
+    
+    Searches record the ids they returned; hits are summed per memory and
+    flushed as ``(hits, last_accessed)`` deltas through the store's
+    ``apply_access_deltas``. ``record`` reports a flush as due once
+    ``max_pending`` memories are pending or ``flush_interval`` seconds
+    have passed since the last flush. After ``start``, a background thread
+    also flushes every ``flush_interval`` seconds, so accesses reach the
+    store while the caller is idle. ``on_flush`` is called with every
+    applied batch, e.g. to update in-process copies. Call ``close`` on
+    shutdown to write out whatever is still pending. Failed flushes are
+    counted, with the last error, in ``stats``.
+    """
+    
+    def __init__(
+        self,
+        memory_store=None,
+        flush_interval: float = 5.0,
+        max_pending: int = 1000,
+        on_flush: Optional[Callable[[Dict[str, Tuple[int, datetime]]], None]] = None
+    ):
+        """Initialize access tracker."""
+        self.memory_store = memory_store
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.on_flush = on_flush
+        self._pending: Dict[str, Tuple[int, datetime]] = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.flushes = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[datetime] = None
+    
+    def record(self, memory_ids: List[str], accessed_at: Optional[datetime] = None) -> bool:
+        """Record one access per id. Returns whether a flush is due."""
+        if accessed_at is None:
+            accessed_at = datetime.now()
+        
+        with self._lock:
+            for memory_id in memory_ids:
+                hits, last_accessed = self._pending.get(memory_id, (0, accessed_at))
+                self._pending[memory_id] = (hits + 1, max(last_accessed, accessed_at))
+            return self.flush_due()
+    
+    def flush_due(self) -> bool:
+        """Return whether the size or time threshold has been reached."""
+        if not self._pending:
+            return False
+        return (
+            len(self._pending) >= self.max_pending
+            or time.monotonic() - self._last_flush >= self.flush_interval
+        )
+    
+    def pending(self) -> int:
+        """Return the number of memories with unflushed accesses."""
+        return len(self._pending)
+    
+    def drain(self) -> Dict[str, Tuple[int, datetime]]:
+        """Take the pending deltas, leaving the tracker empty."""
+        with self._lock:
+            deltas, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+            return deltas
+    
+    def restore(self, deltas: Dict[str, Tuple[int, datetime]]) -> None:
+        """Merge deltas back after a failed flush so no access is lost."""
+        with self._lock:
+            for memory_id, (hits, accessed_at) in deltas.items():
+                pending_hits, last_accessed = self._pending.get(memory_id, (0, accessed_at))
+                self._pending[memory_id] = (pending_hits + hits, max(last_accessed, accessed_at))
+    
+    def flush(self, memory_store=None) -> int:
+        """Write pending deltas to ``memory_store`` (default: the tracker's store).
+        
+        Returns the number of updated memories.
+        """
+        deltas = self.drain()
+        if not deltas:
+            return 0
+        
+        try:
+            updated = (memory_store or self.memory_store).apply_access_deltas(deltas)
+        except Exception as e:
+            self.restore(deltas)
+            self.record_failure(e)
+            raise
+        self.flushes += 1
+        if self.on_flush is not None:
+            self.on_flush(deltas)
+        return updated
+    
+    def record_failure(self, error: Exception) -> None:
+        """Count a failed flush and keep its error for ``stats``."""
+        with self._lock:
+            self.failures += 1
+            self.last_error = str(error)
+            self.last_error_at = datetime.now()
+    
+    def start(self, open_store: Optional[Callable[[], Any]] = None) -> None:
+        """Flush every ``flush_interval`` seconds on a background thread.
+        
+        ``open_store`` is called on that thread for the store to flush
+        into, e.g. a session of its own, and the store is closed when the
+        thread stops; by default the tracker's store is used.
+        """
+        if self._thread is not None:
+            return
+        
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(open_store,), name="memory-access-flush", daemon=True
+        )
+        self._thread.start()
+    
+    def _run(self, open_store: Optional[Callable[[], Any]]) -> None:
+        """Background loop."""
+        store = self.memory_store
+        try:
+            if open_store is not None:
+                store = open_store()
+            
+            while not self._stop.wait(self.flush_interval):
+                try:
+                    self.flush(store)
+                except Exception as e:
+                    print(f"Error flushing memory access: {str(e)}")
+        except Exception as e:
+            self.record_failure(e)
+            print(f"Error starting memory access flushing: {str(e)}")
+        finally:
+            if store is not self.memory_store:
+                store.close()
+    
+    def stop(self) -> None:
+        """Stop the background thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._stop.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return flush totals and the last flush error."""
+        return {
+            "running": self._thread is not None,
+            "pending": len(self._pending),
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at
+        }
+    
+    def close(self) -> None:
+        """Stop the background thread and flush pending accesses."""
+        self.stop()
+        self.flush()
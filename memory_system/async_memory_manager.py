@@ -0,0 +1,216 @@
+"""
+Asynchronous memory manager module.
+"""
+
+from typing import List, Optional, Dict, Any
+from datetime import datetime
+import asyncio
+import uuid
+from .models import Memory, MemoryLevel, MemoryType, MemoryQuery
+from .async_memory_store import AsyncMemoryStore
+from .access_tracker import AccessTracker
+from .recall import recall_levels, level_query, async_hierarchical_search
+from .embeddings import EmbeddingGenerator
+from .config import LLMConfig, DatabaseConfig
+
+class AsyncMemoryManager:
+    """Manage memory operations from asyncio code."""
+    
+    def __init__(
+        self,
+        llm_config: LLMConfig,
+        db_config: DatabaseConfig,
+        track_access: bool = False,
+        access_flush_interval: float = 5.0,
+        access_flush_size: int = 1000
+    ):
+        """Initialize memory manager."""
+        self.llm_config = llm_config
+        self.db_config = db_config
+        self.memory_store = AsyncMemoryStore(db_config)
+        self.embedding_generator = EmbeddingGenerator(llm_config)
+        # Deltas are drained here and awaited on the async store
+        self.access_tracker = AccessTracker(
+            None, access_flush_interval, access_flush_size
+        ) if track_access else None
+        self._flusher: Optional[asyncio.Task] = None
+    
+    async def connect(self) -> "AsyncMemoryManager":
+        """Connect the underlying memory store.
+        
+        With access tracking, a task also flushes pending counts every
+        ``access_flush_interval`` seconds, so they persist while idle.
+        """
+        await self.memory_store.connect()
+        if self.access_tracker is not None and self._flusher is None:
+            self._flusher = asyncio.create_task(self._flush_periodically())
+        return self
+    
+    async def close(self) -> None:
+        """Flush pending access counts and close the underlying memory store."""
+        if self._flusher is not None:
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+            self._flusher = None
+        await self.flush_access()
+        await self.memory_store.close()
+    
+    async def __aenter__(self) -> "AsyncMemoryManager":
+        return await self.connect()
+    
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        await self.close()
+    
+    async def add_experience(
+        self,
+        content: str,
+        level: MemoryLevel,
+        memory_type: Optional[MemoryType] = None,
+        tags: Optional[List[str]] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ) -> Memory:
+        """Add a new experience memory."""
+        if memory_type is None:
+            memory_type = MemoryType.EXPERIENCE
+        
+        if metadata is None:
+            metadata = {}
+        
+        if tags is None:
+            tags = []
+        
+        memory = Memory(
+            id=str(uuid.uuid4()),
+            content=content,
+            embedding=self.embedding_generator.generate(content),
+            level=level,
+            memory_type=memory_type,
+            timestamp=datetime.now(),
+            metadata=metadata,
+            relevance_score=1.0,
+            access_count=0,
+            last_accessed=None,
+            tags=tags
+        )
+        
+        await self.memory_store.store_memory(memory)
+        return memory
+    
+    async def add_experiences(self, experiences: List[Dict[str, Any]]) -> List[Memory]:
+        """Add several experiences concurrently.
+        
+        Each item holds the keyword arguments of ``add_experience``.
+        """
+        return list(await asyncio.gather(
+            *(self.add_experience(**experience) for experience in experiences)
+        ))
+    
+    async def search_memories(self, query: MemoryQuery) -> List[Memory]:
+        """Search for memories based on query.
+        
+        A hierarchical query searches all its levels concurrently on the
+        connection pool and cancels the wider ones as soon as narrower
+        levels yield ``max_results`` results reaching ``min_similarity``.
+        """
+        if query.page_token:
+            raise ValueError("Page tokens are not supported by the async memory manager")
+        
+        # Get embeddings for query content
+        query_embedding = self.embedding_generator.generate(query.content)
+        
+        if query.hierarchical:
+            memories = await async_hierarchical_search(
+                lambda level: self._search(level_query(query, level), query_embedding),
+                recall_levels(query.level),
+                query.max_results,
+                query.min_similarity
+            )
+        else:
+            memories = await self._search(query, query_embedding)
+        
+        if self.access_tracker is not None and memories:
+            await self._record_access(memories)
+        
+        return memories
+    
+    async def _search(self, query: MemoryQuery, query_embedding: List[float]) -> List[Memory]:
+        """Search the memory store."""
+        return await self.memory_store.search_memories(
+            query_embedding=query_embedding,
+            level=query.level,
+            memory_type=query.memory_type,
+            min_relevance=query.min_relevance,
+            max_results=query.max_results,
+            tags=query.tags,
+            metadata_filters=query.metadata_filters,
+            since=query.since,
+            until=query.until,
+            recency_half_life=query.recency_half_life
+        )
+    
+    async def _record_access(self, memories: List[Memory]) -> None:
+        """Count a recall of each memory and flush when due."""
+        accessed_at = datetime.now()
+        for memory in memories:
+            memory.access_count += 1
+            memory.last_accessed = accessed_at
+        
+        if self.access_tracker.record([memory.id for memory in memories], accessed_at):
+            await self.flush_access()
+    
+    async def _flush_periodically(self) -> None:
+        """Flush pending access counts on a timer."""
+        while True:
+            await asyncio.sleep(self.access_tracker.flush_interval)
+            if self.access_tracker.pending():
+                await self.flush_access()
+    
+    async def flush_access(self) -> bool:
+        """Write pending access counts to the store."""
+        if self.access_tracker is None:
+            return True
+        
+        deltas = self.access_tracker.drain()
+        try:
+            await self.memory_store.apply_access_deltas(deltas)
+            if deltas:
+                self.access_tracker.flushes += 1
+            return True
+        except Exception as e:
+            self.access_tracker.restore(deltas)
+            self.access_tracker.record_failure(e)
+            print(f"Error flushing memory access: {str(e)}")
+            return False
+    
+    async def search_many(self, queries: List[MemoryQuery]) -> List[List[Memory]]:
+        """Run several searches concurrently, one result list per query."""
+        return list(await asyncio.gather(*(self.search_memories(query) for query in queries)))
+    
+    async def update_memory(self, memory: Memory) -> bool:
+        """Update an existing memory."""
+        try:
+            await self.memory_store.update_memory(memory)
+            return True
+        except Exception as e:
+            print(f"Error updating memory: {str(e)}")
+            return False
+    
+    async def update_fields(self, memory_id: str, fields: Dict[str, Any]) -> bool:
+        """Update only the given fields of a memory."""
+        try:
+            return await self.memory_store.update_fields(memory_id, fields) > 0
+        except Exception as e:
+            print(f"Error updating memory: {str(e)}")
+            return False
+    
+    async def delete_memory(self, memory_id: str) -> bool:
+        """Delete a memory by ID."""
+        try:
+            await self.memory_store.delete_memory(memory_id)
+            return True
+        except Exception as e:
+            print(f"Error deleting memory: {str(e)}")
+            return False
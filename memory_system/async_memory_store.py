@@ -0,0 +1,628 @@
+"""
+Asynchronous memory store module.
+"""
+
+from typing import List, Optional, Dict, Any, Set, Tuple, Union
+import asyncio
+import json
+import numpy as np
+from datetime import datetime
+from .models import Memory, MemoryLevel, MemoryType
+from .config import DatabaseConfig, DatabaseProvider
+from .vectors import EMBEDDING_DTYPE
+from .memory_store import (
+    _PG_SETUP_SQL,
+    _PG_TABLE_SQL,
+    _PG_PARTITIONED_TABLE_SQL,
+    _PG_ID_REGISTRY_SQL,
+    _PG_TIMESTAMP_INDEX_SQL,
+    _PG_ARCHIVE_TABLE_SQL,
+    _PG_CONSOLIDATION_STATE_SQL,
+    _PG_RELKIND_SQL,
+    _PG_LEGACY_EMBEDDINGS_SQL,
+    _PG_INSERT_SQL,
+    _PG_INCREMENT_ACCESS_SQL,
+    _PG_APPLY_ACCESS_DELTAS_SQL,
+    _PG_LAST_PASS_SQL,
+    _PG_DECAY_PASS_SQL,
+    _PG_DECAY_SQL,
+    _PG_ARCHIVE_SQL,
+    _PG_ARCHIVED_PARTITIONS_SQL,
+    _PG_RESTORE_SQL,
+    _NOT_PARTITIONED_ERROR,
+    _ExecutionModes,
+    _enum_value,
+    _pg_partition_ddl,
+    _pg_memory_params,
+    _pg_update_sql,
+    _pg_update_params,
+    _patch_fields,
+    _pg_patch_sql,
+    _pg_patch_params,
+    _mongo_patch,
+    _memory_ids,
+    _access_delta_params,
+    _mongo_access_updates,
+    _mongo_decay,
+    _mongo_archive_writes,
+    _pg_filters,
+    _pg_search_sql,
+    _pg_vector,
+    _pg_migration_ddl,
+    _row_to_memory,
+    _mongo_filter,
+    _mongo_document,
+    _mongo_update,
+    _doc_to_memory,
+    _rank_candidates,
+    _candidate_weights,
+    _rank_mongo_batch,
+    _mongo_vector_search_pipeline,
+    _vector_search_similarity,
+    _chunks,
+    _MONGO_INDEXES,
+    _SCORING_BATCH_SIZE,
+    _MONGO_WITHOUT_EMBEDDING,
+    _MONGO_DECAY_PROJECTION,
+    _MONGO_RECENCY_SCORED,
+    _MONGO_RECENT_SORT
+)
+
+def _identity(value: Any) -> Any:
+    """Pass a value through unchanged (asyncpg encodes jsonb itself)."""
+    return value
+
+class AsyncMemoryStore:
+    """Store and retrieve memories without blocking the event loop.
+    
+    PostgreSQL is accessed through a pooled asyncpg connection (asyncpg
+    prepares and caches every statement per connection) and MongoDB through
+    PyMongo's ``AsyncMongoClient``. Call ``connect()`` or use the store as an
+    async context manager before issuing operations.
+    """
+    
+    def __init__(self, db_config: DatabaseConfig):
+        """Initialize memory store."""
+        self.db_config = db_config
+        self.provider = db_config.provider
+        self.pool = None
+        self.db = None
+        self._client = None
+        self._partitions: Set[Tuple[str, Tuple[int, int]]] = set()
+        self._partition_lock = asyncio.Lock()
+        self._execution_modes = _ExecutionModes(db_config.execution_mode_ttl)
+        
+        if self.provider not in (DatabaseProvider.POSTGRESQL, DatabaseProvider.MONGODB):
+            raise ValueError(f"Unsupported database provider: {self.provider}")
+    
+    async def connect(self) -> "AsyncMemoryStore":
+        """Open the connection pool and prepare the schema."""
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            await self._init_postgresql()
+        else:
+            await self._init_mongodb()
+        return self
+    
+    async def close(self) -> None:
+        """Close the connection pool."""
+        if self.pool is not None:
+            await self.pool.close()
+            self.pool = None
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
+    async def __aenter__(self) -> "AsyncMemoryStore":
+        return await self.connect()
+    
+    async def __aexit__(self, exc_type, exc, traceback) -> None:
+        await self.close()
+    
+    async def _init_postgresql(self):
+        """Initialize the PostgreSQL connection pool."""
+        try:
+            import asyncpg
+            
+            async def init_connection(connection):
+                await connection.set_type_codec(
+                    'jsonb', encoder=json.dumps, decoder=json.loads, schema='pg_catalog'
+                )
+            
+            self.pool = await asyncpg.create_pool(
+                host=self.db_config.host,
+                port=self.db_config.port,
+                database=self.db_config.database,
+                user=self.db_config.username,
+                password=self.db_config.password,
+                ssl='require' if self.db_config.ssl else 'disable',
+                min_size=self.db_config.pool_min_size,
+                max_size=self.db_config.pool_max_size,
+                statement_cache_size=self.db_config.statement_cache_size,
+                init=init_connection
+            )
+            
+            # Create memories table if it doesn't exist
+            async with self.pool.acquire() as connection:
+                async with connection.transaction():
+                    await connection.execute(_PG_SETUP_SQL)
+                    
+                    if self.db_config.partitioned:
+                        relkind = await connection.fetchval(_PG_RELKIND_SQL)
+                        if relkind is not None and relkind != 'p':
+                            raise ValueError(_NOT_PARTITIONED_ERROR)
+                        await connection.execute(_PG_PARTITIONED_TABLE_SQL)
+                        await connection.execute(_PG_ID_REGISTRY_SQL)
+                    else:
+                        await connection.execute(_PG_TABLE_SQL)
+                    await connection.execute(_PG_TIMESTAMP_INDEX_SQL)
+                    await connection.execute(_PG_ARCHIVE_TABLE_SQL)
+                    await connection.execute(_PG_CONSOLIDATION_STATE_SQL)
+                    
+                    # Tables created by earlier versions hold FLOAT[] or blob embeddings
+                    for table, column_type in await connection.fetch(_PG_LEGACY_EMBEDDINGS_SQL):
+                        for statement in _pg_migration_ddl(table, column_type):
+                            await connection.execute(statement)
+        
+        except Exception as e:
+            raise Exception(f"Failed to initialize PostgreSQL: {str(e)}")
+    
+    async def _init_mongodb(self):
+        """Initialize the MongoDB client."""
+        try:
+            from pymongo import AsyncMongoClient
+            
+            self._client = AsyncMongoClient(
+                host=self.db_config.host,
+                port=self.db_config.port,
+                username=self.db_config.username,
+                password=self.db_config.password,
+                ssl=self.db_config.ssl,
+                minPoolSize=self.db_config.pool_min_size,
+                maxPoolSize=self.db_config.pool_max_size
+            )
+            self.db = self._client[self.db_config.database]
+            
+            for keys in _MONGO_INDEXES:
+                await self.db.memories.create_index(keys)
+        
+        except Exception as e:
+            raise Exception(f"Failed to initialize MongoDB: {str(e)}")
+    
+    async def _ensure_partition(self, connection, level: str, timestamp: datetime) -> None:
+        """Create the level and month partitions a row will be routed to."""
+        month = (timestamp.year, timestamp.month)
+        if not self.db_config.partitioned or (level, month) in self._partitions:
+            return
+        
+        # Serialize DDL so concurrent writers don't race on the same partition
+        async with self._partition_lock:
+            if (level, month) in self._partitions:
+                return
+            for statement in _pg_partition_ddl(level, timestamp):
+                await connection.execute(statement)
+            self._partitions.add((level, month))
+    
+    async def store_memory(self, memory: Memory) -> None:
+        """Store a memory."""
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            async with self.pool.acquire() as connection:
+                await self._ensure_partition(connection, _enum_value(memory.level), memory.timestamp)
+                await connection.execute(
+                    _PG_INSERT_SQL,
+                    *_pg_memory_params(memory, adapt_json=_identity)
+                )
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            await self.db.memories.insert_one(_mongo_document(memory))
+    
+    async def store_memories(self, memories: List[Memory]) -> None:
+        """Store several memories.
+        
+        PostgreSQL inserts them with one ``executemany`` in one transaction;
+        MongoDB sends unordered bulk inserts of up to ``write_batch_size``
+        documents.
+        """
+        if not memories:
+            return
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            async with self.pool.acquire() as connection:
+                for memory in memories:
+                    await self._ensure_partition(connection, _enum_value(memory.level), memory.timestamp)
+                async with connection.transaction():
+                    await connection.executemany(
+                        _PG_INSERT_SQL,
+                        [_pg_memory_params(memory, adapt_json=_identity) for memory in memories]
+                    )
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            for batch in _chunks(memories, self.db_config.write_batch_size):
+                await self.db.memories.insert_many(
+                    [_mongo_document(memory) for memory in batch],
+                    ordered=False
+                )
+    
+    async def get_memories(self, memory_ids: List[str], include_embedding: bool = True) -> List[Memory]:
+        """Fetch memories by id, in the order given; missing ids are skipped."""
+        if not memory_ids:
+            return []
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            text, _ = _pg_search_sql("fetch", (), include_embedding)
+            async with self.pool.acquire() as connection:
+                rows = await connection.fetch(text, list(memory_ids))
+            found = {row[0]: _row_to_memory(row) for row in rows}
+        
+        else:
+            projection = None if include_embedding else _MONGO_WITHOUT_EMBEDDING
+            docs = await self.db.memories.find({'_id': {'$in': list(memory_ids)}}, projection).to_list(None)
+            found = {str(doc['_id']): _doc_to_memory(doc) for doc in docs}
+        
+        return [found[memory_id] for memory_id in memory_ids if memory_id in found]
+    
+    async def scan_memories(
+        self,
+        after_id: str = "",
+        batch_size: int = 1000,
+        include_embedding: bool = True
+    ) -> List[Memory]:
+        """Return up to ``batch_size`` memories with ids after ``after_id``, in id order.
+        
+        See ``MemoryStore.scan_memories``.
+        """
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            text, _ = _pg_search_sql("scan", (), include_embedding)
+            async with self.pool.acquire() as connection:
+                rows = await connection.fetch(text, after_id, batch_size)
+            return [_row_to_memory(row) for row in rows]
+        
+        projection = None if include_embedding else _MONGO_WITHOUT_EMBEDDING
+        docs = await self.db.memories.find(
+            {'_id': {'$gt': after_id}}, projection
+        ).sort('_id', 1).limit(batch_size).to_list(None)
+        return [_doc_to_memory(doc) for doc in docs]
+    
+    async def search_memories(
+        self,
+        query_embedding: Optional[np.ndarray] = None,
+        level: Optional[MemoryLevel] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_relevance: float = 0.0,
+        max_results: int = 10,
+        tags: Optional[List[str]] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None
+    ) -> List[Memory]:
+        """Search for memories based on query parameters.
+        
+        Behaves like ``MemoryStore.search_memories``, including the
+        ``execution_mode`` choice between server- and client-side scoring,
+        the ``since``/``until`` window and recency-weighted ranking, and
+        leaving embeddings out with ``include_embedding=False``.
+        """
+        if execution_mode not in ("auto", "server", "client"):
+            raise ValueError(f"Unsupported execution mode: {execution_mode}")
+        
+        recency = (datetime.now(), recency_half_life) if recency_half_life else None
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            filter_shape, params = _pg_filters(
+                level, memory_type, min_relevance, tags, metadata_filters, since, until,
+                adapt_json=_identity
+            )
+            
+            async with self.pool.acquire() as connection:
+                if query_embedding is None:
+                    text, _ = _pg_search_sql("recent", filter_shape, include_embedding)
+                    rows = await connection.fetch(text, *params, max_results)
+                    return [_row_to_memory(row) for row in rows]
+                
+                candidates_sql, _ = _pg_search_sql("candidates", filter_shape)
+                if execution_mode == "auto":
+                    execution_mode = self._execution_modes.get(filter_shape)
+                if execution_mode is None:
+                    plan = json.loads(await connection.fetchval(
+                        f"EXPLAIN (FORMAT JSON) {candidates_sql}", *params
+                    ))
+                    if plan[0]["Plan"]["Plan Rows"] <= self.db_config.client_scoring_max_candidates:
+                        execution_mode = "client"
+                    else:
+                        execution_mode = "server"
+                    self._execution_modes.put(filter_shape, execution_mode)
+                
+                if execution_mode == "server":
+                    text, _ = _pg_search_sql("ranked", filter_shape, include_embedding, recency is not None)
+                    rows = await connection.fetch(
+                        text, *params, _pg_vector(query_embedding), *(recency or ()), max_results
+                    )
+                    return [_row_to_memory(row) for row in rows]
+                
+                # Filters run in the database, similarity runs here
+                if recency is not None:
+                    candidates_sql, _ = _pg_search_sql("candidates", filter_shape, recency=True)
+                candidates = await connection.fetch(candidates_sql, *params)
+                ids, scores = _rank_candidates(
+                    [row[0] for row in candidates],
+                    [row[1] for row in candidates],
+                    query_embedding,
+                    max_results,
+                    _candidate_weights(candidates, recency),
+                    server_precision=True
+                )
+                if not ids:
+                    return []
+                
+                text, _ = _pg_search_sql("fetch", (), include_embedding)
+                rows = {row[0]: tuple(row) for row in await connection.fetch(text, ids)}
+                
+                return [
+                    _row_to_memory(rows[memory_id] + (float(score),))
+                    for memory_id, score in zip(ids, scores)
+                    if memory_id in rows
+                ]
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            filter_query = _mongo_filter(
+                level, memory_type, min_relevance, tags, metadata_filters, since, until
+            )
+            
+            projection = None if include_embedding else _MONGO_WITHOUT_EMBEDDING
+            
+            if query_embedding is None:
+                cursor = self.db.memories.find(filter_query, projection)
+                cursor = cursor.sort(_MONGO_RECENT_SORT).limit(max_results)
+                return [_doc_to_memory(doc) for doc in await cursor.to_list(None)]
+            
+            if self.db_config.mongo_vector_index and execution_mode != "client":
+                cursor = await self.db.memories.aggregate(_mongo_vector_search_pipeline(
+                    self.db_config.mongo_vector_index,
+                    query_embedding,
+                    filter_query,
+                    max_results,
+                    max_results * self.db_config.vector_search_candidates,
+                    include_embedding,
+                    recency
+                ))
+                return [
+                    _doc_to_memory(doc, similarity=(
+                        doc['similarity'] if recency else _vector_search_similarity(doc['similarity'])
+                    ))
+                    for doc in await cursor.to_list(None)
+                ]
+            
+            scored = _MONGO_RECENCY_SCORED if recency else {'embedding': 1}
+            cursor = self.db.memories.find(filter_query, scored)
+            cursor.batch_size(_SCORING_BATCH_SIZE)
+            ids, scores = [], np.empty(0, dtype=EMBEDDING_DTYPE)
+            while True:
+                docs = await cursor.to_list(_SCORING_BATCH_SIZE)
+                if not docs:
+                    break
+                ids, scores = _rank_mongo_batch((ids, scores), docs, query_embedding, max_results, recency)
+            docs = {
+                doc['_id']: doc
+                for doc in await self.db.memories.find({'_id': {'$in': ids}}, projection).to_list(None)
+            }
+            
+            return [
+                _doc_to_memory(docs[memory_id], similarity=float(score))
+                for memory_id, score in zip(ids, scores)
+                if memory_id in docs
+            ]
+    
+    async def update_memory(self, memory: Memory) -> None:
+        """Update an existing memory."""
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            partitioned = self.db_config.partitioned
+            text, _ = _pg_update_sql(partitioned)
+            async with self.pool.acquire() as connection:
+                await self._ensure_partition(connection, _enum_value(memory.level), memory.timestamp)
+                await connection.execute(text, *_pg_update_params(
+                    memory, partitioned, adapt_json=_identity
+                ))
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            await self.db.memories.update_one(
+                {"_id": memory.id},
+                {"$set": _mongo_update(memory)}
+            )
+    
+    async def update_fields(self, memory_ids: Union[str, List[str]], fields: Dict[str, Any]) -> int:
+        """Set only the given fields on one or more memories.
+        
+        See ``MemoryStore.update_fields``. Returns the number of matched memories.
+        """
+        field_names = _patch_fields(fields)
+        ids = _memory_ids(memory_ids)
+        if not ids:
+            return 0
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            text, _ = _pg_patch_sql(field_names)
+            async with self.pool.acquire() as connection:
+                if self.db_config.partitioned and "level" in fields:
+                    # Rows moving level need the target partition for their month
+                    months = await connection.fetch(
+                        "SELECT DISTINCT date_trunc('month', timestamp) FROM memories WHERE id = ANY($1::text[])",
+                        ids
+                    )
+                    for (month,) in months:
+                        await self._ensure_partition(connection, _enum_value(fields["level"]), month)
+                
+                status = await connection.execute(text, *_pg_patch_params(
+                    fields, field_names, ids, adapt_json=_identity
+                ))
+                return int(status.split()[-1])
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            result = await self.db.memories.update_many(
+                {"_id": {"$in": ids}},
+                {"$set": _mongo_patch(fields)}
+            )
+            return result.matched_count
+    
+    async def increment_access(
+        self,
+        memory_ids: Union[str, List[str]],
+        count: int = 1,
+        accessed_at: Optional[datetime] = None
+    ) -> int:
+        """Atomically add ``count`` to the access counters of memories.
+        
+        See ``MemoryStore.increment_access``. Returns the number of matched memories.
+        """
+        ids = _memory_ids(memory_ids)
+        if not ids:
+            return 0
+        if accessed_at is None:
+            accessed_at = datetime.now()
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            async with self.pool.acquire() as connection:
+                status = await connection.execute(_PG_INCREMENT_ACCESS_SQL, count, accessed_at, ids)
+                return int(status.split()[-1])
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            result = await self.db.memories.update_many(
+                {"_id": {"$in": ids}},
+                {"$inc": {"access_count": count}, "$max": {"last_accessed": accessed_at}}
+            )
+            return result.matched_count
+    
+    async def apply_access_deltas(self, deltas: Dict[str, Tuple[int, datetime]]) -> int:
+        """Apply accumulated accesses in one bulk write.
+        
+        See ``MemoryStore.apply_access_deltas``. Returns the number of matched memories.
+        """
+        if not deltas:
+            return 0
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            async with self.pool.acquire() as connection:
+                status = await connection.execute(
+                    _PG_APPLY_ACCESS_DELTAS_SQL, *_access_delta_params(deltas)
+                )
+                return int(status.split()[-1])
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            result = await self.db.memories.bulk_write(_mongo_access_updates(deltas), ordered=False)
+            return result.matched_count
+    
+    async def delete_memory(self, memory_id: str) -> None:
+        """Delete a memory by ID."""
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            async with self.pool.acquire() as connection:
+                await connection.execute("DELETE FROM memories WHERE id = $1", memory_id)
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            await self.db.memories.delete_one({"_id": memory_id})
+    
+    async def delete_memories(self, memory_ids: List[str]) -> int:
+        """Delete several memories by ID. Returns the number deleted."""
+        if not memory_ids:
+            return 0
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            async with self.pool.acquire() as connection:
+                status = await connection.execute(
+                    "DELETE FROM memories WHERE id = ANY($1::text[])", list(memory_ids)
+                )
+                return int(status.split()[-1])
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            deleted = 0
+            for batch in _chunks(list(memory_ids), self.db_config.write_batch_size):
+                result = await self.db.memories.delete_many({"_id": {"$in": batch}})
+                deleted += result.deleted_count
+            return deleted
+    
+    async def begin_decay_pass(self, now: Optional[datetime] = None) -> float:
+        """Record ``now`` as the start of a decay pass over the store.
+        
+        See ``MemoryStore.begin_decay_pass``. Returns the seconds since the
+        previous pass started.
+        """
+        if now is None:
+            now = datetime.now()
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            async with self.pool.acquire() as connection:
+                async with connection.transaction():
+                    previous = await connection.fetchval(_PG_LAST_PASS_SQL)
+                    await connection.execute(_PG_DECAY_PASS_SQL, now)
+        
+        else:
+            doc = await self.db.consolidation_state.find_one_and_update(
+                {'_id': 'decay'}, {'$max': {'last_pass': now}}, upsert=True
+            )
+            previous = doc['last_pass'] if doc is not None else None
+        
+        return max((now - previous).total_seconds(), 0.0) if previous is not None else 0.0
+    
+    async def decay_relevance(
+        self,
+        after_id: str,
+        batch_size: int,
+        elapsed: float,
+        half_life: float,
+        archive_below: float,
+        now: Optional[datetime] = None
+    ) -> Tuple[Optional[str], int, List[str]]:
+        """Decay the relevance of the next batch of memories and archive the faded ones.
+        
+        See ``MemoryStore.decay_relevance``. Returns the last id visited
+        (``None`` once every memory was visited), the number of memories
+        decayed and the ids archived.
+        """
+        if now is None:
+            now = datetime.now()
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            async with self.pool.acquire() as connection:
+                async with connection.transaction():
+                    rows = await connection.fetch(_PG_DECAY_SQL, elapsed, now, half_life, after_id, batch_size)
+                    archived = [row[0] for row in rows if row[1] < archive_below]
+                    if archived:
+                        await connection.execute(_PG_ARCHIVE_SQL, archived)
+            ids = [row[0] for row in rows]
+        
+        else:
+            docs = await self.db.memories.find(
+                {'_id': {'$gt': after_id}}, _MONGO_DECAY_PROJECTION
+            ).sort('_id', 1).limit(batch_size).to_list(None)
+            ids = [doc['_id'] for doc in docs]
+            updates, archived = _mongo_decay(docs, now, elapsed, half_life, archive_below)
+            if updates:
+                await self.db.memories.bulk_write(updates, ordered=False)
+            if archived:
+                moving = await self.db.memories.find({'_id': {'$in': archived}}).to_list(None)
+                await self.db.memories_archive.bulk_write(_mongo_archive_writes(moving, now), ordered=False)
+                await self.db.memories.delete_many({'_id': {'$in': archived}})
+        
+        last_id = max(ids) if len(ids) == batch_size else None
+        return last_id, len(ids), archived
+    
+    async def restore_memories(self, memory_ids: List[str]) -> int:
+        """Move archived memories back into the searchable store. Returns the number restored."""
+        if not memory_ids:
+            return 0
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            async with self.pool.acquire() as connection:
+                if self.db_config.partitioned:
+                    for level, timestamp in await connection.fetch(_PG_ARCHIVED_PARTITIONS_SQL, list(memory_ids)):
+                        await self._ensure_partition(connection, level, timestamp)
+                status = await connection.execute(_PG_RESTORE_SQL, list(memory_ids))
+                return int(status.split()[-1])
+        
+        docs = await self.db.memories_archive.find({'_id': {'$in': list(memory_ids)}}).to_list(None)
+        for doc in docs:
+            doc.pop('archived_at', None)
+        if docs:
+            await self.db.memories.insert_many(docs, ordered=False)
+            await self.db.memories_archive.delete_many({'_id': {'$in': [doc['_id'] for doc in docs]}})
+        return len(docs)
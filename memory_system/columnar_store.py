@@ -0,0 +1,607 @@
+"""
+Columnar in-memory storage module.
+"""
+
+from typing import List, Optional, Dict, Any, Set, Tuple
+from datetime import datetime
+import copy
+import heapq
+import json
+import os
+import pickle
+import threading
+import numpy as np
+from .models import Memory, MemoryLevel, MemoryType, _interned_tags
+from .vectors import EMBEDDING_DTYPE, cosine_scores, recency_weights, top_k_after
+
+# Enum members are stored as small integer codes
+_LEVELS = list(MemoryLevel)
+_MEMORY_TYPES = list(MemoryType)
+
+# Columns held in NumPy arrays, with their dtypes
+_NUMERIC_COLUMNS = {
+    "embedded": np.bool_,
+    "levels": np.int8,
+    "memory_types": np.int8,
+    "timestamps": "datetime64[us]",
+    "relevance_scores": np.float64,
+    "access_counts": np.int64,
+    "last_accessed": "datetime64[us]"
+}
+
+_INITIAL_CAPACITY = 64
+
+def _level_code(level: Any) -> int:
+    """Return the column code of a memory level (enum member or value)."""
+    return _LEVELS.index(MemoryLevel(level))
+
+def _memory_type_code(memory_type: Any) -> int:
+    """Return the column code of a memory type (enum member or value)."""
+    return _MEMORY_TYPES.index(MemoryType(memory_type))
+
+def _datetime64(value: Optional[datetime]) -> np.datetime64:
+    """Convert a datetime to a column value; ``None`` becomes NaT."""
+    return np.datetime64(value, 'us') if value is not None else np.datetime64('NaT', 'us')
+
+def retention_scores(
+    relevance_scores: np.ndarray,
+    access_counts: np.ndarray,
+    last_seen: np.ndarray,
+    now: datetime,
+    half_life: float
+) -> np.ndarray:
+    """Score how worth keeping at hand memories are.
+    
+    Relevance is weighted by the log of the access count and halved for
+    every ``half_life`` seconds since the memory was last seen. Scores are
+    returned as logarithms so that long-idle memories still rank against
+    each other instead of all decaying to zero.
+    """
+    age = (_datetime64(now) - last_seen) / np.timedelta64(1, 's')
+    with np.errstate(divide='ignore'):
+        weight = np.log(relevance_scores * (1 + np.log1p(access_counts)))
+    return weight - np.log(2) * np.clip(age, 0, None) / half_life
+
+def relevance_decay(
+    access_counts: np.ndarray,
+    idle_seconds: np.ndarray,
+    elapsed: float,
+    half_life: float
+) -> np.ndarray:
+    """Return the factors relevance scores decay by over ``elapsed`` seconds.
+    
+    Only the part of ``elapsed`` a memory spent idle counts, so memories
+    recalled since the last pass decay less, and the half-life stretches
+    with the log of the access count.
+    """
+    span = np.clip(np.minimum(idle_seconds, elapsed), 0, None)
+    return np.exp2(-span / (half_life * (1 + np.log1p(access_counts))))
+
+class ColumnarMemoryTable:
+    """Process-local memory table stored column by column.
+    
+    Embeddings live in one contiguous float32 matrix and the filterable
+    fields (level, type, timestamp, relevance, counters) in typed NumPy
+    arrays, so filters are boolean masks and scoring is a single matrix
+    product over the matching rows. Tags are indexed by value. Deletes
+    move the last row into the freed slot, keeping the columns dense.
+    """
+    
+    def __init__(self):
+        """Initialize an empty table."""
+        self._lock = threading.RLock()
+        self._clear()
+    
+    def _clear(self) -> None:
+        """Drop every row and the embedding dimension."""
+        self._size = 0
+        self._dim: Optional[int] = None
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._contents: List[str] = []
+        self._metadata: List[Dict[str, Any]] = []
+        self._tags: List[List[str]] = []
+        self._tag_index: Dict[str, Set[str]] = {}
+        self._embeddings = np.zeros((_INITIAL_CAPACITY, 0), dtype=EMBEDDING_DTYPE)
+        self._columns = {
+            name: np.zeros(_INITIAL_CAPACITY, dtype=dtype)
+            for name, dtype in _NUMERIC_COLUMNS.items()
+        }
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._rows
+    
+    @property
+    def dim(self) -> Optional[int]:
+        """Embedding dimension, fixed by the first stored embedding."""
+        return self._dim
+    
+    def _reserve(self, size: int, dim: int) -> None:
+        """Grow the arrays to hold ``size`` rows of dimension ``dim``."""
+        capacity = self._embeddings.shape[0]
+        if size <= capacity and dim == self._embeddings.shape[1]:
+            return
+        
+        while capacity < size:
+            capacity *= 2
+        
+        embeddings = np.zeros((capacity, dim), dtype=EMBEDDING_DTYPE)
+        if dim == self._embeddings.shape[1]:
+            embeddings[:self._size] = self._embeddings[:self._size]
+        self._embeddings = embeddings
+        
+        for name, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self._size] = column[:self._size]
+            self._columns[name] = grown
+    
+    def _embedding(self, embedding: Any) -> Optional[np.ndarray]:
+        """Validate an embedding against the table dimension."""
+        if embedding is None:
+            return None
+        
+        vector = np.asarray(embedding, dtype=EMBEDDING_DTYPE)
+        if self._dim is None:
+            # The first embedding fixes the width of the matrix
+            self._dim = vector.shape[0]
+            self._reserve(self._size, self._dim)
+        elif vector.shape != (self._dim,):
+            raise ValueError(
+                f"Embedding dimension {vector.shape[0]} does not match table dimension {self._dim}"
+            )
+        return vector
+    
+    def _set_embedding(self, row: int, vector: Optional[np.ndarray]) -> None:
+        """Write an embedding (or its absence) into a row."""
+        if vector is None:
+            self._embeddings[row] = 0
+            self._columns["embedded"][row] = False
+        else:
+            self._embeddings[row] = vector
+            self._columns["embedded"][row] = True
+    
+    def _set_tags(self, row: int, tags: Optional[List[str]]) -> None:
+        """Replace the tags of a row and keep the tag index in step."""
+        memory_id = self._ids[row]
+        for tag in self._tags[row]:
+            self._tag_index[tag].discard(memory_id)
+            if not self._tag_index[tag]:
+                del self._tag_index[tag]
+        
+        self._tags[row] = _interned_tags(list(tags or []))
+        for tag in self._tags[row]:
+            self._tag_index.setdefault(tag, set()).add(memory_id)
+    
+    def _write(self, row: int, memory: Memory, vector: Optional[np.ndarray]) -> None:
+        """Write every mutable field of a memory into a row."""
+        self._contents[row] = memory.content
+        self._metadata[row] = copy.deepcopy(memory.metadata or {})
+        self._set_embedding(row, vector)
+        self._set_tags(row, memory.tags)
+        self._columns["levels"][row] = _level_code(memory.level)
+        self._columns["memory_types"][row] = _memory_type_code(memory.memory_type)
+        self._columns["relevance_scores"][row] = memory.relevance_score
+        self._columns["access_counts"][row] = memory.access_count
+        self._columns["last_accessed"][row] = _datetime64(memory.last_accessed)
+    
+    def _memory(
+        self,
+        row: int,
+        similarity: Optional[float] = None,
+        include_embedding: bool = True,
+        embedding: Optional[np.ndarray] = None
+    ) -> Memory:
+        """Materialize a row as a memory that shares no state with the table.
+        
+        ``embedding``, if given, is used instead of a copy of the row's.
+        """
+        columns = self._columns
+        embedded = include_embedding and columns["embedded"][row]
+        if embedded and embedding is None:
+            embedding = self._embeddings[row].copy()
+        return Memory(
+            id=self._ids[row],
+            content=self._contents[row],
+            embedding=embedding if embedded else None,
+            level=_LEVELS[columns["levels"][row]],
+            memory_type=_MEMORY_TYPES[columns["memory_types"][row]],
+            timestamp=columns["timestamps"][row].item(),
+            metadata=copy.deepcopy(self._metadata[row]),
+            relevance_score=float(columns["relevance_scores"][row]),
+            access_count=int(columns["access_counts"][row]),
+            last_accessed=columns["last_accessed"][row].item(),
+            tags=list(self._tags[row]),
+            similarity=similarity
+        )
+    
+    def _memories(
+        self,
+        rows: List[int],
+        similarities: Optional[List[float]] = None,
+        include_embedding: bool = True
+    ) -> List[Memory]:
+        """Materialize rows as memories whose embeddings are views of one result matrix."""
+        embeddings = None
+        if include_embedding and rows:
+            # One gather instead of a copy per row; the memories only read it
+            embeddings = self._embeddings[rows]
+            embeddings.flags.writeable = False
+        return [
+            self._memory(
+                row,
+                similarity=similarities[i] if similarities is not None else None,
+                include_embedding=include_embedding,
+                embedding=embeddings[i] if embeddings is not None else None
+            )
+            for i, row in enumerate(rows)
+        ]
+    
+    def insert(self, memories: List[Memory]) -> None:
+        """Append memories; fails without writing anything if an id exists."""
+        with self._lock:
+            batch = set()
+            for memory in memories:
+                if memory.id in self._rows or memory.id in batch:
+                    raise ValueError(f"Duplicate memory id: {memory.id}")
+                batch.add(memory.id)
+            
+            vectors = [self._embedding(memory.embedding) for memory in memories]
+            self._reserve(self._size + len(memories), self._dim or 0)
+            
+            for memory, vector in zip(memories, vectors):
+                row = self._size
+                self._ids.append(memory.id)
+                self._rows[memory.id] = row
+                self._contents.append("")
+                self._metadata.append({})
+                self._tags.append([])
+                self._columns["timestamps"][row] = _datetime64(memory.timestamp)
+                self._write(row, memory, vector)
+                self._size += 1
+    
+    def update(self, memories: List[Memory]) -> int:
+        """Overwrite stored memories (ids and timestamps are immutable)."""
+        with self._lock:
+            vectors = [self._embedding(memory.embedding) for memory in memories]
+            updated = 0
+            for memory, vector in zip(memories, vectors):
+                row = self._rows.get(memory.id)
+                if row is not None:
+                    self._write(row, memory, vector)
+                    updated += 1
+            return updated
+    
+    def patch(self, memory_ids: List[str], fields: Dict[str, Any]) -> int:
+        """Set only the given fields on memories. Returns the number matched."""
+        with self._lock:
+            rows = [self._rows[memory_id] for memory_id in memory_ids if memory_id in self._rows]
+            vector = self._embedding(fields["embedding"]) if "embedding" in fields else None
+            columns = self._columns
+            for row in rows:
+                for field, value in fields.items():
+                    if field == "content":
+                        self._contents[row] = value
+                    elif field == "embedding":
+                        self._set_embedding(row, vector)
+                    elif field == "metadata":
+                        self._metadata[row] = copy.deepcopy(value or {})
+                    elif field == "tags":
+                        self._set_tags(row, value)
+                    elif field == "level":
+                        columns["levels"][row] = _level_code(value)
+                    elif field == "memory_type":
+                        columns["memory_types"][row] = _memory_type_code(value)
+                    elif field == "relevance_score":
+                        columns["relevance_scores"][row] = value
+                    elif field == "access_count":
+                        columns["access_counts"][row] = value
+                    elif field == "last_accessed":
+                        columns["last_accessed"][row] = _datetime64(value)
+            return len(rows)
+    
+    def add_tags(self, tags: Dict[str, List[str]]) -> int:
+        """Add tags to memories, keeping the ones they have. Returns the number matched."""
+        with self._lock:
+            matched = 0
+            for memory_id, new_tags in tags.items():
+                row = self._rows.get(memory_id)
+                if row is not None:
+                    current = self._tags[row]
+                    self._set_tags(row, current + [tag for tag in dict.fromkeys(new_tags) if tag not in current])
+                    matched += 1
+            return matched
+    
+    def set_relevance(self, memory_ids: List[str], scores: List[float]) -> int:
+        """Set each memory's relevance score. Returns the number matched."""
+        with self._lock:
+            matched = [i for i, memory_id in enumerate(memory_ids) if memory_id in self._rows]
+            rows = np.array([self._rows[memory_ids[i]] for i in matched], dtype=np.intp)
+            self._columns["relevance_scores"][rows] = [scores[i] for i in matched]
+            return len(matched)
+    
+    def add_access(self, memory_ids: List[str], hits: List[int], accessed_at: List[datetime]) -> int:
+        """Add hits to access counters, moving ``last_accessed`` forward only."""
+        with self._lock:
+            matched = [i for i, memory_id in enumerate(memory_ids) if memory_id in self._rows]
+            if not matched:
+                return 0
+            
+            rows = np.array([self._rows[memory_ids[i]] for i in matched], dtype=np.intp)
+            times = np.array([_datetime64(accessed_at[i]) for i in matched])
+            np.add.at(self._columns["access_counts"], rows, np.array([hits[i] for i in matched]))
+            
+            last_accessed = self._columns["last_accessed"]
+            current = last_accessed[rows]
+            later = np.isnat(current) | (times > current)
+            last_accessed[rows[later]] = times[later]
+            return len(matched)
+    
+    def delete(self, memory_ids: List[str]) -> int:
+        """Delete memories by id. Returns the number deleted."""
+        with self._lock:
+            deleted = 0
+            for memory_id in memory_ids:
+                row = self._rows.get(memory_id)
+                if row is None:
+                    continue
+                
+                self._set_tags(row, [])
+                last = self._size - 1
+                if row != last:
+                    # Move the last row into the gap
+                    moved_id = self._ids[last]
+                    self._ids[row] = moved_id
+                    self._rows[moved_id] = row
+                    self._contents[row] = self._contents[last]
+                    self._metadata[row] = self._metadata[last]
+                    self._tags[row] = self._tags[last]
+                    self._embeddings[row] = self._embeddings[last]
+                    for column in self._columns.values():
+                        column[row] = column[last]
+                
+                del self._rows[memory_id]
+                for values in (self._ids, self._contents, self._metadata, self._tags):
+                    values.pop()
+                self._size -= 1
+                deleted += 1
+            return deleted
+    
+    def get(self, memory_ids: List[str], include_embedding: bool = True) -> List[Memory]:
+        """Fetch memories by id, in the order given; missing ids are skipped."""
+        with self._lock:
+            rows = [self._rows[memory_id] for memory_id in memory_ids if memory_id in self._rows]
+            return self._memories(rows, include_embedding=include_embedding)
+    
+    def ids(self) -> List[str]:
+        """Return every id, in row order."""
+        with self._lock:
+            return list(self._ids)
+    
+    def scan(self, after_id: str, limit: int, include_embedding: bool = True) -> List[Memory]:
+        """Return up to ``limit`` memories with ids after ``after_id``, in id order."""
+        with self._lock:
+            ids = heapq.nsmallest(limit, (memory_id for memory_id in self._ids if memory_id > after_id))
+            return self.get(ids, include_embedding)
+    
+    def _last_seen(self) -> np.ndarray:
+        """Return when each memory was last accessed or, if never, created."""
+        last_accessed = self._columns["last_accessed"][:self._size]
+        return np.where(np.isnat(last_accessed), self._columns["timestamps"][:self._size], last_accessed)
+    
+    def retention(self, now: datetime, half_life: float) -> Tuple[List[str], np.ndarray]:
+        """Return every id with its ``retention_scores`` value."""
+        with self._lock:
+            size = self._size
+            columns = self._columns
+            return list(self._ids), retention_scores(
+                columns["relevance_scores"][:size],
+                columns["access_counts"][:size],
+                self._last_seen(),
+                now,
+                half_life
+            )
+    
+    def decay(
+        self,
+        now: datetime,
+        elapsed: float,
+        half_life: float,
+        archive_below: float,
+        after_id: str,
+        limit: int
+    ) -> Tuple[List[str], List[Memory]]:
+        """Apply ``relevance_decay`` to up to ``limit`` memories with ids after ``after_id``.
+        
+        Memories falling below ``archive_below`` are removed. Returns the
+        ids visited, in id order, and the removed memories.
+        """
+        with self._lock:
+            ids = heapq.nsmallest(limit, (memory_id for memory_id in self._ids if memory_id > after_id))
+            rows = np.array([self._rows[memory_id] for memory_id in ids], dtype=np.intp)
+            columns = self._columns
+            idle = (_datetime64(now) - self._last_seen()[rows]) / np.timedelta64(1, 's')
+            columns["relevance_scores"][rows] *= relevance_decay(
+                columns["access_counts"][rows], idle, elapsed, half_life
+            )
+            
+            below = [ids[i] for i in np.flatnonzero(columns["relevance_scores"][rows] < archive_below)]
+            removed = self.get(below)
+            self.delete(below)
+            return ids, removed
+    
+    def _filter_rows(
+        self,
+        level: Optional[MemoryLevel],
+        memory_type: Optional[MemoryType],
+        min_relevance: float,
+        tags: Optional[List[str]],
+        metadata_filters: Optional[Dict[str, Any]],
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None
+    ) -> Optional[np.ndarray]:
+        """Return the rows matching the filters, or ``None`` for every row."""
+        size = self._size
+        columns = self._columns
+        mask = None
+        
+        def narrow(condition: np.ndarray) -> None:
+            nonlocal mask
+            mask = condition if mask is None else mask & condition
+        
+        if level:
+            narrow(columns["levels"][:size] == _level_code(level))
+        
+        if memory_type:
+            narrow(columns["memory_types"][:size] == _memory_type_code(memory_type))
+        
+        if tags:
+            # Matches memories carrying any of the tags
+            tagged = np.zeros(size, dtype=bool)
+            for tag in tags:
+                for memory_id in self._tag_index.get(tag, ()):
+                    tagged[self._rows[memory_id]] = True
+            narrow(tagged)
+        
+        if min_relevance > 0:
+            narrow(columns["relevance_scores"][:size] >= min_relevance)
+        
+        if since is not None:
+            narrow(columns["timestamps"][:size] >= _datetime64(since))
+        
+        if until is not None:
+            narrow(columns["timestamps"][:size] <= _datetime64(until))
+        
+        if mask is None and not metadata_filters:
+            return None
+        
+        rows = np.flatnonzero(mask) if mask is not None else np.arange(size)
+        if metadata_filters:
+            missing = object()
+            rows = np.array([
+                row for row in rows
+                if all(
+                    self._metadata[row].get(key, missing) == value
+                    for key, value in metadata_filters.items()
+                )
+            ], dtype=np.intp)
+        return rows
+    
+    def search(
+        self,
+        query_embedding: Optional[np.ndarray],
+        level: Optional[MemoryLevel],
+        memory_type: Optional[MemoryType],
+        min_relevance: float,
+        max_results: int,
+        tags: Optional[List[str]],
+        metadata_filters: Optional[Dict[str, Any]],
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency: Optional[Tuple[datetime, float]] = None,
+        after: Optional[Tuple[Any, str]] = None
+    ) -> List[Memory]:
+        """Filter with column masks and rank by similarity or recency.
+        
+        With ``recency`` (the current time and a half-life in seconds),
+        similarities are blended by ``recency_weights``. With ``after`` (the
+        similarity or timestamp and id of an earlier result), only results
+        ranked below it are returned.
+        """
+        with self._lock:
+            rows = self._filter_rows(
+                level, memory_type, min_relevance, tags, metadata_filters, since, until
+            )
+            
+            def id_of(i: int) -> str:
+                return self._ids[i if rows is None else int(rows[i])]
+            
+            if query_embedding is None:
+                timestamps = self._columns["timestamps"][:self._size]
+                keys = timestamps if rows is None else timestamps[rows]
+                if after is not None:
+                    after = (_datetime64(after[0]).astype(np.int64), after[1])
+                best = top_k_after(keys.astype(np.int64), max_results, id_of, after)
+                scores = None
+            else:
+                if len(query_embedding) != self._dim:
+                    # Mismatched dimensions score 0, as in the database backends
+                    scores = np.zeros(self._size if rows is None else len(rows), dtype=EMBEDDING_DTYPE)
+                else:
+                    # Unfiltered searches score the matrix in place
+                    matrix = self._embeddings[:self._size] if rows is None else self._embeddings[rows]
+                    scores = cosine_scores(matrix, query_embedding)
+                if recency is not None:
+                    size = self._size
+                    timestamps = self._columns["timestamps"][:size]
+                    relevance_scores = self._columns["relevance_scores"][:size]
+                    if rows is not None:
+                        timestamps, relevance_scores = timestamps[rows], relevance_scores[rows]
+                    scores = scores * recency_weights(timestamps, relevance_scores, *recency)
+                best = top_k_after(scores, max_results, id_of, after)
+            
+            return self._memories(
+                [int(i) if rows is None else int(rows[i]) for i in best],
+                [float(scores[i]) for i in best] if scores is not None else None,
+                include_embedding
+            )
+    
+    def save(self, path: str) -> None:
+        """Write the table to ``path`` as a NumPy ``.npz`` archive.
+        
+        The file is written next to ``path`` and renamed into place, so a
+        crash mid-write never leaves a truncated snapshot. Ids, contents,
+        metadata and tags are pickled, so metadata keeps any value the table
+        accepts, such as datetimes; only load snapshots you wrote.
+        """
+        with self._lock:
+            size = self._size
+            records = pickle.dumps({
+                "ids": self._ids,
+                "contents": self._contents,
+                "metadata": self._metadata,
+                "tags": self._tags
+            }, protocol=pickle.HIGHEST_PROTOCOL)
+            arrays = {name: column[:size] for name, column in self._columns.items()}
+            
+            temporary = f"{path}.tmp"
+            with open(temporary, "wb") as snapshot:
+                np.savez(
+                    snapshot,
+                    embeddings=self._embeddings[:size],
+                    records=np.frombuffer(records, dtype=np.uint8),
+                    **arrays
+                )
+            os.replace(temporary, path)
+    
+    def load(self, path: str) -> None:
+        """Replace the table contents with a snapshot written by ``save``."""
+        with np.load(path, allow_pickle=False) as snapshot:
+            records = snapshot["records"].tobytes()
+            # Snapshots of earlier versions hold JSON records
+            records = json.loads(records) if records.startswith(b"{") else pickle.loads(records)
+            embeddings = snapshot["embeddings"].astype(EMBEDDING_DTYPE)
+            arrays = {name: snapshot[name] for name in _NUMERIC_COLUMNS}
+        
+        with self._lock:
+            self._clear()
+            size = len(records["ids"])
+            if size:
+                self._dim = embeddings.shape[1]
+            self._reserve(size, embeddings.shape[1])
+            self._embeddings[:size] = embeddings
+            for name, values in arrays.items():
+                self._columns[name][:size] = values
+            
+            self._ids = records["ids"]
+            self._rows = {memory_id: row for row, memory_id in enumerate(self._ids)}
+            self._contents = records["contents"]
+            self._metadata = records["metadata"]
+            self._tags = records["tags"]
+            for memory_id, tags in zip(self._ids, self._tags):
+                for tag in tags:
+                    self._tag_index.setdefault(tag, set()).add(memory_id)
+            self._size = size
@@ -3,12 +3,14 @@ Configuration module for memory system.
 """
 
 from enum import Enum
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 class DatabaseProvider(Enum):
     """Database provider options."""
     POSTGRESQL = "postgresql"
     MONGODB = "mongodb"
+    SQLITE = "sqlite"
+    MEMORY = "memory"
 
 class LLMConfig:
     """LLM configuration."""
@@ -30,13 +32,55 @@ class DatabaseConfig:
         database: str = "memory_system",
         username: str = "postgres",
         password: str = "postgres",
-        ssl: bool = False
+        ssl: bool = False,
+        statement_cache_size: int = 64,
+        partitioned: bool = False,
+        client_scoring_max_candidates: int = 10000,
+        pool_min_size: int = 1,
+        pool_max_size: int = 10,
+        mongo_vector_index: Optional[str] = None,
+        vector_search_candidates: int = 10,
+        write_batch_size: int = 1000,
+        snapshot_path: Optional[str] = None,
+        replicas: Optional[List[Dict[str, Any]]] = None,
+        replica_max_lag: float = 10.0,
+        replica_retry_interval: float = 30.0,
+        read_your_writes: bool = False,
+        execution_mode_ttl: float = 60.0
     ):
         """Initialize database config."""
         self.provider = provider
         self.host = host
         self.port = port
+        # For SQLite, the path of the database file
         self.database = database
         self.username = username
         self.password = password
         self.ssl = ssl
+        # Maximum number of prepared query shapes kept per PostgreSQL session
+        self.statement_cache_size = statement_cache_size
+        # Partition the PostgreSQL memories table by level and month
+        self.partitioned = partitioned
+        # Largest estimated candidate set that is scored client-side in "auto" mode
+        self.client_scoring_max_candidates = client_scoring_max_candidates
+        # Seconds an "auto" mode choice is reused per filter shape; 0 estimates every search
+        self.execution_mode_ttl = execution_mode_ttl
+        # Connection pool bounds for asyncpg pools and the shared MongoDB clients
+        self.pool_min_size = pool_min_size
+        self.pool_max_size = pool_max_size
+        # Name of a MongoDB vector search index on "embedding" ($vectorSearch)
+        self.mongo_vector_index = mongo_vector_index
+        # $vectorSearch candidates considered per requested result
+        self.vector_search_candidates = vector_search_candidates
+        # Maximum number of operations per MongoDB bulk write
+        self.write_batch_size = write_batch_size
+        # For in-memory stores, a snapshot file loaded on start and written on close
+        self.snapshot_path = snapshot_path
+        # PostgreSQL read replicas, each overriding host, port, database, username, password or ssl
+        self.replicas = replicas or []
+        # Replicas lagging more than this many seconds are skipped
+        self.replica_max_lag = replica_max_lag
+        # Seconds a failed replica stays out of rotation
+        self.replica_retry_interval = replica_retry_interval
+        # Read from the primary for replica_max_lag seconds after this session writes
+        self.read_your_writes = read_your_writes
@@ -0,0 +1,167 @@
+"""
+Memory consolidation module.
+"""
+
+from typing import List, Optional, Dict, Any, Callable, Tuple
+from datetime import datetime
+import threading
+from .config import DatabaseProvider
+from .memory_store import MemoryStore
+
+class ConsolidationJob:
+    """Periodically decay relevance and archive memories that have faded.
+    
+    Every ``interval`` seconds a pass walks the store in id order, in
+    batches of ``batch_size`` memories with a ``batch_pause`` between them,
+    so each transaction stays short and live traffic is never blocked for
+    long. A pass multiplies relevance scores by ``relevance_decay`` for the
+    time since the previous pass over the store, which the store records
+    (see ``MemoryStore.begin_decay_pass``), so restarts and several jobs
+    over one store neither lose nor compound decay; the first pass over a
+    store only records its time. Relevance halves per ``half_life``
+    seconds of idleness, more slowly for often recalled memories. Memories
+    whose relevance drops below ``archive_below`` are moved to the archive,
+    which searches skip; ``MemoryStore.restore_memories`` brings them back.
+    
+    The background thread opens its own session to the database, so its
+    batches never share a transaction with the application's writes. The
+    in-memory store is shared directly; SQLite needs a database file.
+    ``on_archive`` is called with the ids archived by each batch, e.g. to
+    drop cached copies, and ``on_decay`` after every pass (or the part run
+    before ``stop``) that decayed memories, e.g. to drop cached relevance
+    scores.
+    """
+    
+    def __init__(
+        self,
+        memory_store: MemoryStore,
+        interval: float = 3600.0,
+        half_life: float = 30 * 86400.0,
+        archive_below: float = 0.05,
+        batch_size: int = 500,
+        batch_pause: float = 0.05,
+        on_archive: Optional[Callable[[List[str]], None]] = None,
+        on_decay: Optional[Callable[[], None]] = None
+    ):
+        """Initialize consolidation job."""
+        self.memory_store = memory_store
+        self.interval = interval
+        self.half_life = half_life
+        self.archive_below = archive_below
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.on_archive = on_archive
+        self.on_decay = on_decay
+        self._last_pass: Optional[datetime] = None
+        # Where an interrupted pass stopped: (last id, pass time, elapsed)
+        self._resume: Optional[Tuple[str, datetime, float]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pass_lock = threading.Lock()
+        self.passes = 0
+        self.decayed = 0
+        self.archived = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self.last_error_at: Optional[datetime] = None
+    
+    def run_once(self, memory_store: Optional[MemoryStore] = None) -> Dict[str, int]:
+        """Run one full pass over ``memory_store`` (default: the job's store).
+        
+        A pass interrupted by ``stop`` is finished first. Returns the
+        number of memories decayed and archived.
+        """
+        store = memory_store or self.memory_store
+        with self._pass_lock:
+            if self._resume is not None:
+                after_id, now, elapsed = self._resume
+            else:
+                now = datetime.now()
+                after_id, elapsed = "", store.begin_decay_pass(now)
+            
+            decayed = archived = 0
+            while after_id is not None:
+                after_id, batch_decayed, batch_archived = store.decay_relevance(
+                    after_id, self.batch_size, elapsed, self.half_life, self.archive_below, now
+                )
+                decayed += batch_decayed
+                archived += len(batch_archived)
+                if batch_archived and self.on_archive is not None:
+                    self.on_archive(batch_archived)
+                
+                # Yield the database to live traffic between batches
+                if after_id is not None and self._stop.wait(self.batch_pause):
+                    break
+            
+            if after_id is None:
+                self._resume = None
+                self._last_pass = now
+                self.passes += 1
+            else:
+                self._resume = (after_id, now, elapsed)
+            if decayed and self.on_decay is not None:
+                self.on_decay()
+            self.decayed += decayed
+            self.archived += archived
+            return {"decayed": decayed, "archived": archived}
+    
+    def start(self) -> None:
+        """Run passes every ``interval`` seconds on a background thread."""
+        if self._thread is not None:
+            return
+        
+        db_config = self.memory_store.db_config
+        if db_config.provider == DatabaseProvider.SQLITE and db_config.database == ":memory:":
+            raise ValueError("Background consolidation needs a SQLite database file")
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="memory-consolidation", daemon=True)
+        self._thread.start()
+    
+    def _run(self) -> None:
+        """Background loop."""
+        store = self.memory_store
+        try:
+            if store.provider != DatabaseProvider.MEMORY:
+                # A session of its own keeps batches out of the application's transactions
+                store = MemoryStore(store.db_config)
+            
+            while not self._stop.wait(self.interval):
+                try:
+                    self.run_once(store)
+                except Exception as e:
+                    self._record_failure(e)
+                    print(f"Error consolidating memories: {str(e)}")
+        except Exception as e:
+            self._record_failure(e)
+            print(f"Error starting memory consolidation: {str(e)}")
+        finally:
+            if store is not self.memory_store:
+                store.close()
+    
+    def _record_failure(self, error: Exception) -> None:
+        """Count a failed background pass and keep its error for ``stats``."""
+        self.failures += 1
+        self.last_error = str(error)
+        self.last_error_at = datetime.now()
+    
+    def stop(self) -> None:
+        """Stop the background thread, interrupting a pass between batches."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._stop.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return totals over every pass and the last background error."""
+        return {
+            "running": self._thread is not None,
+            "passes": self.passes,
+            "decayed": self.decayed,
+            "archived": self.archived,
+            "last_pass": self._last_pass,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            "last_error_at": self.last_error_at
+        }
@@ -0,0 +1,263 @@
+"""
+Near-duplicate detection module.
+"""
+
+from typing import List, Optional, Dict, Any, Tuple
+from datetime import datetime
+import hashlib
+import sqlite3
+import threading
+import numpy as np
+from .models import Memory
+from .vectors import EMBEDDING_DTYPE, cosine_scores
+
+# What to do with a new memory that duplicates a stored one
+DUPLICATE_POLICIES = ("skip", "merge", "link")
+
+_INDEX_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS settings (
+        name TEXT PRIMARY KEY,
+        value INTEGER NOT NULL
+    );
+    
+    CREATE TABLE IF NOT EXISTS content_hashes (
+        hash BLOB PRIMARY KEY,
+        memory_id TEXT NOT NULL
+    );
+    
+    -- One row per (band, memory); memories sharing a band value are candidates
+    CREATE TABLE IF NOT EXISTS buckets (
+        bucket TEXT NOT NULL,
+        memory_id TEXT NOT NULL,
+        PRIMARY KEY (bucket, memory_id)
+    ) WITHOUT ROWID;
+    
+    CREATE INDEX IF NOT EXISTS content_hashes_memory_id ON content_hashes (memory_id);
+    CREATE INDEX IF NOT EXISTS buckets_memory_id ON buckets (memory_id);
+"""
+
+def content_key(level: Any, content: str) -> bytes:
+    """Hash a memory's level and content for exact duplicate checks."""
+    level = getattr(level, "value", level)
+    return hashlib.blake2b(f"{level}\0{content}".encode(), digest_size=16).digest()
+
+class DuplicateIndex:
+    """Find stored memories that duplicate new ones without a similarity scan.
+    
+    Exact duplicates (same level and content) are found through a content
+    hash. Near duplicates are found with SimHash: an embedding is reduced
+    to ``bands * rows`` random-hyperplane sign bits, and memories of the
+    same level sharing all bits of any band land in a common bucket. Only
+    the ``max_candidates`` memories sharing the most buckets are compared
+    exactly, against ``threshold`` cosine similarity.
+    
+    Hashes and buckets live in a SQLite database at ``path`` (in process
+    memory by default), so the index survives restarts; the hyperplanes are
+    derived from ``seed`` and are fixed when the index is first created.
+    The index only knows the memories added to it.
+    """
+    
+    def __init__(
+        self,
+        path: str = ":memory:",
+        threshold: float = 0.95,
+        bands: int = 20,
+        rows: int = 12,
+        seed: int = 0,
+        max_candidates: int = 32
+    ):
+        """Initialize duplicate index."""
+        self.threshold = threshold
+        self.max_candidates = max_candidates
+        # Shared with the ingestion writer thread; every use holds the lock
+        self.lock = threading.RLock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.executescript(_INDEX_SCHEMA_SQL)
+        
+        settings = {"bands": bands, "rows": rows, "seed": seed}
+        with self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO settings (name, value) VALUES (?, ?)", settings.items()
+            )
+        stored = dict(self.db.execute("SELECT name, value FROM settings"))
+        if stored != settings:
+            raise ValueError(f"Duplicate index at {path} was created with {stored}")
+        
+        self.bands = bands
+        self.rows = rows
+        self.seed = seed
+        self._planes: Dict[int, np.ndarray] = {}
+    
+    def __len__(self) -> int:
+        with self.lock:
+            return self.db.execute("SELECT count(*) FROM content_hashes").fetchone()[0]
+    
+    def buckets(self, level: Any, embedding: Any) -> List[str]:
+        """Return the LSH bucket keys of an embedding."""
+        vector = np.asarray(embedding, dtype=EMBEDDING_DTYPE)
+        planes = self._planes.get(len(vector))
+        if planes is None:
+            rng = np.random.default_rng([self.seed, len(vector)])
+            planes = self._planes[len(vector)] = rng.standard_normal(
+                (self.bands * self.rows, len(vector))
+            ).astype(EMBEDDING_DTYPE)
+        
+        bits = (planes @ vector > 0).reshape(self.bands, self.rows)
+        level = getattr(level, "value", level)
+        return [
+            f"{level}:{len(vector)}:{band}:{np.packbits(band_bits).tobytes().hex()}"
+            for band, band_bits in enumerate(bits)
+        ]
+    
+    def candidates(self, memory: Memory) -> Tuple[Optional[str], List[str]]:
+        """Return the exact duplicate's id, if any, and near-duplicate candidate ids."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT memory_id FROM content_hashes WHERE hash = ?",
+                (content_key(memory.level, memory.content),)
+            ).fetchone()
+            if row is not None or memory.embedding is None:
+                return (row[0] if row else None), []
+            
+            buckets = self.buckets(memory.level, memory.embedding)
+            rows = self.db.execute(f"""
+                SELECT memory_id
+                FROM buckets
+                WHERE bucket IN ({', '.join(['?'] * len(buckets))})
+                GROUP BY memory_id
+                ORDER BY count(*) DESC
+                LIMIT ?
+            """, buckets + [self.max_candidates])
+            return None, [row[0] for row in rows]
+    
+    def add(self, memories: List[Memory]) -> None:
+        """Index memories as originals later memories may duplicate."""
+        with self.lock, self.db:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO content_hashes (hash, memory_id) VALUES (?, ?)",
+                [(content_key(memory.level, memory.content), memory.id) for memory in memories]
+            )
+            self.db.executemany(
+                "INSERT OR IGNORE INTO buckets (bucket, memory_id) VALUES (?, ?)",
+                [
+                    (bucket, memory.id)
+                    for memory in memories if memory.embedding is not None
+                    for bucket in self.buckets(memory.level, memory.embedding)
+                ]
+            )
+    
+    def remove(self, memory_ids: List[str]) -> None:
+        """Forget memories, e.g. after they were deleted or changed."""
+        if not memory_ids:
+            return
+        with self.lock, self.db:
+            params = [(memory_id,) for memory_id in memory_ids]
+            self.db.executemany("DELETE FROM content_hashes WHERE memory_id = ?", params)
+            self.db.executemany("DELETE FROM buckets WHERE memory_id = ?", params)
+    
+    def close(self) -> None:
+        """Close the index database."""
+        self.db.close()
+
+def find_duplicates(index: DuplicateIndex, memories: List[Memory], memory_store) -> Dict[str, Memory]:
+    """Map the ids of new memories to the memories they duplicate.
+    
+    A memory may duplicate a stored memory or an earlier one in the list.
+    Memories without a duplicate are added to the index; indexed ids the
+    store no longer holds are removed from it.
+    """
+    with index.lock:
+        matches = [index.candidates(memory) for memory in memories]
+        wanted = {memory_id for exact, near in matches for memory_id in ([exact] if exact else near)}
+        # One round trip for the candidates of the whole batch
+        stored = {memory.id: memory for memory in memory_store.get_memories(list(wanted))} if wanted else {}
+        index.remove([memory_id for memory_id in wanted if memory_id not in stored])
+        
+        # Earlier memories of the batch are not in the store yet
+        by_content: Dict[bytes, Memory] = {}
+        by_bucket: Dict[str, List[Memory]] = {}
+        duplicates: Dict[str, Memory] = {}
+        originals = []
+        for memory, (exact, near) in zip(memories, matches):
+            key = content_key(memory.level, memory.content)
+            original = stored.get(exact) or by_content.get(key)
+            buckets = []
+            if original is None and memory.embedding is not None:
+                buckets = index.buckets(memory.level, memory.embedding)
+                pending = [stored[memory_id] for memory_id in near if memory_id in stored]
+                pending.extend(m for bucket in buckets for m in by_bucket.get(bucket, []))
+                original = _closest(memory, pending, index.threshold)
+            
+            if original is not None:
+                duplicates[memory.id] = original
+                continue
+            
+            by_content[key] = memory
+            for bucket in buckets:
+                by_bucket.setdefault(bucket, []).append(memory)
+            originals.append(memory)
+        
+        index.add(originals)
+        return duplicates
+
+def _closest(memory: Memory, candidates: List[Memory], threshold: float) -> Optional[Memory]:
+    """Return the candidate most similar to a memory, if within ``threshold``."""
+    candidates = [
+        candidate for candidate in candidates
+        if candidate.embedding is not None and len(candidate.embedding) == len(memory.embedding)
+    ]
+    if not candidates:
+        return None
+    
+    scores = cosine_scores(
+        np.stack([np.asarray(candidate.embedding, dtype=EMBEDDING_DTYPE) for candidate in candidates]),
+        memory.embedding
+    )
+    best = int(np.argmax(scores))
+    return candidates[best] if scores[best] >= threshold else None
+
+def resolve_duplicates(
+    memories: List[Memory],
+    duplicates: Dict[str, Memory],
+    policy: str,
+    memory_store
+) -> List[Memory]:
+    """Apply a duplicate policy and return the memories that still need storing.
+    
+    ``skip`` drops duplicates; ``merge`` drops them too but bumps the
+    original's ``access_count`` and adds their tags to it, both updated in
+    place by the store (``apply_access_deltas``, ``add_tags``) so
+    concurrent merges never lose each other's changes; ``link`` keeps them
+    with ``metadata["duplicate_of"]`` naming the original.
+    """
+    if policy not in DUPLICATE_POLICIES:
+        raise ValueError(f"Unsupported duplicate policy: {policy}")
+    
+    if policy == "link":
+        for memory in memories:
+            if memory.id in duplicates:
+                memory.metadata = dict(memory.metadata, duplicate_of=duplicates[memory.id].id)
+        return memories
+    
+    fresh = [memory for memory in memories if memory.id not in duplicates]
+    if policy == "merge":
+        new_ids = {memory.id for memory in fresh}
+        now = datetime.now()
+        hits: Dict[str, int] = {}
+        tags: Dict[str, List[str]] = {}
+        for memory in memories:
+            original = duplicates.get(memory.id)
+            if original is None:
+                continue
+            added = [tag for tag in memory.tags if tag not in original.tags]
+            original.access_count += 1
+            original.tags = original.tags + added
+            if original.id not in new_ids:
+                hits[original.id] = hits.get(original.id, 0) + 1
+                tags.setdefault(original.id, []).extend(added)
+        
+        # Originals from the same batch are stored with the merged values
+        if hits:
+            memory_store.apply_access_deltas({memory_id: (count, now) for memory_id, count in hits.items()})
+        memory_store.add_tags(tags)
+    return fresh
@@ -21,3 +21,8 @@ class EmbeddingGenerator:
         embedding = np.random.uniform(0, 1, self.embedding_size)  # Use uniform distribution between 0 and 1
         embedding = embedding / np.linalg.norm(embedding)  # Normalize to unit vector
         return embedding.tolist()  # Convert to list
+    
+    def generate_many(self, texts: List[str]) -> List[List[float]]:
+        """Generate embeddings for several texts in one call."""
+        # A provider batch endpoint would embed the whole list in one request
+        return [self.generate(text) for text in texts]
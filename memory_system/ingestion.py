@@ -0,0 +1,378 @@
+"""
+Bulk ingestion module.
+"""
+
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
+from datetime import datetime
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from .models import Memory, MemoryLevel, MemoryType
+from .dedup import DuplicateIndex, DUPLICATE_POLICIES, content_key, find_duplicates, resolve_duplicates
+from .lexical import LexicalIndex
+
+# Marks the end of a queue's stream
+_DONE = object()
+
+# Namespace of the name-based ids given to ingested chunks
+_CHUNK_NAMESPACE = uuid.UUID("6f1c2d2e-4b1a-5e8f-9a57-3c0d8e4b7a21")
+
+# A chunk on its way through the pipeline: the offset of its source record,
+# its index within the record, whether it is the record's last chunk, and
+# the memory (without embedding until the embed stage)
+_Item = Tuple[int, int, bool, Memory]
+
+class StageMetrics:
+    """Throughput counters of one pipeline stage."""
+    
+    def __init__(self):
+        """Initialize stage metrics."""
+        self.items = 0
+        self.batches = 0
+        self.busy_seconds = 0.0
+        # Time spent waiting on a full downstream queue (backpressure)
+        self.blocked_seconds = 0.0
+    
+    def add(self, items: int, seconds: float) -> None:
+        """Count one unit of work."""
+        self.items += items
+        self.batches += 1
+        self.busy_seconds += seconds
+    
+    def to_dict(self) -> Dict[str, float]:
+        """Return the counters and the stage's throughput while busy."""
+        return {
+            "items": self.items,
+            "batches": self.batches,
+            "busy_seconds": self.busy_seconds,
+            "blocked_seconds": self.blocked_seconds,
+            "items_per_second": self.items / self.busy_seconds if self.busy_seconds else 0.0
+        }
+
+def _parse_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a record holding ``add_experience`` arguments."""
+    content = record.get("content")
+    if not isinstance(content, str) or not content.strip():
+        raise ValueError("Record has no content")
+    
+    return {
+        "content": content,
+        "level": MemoryLevel(record["level"]),
+        "memory_type": MemoryType(record.get("memory_type") or MemoryType.EXPERIENCE),
+        "tags": list(record.get("tags") or []),
+        "metadata": dict(record.get("metadata") or {})
+    }
+
+def _chunk_id(source: str, offset: int, index: int, level: MemoryLevel, content: str) -> str:
+    """Return the id of a chunk, the same whenever the same stream is ingested."""
+    return str(uuid.uuid5(_CHUNK_NAMESPACE, "\0".join((source, str(offset), str(index), level.value, content))))
+
+def _split_content(content: str, max_chars: Optional[int]) -> List[str]:
+    """Split content into chunks of at most ``max_chars``, on whitespace where possible."""
+    if not max_chars or len(content) <= max_chars:
+        return [content]
+    
+    chunks = []
+    while len(content) > max_chars:
+        cut = content.rfind(" ", 0, max_chars + 1)
+        if cut <= 0:
+            cut = max_chars
+        chunks.append(content[:cut].strip())
+        content = content[cut:].strip()
+    if content:
+        chunks.append(content)
+    return chunks
+
+class IngestionPipeline:
+    """Import large record streams with embedding and writes overlapped.
+    
+    Records flow through generator stages (parse, dedupe, chunk) on the
+    calling thread, are embedded in batches of ``embed_batch_size`` on an
+    embedding thread and written in batches of ``write_batch_size`` on a
+    writer thread, so embedding batch N+1 runs while batch N is written.
+    The stages are joined by queues holding at most ``queue_size`` batches;
+    a slow stage blocks the ones feeding it instead of buffering without
+    bound.
+    
+    With ``checkpoint_path`` set, the position of the last written chunk
+    is saved after every write batch, and a later ``run`` over the same
+    records resumes after it. Chunk ids are derived from ``source`` (a name
+    for the record stream), the record offset, the chunk index and the
+    content, so a batch written just before a crash, with its checkpoint
+    not yet saved, is recognized on resume: the first batches of a run
+    skip chunks already stored, until one has none. Without ``source``,
+    the checkpoint's path names the stream; with neither, every run gets
+    a fresh name, so distinct streams never share chunk ids but
+    re-running an import writes it again.
+    
+    With a ``duplicate_index``, each write batch is checked against the
+    stored memories and itself for exact and near duplicates, which are
+    handled per ``on_duplicate`` (see ``resolve_duplicates``). Written
+    memories are added to ``lexical_index`` when one is given.
+    """
+    
+    def __init__(
+        self,
+        memory_store,
+        embedding_generator,
+        embed_batch_size: int = 64,
+        write_batch_size: int = 500,
+        queue_size: int = 4,
+        max_chunk_chars: Optional[int] = None,
+        dedupe: bool = True,
+        checkpoint_path: Optional[str] = None,
+        duplicate_index: Optional[DuplicateIndex] = None,
+        on_duplicate: str = "skip",
+        lexical_index: Optional[LexicalIndex] = None,
+        source: Optional[str] = None
+    ):
+        """Initialize ingestion pipeline."""
+        if on_duplicate not in DUPLICATE_POLICIES:
+            raise ValueError(f"Unsupported duplicate policy: {on_duplicate}")
+        
+        self.memory_store = memory_store
+        self.embedding_generator = embedding_generator
+        self.embed_batch_size = embed_batch_size
+        self.write_batch_size = write_batch_size
+        self.queue_size = queue_size
+        self.max_chunk_chars = max_chunk_chars
+        self.dedupe = dedupe
+        self.checkpoint_path = checkpoint_path
+        self.duplicate_index = duplicate_index
+        self.on_duplicate = on_duplicate
+        self.lexical_index = lexical_index
+        if source is None and checkpoint_path:
+            source = os.path.abspath(checkpoint_path)
+        self.source = source
+        self.duplicates = 0
+        self._metrics = {
+            stage: StageMetrics() for stage in ("parse", "dedupe", "chunk", "embed", "write")
+        }
+        self._stop = threading.Event()
+        self._error: Optional[BaseException] = None
+    
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Return per-stage throughput metrics of the last run."""
+        return {stage: metrics.to_dict() for stage, metrics in self._metrics.items()}
+    
+    def load_checkpoint(self) -> Tuple[int, int]:
+        """Return the saved position as ``(records, chunks)``.
+        
+        Every chunk of the first ``records`` records and the first
+        ``chunks`` chunks of the next record have been written.
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0, 0
+        with open(self.checkpoint_path) as checkpoint:
+            position = json.load(checkpoint)
+        return position["records"], position["chunks"]
+    
+    def _save_checkpoint(self, item: _Item) -> None:
+        """Save the position after the last written chunk."""
+        offset, chunk, last, _ = item
+        position = {"records": offset + 1, "chunks": 0} if last else {"records": offset, "chunks": chunk + 1}
+        
+        temporary = f"{self.checkpoint_path}.tmp"
+        with open(temporary, "w") as checkpoint:
+            json.dump(position, checkpoint)
+        os.replace(temporary, self.checkpoint_path)
+    
+    def _parse(self, records: Iterable[Dict[str, Any]]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Parse stage: validate records, keeping their offsets."""
+        metrics = self._metrics["parse"]
+        for offset, record in enumerate(records):
+            start = time.perf_counter()
+            try:
+                parsed = _parse_record(record)
+            except (KeyError, TypeError, ValueError) as e:
+                raise ValueError(f"Invalid record at offset {offset}: {str(e)}")
+            metrics.add(1, time.perf_counter() - start)
+            yield offset, parsed
+    
+    def _dedupe(self, records: Iterator[Tuple[int, Dict[str, Any]]]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Dedupe stage: drop records whose level and content were already seen."""
+        metrics = self._metrics["dedupe"]
+        seen = set()
+        for offset, record in records:
+            start = time.perf_counter()
+            key = content_key(record['level'], record['content'])
+            duplicate = key in seen
+            seen.add(key)
+            metrics.add(0 if duplicate else 1, time.perf_counter() - start)
+            if not duplicate:
+                yield offset, record
+    
+    def _chunk(
+        self,
+        records: Iterator[Tuple[int, Dict[str, Any]]],
+        resume: Tuple[int, int],
+        source: str
+    ) -> Iterator[_Item]:
+        """Chunk stage: split records into memories, skipping those already written."""
+        metrics = self._metrics["chunk"]
+        for offset, record in records:
+            if offset < resume[0]:
+                continue
+            
+            start = time.perf_counter()
+            chunks = _split_content(record["content"], self.max_chunk_chars)
+            items = []
+            for index, content in enumerate(chunks):
+                if offset == resume[0] and index < resume[1]:
+                    continue
+                
+                metadata = dict(record["metadata"])
+                if len(chunks) > 1:
+                    metadata.update({"chunk": index, "chunks": len(chunks)})
+                items.append((offset, index, index == len(chunks) - 1, Memory(
+                    id=_chunk_id(source, offset, index, record["level"], content),
+                    content=content,
+                    embedding=None,
+                    level=record["level"],
+                    memory_type=record["memory_type"],
+                    timestamp=datetime.now(),
+                    metadata=metadata,
+                    tags=list(record["tags"])
+                )))
+            metrics.add(len(items), time.perf_counter() - start)
+            yield from items
+    
+    def _put(self, stage: str, target: "queue.Queue", batch: Any) -> None:
+        """Hand a batch downstream, waiting while the queue is full."""
+        start = time.perf_counter()
+        while not self._stop.is_set():
+            try:
+                target.put(batch, timeout=0.1)
+                break
+            except queue.Full:
+                continue
+        self._metrics[stage].blocked_seconds += time.perf_counter() - start
+    
+    def _get(self, source: "queue.Queue") -> Any:
+        """Take the next batch, or ``_DONE`` once the pipeline stops."""
+        while not self._stop.is_set():
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                continue
+        return _DONE
+    
+    def _embed(self, source: "queue.Queue", target: "queue.Queue") -> None:
+        """Embed stage: embed chunk batches and regroup them into write batches."""
+        metrics = self._metrics["embed"]
+        pending: List[_Item] = []
+        try:
+            while True:
+                batch = self._get(source)
+                if batch is _DONE:
+                    break
+                
+                start = time.perf_counter()
+                embeddings = self.embedding_generator.generate_many(
+                    [item[3].content for item in batch]
+                )
+                for item, embedding in zip(batch, embeddings):
+                    item[3].embedding = embedding
+                metrics.add(len(batch), time.perf_counter() - start)
+                
+                pending.extend(batch)
+                while len(pending) >= self.write_batch_size:
+                    self._put("embed", target, pending[:self.write_batch_size])
+                    pending = pending[self.write_batch_size:]
+            
+            if pending:
+                self._put("embed", target, pending)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put("embed", target, _DONE)
+    
+    def _write(self, source: "queue.Queue", written_before: bool) -> None:
+        """Write stage: store batches and advance the checkpoint."""
+        metrics = self._metrics["write"]
+        try:
+            while True:
+                batch = self._get(source)
+                if batch is _DONE:
+                    break
+                
+                start = time.perf_counter()
+                memories = [item[3] for item in batch]
+                if written_before:
+                    stored = {
+                        memory.id for memory in self.memory_store.get_memories(
+                            [memory.id for memory in memories], include_embedding=False
+                        )
+                    }
+                    memories = [memory for memory in memories if memory.id not in stored]
+                    written_before = bool(stored)
+                if self.duplicate_index is not None:
+                    duplicates = find_duplicates(self.duplicate_index, memories, self.memory_store)
+                    self.duplicates += len(duplicates)
+                    memories = resolve_duplicates(memories, duplicates, self.on_duplicate, self.memory_store)
+                self.memory_store.store_memories(memories)
+                if self.lexical_index is not None:
+                    self.lexical_index.add(memories)
+                if self.checkpoint_path:
+                    self._save_checkpoint(batch[-1])
+                metrics.add(len(memories), time.perf_counter() - start)
+        except BaseException as e:
+            self._fail(e)
+    
+    def _fail(self, error: BaseException) -> None:
+        """Record the first error and stop every stage."""
+        if self._error is None:
+            self._error = error
+        self._stop.set()
+    
+    def run(self, records: Iterable[Dict[str, Any]]) -> int:
+        """Ingest records holding ``add_experience`` arguments.
+        
+        Returns the number of memories written by this run.
+        """
+        self._metrics = {stage: StageMetrics() for stage in self._metrics}
+        self._stop.clear()
+        self._error = None
+        self.duplicates = 0
+        
+        # A named stream may start with chunks written before the checkpoint was saved
+        resumable = self.source is not None
+        source = self.source if resumable else uuid.uuid4().hex
+        
+        to_embed: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        to_write: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        workers = [
+            threading.Thread(target=self._embed, args=(to_embed, to_write), name="ingest-embed"),
+            threading.Thread(target=self._write, args=(to_write, resumable), name="ingest-write")
+        ]
+        for worker in workers:
+            worker.start()
+        
+        try:
+            parsed = self._parse(records)
+            if self.dedupe:
+                parsed = self._dedupe(parsed)
+            items = self._chunk(parsed, self.load_checkpoint(), source)
+            batch: List[_Item] = []
+            for item in items:
+                if self._stop.is_set():
+                    break
+                batch.append(item)
+                if len(batch) >= self.embed_batch_size:
+                    self._put("chunk", to_embed, batch)
+                    batch = []
+            if batch:
+                self._put("chunk", to_embed, batch)
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            self._put("chunk", to_embed, _DONE)
+            for worker in workers:
+                worker.join()
+        
+        if self._error is not None:
+            raise self._error
+        return self._metrics["write"].items
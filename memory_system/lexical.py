@@ -0,0 +1,328 @@
+"""
+Lexical search module.
+"""
+
+from collections import Counter
+from typing import List, Optional, Dict, Sequence, Tuple
+import heapq
+import math
+import re
+import threading
+import numpy as np
+from .models import Memory
+from .vectors import top_k
+
+# How ranked lists are combined by ``fuse_rankings``
+FUSION_METHODS = ("rrf", "weighted")
+
+# Words, with identifiers such as PROJ-1234, v2.1 or a/b kept together
+_TOKEN = re.compile(r"\w+(?:[-.#/:]\w+)*")
+_WORD = re.compile(r"\w+")
+
+# Term frequencies are stored as uint16
+_MAX_FREQUENCY = 65535
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase terms.
+    
+    Compound identifiers are kept whole and also split into their words,
+    so ``PROJ-1234`` matches both ``proj-1234`` and ``1234``.
+    """
+    terms = []
+    for token in _TOKEN.findall(text.lower()):
+        terms.append(token)
+        words = _WORD.findall(token)
+        if len(words) > 1:
+            terms.extend(words)
+    return terms
+
+def memory_terms(memory: Memory, metadata_fields: Sequence[str] = ()) -> List[str]:
+    """Return the terms a memory is indexed under: its content, tags and chosen metadata values."""
+    terms = tokenize(memory.content)
+    for tag in memory.tags:
+        terms.extend(tokenize(tag))
+    for field in metadata_fields:
+        value = memory.metadata.get(field)
+        values = value if isinstance(value, (list, tuple)) else [value]
+        for item in values:
+            if isinstance(item, str):
+                terms.extend(tokenize(item))
+    return terms
+
+def _grown(array: np.ndarray, size: int) -> np.ndarray:
+    """Return ``array``, or a copy with at least ``size`` slots, doubling capacity."""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array)), dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+class _Postings:
+    """Posting list of one term, ordered by document number.
+    
+    Documents are grouped into blocks of consecutive document numbers. Each
+    block of the list keeps the offset of its first posting, its highest
+    term frequency and its shortest document, which bound the score of
+    every document in it.
+    """
+    
+    __slots__ = (
+        "docs", "frequencies", "size", "blocks", "starts", "max_frequencies",
+        "min_lengths", "block_count", "document_frequency"
+    )
+    
+    def __init__(self):
+        self.docs = np.zeros(4, dtype=np.int32)
+        self.frequencies = np.zeros(4, dtype=np.uint16)
+        self.size = 0
+        self.blocks = np.zeros(1, dtype=np.int32)
+        self.starts = np.zeros(1, dtype=np.int32)
+        self.max_frequencies = np.zeros(1, dtype=np.uint16)
+        self.min_lengths = np.zeros(1, dtype=np.int32)
+        self.block_count = 0
+        # Live documents holding the term; removed ones linger until compaction
+        self.document_frequency = 0
+    
+    def append(self, doc: int, frequency: int, length: int, block_size: int) -> None:
+        """Add a document numbered above every document in the list."""
+        frequency = min(frequency, _MAX_FREQUENCY)
+        self.docs = _grown(self.docs, self.size + 1)
+        self.frequencies = _grown(self.frequencies, self.size + 1)
+        self.docs[self.size] = doc
+        self.frequencies[self.size] = frequency
+        self.size += 1
+        self.document_frequency += 1
+        
+        block = doc // block_size
+        last = self.block_count - 1
+        if self.block_count and self.blocks[last] == block:
+            self.max_frequencies[last] = max(self.max_frequencies[last], frequency)
+            self.min_lengths[last] = min(self.min_lengths[last], length)
+            return
+        
+        count = self.block_count + 1
+        self.blocks = _grown(self.blocks, count)
+        self.starts = _grown(self.starts, count)
+        self.max_frequencies = _grown(self.max_frequencies, count)
+        self.min_lengths = _grown(self.min_lengths, count)
+        self.blocks[last + 1] = block
+        self.starts[last + 1] = self.size - 1
+        self.max_frequencies[last + 1] = frequency
+        self.min_lengths[last + 1] = length
+        self.block_count = count
+    
+    def block(self, block: int) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """Return the documents and frequencies of a block, if the term occurs in it."""
+        i = int(np.searchsorted(self.blocks[:self.block_count], block))
+        if i == self.block_count or self.blocks[i] != block:
+            return None
+        end = self.starts[i + 1] if i + 1 < self.block_count else self.size
+        return self.docs[self.starts[i]:end], self.frequencies[self.starts[i]:end]
+    
+    def compact(self, alive: np.ndarray, lengths: np.ndarray, block_size: int) -> None:
+        """Drop the postings of removed documents and recompute the block bounds."""
+        keep = alive[self.docs[:self.size]]
+        docs = self.docs[:self.size][keep]
+        frequencies = self.frequencies[:self.size][keep]
+        self.docs, self.frequencies, self.size = docs, frequencies, len(docs)
+        if not len(docs):
+            self.block_count = 0
+            return
+        
+        blocks, starts = np.unique(docs // block_size, return_index=True)
+        self.blocks = blocks.astype(np.int32)
+        self.starts = starts.astype(np.int32)
+        self.max_frequencies = np.maximum.reduceat(frequencies, starts)
+        self.min_lengths = np.minimum.reduceat(lengths[docs], starts)
+        self.block_count = len(blocks)
+
+class LexicalIndex:
+    """Rank memories by BM25 over their terms without scanning content.
+    
+    An inverted index over content, tags and the string values of
+    ``metadata_fields``, maintained incrementally as memories are added
+    and removed. Posting lists are typed NumPy arrays grouped into blocks
+    of ``block_size`` document numbers; each block records bounds from
+    which the best possible BM25 score of its documents follows. A search
+    scores blocks from the highest bound down and stops as soon as no
+    remaining block can beat the current top results, so common terms do
+    not force a pass over every posting.
+    
+    Removed memories leave dead postings behind, which are compacted away
+    once they outnumber the live memories. The index only knows the
+    memories added to it.
+    """
+    
+    def __init__(
+        self,
+        k1: float = 1.2,
+        b: float = 0.75,
+        block_size: int = 256,
+        metadata_fields: Sequence[str] = ()
+    ):
+        """Initialize lexical index."""
+        self.k1 = k1
+        self.b = b
+        self.block_size = block_size
+        self.metadata_fields = tuple(metadata_fields)
+        self.lock = threading.RLock()
+        self._postings: Dict[str, _Postings] = {}
+        # Document numbers only grow; a memory re-added gets a new number
+        self._ids: List[Optional[str]] = []
+        self._numbers: Dict[str, int] = {}
+        self._terms: Dict[int, Tuple[str, ...]] = {}
+        self._lengths = np.zeros(64, dtype=np.int32)
+        self._alive = np.zeros(64, dtype=bool)
+        self._total_length = 0
+        self._dead = 0
+    
+    def __len__(self) -> int:
+        return len(self._numbers)
+    
+    def add(self, memories: List[Memory]) -> None:
+        """Index memories, replacing earlier versions of them."""
+        with self.lock:
+            for memory in memories:
+                if memory.id in self._numbers:
+                    self.remove([memory.id])
+                counts = Counter(memory_terms(memory, self.metadata_fields))
+                length = sum(counts.values())
+                doc = len(self._ids)
+                self._ids.append(memory.id)
+                self._numbers[memory.id] = doc
+                self._terms[doc] = tuple(counts)
+                self._lengths = _grown(self._lengths, doc + 1)
+                self._alive = _grown(self._alive, doc + 1)
+                self._lengths[doc] = length
+                self._alive[doc] = True
+                self._total_length += length
+                for term, frequency in counts.items():
+                    postings = self._postings.get(term)
+                    if postings is None:
+                        postings = self._postings[term] = _Postings()
+                    postings.append(doc, frequency, length, self.block_size)
+    
+    def remove(self, memory_ids: List[str]) -> None:
+        """Forget memories, e.g. after they were deleted or changed."""
+        with self.lock:
+            for memory_id in memory_ids:
+                doc = self._numbers.pop(memory_id, None)
+                if doc is None:
+                    continue
+                self._ids[doc] = None
+                self._alive[doc] = False
+                self._total_length -= int(self._lengths[doc])
+                for term in self._terms.pop(doc):
+                    self._postings[term].document_frequency -= 1
+                self._dead += 1
+            
+            if self._dead > max(len(self._numbers), 1024):
+                self._compact()
+    
+    def _compact(self) -> None:
+        """Drop dead postings and the terms left without live documents."""
+        for term, postings in list(self._postings.items()):
+            if postings.document_frequency == 0:
+                del self._postings[term]
+            else:
+                postings.compact(self._alive, self._lengths, self.block_size)
+        self._dead = 0
+    
+    def _bm25(
+        self,
+        idf: float,
+        frequencies: np.ndarray,
+        lengths: np.ndarray,
+        average_length: float
+    ) -> np.ndarray:
+        """Return the BM25 contributions of one term."""
+        frequencies = frequencies.astype(np.float64)
+        norms = self.k1 * (1 - self.b + self.b * lengths / average_length)
+        return idf * (self.k1 + 1) * frequencies / (frequencies + norms)
+    
+    def search(self, text: str, max_results: int = 10) -> List[Tuple[str, float]]:
+        """Return the ids and BM25 scores of the best matches for ``text``, best first."""
+        with self.lock:
+            live = len(self._numbers)
+            terms = [
+                self._postings[term] for term in set(tokenize(text))
+                if term in self._postings and self._postings[term].document_frequency > 0
+            ]
+            if not live or not terms or max_results <= 0:
+                return []
+            
+            average_length = self._total_length / live
+            idfs = [
+                math.log(1 + (live - postings.document_frequency + 0.5) / (postings.document_frequency + 0.5))
+                for postings in terms
+            ]
+            
+            # A block's bound sums each term's best contribution within it
+            blocks = np.concatenate([postings.blocks[:postings.block_count] for postings in terms])
+            bounds = np.concatenate([
+                self._bm25(
+                    idf,
+                    postings.max_frequencies[:postings.block_count],
+                    postings.min_lengths[:postings.block_count],
+                    average_length
+                )
+                for postings, idf in zip(terms, idfs)
+            ])
+            blocks, inverse = np.unique(blocks, return_inverse=True)
+            bounds = np.bincount(inverse, weights=bounds)
+            
+            best: List[Tuple[float, int]] = []
+            for i in np.argsort(-bounds, kind="stable"):
+                if len(best) >= max_results and bounds[i] <= best[0][0]:
+                    # No remaining block can place a document in the top results
+                    break
+                
+                docs, scores = [], []
+                for postings, idf in zip(terms, idfs):
+                    found = postings.block(int(blocks[i]))
+                    if found is None:
+                        continue
+                    block_docs, frequencies = found
+                    docs.append(block_docs)
+                    scores.append(self._bm25(idf, frequencies, self._lengths[block_docs], average_length))
+                
+                block_docs, inverse = np.unique(np.concatenate(docs), return_inverse=True)
+                block_scores = np.bincount(inverse, weights=np.concatenate(scores))
+                alive = self._alive[block_docs]
+                block_docs, block_scores = block_docs[alive], block_scores[alive]
+                for j in top_k(block_scores, max_results):
+                    entry = (float(block_scores[j]), -int(block_docs[j]))
+                    if len(best) < max_results:
+                        heapq.heappush(best, entry)
+                    elif entry > best[0]:
+                        heapq.heapreplace(best, entry)
+            
+            return [(self._ids[-doc], score) for score, doc in sorted(best, reverse=True)]
+
+def fuse_rankings(
+    rankings: List[List[Tuple[str, float]]],
+    method: str = "rrf",
+    weights: Optional[Sequence[float]] = None,
+    k: int = 60
+) -> List[Tuple[str, float]]:
+    """Combine best-first ``(id, score)`` rankings into one, best first.
+    
+    ``rrf`` (reciprocal rank fusion) sums ``weight / (k + rank)`` and
+    ignores the scores, so scales need not agree; ``weighted`` sums
+    ``weight * score / best score`` of each ranking.
+    """
+    if method not in FUSION_METHODS:
+        raise ValueError(f"Unsupported fusion method: {method}")
+    
+    weights = weights or [1.0] * len(rankings)
+    fused: Dict[str, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        if method == "rrf":
+            for rank, (memory_id, _) in enumerate(ranking, start=1):
+                fused[memory_id] = fused.get(memory_id, 0.0) + weight / (k + rank)
+        elif ranking:
+            top = max(score for _, score in ranking)
+            for memory_id, score in ranking:
+                normalized = score / top if top > 0 else 0.0
+                fused[memory_id] = fused.get(memory_id, 0.0) + weight * normalized
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
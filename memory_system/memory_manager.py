@@ -2,23 +2,125 @@
 Memory manager module.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 from datetime import datetime
+import copy
 import uuid
 from .models import Memory, MemoryLevel, MemoryType, MemoryQuery
 from .memory_store import MemoryStore
+from .tiered_store import TieredMemoryStore
+from .access_tracker import AccessTracker
+from .ingestion import IngestionPipeline
+from .query_cache import QueryCache, SemanticCacheStore, _could_match
+from .consolidation import ConsolidationJob
+from .dedup import DuplicateIndex, DUPLICATE_POLICIES, find_duplicates, resolve_duplicates
+from .lexical import LexicalIndex, FUSION_METHODS, fuse_rankings
+from .recall import recall_levels, level_query, hierarchical_search
+from .pagination import PageToken
 from .embeddings import EmbeddingGenerator
-from .config import LLMConfig, DatabaseConfig
+from .config import LLMConfig, DatabaseConfig, DatabaseProvider
+
+# Lexical matches fetched per requested result, leaving room for filters
+_LEXICAL_OVERFETCH = 4
 
 class MemoryManager:
     """Manage memory operations."""
     
-    def __init__(self, llm_config: LLMConfig, db_config: DatabaseConfig):
+    def __init__(
+        self,
+        llm_config: LLMConfig,
+        db_config: DatabaseConfig,
+        track_access: bool = False,
+        access_flush_interval: float = 5.0,
+        access_flush_size: int = 1000,
+        hot_tier_size: int = 0,
+        query_cache_size: int = 0,
+        query_cache_ttl: float = 60.0,
+        semantic_cache_size: int = 0,
+        semantic_cache_threshold: float = 0.95,
+        consolidation_interval: float = 0.0,
+        dedup_policy: Optional[str] = None,
+        dedup_threshold: float = 0.95,
+        dedup_index_path: str = ":memory:",
+        dedup_rebuild: bool = False,
+        lexical_search: bool = False,
+        lexical_metadata_fields: Optional[List[str]] = None,
+        hybrid_fusion: str = "rrf",
+        hybrid_weight: float = 0.5
+    ):
         """Initialize memory manager."""
+        if dedup_policy is not None and dedup_policy not in DUPLICATE_POLICIES:
+            raise ValueError(f"Unsupported duplicate policy: {dedup_policy}")
+        if hybrid_fusion not in FUSION_METHODS:
+            raise ValueError(f"Unsupported fusion method: {hybrid_fusion}")
+        
         self.llm_config = llm_config
         self.db_config = db_config
-        self.memory_store = MemoryStore(db_config)
+        self.memory_store = base_store = MemoryStore(db_config)
+        tiered_store = None
+        if hot_tier_size > 0:
+            # Most recalls are answered in process without touching the database
+            self.memory_store = tiered_store = TieredMemoryStore(self.memory_store, hot_capacity=hot_tier_size)
+        if semantic_cache_size > 0:
+            # Paraphrased queries re-rank the results of a close cached query
+            self.memory_store = SemanticCacheStore(
+                self.memory_store,
+                similarity_threshold=semantic_cache_threshold,
+                max_entries=semantic_cache_size
+            )
         self.embedding_generator = EmbeddingGenerator(llm_config)
+        # Opt-in: recalled memories have their access counters written back in
+        # batches, on a timer too so they persist while the agent is idle, from
+        # a thread with a session of its own; the hot tier mirrors every batch
+        self.access_tracker = AccessTracker(
+            base_store, access_flush_interval, access_flush_size,
+            on_flush=tiered_store.mirror_access if tiered_store is not None else None
+        ) if track_access else None
+        if self.access_tracker is not None and not (
+            db_config.provider == DatabaseProvider.SQLITE and db_config.database == ":memory:"
+        ):
+            self.access_tracker.start(self._open_access_session)
+        # Repeated queries are answered from cached results until a write could change them
+        self.query_cache = QueryCache(
+            query_cache_size, query_cache_ttl
+        ) if query_cache_size > 0 else None
+        # Relevance decays in the background and faded memories are archived
+        self.consolidation = ConsolidationJob(
+            base_store, interval=consolidation_interval,
+            on_archive=self._forget, on_decay=self._invalidate_relevance
+        ) if consolidation_interval > 0 else None
+        if self.consolidation is not None:
+            self.consolidation.start()
+        # New memories duplicating stored ones are skipped, merged or linked
+        self.dedup_policy = dedup_policy
+        self.dedup_index = DuplicateIndex(
+            dedup_index_path, threshold=dedup_threshold
+        ) if dedup_policy is not None else None
+        # Searches fuse BM25 keyword matches with vector similarity
+        self.hybrid_fusion = hybrid_fusion
+        self.hybrid_weight = hybrid_weight
+        self.lexical_index = None
+        if lexical_search:
+            self.lexical_index = LexicalIndex(metadata_fields=lexical_metadata_fields or ())
+        indexes = [self.lexical_index] if self.lexical_index is not None else []
+        if dedup_rebuild and self.dedup_index is not None and len(self.dedup_index) == 0:
+            # Opt-in, as it reads every memory: a new duplicate index learns the
+            # memories stored before it; a file at dedup_index_path keeps them
+            indexes.append(self.dedup_index)
+        if indexes:
+            self._build_indexes(base_store, indexes)
+    
+    def _build_indexes(self, memory_store: MemoryStore, indexes: List[Any], batch_size: int = 1000) -> None:
+        """Add every stored memory to the lexical and duplicate indexes."""
+        include_embedding = self.dedup_index in indexes
+        after_id = ""
+        while True:
+            memories = memory_store.scan_memories(after_id, batch_size, include_embedding=include_embedding)
+            if not memories:
+                break
+            for index in indexes:
+                index.add(memories)
+            after_id = memories[-1].id
     
     def add_experience(
         self,
@@ -52,15 +154,138 @@ class MemoryManager:
             tags=tags
         )
         
+        if self.dedup_index is not None:
+            duplicates = find_duplicates(self.dedup_index, [memory], self.memory_store)
+            if not resolve_duplicates([memory], duplicates, self.dedup_policy, self.memory_store):
+                # Skipped, or merged into the memory it duplicates
+                original = duplicates[memory.id]
+                if self.dedup_policy == "merge":
+                    if self.query_cache is not None:
+                        self.query_cache.invalidate_memories([original])
+                    if self.lexical_index is not None:
+                        self.lexical_index.add([original])
+                return original
+        
         self.memory_store.store_memory(memory)
+        if self.query_cache is not None:
+            self.query_cache.invalidate_memories([memory])
+        if self.lexical_index is not None:
+            self.lexical_index.add([memory])
         return memory
     
+    def ingest(self, records: Iterable[Dict[str, Any]], **options) -> int:
+        """Bulk-import records holding ``add_experience`` arguments.
+        
+        ``options`` configure the ``IngestionPipeline``. Returns the number
+        of memories written; errors are raised so an import can be resumed
+        from its checkpoint.
+        """
+        if self.dedup_index is not None:
+            options.setdefault("duplicate_index", self.dedup_index)
+            options.setdefault("on_duplicate", self.dedup_policy)
+        if self.lexical_index is not None:
+            options.setdefault("lexical_index", self.lexical_index)
+        pipeline = IngestionPipeline(self.memory_store, self.embedding_generator, **options)
+        try:
+            return pipeline.run(records)
+        finally:
+            if self.query_cache is not None:
+                self.query_cache.clear()
+    
     def search_memories(self, query: MemoryQuery) -> List[Memory]:
-        """Search for memories based on query."""
-        # Get embeddings for query content
-        query_embedding = self.embedding_generator.generate(query.content)
+        """Search for memories based on query.
+        
+        With lexical search enabled, the vector results are fused with the
+        best BM25 matches for the query text that pass its filters, and
+        ``similarity`` holds the fused score.
+        
+        A hierarchical query searches its levels one at a time, narrowest
+        first, and stops widening once ``max_results`` results reach
+        ``min_similarity``; narrower results are returned first. Levels are
+        searched sequentially here; ``AsyncMemoryManager`` overlaps them.
+        """
+        if query.page_token and (query.hierarchical or self.lexical_index is not None):
+            raise ValueError("Page tokens are not supported for hierarchical or hybrid searches")
+        
+        memories = self.query_cache.get(query) if self.query_cache is not None else None
+        if memories is None:
+            # Get embeddings for query content
+            query_embedding = self.embedding_generator.generate(query.content)
+            
+            if query.hierarchical:
+                memories = hierarchical_search(
+                    lambda level: self._search(level_query(query, level), query_embedding),
+                    recall_levels(query.level),
+                    query.max_results,
+                    query.min_similarity
+                )
+            else:
+                memories = self._search(query, query_embedding)
+            if self.query_cache is not None:
+                self.query_cache.put(query, memories)
+        
+        if self.access_tracker is not None and memories:
+            self._record_access(memories)
         
-        # Search memory store
+        return memories
+    
+    def iter_search(self, query: MemoryQuery, batch_size: int = 100) -> Iterator[Memory]:
+        """Yield the results of ``search_memories``, best first, as they arrive.
+        
+        Results are streamed from the store ``batch_size`` at a time, so the
+        first hits can be used before the search completes and stopping
+        early skips the remaining reads. Only yielded memories count as
+        accessed. Streamed results are not cached; hierarchical and hybrid
+        searches need their complete results and arrive at once.
+        """
+        if query.hierarchical or self.lexical_index is not None:
+            yield from self.search_memories(query)
+            return
+        
+        memories = self.query_cache.get(query) if self.query_cache is not None else None
+        if memories is None:
+            memories = self.memory_store.iter_search_memories(
+                query_embedding=self.embedding_generator.generate(query.content),
+                level=query.level,
+                memory_type=query.memory_type,
+                min_relevance=query.min_relevance,
+                max_results=query.max_results,
+                tags=query.tags,
+                metadata_filters=query.metadata_filters,
+                since=query.since,
+                until=query.until,
+                recency_half_life=query.recency_half_life,
+                page_token=query.page_token,
+                batch_size=batch_size
+            )
+        
+        for memory in memories:
+            if self.access_tracker is not None:
+                self._record_access([memory])
+            yield memory
+    
+    def search_page(self, query: MemoryQuery) -> Tuple[List[Memory], Optional[str]]:
+        """Return one page of search results and the token of the next page.
+        
+        Set the token as ``page_token`` of the same query to get the next
+        page; it is ``None`` after the last page. Each page resumes below
+        the previous page's last ``(similarity, id)`` instead of skipping
+        an offset, so memories stored between pages do not shift the walk.
+        """
+        if query.page_token:
+            page = PageToken.decode(query.page_token, True)
+        else:
+            # Recency-weighted pages are all scored from the first page's instant
+            page = PageToken(True, now=datetime.now() if query.recency_half_life else None)
+            query = copy.copy(query)
+            query.page_token = page.encode()
+        
+        memories = self.search_memories(query)
+        next_page = page.next(memories, query.max_results)
+        return memories, next_page.encode() if next_page is not None else None
+    
+    def _search(self, query: MemoryQuery, query_embedding: List[float]) -> List[Memory]:
+        """Search the memory store, fusing lexical matches when enabled."""
         memories = self.memory_store.search_memories(
             query_embedding=query_embedding,
             level=query.level,
@@ -68,24 +293,181 @@ class MemoryManager:
             min_relevance=query.min_relevance,
             max_results=query.max_results,
             tags=query.tags,
-            metadata_filters=query.metadata_filters
+            metadata_filters=query.metadata_filters,
+            since=query.since,
+            until=query.until,
+            recency_half_life=query.recency_half_life,
+            page_token=query.page_token
         )
-        
+        if self.lexical_index is not None:
+            memories = self._fuse_lexical(query, memories)
         return memories
     
+    def _fuse_lexical(self, query: MemoryQuery, memories: List[Memory]) -> List[Memory]:
+        """Fuse vector results with the query's best lexical matches."""
+        matches = self.lexical_index.search(query.content, query.max_results * _LEXICAL_OVERFETCH)
+        found = {memory.id: memory for memory in memories}
+        missing = [memory_id for memory_id, _ in matches if memory_id not in found]
+        for memory in self.memory_store.get_memories(missing):
+            found[memory.id] = memory
+        
+        # The index knows no filters; matches failing them are dropped here
+        lexical = [
+            (memory_id, score) for memory_id, score in matches
+            if memory_id in found and _could_match(
+                query,
+                level=found[memory_id].level,
+                memory_type=found[memory_id].memory_type,
+                tags=found[memory_id].tags,
+                relevance_score=found[memory_id].relevance_score,
+                metadata=found[memory_id].metadata,
+                timestamp=found[memory_id].timestamp
+            )
+        ]
+        fused = fuse_rankings(
+            [[(memory.id, memory.similarity or 0.0) for memory in memories], lexical],
+            self.hybrid_fusion,
+            [1 - self.hybrid_weight, self.hybrid_weight]
+        )
+        
+        results = []
+        for memory_id, score in fused[:query.max_results]:
+            memory = found[memory_id]
+            memory.similarity = score
+            results.append(memory)
+        return results
+    
+    def _record_access(self, memories: List[Memory]) -> None:
+        """Count a recall of each memory and flush when due."""
+        accessed_at = datetime.now()
+        for memory in memories:
+            memory.access_count += 1
+            memory.last_accessed = accessed_at
+        
+        if self.access_tracker.record([memory.id for memory in memories], accessed_at):
+            self.flush_access()
+    
+    def _open_access_session(self):
+        """Open the store background access flushes write to.
+        
+        Like consolidation, they use a session of their own, so they never
+        share a transaction with the application's writes; the in-memory
+        store is shared directly.
+        """
+        if self.db_config.provider == DatabaseProvider.MEMORY:
+            return self.access_tracker.memory_store
+        return MemoryStore(self.db_config)
+    
+    def flush_access(self) -> bool:
+        """Write pending access counts to the store."""
+        if self.access_tracker is None:
+            return True
+        try:
+            self.access_tracker.flush()
+            return True
+        except Exception as e:
+            print(f"Error flushing memory access: {str(e)}")
+            return False
+    
+    def _forget(self, memory_ids: List[str]) -> None:
+        """Drop cached copies of memories archived by consolidation."""
+        if self.query_cache is not None:
+            self.query_cache.invalidate_ids(memory_ids)
+        if self.dedup_index is not None:
+            self.dedup_index.remove(memory_ids)
+        if self.lexical_index is not None:
+            self.lexical_index.remove(memory_ids)
+        store = self.memory_store
+        while not isinstance(store, MemoryStore):
+            store.discard(memory_ids)
+            store = store.memory_store
+    
+    def _invalidate_relevance(self) -> None:
+        """Drop cached results ranked by relevance scores consolidation has since decayed."""
+        if self.query_cache is not None:
+            self.query_cache.clear()
+        store = self.memory_store
+        while not isinstance(store, MemoryStore):
+            store.invalidate_relevance()
+            store = store.memory_store
+    
+    def restore_memories(self, memory_ids: List[str]) -> int:
+        """Bring archived memories back into searches. Returns the number restored."""
+        try:
+            restored = self.memory_store.restore_memories(memory_ids)
+            indexes = (self.query_cache, self.dedup_index, self.lexical_index)
+            if restored and any(index is not None for index in indexes):
+                memories = self.memory_store.get_memories(memory_ids)
+                if self.query_cache is not None:
+                    self.query_cache.invalidate_memories(memories)
+                if self.dedup_index is not None:
+                    self.dedup_index.add(memories)
+                if self.lexical_index is not None:
+                    self.lexical_index.add(memories)
+            return restored
+        except Exception as e:
+            print(f"Error restoring memories: {str(e)}")
+            return 0
+    
+    def close(self) -> None:
+        """Stop consolidation, flush pending access counts and close the memory store."""
+        if self.consolidation is not None:
+            self.consolidation.stop()
+        if self.access_tracker is not None:
+            self.access_tracker.stop()
+        self.flush_access()
+        self.memory_store.close()
+        if self.dedup_index is not None:
+            self.dedup_index.close()
+    
+    def __enter__(self) -> "MemoryManager":
+        return self
+    
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        self.close()
+    
     def update_memory(self, memory: Memory) -> bool:
         """Update an existing memory."""
         try:
             self.memory_store.update_memory(memory)
+            if self.query_cache is not None:
+                self.query_cache.invalidate_memories([memory])
+            if self.dedup_index is not None:
+                self.dedup_index.remove([memory.id])
+                self.dedup_index.add([memory])
+            if self.lexical_index is not None:
+                self.lexical_index.add([memory])
             return True
         except Exception as e:
             print(f"Error updating memory: {str(e)}")
             return False
     
+    def update_fields(self, memory_id: str, fields: Dict[str, Any]) -> bool:
+        """Update only the given fields of a memory."""
+        try:
+            updated = self.memory_store.update_fields(memory_id, fields) > 0
+            if self.query_cache is not None:
+                self.query_cache.invalidate_fields([memory_id], fields)
+            if self.dedup_index is not None and {"content", "embedding", "level"} & set(fields):
+                self.dedup_index.remove([memory_id])
+                self.dedup_index.add(self.memory_store.get_memories([memory_id]))
+            if self.lexical_index is not None and {"content", "tags", "metadata"} & set(fields):
+                self.lexical_index.add(self.memory_store.get_memories([memory_id], include_embedding=False))
+            return updated
+        except Exception as e:
+            print(f"Error updating memory: {str(e)}")
+            return False
+    
     def delete_memory(self, memory_id: str) -> bool:
         """Delete a memory by ID."""
         try:
             self.memory_store.delete_memory(memory_id)
+            if self.query_cache is not None:
+                self.query_cache.invalidate_ids([memory_id])
+            if self.dedup_index is not None:
+                self.dedup_index.remove([memory_id])
+            if self.lexical_index is not None:
+                self.lexical_index.remove([memory_id])
             return True
         except Exception as e:
             print(f"Error deleting memory: {str(e)}")
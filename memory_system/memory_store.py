@@ -2,14 +2,1370 @@
 Memory store module.
 """
 
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Set, Tuple, Callable, Iterator, Union, Hashable
+from collections import OrderedDict
+import os
+import re
+import itertools
+import threading
+import time
+import json
+import sqlite3
 import psycopg2
+from psycopg2 import errors
 from psycopg2.extras import Json
 import pymongo
+from pymongo import UpdateOne, ReplaceOne
+from bson.binary import Binary, BinaryVectorDtype, VECTOR_SUBTYPE
 import numpy as np
 from datetime import datetime, timedelta
-from .models import Memory, MemoryLevel, MemoryType
+from .models import Memory, MemoryLevel, MemoryType, _interned_tags
 from .config import DatabaseConfig, DatabaseProvider
+from .statements import StatementCache
+from .columnar_store import ColumnarMemoryTable, relevance_decay
+from .replicas import ReplicaRouter
+from .pagination import PageToken
+from .vectors import (
+    EMBEDDING_DTYPE,
+    encode_embedding,
+    decode_embedding,
+    stack_embeddings,
+    cosine_scores,
+    float32_scores,
+    recency_weights,
+    top_k_after
+)
+
+# Column order shared by every PostgreSQL read
+_PG_COLUMNS = (
+    "id, content, embedding, level, memory_type, timestamp, metadata, "
+    "relevance_score, access_count, last_accessed, tags"
+)
+
+# Same column order, with the embedding left out of the result
+_PG_COLUMNS_WITHOUT_EMBEDDING = _PG_COLUMNS.replace("embedding", "NULL::real[] AS embedding")
+
+# Parameter types of the prepared INSERT, in _PG_COLUMNS order
+_PG_INSERT_TYPES = [
+    "varchar", "text", "real[]", "varchar", "varchar", "timestamp",
+    "jsonb", "float8", "integer", "timestamp", "text[]"
+]
+
+_PG_INSERT_SQL = (
+    f"INSERT INTO memories ({_PG_COLUMNS}) "
+    f"VALUES ({', '.join(f'${i}' for i in range(1, 12))})"
+)
+
+# Vector similarity over float32 embeddings, stored as REAL[] so scoring
+# reads them as they are. Tables of float32 blobs, the layout before REAL[],
+# are decoded once by float4_array_from_blob when they are migrated
+_PG_SETUP_SQL = """
+    CREATE OR REPLACE FUNCTION float4_array_from_blob(b BYTEA) RETURNS REAL[] AS $$
+        SELECT COALESCE(array_agg((
+            CASE WHEN exponent = 0
+                THEN mantissa * power(2::FLOAT, -149)
+                ELSE (mantissa + 8388608) * power(2::FLOAT, exponent - 150)
+            END * CASE WHEN negative THEN -1 ELSE 1 END
+        )::REAL ORDER BY i), '{}')
+        FROM (
+            -- Little-endian IEEE 754 singles: sign, 8 exponent bits, 23 mantissa bits
+            SELECT i,
+                get_byte(b, i * 4 + 3) >= 128 AS negative,
+                ((get_byte(b, i * 4 + 3) & 127) << 1) | (get_byte(b, i * 4 + 2) >> 7) AS exponent,
+                ((get_byte(b, i * 4 + 2) & 127) << 16)
+                    | (get_byte(b, i * 4 + 1) << 8)
+                    | get_byte(b, i * 4) AS mantissa
+            FROM generate_series(0, length(b) / 4 - 1) AS i
+        ) AS singles
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+    
+    -- Ranked scores are rounded to float32, as client-side scoring rounds
+    -- them, so pages of either execution mode end at comparable values;
+    -- scores too small for a normal float32 are 0 instead of an underflow
+    CREATE OR REPLACE FUNCTION float4_score(s FLOAT) RETURNS REAL AS $$
+        SELECT CASE WHEN abs(s) < 1.1754943508222875e-38 THEN 0 ELSE s::REAL END
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+    
+    CREATE OR REPLACE FUNCTION vector_similarity(a REAL[], b REAL[]) RETURNS FLOAT AS $$
+        SELECT CASE
+            WHEN cardinality(a) != cardinality(b)
+                OR COALESCE(sum(x::FLOAT * x), 0) = 0
+                OR COALESCE(sum(y::FLOAT * y), 0) = 0 THEN 0
+            ELSE sum(x::FLOAT * y) / (sqrt(sum(x::FLOAT * x)) * sqrt(sum(y::FLOAT * y)))
+        END
+        FROM unnest(a, b) AS t(x, y)
+    $$ LANGUAGE sql IMMUTABLE PARALLEL SAFE;
+    
+    -- Create operator if it doesn't exist
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_operator WHERE oprname = '<->'
+            AND oprleft = 'real[]'::regtype
+            AND oprright = 'real[]'::regtype
+        ) THEN
+            CREATE OPERATOR <-> (
+                LEFTARG = REAL[],
+                RIGHTARG = REAL[],
+                FUNCTION = vector_similarity,
+                COMMUTATOR = <->
+            );
+        END IF;
+    END
+    $$;
+"""
+
+_PG_TABLE_COLUMNS = """
+    content TEXT NOT NULL,
+    embedding REAL[] NOT NULL,
+    level VARCHAR(50) NOT NULL,
+    memory_type VARCHAR(50) NOT NULL,
+    timestamp TIMESTAMP NOT NULL,
+    metadata JSONB,
+    relevance_score FLOAT NOT NULL,
+    access_count INTEGER NOT NULL,
+    last_accessed TIMESTAMP,
+    tags TEXT[]
+"""
+
+_PG_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS memories (
+        id VARCHAR(36) PRIMARY KEY,
+        {_PG_TABLE_COLUMNS}
+    )
+"""
+
+# The primary key has to include the partition columns, so table-wide id
+# uniqueness is enforced by _PG_ID_REGISTRY_SQL
+_PG_PARTITIONED_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS memories (
+        id VARCHAR(36) NOT NULL,
+        {_PG_TABLE_COLUMNS},
+        PRIMARY KEY (id, level, timestamp)
+    ) PARTITION BY LIST (level)
+"""
+
+# Ids of a partitioned table, kept by a trigger on every partition; a
+# duplicate id fails the insert with a unique violation. Rows moving level
+# are deleted and reinserted, releasing their id first
+_PG_ID_REGISTRY_SQL = """
+    CREATE TABLE IF NOT EXISTS memory_ids (id VARCHAR(36) PRIMARY KEY);
+    
+    CREATE OR REPLACE FUNCTION memory_ids_track() RETURNS TRIGGER AS $$
+    BEGIN
+        IF TG_OP = 'INSERT' THEN
+            INSERT INTO memory_ids (id) VALUES (NEW.id);
+        ELSE
+            DELETE FROM memory_ids WHERE id = OLD.id;
+        END IF;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql;
+    
+    -- Registers the rows of tables partitioned before the registry existed
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1 FROM pg_trigger
+            WHERE tgname = 'memories_ids' AND tgrelid = 'memories'::regclass
+        ) THEN
+            INSERT INTO memory_ids (id) SELECT id FROM memories;
+            CREATE TRIGGER memories_ids AFTER INSERT OR DELETE ON memories
+            FOR EACH ROW EXECUTE FUNCTION memory_ids_track();
+        END IF;
+    END
+    $$;
+"""
+
+# Memories archived by consolidation; searches only read ``memories``
+_PG_ARCHIVE_TABLE_SQL = f"""
+    CREATE TABLE IF NOT EXISTS memories_archive (
+        id VARCHAR(36) PRIMARY KEY,
+        {_PG_TABLE_COLUMNS},
+        archived_at TIMESTAMP NOT NULL DEFAULT now()
+    )
+"""
+
+# When the last decay pass over the store started, shared by every job
+_PG_CONSOLIDATION_STATE_SQL = """
+    CREATE TABLE IF NOT EXISTS consolidation_state (
+        name TEXT PRIMARY KEY,
+        last_pass TIMESTAMP NOT NULL
+    )
+"""
+
+# Claims the time since the last decay pass, after locking the row with
+# _PG_LAST_PASS_SQL, so concurrent passes split the time instead of each
+# decaying by all of it
+_PG_LAST_PASS_SQL = "SELECT last_pass FROM consolidation_state WHERE name = 'decay' FOR UPDATE"
+
+_PG_DECAY_PASS_SQL = """
+    INSERT INTO consolidation_state (name, last_pass) VALUES ('decay', $1::timestamp)
+    ON CONFLICT (name) DO UPDATE
+    SET last_pass = GREATEST(consolidation_state.last_pass, EXCLUDED.last_pass)
+"""
+
+# Backs time-window filters and the recency sort; on a partitioned table
+# every partition gets its own copy
+_PG_TIMESTAMP_INDEX_SQL = "CREATE INDEX IF NOT EXISTS memories_timestamp ON memories (timestamp)"
+
+_PG_RELKIND_SQL = "SELECT relkind FROM pg_class WHERE oid = to_regclass('memories')"
+
+# Tables created by earlier versions: FLOAT[] embeddings, or float32 blobs
+# with a generated REAL[] copy for scoring. Checked before migrating, as
+# ALTER TABLE locks the table exclusively and would wait on any session
+# with an open read
+_PG_LEGACY_EMBEDDINGS_SQL = """
+    SELECT table_name, udt_name
+    FROM information_schema.columns
+    WHERE table_name IN ('memories', 'memories_archive')
+    AND column_name = 'embedding' AND udt_name != '_float4'
+    ORDER BY table_name
+"""
+
+def _pg_migration_ddl(table: str, column_type: str) -> List[str]:
+    """Return the statements converting a table's embeddings to REAL[]."""
+    if column_type == "bytea":
+        return [
+            f"ALTER TABLE {table} DROP COLUMN IF EXISTS embedding_values",
+            f"ALTER TABLE {table} ALTER COLUMN embedding TYPE REAL[] USING float4_array_from_blob(embedding)"
+        ]
+    return [f"ALTER TABLE {table} ALTER COLUMN embedding TYPE REAL[] USING embedding::REAL[]"]
+
+# Monthly partitions are named memories_<level>_<yyyy>_<mm>
+_MONTH_PARTITION = re.compile(r"_(\d{4})_(\d{2})$")
+
+_NOT_PARTITIONED_ERROR = (
+    "Table 'memories' already exists and is not partitioned; "
+    "migrate its rows into a partitioned table before enabling partitioning"
+)
+
+def _quote_literal(value: str) -> str:
+    """Quote a string as a SQL literal."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def _enum_value(value: Any) -> Any:
+    """Return the stored value of an enum member (or a plain string)."""
+    return value.value if hasattr(value, 'value') else value
+
+def _pg_vector(embedding: Any) -> List[float]:
+    """Bind an embedding as a REAL[] parameter."""
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tolist()
+
+def _pg_control(connection, sql: str) -> None:
+    """Run a transaction control statement without disturbing open cursors' results."""
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+
+def _pg_partition_ddl(level: str, timestamp: datetime) -> List[str]:
+    """Return the statements creating the level and month partitions for a row."""
+    level_table = "memories_" + re.sub(r"[^a-z0-9_]", "_", level.lower())
+    start = datetime(timestamp.year, timestamp.month, 1)
+    end = datetime(start.year + start.month // 12, start.month % 12 + 1, 1)
+    month_table = f"{level_table}_{start:%Y_%m}"
+    
+    return [
+        f"""
+            CREATE TABLE IF NOT EXISTS {level_table} PARTITION OF memories
+            FOR VALUES IN ({_quote_literal(level)}) PARTITION BY RANGE (timestamp)
+        """,
+        f"""
+            CREATE TABLE IF NOT EXISTS {month_table} PARTITION OF {level_table}
+            FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')
+        """
+    ]
+
+def _pg_memory_params(
+    memory: Memory,
+    adapt_json: Callable = Json,
+    adapt_embedding: Callable = _pg_vector
+) -> list:
+    """Return INSERT parameters for a memory, in _PG_COLUMNS order."""
+    return [
+        memory.id,
+        memory.content,
+        adapt_embedding(memory.embedding),
+        _enum_value(memory.level),
+        _enum_value(memory.memory_type),
+        memory.timestamp,
+        adapt_json(memory.metadata),
+        memory.relevance_score,
+        memory.access_count,
+        memory.last_accessed,
+        memory.tags
+    ]
+
+def _pg_update_sql(partitioned: bool) -> Tuple[str, List[str]]:
+    """Build the full-row UPDATE statement text and parameter types."""
+    text = """
+        UPDATE memories
+        SET content = $1,
+            embedding = $2,
+            level = $3,
+            memory_type = $4,
+            metadata = $5,
+            relevance_score = $6,
+            access_count = $7,
+            last_accessed = $8,
+            tags = $9
+        WHERE id = $10
+    """
+    types = [
+        "text", "real[]", "varchar", "varchar", "jsonb",
+        "float8", "integer", "timestamp", "text[]", "varchar"
+    ]
+    if partitioned:
+        # The timestamp never changes, so it prunes to one month per level;
+        # the level may change and moves the row across partitions
+        text += " AND timestamp = $11"
+        types.append("timestamp")
+    return text, types
+
+def _pg_update_params(memory: Memory, partitioned: bool, **adapters) -> list:
+    """Return parameters for _pg_update_sql."""
+    params = _pg_memory_params(memory, **adapters)
+    # SET columns skip the id and the immutable timestamp
+    update_params = params[1:5] + params[6:] + [memory.id]
+    if partitioned:
+        update_params.append(memory.timestamp)
+    return update_params
+
+# Fields a partial update may set, with their PostgreSQL parameter types;
+# ids and timestamps are immutable
+_PATCHABLE_FIELDS = {
+    "content": "text",
+    "embedding": "real[]",
+    "level": "varchar",
+    "memory_type": "varchar",
+    "metadata": "jsonb",
+    "relevance_score": "float8",
+    "access_count": "integer",
+    "last_accessed": "timestamp",
+    "tags": "text[]"
+}
+
+# Unions tags into memories in place, keeping their order, so concurrent
+# merges never drop each other's tags; one (id, tag) pair per element
+_PG_ADD_TAGS_SQL = """
+    UPDATE memories AS m
+    SET tags = array(
+        SELECT tag FROM unnest(COALESCE(m.tags, '{}') || d.tags) WITH ORDINALITY AS t(tag, position)
+        GROUP BY tag ORDER BY min(position)
+    )
+    FROM (
+        SELECT id, array_agg(tag ORDER BY position) AS tags
+        FROM unnest($1::text[], $2::text[]) WITH ORDINALITY AS p(id, tag, position)
+        GROUP BY id
+    ) AS d
+    WHERE m.id = d.id
+"""
+
+# Bumps counters in place, so concurrent readers never lose increments;
+# last_accessed only moves forward (GREATEST ignores NULLs)
+_PG_INCREMENT_ACCESS_SQL = """
+    UPDATE memories
+    SET access_count = access_count + $1::integer,
+        last_accessed = GREATEST(last_accessed, $2::timestamp)
+    WHERE id = ANY($3::text[])
+"""
+
+_PG_INCREMENT_ACCESS_TYPES = ["integer", "timestamp", "text[]"]
+
+# Applies per-memory access deltas in one statement
+_PG_APPLY_ACCESS_DELTAS_SQL = """
+    UPDATE memories AS m
+    SET access_count = m.access_count + d.hits,
+        last_accessed = GREATEST(m.last_accessed, d.accessed_at)
+    FROM unnest($1::text[], $2::integer[], $3::timestamp[]) AS d(id, hits, accessed_at)
+    WHERE m.id = d.id
+"""
+
+_PG_APPLY_ACCESS_DELTAS_TYPES = ["text[]", "integer[]", "timestamp[]"]
+
+# Decays the relevance of the next batch of memories by id; same formula as
+# relevance_decay: halved per half-life of idle time within the elapsed
+# window, the half-life stretching with the log of the access count
+_PG_DECAY_SQL = """
+    WITH batch AS (
+        -- Capped like the ranking's recency exponent; power() raises on underflow
+        SELECT id, LEAST(LEAST(
+            $1,
+            GREATEST(0, EXTRACT(EPOCH FROM $2 - COALESCE(last_accessed, timestamp))::float8)
+        ) / ($3 * (1 + ln(1 + access_count::float8))), 1000) AS halvings
+        FROM memories WHERE id > $4 ORDER BY id LIMIT $5
+    )
+    UPDATE memories AS m
+    SET relevance_score = CASE
+        -- So does a product rounding to zero
+        WHEN m.relevance_score <= 0 THEN m.relevance_score
+        WHEN ln(m.relevance_score) / ln(2::float8) - batch.halvings < -1000 THEN 0
+        ELSE m.relevance_score * power(2::float8, -batch.halvings)
+    END
+    FROM batch
+    WHERE m.id = batch.id
+    RETURNING m.id, m.relevance_score
+"""
+
+_PG_DECAY_TYPES = ["float8", "timestamp", "float8", "text", "integer"]
+
+_PG_ARCHIVE_UPSERT = ", ".join(
+    f"{column} = EXCLUDED.{column}" for column in _PG_COLUMNS.split(", ")[1:]
+)
+
+# Moves rows to the archive table in one statement
+_PG_ARCHIVE_SQL = f"""
+    WITH moved AS (
+        DELETE FROM memories WHERE id = ANY($1::text[]) RETURNING {_PG_COLUMNS}
+    )
+    INSERT INTO memories_archive ({_PG_COLUMNS})
+    SELECT {_PG_COLUMNS} FROM moved
+    ON CONFLICT (id) DO UPDATE SET {_PG_ARCHIVE_UPSERT}, archived_at = now()
+"""
+
+_PG_RESTORE_SQL = f"""
+    WITH moved AS (
+        DELETE FROM memories_archive WHERE id = ANY($1::text[]) RETURNING {_PG_COLUMNS}
+    )
+    INSERT INTO memories ({_PG_COLUMNS})
+    SELECT {_PG_COLUMNS} FROM moved
+"""
+
+# The partitions archived memories return to
+_PG_ARCHIVED_PARTITIONS_SQL = "SELECT DISTINCT level, timestamp FROM memories_archive WHERE id = ANY($1::text[])"
+
+def _patch_fields(fields: Dict[str, Any]) -> Tuple[str, ...]:
+    """Validate a partial update and return its field names in a stable order."""
+    if not fields:
+        raise ValueError("No fields to update")
+    
+    unknown = set(fields) - set(_PATCHABLE_FIELDS)
+    if unknown:
+        raise ValueError(f"Cannot update fields: {', '.join(sorted(unknown))}")
+    return tuple(sorted(fields))
+
+def _patch_value(
+    field: str,
+    value: Any,
+    adapt_json: Callable = Json,
+    adapt_embedding: Callable = _pg_vector
+) -> Any:
+    """Convert a partial update value to its stored representation."""
+    if field == "embedding":
+        return adapt_embedding(value)
+    if field == "metadata":
+        return adapt_json(value)
+    if field in ("level", "memory_type"):
+        return _enum_value(value)
+    return value
+
+def _pg_patch_sql(field_names: Tuple[str, ...]) -> Tuple[str, List[str]]:
+    """Build an UPDATE setting only ``field_names`` on an array of ids."""
+    types = [_PATCHABLE_FIELDS[field] for field in field_names] + ["text[]"]
+    assignments = ", ".join(
+        f"{field} = ${i}::{_PATCHABLE_FIELDS[field]}"
+        for i, field in enumerate(field_names, start=1)
+    )
+    return f"UPDATE memories SET {assignments} WHERE id = ANY(${len(types)}::text[])", types
+
+def _pg_patch_params(
+    fields: Dict[str, Any],
+    field_names: Tuple[str, ...],
+    memory_ids: List[str],
+    **adapters
+) -> list:
+    """Return parameters for _pg_patch_sql."""
+    return [_patch_value(field, fields[field], **adapters) for field in field_names] + [memory_ids]
+
+def _mongo_patch(fields: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the ``$set`` document for a partial update."""
+    return {
+        field: _patch_value(field, value, adapt_json=lambda v: v, adapt_embedding=_mongo_vector)
+        for field, value in fields.items()
+    }
+
+def _access_delta_params(deltas: Dict[str, Tuple[int, datetime]]) -> list:
+    """Return parameters for _PG_APPLY_ACCESS_DELTAS_SQL."""
+    ids = list(deltas)
+    return [ids, [deltas[i][0] for i in ids], [deltas[i][1] for i in ids]]
+
+def _mongo_access_updates(deltas: Dict[str, Tuple[int, datetime]]) -> List[UpdateOne]:
+    """Return bulk operations applying access deltas."""
+    return [
+        UpdateOne(
+            {"_id": memory_id},
+            {"$inc": {"access_count": hits}, "$max": {"last_accessed": accessed_at}}
+        )
+        for memory_id, (hits, accessed_at) in deltas.items()
+    ]
+
+# Fields a decay batch reads
+_MONGO_DECAY_PROJECTION = {'relevance_score': 1, 'access_count': 1, 'last_accessed': 1, 'timestamp': 1}
+
+def _mongo_decay(
+    docs: List[Dict[str, Any]],
+    now: datetime,
+    elapsed: float,
+    half_life: float,
+    archive_below: float
+) -> Tuple[List[UpdateOne], List[str]]:
+    """Return bulk operations decaying a batch, and the ids falling below ``archive_below``."""
+    factors = relevance_decay(
+        np.array([doc.get('access_count', 0) for doc in docs], dtype=np.int64),
+        np.array([(now - (doc.get('last_accessed') or doc['timestamp'])).total_seconds() for doc in docs]),
+        elapsed,
+        half_life
+    )
+    # $mul keeps concurrent relevance changes instead of overwriting them
+    updates = [
+        UpdateOne({'_id': doc['_id']}, {'$mul': {'relevance_score': float(factor)}})
+        for doc, factor in zip(docs, factors)
+    ]
+    archived = [
+        doc['_id'] for doc, factor in zip(docs, factors)
+        if doc['relevance_score'] * factor < archive_below
+    ]
+    return updates, archived
+
+def _mongo_archive_writes(docs: List[Dict[str, Any]], now: datetime) -> List[ReplaceOne]:
+    """Return bulk operations copying memories into the archive."""
+    return [ReplaceOne({'_id': doc['_id']}, dict(doc, archived_at=now), upsert=True) for doc in docs]
+
+def _memory_ids(memory_ids: Union[str, List[str]]) -> List[str]:
+    """Accept a single id or a list of ids."""
+    return [memory_ids] if isinstance(memory_ids, str) else list(memory_ids)
+
+def _pg_filters(
+    level: Optional[MemoryLevel],
+    memory_type: Optional[MemoryType],
+    min_relevance: float,
+    tags: Optional[List[str]],
+    metadata_filters: Optional[Dict[str, Any]],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    adapt_json: Callable = Json
+) -> Tuple[tuple, list]:
+    """Return the filter shape and its parameters, in _pg_search_sql order."""
+    params = []
+    
+    if level:
+        params.append(_enum_value(level))
+    
+    if memory_type:
+        params.append(_enum_value(memory_type))
+    
+    if tags:
+        params.append(tags)
+    
+    if min_relevance > 0:
+        params.append(min_relevance)
+    
+    if since is not None:
+        params.append(since)
+    
+    if until is not None:
+        params.append(until)
+    
+    metadata_keys = tuple(sorted(metadata_filters)) if metadata_filters else ()
+    for key in metadata_keys:
+        params.append(adapt_json(metadata_filters[key]))
+    
+    # The shape determines the statement text; values are bound on EXECUTE
+    shape = (
+        bool(level), bool(memory_type), bool(tags), min_relevance > 0,
+        since is not None, until is not None, metadata_keys
+    )
+    return shape, params
+
+def _pg_search_sql(
+    kind: str,
+    filter_shape: tuple,
+    include_embedding: bool = True,
+    recency: bool = False,
+    after: bool = False
+) -> Tuple[str, List[str]]:
+    """Build a search statement text and parameter types.
+    
+    ``kind`` is one of ``ranked`` (server-side similarity ranking, binds
+    the filters, the query embedding and a limit), ``recent`` (newest
+    first, binds the filters and a limit), ``candidates`` (ids and
+    embeddings of every match, binds the filters), ``fetch`` (full rows
+    for an array of ids) or ``scan`` (full rows in id order after an id,
+    binds the id and a limit). Without ``include_embedding`` returned rows carry
+    a NULL embedding. With ``recency``, ``ranked`` orders by the
+    ``recency_weights`` blend (binding the current time and the half-life
+    after the query embedding) and ``candidates`` rows also carry their
+    timestamp and relevance score. With ``after``, ``ranked`` and
+    ``recent`` only return rows ordered below a ``(similarity, id)`` or
+    ``(timestamp, id)`` pair bound before the limit; ties are always
+    ordered by descending id.
+    """
+    types = []
+    columns = _PG_COLUMNS if include_embedding else _PG_COLUMNS_WITHOUT_EMBEDDING
+    
+    def param(type_name: str) -> str:
+        types.append(type_name)
+        return f"${len(types)}::{type_name}"
+    
+    if kind == "fetch":
+        return f"SELECT {columns} FROM memories WHERE id = ANY({param('text[]')})", types
+    
+    if kind == "scan":
+        return (
+            f"SELECT {columns} FROM memories WHERE id > {param('text')} "
+            f"ORDER BY id LIMIT {param('integer')}"
+        ), types
+    
+    has_level, has_type, has_tags, has_min_relevance, has_since, has_until, metadata_keys = filter_shape
+    conditions = ["1=1"]
+    if has_level:
+        conditions.append(f"level = {param('varchar')}")
+    if has_type:
+        conditions.append(f"memory_type = {param('varchar')}")
+    if has_tags:
+        conditions.append(f"tags && {param('text[]')}")
+    if has_min_relevance:
+        conditions.append(f"relevance_score >= {param('float8')}")
+    if has_since:
+        conditions.append(f"timestamp >= {param('timestamp')}")
+    if has_until:
+        conditions.append(f"timestamp <= {param('timestamp')}")
+    for key in metadata_keys:
+        # Keys are part of the shape so expression indexes on metadata->'key' apply
+        conditions.append(f"metadata->{_quote_literal(key)} = {param('jsonb')}")
+    where = " AND ".join(conditions)
+    
+    if kind == "candidates":
+        scored = "id, embedding, timestamp, relevance_score" if recency else "id, embedding"
+        return f"SELECT {scored} FROM memories WHERE {where}", types
+    
+    if kind == "ranked":
+        similarity = f"vector_similarity(embedding, {param('real[]')})"
+        if recency:
+            # The exponent is capped so that power() cannot underflow
+            age = f"greatest(extract(epoch FROM {param('timestamp')} - timestamp)::float8, 0)"
+            similarity = (
+                f"({similarity}) * power(0.5, least({age} / {param('float8')}, 1000)) * relevance_score"
+            )
+        text = f"SELECT {columns}, float4_score({similarity}) AS similarity FROM memories WHERE {where}"
+        if after:
+            # Keyset: resume below the previous page's last result
+            text = (
+                f"SELECT * FROM ({text}) ranked "
+                f"WHERE (similarity, id) < ({param('float8')}, {param('varchar')})"
+            )
+        text += " ORDER BY similarity DESC, id DESC"
+    else:
+        if after:
+            # The first condition is a range scan of the timestamp index
+            last = param('timestamp')
+            where += f" AND timestamp <= {last} AND (timestamp, id) < ({last}, {param('varchar')})"
+        text = f"SELECT {columns} FROM memories WHERE {where} ORDER BY timestamp DESC, id DESC"
+    return f"{text} LIMIT {param('integer')}", types
+
+def _pg_search_shape(
+    filter_shape: tuple,
+    query_embedding: Optional[np.ndarray],
+    include_embedding: bool,
+    recency: Optional[Tuple[datetime, float]] = None,
+    after: Optional[Tuple[Any, str]] = None
+) -> tuple:
+    """Return the shape of a search the database orders (``ranked`` or ``recent``)."""
+    if query_embedding is None:
+        return ("recent", filter_shape, include_embedding, False, after is not None)
+    return ("ranked", filter_shape, include_embedding, recency is not None, after is not None)
+
+def _pg_search_params(
+    params: list,
+    query_embedding: Optional[np.ndarray],
+    max_results: int,
+    recency: Optional[Tuple[datetime, float]] = None,
+    after: Optional[Tuple[Any, str]] = None
+) -> list:
+    """Bind the filters, the query embedding and recency of a ranked search, the keyset and the limit."""
+    keyset = list(after or ())
+    if query_embedding is None:
+        return params + keyset + [max_results]
+    return params + [
+        _pg_vector(query_embedding)
+    ] + list(recency or ()) + keyset + [max_results]
+
+def _search_page(
+    page_token: Optional[str],
+    query_embedding: Optional[np.ndarray],
+    recency_half_life: Optional[float]
+) -> Tuple[Optional[Tuple[datetime, float]], Optional[Tuple[Any, str]], int]:
+    """Return the recency, keyset and offset of a search page."""
+    page = PageToken.decode(page_token, query_embedding is not None) if page_token else None
+    # Ages are measured from one instant across every candidate and every page
+    now = page.now if page is not None and page.now is not None else datetime.now()
+    recency = (now, recency_half_life) if recency_half_life else None
+    if page is None:
+        return recency, None, 0
+    return recency, page.after, page.offset
+
+# Stored enum values map straight to their members; an Enum call per row is slow
+_LEVELS_BY_VALUE = {level.value: level for level in MemoryLevel}
+_MEMORY_TYPES_BY_VALUE = {memory_type.value: memory_type for memory_type in MemoryType}
+
+def _level(value: Any) -> MemoryLevel:
+    """Return the member of a stored memory level."""
+    return _LEVELS_BY_VALUE.get(value) or MemoryLevel(value)
+
+def _memory_type(value: Any) -> MemoryType:
+    """Return the member of a stored memory type."""
+    return _MEMORY_TYPES_BY_VALUE.get(value) or MemoryType(value)
+
+def _row_to_memory(row: tuple) -> Memory:
+    """Convert a PostgreSQL row in ``_PG_COLUMNS`` order to a memory."""
+    return Memory(
+        id=row[0],
+        content=row[1],
+        embedding=decode_embedding(row[2]) if row[2] is not None else None,
+        level=_level(row[3]),
+        memory_type=_memory_type(row[4]),
+        timestamp=row[5],
+        metadata=row[6],
+        relevance_score=row[7],
+        access_count=row[8],
+        last_accessed=row[9],
+        tags=_interned_tags(row[10]),
+        similarity=row[11] if len(row) > 11 else None
+    )
+
+def _mongo_filter(
+    level: Optional[MemoryLevel],
+    memory_type: Optional[MemoryType],
+    min_relevance: float,
+    tags: Optional[List[str]],
+    metadata_filters: Optional[Dict[str, Any]],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """Build a MongoDB query filter."""
+    filter_query = {}
+    
+    if level:
+        filter_query['level'] = _enum_value(level)
+    
+    if memory_type:
+        filter_query['memory_type'] = _enum_value(memory_type)
+    
+    if tags:
+        filter_query['tags'] = {'$in': tags}
+    
+    if min_relevance > 0:
+        filter_query['relevance_score'] = {'$gte': min_relevance}
+    
+    if since is not None or until is not None:
+        window = {}
+        if since is not None:
+            window['$gte'] = since
+        if until is not None:
+            window['$lte'] = until
+        filter_query['timestamp'] = window
+    
+    if metadata_filters:
+        for key, value in metadata_filters.items():
+            filter_query[f'metadata.{key}'] = value
+    
+    return filter_query
+
+# BSON vector header for float32 data (dtype byte, padding byte); the
+# payload that follows is the same little-endian blob SQLite stores
+_MONGO_VECTOR_HEADER = BinaryVectorDtype.FLOAT32.value + b"\x00"
+
+# Indexes backing the $match filters and the recency sort
+_MONGO_INDEXES = [
+    [("level", pymongo.ASCENDING), ("memory_type", pymongo.ASCENDING), ("timestamp", pymongo.DESCENDING)],
+    [("timestamp", pymongo.DESCENDING)],
+    [("tags", pymongo.ASCENDING)],
+    [("relevance_score", pymongo.DESCENDING)]
+]
+
+# Candidates are streamed from the cursor and scored this many at a time
+_SCORING_BATCH_SIZE = 2048
+
+# Names of server-side cursors streaming search results
+_STREAM_NAMES = itertools.count(1)
+
+# Projection for reads that don't need the embedding
+_MONGO_WITHOUT_EMBEDDING = {'embedding': 0}
+
+# Projection of the fields recency-weighted client scoring reads
+_MONGO_RECENCY_SCORED = {'embedding': 1, 'timestamp': 1, 'relevance_score': 1}
+
+# MongoClient instances shared by every store in the process, keyed by
+# connection parameters, with the number of stores using each
+_MONGO_CLIENTS: Dict[tuple, List[Any]] = {}
+_MONGO_CLIENTS_LOCK = threading.Lock()
+
+def _mongo_client_key(db_config: DatabaseConfig) -> tuple:
+    """Return the connection parameters that identify a shared client."""
+    return (
+        db_config.host,
+        db_config.port,
+        db_config.username,
+        db_config.password,
+        db_config.ssl,
+        db_config.pool_min_size,
+        db_config.pool_max_size
+    )
+
+def _acquire_mongo_client(db_config: DatabaseConfig) -> Tuple[tuple, pymongo.MongoClient]:
+    """Return the shared client for a configuration, creating it on first use."""
+    key = _mongo_client_key(db_config)
+    with _MONGO_CLIENTS_LOCK:
+        entry = _MONGO_CLIENTS.get(key)
+        if entry is None:
+            client = pymongo.MongoClient(
+                host=db_config.host,
+                port=db_config.port,
+                username=db_config.username,
+                password=db_config.password,
+                ssl=db_config.ssl,
+                minPoolSize=db_config.pool_min_size,
+                maxPoolSize=db_config.pool_max_size
+            )
+            entry = _MONGO_CLIENTS[key] = [client, 0]
+        entry[1] += 1
+        return key, entry[0]
+
+def _release_mongo_client(key: tuple) -> None:
+    """Drop one user of a shared client, closing it when none are left."""
+    with _MONGO_CLIENTS_LOCK:
+        entry = _MONGO_CLIENTS.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] <= 0:
+            del _MONGO_CLIENTS[key]
+            entry[0].close()
+
+def _chunks(items: List[Any], size: int):
+    """Yield consecutive slices of at most ``size`` items."""
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _mongo_vector_from_blob(blob: bytes) -> Binary:
+    """Wrap a float32 blob as a BSON vector."""
+    return Binary(_MONGO_VECTOR_HEADER + blob, VECTOR_SUBTYPE)
+
+def _mongo_vector(embedding: Any) -> Binary:
+    """Encode an embedding as a BSON float32 vector, which $vectorSearch can index."""
+    return _mongo_vector_from_blob(encode_embedding(embedding))
+
+def _is_mongo_vector(value: Any) -> bool:
+    """Return whether a stored embedding is already a BSON vector."""
+    return isinstance(value, Binary) and value.subtype == VECTOR_SUBTYPE
+
+def _mongo_embedding_blob(value: Any) -> Any:
+    """Return the float32 payload of a stored embedding without copying it."""
+    if _is_mongo_vector(value):
+        return memoryview(value)[len(_MONGO_VECTOR_HEADER):]
+    # Raw blobs (decoded as bytes) and legacy float lists are read as they are
+    return value
+
+def _mongo_vector_search_pipeline(
+    index: str,
+    query_embedding: np.ndarray,
+    filter_query: Dict[str, Any],
+    max_results: int,
+    num_candidates: int,
+    include_embedding: bool = True,
+    recency: Optional[Tuple[datetime, float]] = None,
+    after: Optional[Tuple[float, Any]] = None,
+    offset: int = 0
+) -> List[Dict[str, Any]]:
+    """Build a $vectorSearch pipeline over the ``embedding`` field.
+    
+    With ``recency`` (the current time and a half-life in seconds), every
+    candidate is re-ranked by the ``recency_weights`` blend, whose value
+    replaces the ``vectorSearchScore`` in ``similarity``. With ``after``
+    (a page's last similarity and id, ``offset`` results into the
+    ranking), the next ``max_results`` below it are returned and
+    ``similarity`` holds the cosine.
+    """
+    # The server caps numCandidates at 10000; pages end there
+    limit = offset + max_results
+    num_candidates = min(max(num_candidates, limit), 10000)
+    stage = {
+        'index': index,
+        'path': 'embedding',
+        'queryVector': _mongo_vector(query_embedding),
+        'numCandidates': num_candidates,
+        'limit': num_candidates if recency else min(limit, num_candidates)
+    }
+    if filter_query:
+        stage['filter'] = filter_query
+    pipeline = [
+        {'$vectorSearch': stage},
+        {'$addFields': {'similarity': {'$meta': 'vectorSearchScore'}}}
+    ]
+    if recency:
+        now, half_life = recency
+        age = {'$max': [{'$divide': [{'$subtract': [now, '$timestamp']}, 1000]}, 0]}
+        pipeline.extend([
+            {'$addFields': {'similarity': {'$multiply': [
+                {'$subtract': [{'$multiply': [2, '$similarity']}, 1]},
+                {'$pow': [0.5, {'$min': [{'$divide': [age, half_life]}, 1000]}]},
+                '$relevance_score'
+            ]}}}
+        ])
+    elif after is not None:
+        # Compared with the cosine the previous page returned, without rounding
+        pipeline.append({'$addFields': {'similarity': {'$subtract': [{'$multiply': [2, '$similarity']}, 1]}}})
+    if after is not None:
+        value, last_id = after
+        pipeline.append({'$match': {'$or': [
+            {'similarity': {'$lt': value}},
+            {'similarity': value, '_id': {'$lt': last_id}}
+        ]}})
+    if recency or after is not None:
+        pipeline.extend([
+            {'$sort': {'similarity': -1, '_id': -1}},
+            {'$limit': max_results}
+        ])
+    if not include_embedding:
+        pipeline.append({'$project': _MONGO_WITHOUT_EMBEDDING})
+    return pipeline
+
+def _mongo_keyset(filter_query: Dict[str, Any], after: Optional[Tuple[datetime, Any]]) -> Dict[str, Any]:
+    """Restrict a newest-first query to memories ordered below a ``(timestamp, id)``."""
+    if after is None:
+        return filter_query
+    timestamp, last_id = after
+    keyset = {
+        'timestamp': {'$lte': timestamp},
+        '$or': [{'timestamp': {'$lt': timestamp}}, {'_id': {'$lt': last_id}}]
+    }
+    return {'$and': [filter_query, keyset]} if filter_query else keyset
+
+# Newest first, ties by descending id, matching the keyset of later pages
+_MONGO_RECENT_SORT = [('timestamp', pymongo.DESCENDING), ('_id', pymongo.DESCENDING)]
+
+def _vector_search_similarity(score: float) -> float:
+    """Map a cosine vectorSearchScore, (1 + cos) / 2, back to the cosine."""
+    return 2.0 * score - 1.0
+
+def _mongo_document(memory: Memory) -> Dict[str, Any]:
+    """Convert a memory to a MongoDB document."""
+    return {
+        "_id": memory.id,
+        "content": memory.content,
+        "embedding": _mongo_vector(memory.embedding),
+        "level": _enum_value(memory.level),
+        "memory_type": _enum_value(memory.memory_type),
+        "timestamp": memory.timestamp,
+        "metadata": memory.metadata,
+        "relevance_score": memory.relevance_score,
+        "access_count": memory.access_count,
+        "last_accessed": memory.last_accessed,
+        "tags": memory.tags
+    }
+
+def _mongo_update(memory: Memory) -> Dict[str, Any]:
+    """Return the ``$set`` document for a full update; ids and timestamps are immutable."""
+    memory_dict = _mongo_document(memory)
+    del memory_dict["_id"]
+    del memory_dict["timestamp"]
+    return memory_dict
+
+def _doc_to_memory(doc: Dict[str, Any], similarity: Optional[float] = None) -> Memory:
+    """Convert a MongoDB document to a memory."""
+    return Memory(
+        id=str(doc['_id']),
+        content=doc['content'],
+        embedding=decode_embedding(_mongo_embedding_blob(doc['embedding'])) if 'embedding' in doc else None,
+        level=_level(doc['level']),
+        memory_type=_memory_type(doc['memory_type']),
+        timestamp=doc['timestamp'],
+        metadata=doc['metadata'],
+        relevance_score=doc['relevance_score'],
+        access_count=doc['access_count'],
+        last_accessed=doc['last_accessed'],
+        tags=_interned_tags(doc['tags']),
+        similarity=similarity
+    )
+
+def _rank_candidates(
+    ids: List[Any],
+    blobs: List[Any],
+    query_embedding: np.ndarray,
+    max_results: int,
+    weights: Optional[np.ndarray] = None,
+    after: Optional[Tuple[float, Any]] = None,
+    server_precision: bool = False
+) -> Tuple[List[Any], np.ndarray]:
+    """Score candidate embeddings in one vectorized pass.
+    
+    Returns the ids of the best ``max_results`` candidates, best first,
+    and their similarities, multiplied by ``weights`` when given. With
+    ``after``, only candidates ranked below that ``(score, id)`` count.
+    With ``server_precision``, scores are computed in float64 and rounded
+    to float32 as PostgreSQL's ranked scores are, so a page boundary from
+    either execution mode compares equal in the other.
+    """
+    query_vector = np.asarray(query_embedding, dtype=EMBEDDING_DTYPE)
+    matrix = stack_embeddings(blobs, query_vector.shape[0])
+    if server_precision:
+        scores = cosine_scores(matrix, query_vector, np.float64)
+        if weights is not None:
+            scores = scores * weights
+        scores = float32_scores(scores)
+    else:
+        scores = cosine_scores(matrix, query_vector)
+        if weights is not None:
+            scores = scores * weights
+    best = top_k_after(scores, max_results, ids.__getitem__, after)
+    return [ids[i] for i in best], scores[best]
+
+def _merge_ranked(
+    best: Tuple[List[Any], np.ndarray],
+    batch: Tuple[List[Any], np.ndarray],
+    max_results: int
+) -> Tuple[List[Any], np.ndarray]:
+    """Merge a ranked batch into the running best ``max_results``."""
+    ids = best[0] + batch[0]
+    scores = np.concatenate([best[1], batch[1]])
+    order = top_k_after(scores, max_results, ids.__getitem__)
+    return [ids[i] for i in order], scores[order]
+
+def _candidate_weights(
+    rows: List[tuple],
+    recency: Optional[Tuple[datetime, float]]
+) -> Optional[np.ndarray]:
+    """Return the ``recency_weights`` of ``(id, embedding, timestamp, relevance_score)`` rows."""
+    if recency is None:
+        return None
+    now, half_life = recency
+    return recency_weights([row[2] for row in rows], [row[3] for row in rows], now, half_life)
+
+def _rank_mongo_batch(
+    best: Tuple[List[Any], np.ndarray],
+    docs: List[Dict[str, Any]],
+    query_embedding: np.ndarray,
+    max_results: int,
+    recency: Optional[Tuple[datetime, float]] = None,
+    after: Optional[Tuple[float, Any]] = None
+) -> Tuple[List[Any], np.ndarray]:
+    """Score one batch of ``{_id, embedding}`` documents into the running best.
+    
+    With ``recency``, documents also carry ``timestamp`` and ``relevance_score``.
+    """
+    weights = None
+    if recency is not None:
+        now, half_life = recency
+        weights = recency_weights(
+            [doc['timestamp'] for doc in docs], [doc['relevance_score'] for doc in docs], now, half_life
+        )
+    batch = _rank_candidates(
+        [doc['_id'] for doc in docs],
+        [_mongo_embedding_blob(doc['embedding']) for doc in docs],
+        query_embedding,
+        max_results,
+        weights,
+        after
+    )
+    return _merge_ranked(best, batch, max_results)
+
+_SQLITE_PRAGMAS = """
+    PRAGMA journal_mode = WAL;
+    PRAGMA synchronous = NORMAL;
+    PRAGMA foreign_keys = ON;
+    PRAGMA busy_timeout = 5000;
+"""
+
+# Embeddings are float32 blobs, metadata and tags JSON text (queried with JSON1)
+_SQLITE_SCHEMA_SQL = """
+    CREATE TABLE IF NOT EXISTS memories (
+        id TEXT PRIMARY KEY,
+        content TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        level TEXT NOT NULL,
+        memory_type TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        metadata TEXT,
+        relevance_score REAL NOT NULL,
+        access_count INTEGER NOT NULL,
+        last_accessed TEXT,
+        tags TEXT
+    );
+    
+    -- One row per tag, so tag filters are index lookups instead of JSON scans
+    CREATE TABLE IF NOT EXISTS memory_tags (
+        tag TEXT NOT NULL,
+        memory_id TEXT NOT NULL REFERENCES memories (id) ON DELETE CASCADE,
+        PRIMARY KEY (tag, memory_id)
+    ) WITHOUT ROWID;
+    
+    CREATE INDEX IF NOT EXISTS memory_tags_memory_id ON memory_tags (memory_id);
+    
+    -- When the last decay pass over the store started
+    CREATE TABLE IF NOT EXISTS consolidation_state (
+        name TEXT PRIMARY KEY,
+        last_pass TEXT NOT NULL
+    );
+    
+    -- Memories archived by consolidation; searches only read memories
+    CREATE TABLE IF NOT EXISTS memories_archive (
+        id TEXT PRIMARY KEY,
+        content TEXT NOT NULL,
+        embedding BLOB NOT NULL,
+        level TEXT NOT NULL,
+        memory_type TEXT NOT NULL,
+        timestamp TEXT NOT NULL,
+        metadata TEXT,
+        relevance_score REAL NOT NULL,
+        access_count INTEGER NOT NULL,
+        last_accessed TEXT,
+        tags TEXT,
+        archived_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+    );
+    CREATE INDEX IF NOT EXISTS memories_level_type_timestamp ON memories (level, memory_type, timestamp);
+    CREATE INDEX IF NOT EXISTS memories_timestamp ON memories (timestamp);
+"""
+
+_SQLITE_INSERT_SQL = f"INSERT INTO memories ({_PG_COLUMNS}) VALUES ({', '.join(['?'] * 11)})"
+
+_SQLITE_UPDATE_SQL = """
+    UPDATE memories
+    SET content = ?,
+        embedding = ?,
+        level = ?,
+        memory_type = ?,
+        metadata = ?,
+        relevance_score = ?,
+        access_count = ?,
+        last_accessed = ?,
+        tags = ?
+    WHERE id = ?
+"""
+
+_SQLITE_INSERT_TAG_SQL = "INSERT OR IGNORE INTO memory_tags (tag, memory_id) VALUES (?, ?)"
+
+_SQLITE_DELETE_TAGS_SQL = "DELETE FROM memory_tags WHERE memory_id = ?"
+
+# Id lists are bound as one JSON array, so statement text doesn't vary with length
+_SQLITE_IDS = "(SELECT value FROM json_each(?))"
+
+# Unions a JSON array of tags into a memory's tags, keeping their order
+_SQLITE_ADD_TAGS_SQL = """
+    UPDATE memories
+    SET tags = (
+        SELECT json_group_array(value) FROM (
+            SELECT value FROM (
+                SELECT value, key AS position FROM json_each(coalesce(memories.tags, '[]'))
+                UNION ALL
+                SELECT value, 1000000 + key FROM json_each(?)
+            )
+            GROUP BY value
+            ORDER BY min(position)
+        )
+    )
+    WHERE id = ?
+"""
+
+_SQLITE_INCREMENT_ACCESS_SQL = f"""
+    UPDATE memories
+    SET access_count = access_count + ?,
+        last_accessed = max(coalesce(last_accessed, ?), ?)
+    WHERE id IN {_SQLITE_IDS}
+"""
+
+_SQLITE_APPLY_ACCESS_DELTA_SQL = """
+    UPDATE memories
+    SET access_count = access_count + ?,
+        last_accessed = max(coalesce(last_accessed, ?), ?)
+    WHERE id = ?
+"""
+
+_SQLITE_COLUMNS_WITHOUT_EMBEDDING = _PG_COLUMNS.replace("embedding", "NULL AS embedding")
+
+_SQLITE_DECAY_BATCH_SQL = """
+    SELECT id, access_count, coalesce(last_accessed, timestamp)
+    FROM memories
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+"""
+
+_SQLITE_ARCHIVE_SQL = f"""
+    INSERT OR REPLACE INTO memories_archive ({_PG_COLUMNS})
+    SELECT {_PG_COLUMNS} FROM memories WHERE id IN {_SQLITE_IDS}
+"""
+
+_SQLITE_RESTORE_SQL = f"""
+    INSERT INTO memories ({_PG_COLUMNS})
+    SELECT {_PG_COLUMNS} FROM memories_archive WHERE id IN {_SQLITE_IDS}
+"""
+
+# Rebuilds the tag rows of restored memories from their tags column
+_SQLITE_RESTORE_TAGS_SQL = f"""
+    INSERT OR IGNORE INTO memory_tags (tag, memory_id)
+    SELECT tag.value, memories.id
+    FROM memories, json_each(memories.tags) AS tag
+    WHERE memories.id IN {_SQLITE_IDS}
+"""
+
+def _sqlite_datetime(value: Optional[datetime]) -> Optional[str]:
+    """Store datetimes as ISO 8601 text, which sorts chronologically."""
+    return value.isoformat() if value is not None else None
+
+def _sqlite_keyset(after: Optional[Tuple[datetime, str]]) -> list:
+    """Bind the ``(timestamp, id)`` a newest-first page resumes below."""
+    if after is None:
+        return []
+    timestamp = _sqlite_datetime(after[0])
+    return [timestamp, timestamp, after[1]]
+
+def _sqlite_memory_params(memory: Memory) -> list:
+    """Return INSERT parameters for a memory, in _PG_COLUMNS order."""
+    return [
+        memory.id,
+        memory.content,
+        encode_embedding(memory.embedding),
+        _enum_value(memory.level),
+        _enum_value(memory.memory_type),
+        _sqlite_datetime(memory.timestamp),
+        json.dumps(memory.metadata),
+        memory.relevance_score,
+        memory.access_count,
+        _sqlite_datetime(memory.last_accessed),
+        json.dumps(memory.tags)
+    ]
+
+def _sqlite_update_params(memory: Memory) -> list:
+    """Return parameters for _SQLITE_UPDATE_SQL."""
+    params = _sqlite_memory_params(memory)
+    # SET columns skip the id and the immutable timestamp
+    return params[1:5] + params[6:] + [memory.id]
+
+def _sqlite_patch_value(field: str, value: Any) -> Any:
+    """Convert a partial update value to its SQLite representation."""
+    if field == "tags":
+        return json.dumps(value)
+    if field == "last_accessed":
+        return _sqlite_datetime(value)
+    return _patch_value(field, value, adapt_json=json.dumps, adapt_embedding=encode_embedding)
+
+def _sqlite_filters(
+    level: Optional[MemoryLevel],
+    memory_type: Optional[MemoryType],
+    min_relevance: float,
+    tags: Optional[List[str]],
+    metadata_filters: Optional[Dict[str, Any]],
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None
+) -> Tuple[str, list]:
+    """Build a SQLite WHERE clause and its parameters."""
+    conditions = ["1=1"]
+    params = []
+    
+    if level:
+        conditions.append("level = ?")
+        params.append(_enum_value(level))
+    
+    if memory_type:
+        conditions.append("memory_type = ?")
+        params.append(_enum_value(memory_type))
+    
+    if tags:
+        conditions.append(f"id IN (SELECT memory_id FROM memory_tags WHERE tag IN {_SQLITE_IDS})")
+        params.append(json.dumps(tags))
+    
+    if min_relevance > 0:
+        conditions.append("relevance_score >= ?")
+        params.append(min_relevance)
+    
+    if since is not None:
+        conditions.append("timestamp >= ?")
+        params.append(_sqlite_datetime(since))
+    
+    if until is not None:
+        conditions.append("timestamp <= ?")
+        params.append(_sqlite_datetime(until))
+    
+    if metadata_filters:
+        for key in sorted(metadata_filters):
+            conditions.append("json_extract(metadata, ?) = json_extract(?, '$')")
+            params.extend([f'$."{key}"', json.dumps(metadata_filters[key])])
+    
+    return " AND ".join(conditions), params
+
+def _sqlite_search_sql(
+    kind: str,
+    where: str = "",
+    include_embedding: bool = True,
+    recency: bool = False,
+    after: bool = False
+) -> str:
+    """Build a SQLite search statement.
+    
+    ``kind`` is ``recent`` (newest first, ties by descending id, binds a
+    limit after the filters and, with ``after``, a timestamp twice and an
+    id to resume below),
+    ``candidates`` (ids and embeddings of every match, plus timestamps and
+    relevance scores with ``recency``), ``fetch`` (rows for a JSON array
+    of ids) or ``scan`` (rows in id order after an id, binds the id and a
+    limit).
+    """
+    columns = _PG_COLUMNS if include_embedding else _SQLITE_COLUMNS_WITHOUT_EMBEDDING
+    if kind == "fetch":
+        return f"SELECT {columns} FROM memories WHERE id IN {_SQLITE_IDS}"
+    if kind == "scan":
+        return f"SELECT {columns} FROM memories WHERE id > ? ORDER BY id LIMIT ?"
+    if kind == "candidates":
+        scored = "id, embedding, timestamp, relevance_score" if recency else "id, embedding"
+        return f"SELECT {scored} FROM memories WHERE {where}"
+    if after:
+        where += " AND timestamp <= ? AND (timestamp, id) < (?, ?)"
+    return f"SELECT {columns} FROM memories WHERE {where} ORDER BY timestamp DESC, id DESC LIMIT ?"
+
+def _sqlite_row_to_memory(row: tuple, similarity: Optional[float] = None) -> Memory:
+    """Convert a SQLite row in ``_PG_COLUMNS`` order to a memory."""
+    return _row_to_memory((
+        row[0],
+        row[1],
+        row[2],
+        row[3],
+        row[4],
+        datetime.fromisoformat(row[5]),
+        json.loads(row[6]) if row[6] is not None else {},
+        row[7],
+        row[8],
+        datetime.fromisoformat(row[9]) if row[9] is not None else None,
+        json.loads(row[10]) if row[10] is not None else [],
+        similarity
+    ))
+
+class _ExecutionModes:
+    """Execution modes ``auto`` resolved per filter shape, reused for ``ttl`` seconds.
+    
+    The planner's estimate costs a round trip, and a filter shape's
+    selectivity rarely moves from one search to the next.
+    """
+    
+    def __init__(self, ttl: float, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._modes: "OrderedDict[Hashable, Tuple[str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, filter_shape: Hashable) -> Optional[str]:
+        """Return the unexpired mode resolved for a filter shape, if any."""
+        with self._lock:
+            entry = self._modes.get(filter_shape)
+            if entry is None or entry[1] <= time.monotonic():
+                return None
+            return entry[0]
+    
+    def put(self, filter_shape: Hashable, execution_mode: str) -> None:
+        """Remember the mode resolved for a filter shape."""
+        with self._lock:
+            self._modes[filter_shape] = (execution_mode, time.monotonic() + self.ttl)
+            self._modes.move_to_end(filter_shape)
+            while len(self._modes) > self.max_entries:
+                self._modes.popitem(last=False)
 
 class MemoryStore:
     """Store and retrieve memories."""
@@ -18,155 +1374,618 @@ class MemoryStore:
         """Initialize memory store."""
         self.db_config = db_config
         self.provider = db_config.provider
+        self.replicas: Optional[ReplicaRouter] = None
         
         # Initialize database connection
         if self.provider == DatabaseProvider.POSTGRESQL:
             self._init_postgresql()
         elif self.provider == DatabaseProvider.MONGODB:
             self._init_mongodb()
+        elif self.provider == DatabaseProvider.SQLITE:
+            self._init_sqlite()
+        elif self.provider == DatabaseProvider.MEMORY:
+            self._init_memory()
+        else:
+            raise ValueError(f"Unsupported database provider: {self.provider}")
+    
+    def _init_postgresql(self):
+        """Initialize PostgreSQL connection."""
+        try:
+            self.db = self._pg_connect({})
+            self.statement_cache = StatementCache(self.db_config.statement_cache_size)
+            self._execution_modes = _ExecutionModes(self.db_config.execution_mode_ttl)
+            self._partitions: Set[Tuple[str, Tuple[int, int]]] = set()
+            
+            # Create memories table if it doesn't exist
+            with self.db.cursor() as cursor:
+                cursor.execute(_PG_SETUP_SQL)
+                
+                if self.db_config.partitioned:
+                    cursor.execute(_PG_RELKIND_SQL)
+                    row = cursor.fetchone()
+                    if row is not None and row[0] != 'p':
+                        raise ValueError(_NOT_PARTITIONED_ERROR)
+                    cursor.execute(_PG_PARTITIONED_TABLE_SQL)
+                    cursor.execute(_PG_ID_REGISTRY_SQL)
+                else:
+                    cursor.execute(_PG_TABLE_SQL)
+                cursor.execute(_PG_TIMESTAMP_INDEX_SQL)
+                cursor.execute(_PG_ARCHIVE_TABLE_SQL)
+                cursor.execute(_PG_CONSOLIDATION_STATE_SQL)
+                self.db.commit()
+            
+            # Tables created by earlier versions hold FLOAT[] or blob embeddings
+            self.migrate_embeddings()
+            
+            if self.db_config.replicas:
+                self.replicas = ReplicaRouter(
+                    self.db_config.replicas,
+                    self._pg_connect,
+                    self.db_config.statement_cache_size,
+                    self.db_config.replica_max_lag,
+                    self.db_config.replica_retry_interval,
+                    self.db_config.read_your_writes
+                )
+        
+        except Exception as e:
+            raise Exception(f"Failed to initialize PostgreSQL: {str(e)}")
+    
+    def _pg_connect(self, endpoint: Dict[str, Any]):
+        """Open a PostgreSQL session, ``endpoint`` overriding the configured settings."""
+        settings = {
+            "host": self.db_config.host,
+            "port": self.db_config.port,
+            "database": self.db_config.database,
+            "username": self.db_config.username,
+            "password": self.db_config.password,
+            "ssl": self.db_config.ssl
+        }
+        settings.update(endpoint)
+        return psycopg2.connect(
+            host=settings["host"],
+            port=settings["port"],
+            database=settings["database"],
+            user=settings["username"],
+            password=settings["password"],
+            sslmode='require' if settings["ssl"] else 'disable'
+        )
+    
+    def _pg_commit(self) -> None:
+        """Commit a write on the primary."""
+        self.db.commit()
+        # The next transaction may run on a reset session
+        self.statement_cache.confirmed.clear()
+        if self.replicas is not None:
+            # With read_your_writes, the next reads stay on the primary
+            self.replicas.note_write()
+    
+    def _pg_read(self, run: Callable[[Any], Any]) -> Any:
+        """Run a read on a usable replica, else on the primary.
+        
+        A replica that fails with a connection error is ejected and the
+        read is retried on the primary.
+        """
+        replica = self.replicas.choose() if self.replicas is not None else None
+        if replica is not None:
+            try:
+                with replica.db.cursor() as cursor:
+                    return run(cursor)
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                self.replicas.eject(replica)
+        
+        with self.db.cursor() as cursor:
+            return run(cursor)
+    
+    def replica_stats(self) -> List[Dict[str, Any]]:
+        """Return the health, lag and read count of every replica."""
+        return self.replicas.stats() if self.replicas is not None else []
+    
+    def _ensure_partition(self, cursor, level: str, timestamp: datetime) -> None:
+        """Create the level and month partitions a row will be routed to."""
+        month = (timestamp.year, timestamp.month)
+        if not self.db_config.partitioned or (level, month) in self._partitions:
+            return
+        
+        for statement in _pg_partition_ddl(level, timestamp):
+            cursor.execute(statement)
+        self._partitions.add((level, month))
+    
+    def detach_partitions_before(self, cutoff: datetime) -> List[str]:
+        """Detach monthly partitions whose range ends on or before ``cutoff``.
+        
+        Detached partitions stay in the database as standalone tables, so old
+        months can be archived or dropped without touching live rows. They
+        are renamed ``<partition>_detached_<yyyymmddhhmmss>``, freeing the
+        partition name for rows later stored in that month. Returns the
+        names of the detached tables.
+        """
+        if self.provider != DatabaseProvider.POSTGRESQL or not self.db_config.partitioned:
+            return []
+        
+        detached = []
+        suffix = f"_detached_{datetime.now():%Y%m%d%H%M%S}"
+        with self.db.cursor() as cursor:
+            cursor.execute("""
+                SELECT parent.relname, child.relname
+                FROM pg_inherits level_link
+                JOIN pg_class parent ON parent.oid = level_link.inhrelid
+                JOIN pg_inherits month_link ON month_link.inhparent = parent.oid
+                JOIN pg_class child ON child.oid = month_link.inhrelid
+                WHERE level_link.inhparent = 'memories'::regclass
+            """)
+            for parent, child in cursor.fetchall():
+                match = _MONTH_PARTITION.search(child)
+                if match is None:
+                    continue
+                
+                year, month = int(match.group(1)), int(match.group(2))
+                end = datetime(year + month // 12, month % 12 + 1, 1)
+                if end > cutoff:
+                    continue
+                
+                # Detached rows leave the table and give up their ids
+                cursor.execute(f'DELETE FROM memory_ids USING "{child}" WHERE memory_ids.id = "{child}".id')
+                cursor.execute(f'ALTER TABLE "{parent}" DETACH PARTITION "{child}"')
+                cursor.execute(f'ALTER TABLE "{child}" RENAME TO "{child}{suffix}"')
+                detached.append(child + suffix)
+            self._pg_commit()
+        
+        # Rows for a detached month recreate its partition on demand
+        self._partitions.clear()
+        return detached
+    
+    def _init_mongodb(self):
+        """Initialize MongoDB connection."""
+        self._client_key = None
+        try:
+            self._client_key, client = _acquire_mongo_client(self.db_config)
+            self.db = client[self.db_config.database]
+            
+            for keys in _MONGO_INDEXES:
+                self.db.memories.create_index(keys)
+        
+        except Exception as e:
+            self.close()
+            raise Exception(f"Failed to initialize MongoDB: {str(e)}")
+    
+    def _init_sqlite(self):
+        """Initialize SQLite connection."""
+        try:
+            # sqlite3 keeps compiled statements in a per-connection cache
+            # keyed by SQL text, so every fixed statement is prepared once
+            self.db = sqlite3.connect(
+                self.db_config.database,
+                cached_statements=self.db_config.statement_cache_size
+            )
+            self.db.executescript(_SQLITE_PRAGMAS)
+            self.db.executescript(_SQLITE_SCHEMA_SQL)
+        
+        except Exception as e:
+            raise Exception(f"Failed to initialize SQLite: {str(e)}")
+    
+    def _init_memory(self):
+        """Initialize the in-process columnar store."""
+        try:
+            self.db = ColumnarMemoryTable()
+            self.archive = ColumnarMemoryTable()
+            self._last_decay_pass: Optional[datetime] = None
+            self._decay_lock = threading.Lock()
+            snapshot_path = self.db_config.snapshot_path
+            if snapshot_path and os.path.exists(snapshot_path):
+                self.db.load(snapshot_path)
+            if snapshot_path and os.path.exists(f"{snapshot_path}.archive"):
+                self.archive.load(f"{snapshot_path}.archive")
+        
+        except Exception as e:
+            raise Exception(f"Failed to initialize in-memory store: {str(e)}")
+    
+    def save_snapshot(self, path: Optional[str] = None) -> None:
+        """Write an in-memory store to ``path`` (default: the configured snapshot path).
+        
+        Archived memories, if any, are written to ``<path>.archive``.
+        """
+        if self.provider != DatabaseProvider.MEMORY:
+            raise ValueError(f"Snapshots are not supported for {self.provider}")
+        
+        path = path or self.db_config.snapshot_path
+        if not path:
+            raise ValueError("No snapshot path configured")
+        self.db.save(path)
+        if len(self.archive) or os.path.exists(f"{path}.archive"):
+            self.archive.save(f"{path}.archive")
+    
+    def _sqlite_replace_tags(self, memories: List[Memory]) -> None:
+        """Rewrite the tag side table rows of memories."""
+        self.db.executemany(_SQLITE_DELETE_TAGS_SQL, [(memory.id,) for memory in memories])
+        self.db.executemany(_SQLITE_INSERT_TAG_SQL, [
+            (tag, memory.id) for memory in memories for tag in memory.tags or []
+        ])
+    
+    def _execute_prepared(self, cursor, shape: tuple, build, params: list, prefix: str = "") -> None:
+        """Execute a query shape through a server-side prepared statement.
+        
+        ``build`` returns the statement text (with ``$n`` placeholders) and
+        its parameter types; it is only called the first time a shape is
+        seen on this connection. ``prefix`` is prepended to the EXECUTE,
+        e.g. to EXPLAIN it.
+        """
+        statement_cache = self.statement_cache
+        if cursor.connection is not self.db:
+            # Replica sessions prepare their own statements
+            statement_cache = self.replicas.statement_cache(cursor.connection)
+        
+        connection = cursor.connection
+        for attempt in range(2):
+            in_transaction = connection.info.transaction_status == psycopg2.extensions.TRANSACTION_STATUS_INTRANS
+            if not in_transaction:
+                # Also covers commits made outside _pg_commit
+                statement_cache.confirmed.clear()
+            name = statement_cache.get(shape)
+            # Statements not yet run in this transaction may have been lost
+            # with the session; a savepoint keeps earlier uncommitted work
+            guarded = in_transaction and name not in statement_cache.confirmed
+            if guarded:
+                _pg_control(connection, "SAVEPOINT memory_prepared")
+            try:
+                if name is None:
+                    text, types = build()
+                    name = statement_cache.new_name()
+                    declared = f" ({', '.join(types)})" if types else ""
+                    cursor.execute(f"PREPARE {name}{declared} AS {text}")
+                    _, evicted = statement_cache.add(shape, name)
+                    if evicted:
+                        cursor.execute(f"DEALLOCATE {evicted}")
+                
+                placeholders = f" ({', '.join(['%s'] * len(params))})" if params else ""
+                cursor.execute(f"{prefix}EXECUTE {name}{placeholders}", params)
+            except errors.InvalidSqlStatementName:
+                # The session lost its statements (e.g. DISCARD ALL); re-prepare once
+                if guarded:
+                    _pg_control(connection, "ROLLBACK TO SAVEPOINT memory_prepared; RELEASE SAVEPOINT memory_prepared")
+                else:
+                    connection.rollback()
+                statement_cache.clear()
+                if attempt:
+                    raise
+                continue
+            
+            if guarded:
+                _pg_control(connection, "RELEASE SAVEPOINT memory_prepared")
+            statement_cache.confirmed.add(name)
+            return
+    
+    def statement_stats(self) -> Dict[str, Any]:
+        """Return prepared statement cache statistics.
+        
+        Besides the client-side shape cache counters, reports how often the
+        server used generic (cached) versus custom plans per statement when
+        the server exposes it (PostgreSQL 14+).
+        """
+        if self.provider != DatabaseProvider.POSTGRESQL:
+            return {}
+        
+        stats = self.statement_cache.stats()
+        if self.db.server_version >= 140000:
+            with self.db.cursor() as cursor:
+                cursor.execute("""
+                    SELECT name, generic_plans, custom_plans
+                    FROM pg_prepared_statements
+                    WHERE name LIKE %s
+                """, (f"{self.statement_cache.prefix}%",))
+                rows = cursor.fetchall()
+            
+            generic_plans = sum(row[1] for row in rows)
+            custom_plans = sum(row[2] for row in rows)
+            stats.update({
+                "statements": {row[0]: {"generic_plans": row[1], "custom_plans": row[2]} for row in rows},
+                "generic_plans": generic_plans,
+                "custom_plans": custom_plans,
+                "plan_cache_hit_rate": generic_plans / (generic_plans + custom_plans)
+                if generic_plans + custom_plans else 0.0
+            })
+        return stats
+    
+    def _pg_estimate_candidates(self, cursor, filter_shape: tuple, filter_params: list) -> float:
+        """Return the planner's row estimate for a filter shape."""
+        shape = ("candidates", filter_shape)
+        self._execute_prepared(
+            cursor, shape, lambda: _pg_search_sql(*shape), filter_params,
+            prefix="EXPLAIN (FORMAT JSON) "
+        )
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]["Plan Rows"]
+    
+    def migrate_embeddings(self, batch_size: int = 1000) -> int:
+        """Convert embeddings stored in earlier formats to the current one.
+        
+        Returns the number of migrated memories. PostgreSQL rewrites FLOAT[]
+        and float32 blob columns as REAL[], one ``ALTER TABLE`` per table,
+        and is run automatically on connect; MongoDB documents (float arrays
+        or raw float32 blobs) are converted to BSON float32 vectors in
+        batches on demand, and reads keep accepting the older formats until
+        then.
+        """
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            with self.db.cursor() as cursor:
+                cursor.execute(_PG_LEGACY_EMBEDDINGS_SQL)
+                migrated = 0
+                for table, column_type in cursor.fetchall():
+                    for statement in _pg_migration_ddl(table, column_type):
+                        cursor.execute(statement)
+                    cursor.execute(f"SELECT count(*) FROM {table}")
+                    migrated += cursor.fetchone()[0]
+                self._pg_commit()
+                return migrated
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            migrated = 0
+            # Float arrays and raw float32 blobs are both rewritten as BSON vectors
+            updates = []
+            cursor = self.db.memories.find(
+                {'embedding': {'$type': ['array', 'binData']}},
+                {'embedding': 1}
+            ).batch_size(batch_size)
+            for doc in cursor:
+                if _is_mongo_vector(doc['embedding']):
+                    continue
+                
+                updates.append(UpdateOne(
+                    {'_id': doc['_id']},
+                    {'$set': {'embedding': _mongo_vector(decode_embedding(doc['embedding']))}}
+                ))
+                if len(updates) >= batch_size:
+                    self.db.memories.bulk_write(updates, ordered=False)
+                    migrated += len(updates)
+                    updates = []
+            
+            if updates:
+                self.db.memories.bulk_write(updates, ordered=False)
+                migrated += len(updates)
+            return migrated
+        
+        return 0
+    
+    def store_memory(self, memory: Memory) -> None:
+        """Store a memory."""
+        self.store_memories([memory])
+    
+    def store_memories(self, memories: List[Memory]) -> None:
+        """Store several memories.
+        
+        PostgreSQL inserts them in one transaction; MongoDB sends unordered
+        bulk inserts of up to ``write_batch_size`` documents.
+        """
+        if not memories:
+            return
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            with self.db.cursor() as cursor:
+                for memory in memories:
+                    self._ensure_partition(cursor, _enum_value(memory.level), memory.timestamp)
+                    self._execute_prepared(
+                        cursor, ("insert",), lambda: (_PG_INSERT_SQL, _PG_INSERT_TYPES),
+                        _pg_memory_params(memory)
+                    )
+                self._pg_commit()
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            for batch in _chunks(memories, self.db_config.write_batch_size):
+                self.db.memories.insert_many(
+                    [_mongo_document(memory) for memory in batch],
+                    ordered=False
+                )
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            with self.db:
+                self.db.executemany(
+                    _SQLITE_INSERT_SQL, [_sqlite_memory_params(memory) for memory in memories]
+                )
+                self._sqlite_replace_tags(memories)
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            self.db.insert(memories)
+    
+    def get_memories(self, memory_ids: List[str], include_embedding: bool = True) -> List[Memory]:
+        """Fetch memories by id, in the order given; missing ids are skipped."""
+        if not memory_ids:
+            return []
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            def fetch(cursor):
+                shape = ("fetch", (), include_embedding)
+                self._execute_prepared(cursor, shape, lambda: _pg_search_sql(*shape), [list(memory_ids)])
+                return {row[0]: _row_to_memory(row) for row in cursor.fetchall()}
+            
+            found = self._pg_read(fetch)
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            projection = None if include_embedding else _MONGO_WITHOUT_EMBEDDING
+            found = {
+                str(doc['_id']): _doc_to_memory(doc)
+                for doc in self.db.memories.find({'_id': {'$in': list(memory_ids)}}, projection)
+            }
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            rows = self.db.execute(
+                _sqlite_search_sql("fetch", include_embedding=include_embedding),
+                (json.dumps(list(memory_ids)),)
+            )
+            found = {row[0]: _sqlite_row_to_memory(row) for row in rows}
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            return self.db.get(list(memory_ids), include_embedding)
+        
+        else:
+            raise ValueError(f"Unsupported database provider: {self.provider}")
+        
+        return [found[memory_id] for memory_id in memory_ids if memory_id in found]
+    
+    def scan_memories(
+        self,
+        after_id: str = "",
+        batch_size: int = 1000,
+        include_embedding: bool = True
+    ) -> List[Memory]:
+        """Return up to ``batch_size`` memories with ids after ``after_id``, in id order.
+        
+        Passing the last id of each batch walks the whole store with
+        keyset reads; an empty batch marks the end. Archived memories are
+        not included.
+        """
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            def scan(cursor):
+                shape = ("scan", (), include_embedding)
+                self._execute_prepared(
+                    cursor, shape, lambda: _pg_search_sql(*shape), [after_id, batch_size]
+                )
+                return [_row_to_memory(row) for row in cursor.fetchall()]
+            
+            return self._pg_read(scan)
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            projection = None if include_embedding else _MONGO_WITHOUT_EMBEDDING
+            results = self.db.memories.find({'_id': {'$gt': after_id}}, projection)
+            results = results.sort('_id', pymongo.ASCENDING).limit(batch_size)
+            return [_doc_to_memory(doc) for doc in results]
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            rows = self.db.execute(
+                _sqlite_search_sql("scan", include_embedding=include_embedding), (after_id, batch_size)
+            )
+            return [_sqlite_row_to_memory(row) for row in rows]
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            return self.db.scan(after_id, batch_size, include_embedding)
+        
         else:
             raise ValueError(f"Unsupported database provider: {self.provider}")
     
-    def _init_postgresql(self):
-        """Initialize PostgreSQL connection."""
-        try:
-            self.db = psycopg2.connect(
-                host=self.db_config.host,
-                port=self.db_config.port,
-                database=self.db_config.database,
-                user=self.db_config.username,
-                password=self.db_config.password,
-                sslmode='require' if self.db_config.ssl else 'disable'
+    def search_memories(
+        self,
+        query_embedding: Optional[np.ndarray] = None,
+        level: Optional[MemoryLevel] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_relevance: float = 0.0,
+        max_results: int = 10,
+        tags: Optional[List[str]] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        page_token: Optional[str] = None
+    ) -> List[Memory]:
+        """Search for memories based on query parameters.
+        
+        When ``query_embedding`` is given, results are ordered by cosine
+        similarity (best first) and carry it in ``Memory.similarity``.
+        With ``recency_half_life`` (seconds) they are ordered by similarity
+        times ``2 ** (-age / recency_half_life)`` times relevance score
+        instead, and carry that blend. ``since`` and ``until`` keep only
+        memories whose timestamp lies in the window (bounds included).
+        With ``include_embedding=False`` embeddings are not transferred and
+        returned memories have ``embedding`` set to ``None``.
+        
+        ``execution_mode`` selects where similarity is computed:
+        ``server`` ranks every matching row inside PostgreSQL, ``client``
+        lets the database apply the filters and return only ids and
+        embeddings, which are scored here with one vectorized product before
+        the winning rows are fetched. ``auto`` picks ``client`` when the
+        planner estimates at most ``client_scoring_max_candidates`` matches;
+        the choice is reused per filter shape for ``execution_mode_ttl``
+        seconds.
+        On MongoDB, ``auto`` and ``server`` use a ``$vectorSearch`` stage when
+        ``DatabaseConfig.mongo_vector_index`` names a cosine vector index on
+        ``embedding`` (its filter fields must cover the filters used);
+        otherwise the filtered ids and embeddings are streamed and scored on
+        the client. SQLite always scores on the client, and in-memory stores
+        score their embedding matrix in process. PostgreSQL searches run on
+        a read replica when ``DatabaseConfig.replicas`` lists any.
+        
+        ``page_token`` (see ``PageToken``) continues a search below the last
+        result of a previous page, ties ordered by descending id. PostgreSQL
+        scores are rounded to float32 in both execution modes, so a walk
+        may switch modes, as ``auto`` can, between pages.
+        """
+        if execution_mode not in ("auto", "server", "client"):
+            raise ValueError(f"Unsupported execution mode: {execution_mode}")
+        
+        recency, after, offset = _search_page(page_token, query_embedding, recency_half_life)
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            filter_shape, params = _pg_filters(
+                level, memory_type, min_relevance, tags, metadata_filters, since, until
             )
             
-            # Create memories table if it doesn't exist
-            with self.db.cursor() as cursor:
-                # Create vector similarity operator
-                cursor.execute("""
-                    CREATE OR REPLACE FUNCTION vector_similarity(a FLOAT[], b FLOAT[]) RETURNS FLOAT AS $$
-                    DECLARE
-                        dot_product FLOAT := 0;
-                        norm_a FLOAT := 0;
-                        norm_b FLOAT := 0;
-                        i INTEGER;
-                    BEGIN
-                        IF array_length(a, 1) != array_length(b, 1) THEN
-                            RETURN 0;
-                        END IF;
-                        
-                        FOR i IN 1..array_length(a, 1) LOOP
-                            dot_product := dot_product + (a[i] * b[i]);
-                            norm_a := norm_a + (a[i] * a[i]);
-                            norm_b := norm_b + (b[i] * b[i]);
-                        END LOOP;
-                        
-                        IF norm_a = 0 OR norm_b = 0 THEN
-                            RETURN 0;
-                        END IF;
-                        
-                        RETURN dot_product / (sqrt(norm_a) * sqrt(norm_b));
-                    END;
-                    $$ LANGUAGE plpgsql IMMUTABLE;
-                    
-                    -- Create operator if it doesn't exist
-                    DO $$
-                    BEGIN
-                        IF NOT EXISTS (
-                            SELECT 1 FROM pg_operator WHERE oprname = '<->'
-                            AND oprleft = 'float[]'::regtype
-                            AND oprright = 'float[]'::regtype
-                        ) THEN
-                            CREATE OPERATOR <-> (
-                                LEFTARG = FLOAT[],
-                                RIGHTARG = FLOAT[],
-                                FUNCTION = vector_similarity,
-                                COMMUTATOR = <->
-                            );
-                        END IF;
-                    END
-                    $$;
-                """)
-                
-                # Create memories table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS memories (
-                        id VARCHAR(36) PRIMARY KEY,
-                        content TEXT NOT NULL,
-                        embedding FLOAT[] NOT NULL,
-                        level VARCHAR(50) NOT NULL,
-                        memory_type VARCHAR(50) NOT NULL,
-                        timestamp TIMESTAMP NOT NULL,
-                        metadata JSONB,
-                        relevance_score FLOAT NOT NULL,
-                        access_count INTEGER NOT NULL,
-                        last_accessed TIMESTAMP,
-                        tags TEXT[]
-                    )
-                """)
-                self.db.commit()
-                
-        except Exception as e:
-            raise Exception(f"Failed to initialize PostgreSQL: {str(e)}")
-    
-    def _init_mongodb(self):
-        """Initialize MongoDB connection."""
-        try:
-            client = pymongo.MongoClient(
-                host=self.db_config.host,
-                port=self.db_config.port,
-                username=self.db_config.username,
-                password=self.db_config.password,
-                ssl=self.db_config.ssl
+            return self._pg_read(lambda cursor: self._pg_search(
+                cursor, filter_shape, params, query_embedding, max_results,
+                execution_mode, include_embedding, recency, after
+            ))
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            filter_query = _mongo_filter(
+                level, memory_type, min_relevance, tags, metadata_filters, since, until
             )
-            self.db = client[self.db_config.database]
             
-        except Exception as e:
-            raise Exception(f"Failed to initialize MongoDB: {str(e)}")
-    
-    def store_memory(self, memory: Memory) -> None:
-        """Store a memory."""
-        if self.provider == DatabaseProvider.POSTGRESQL:
-            with self.db.cursor() as cursor:
-                cursor.execute("""
-                    INSERT INTO memories (
-                        id, content, embedding, level, memory_type,
-                        timestamp, metadata, relevance_score,
-                        access_count, last_accessed, tags
-                    ) VALUES (
-                        %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s
-                    )
-                """, (
-                    memory.id,
-                    memory.content,
-                    memory.embedding.tolist(),
-                    memory.level.value if hasattr(memory.level, 'value') else memory.level,
-                    memory.memory_type.value if hasattr(memory.memory_type, 'value') else memory.memory_type,
-                    memory.timestamp,
-                    Json(memory.metadata),
-                    memory.relevance_score,
-                    memory.access_count,
-                    memory.last_accessed,
-                    memory.tags
+            projection = None if include_embedding else _MONGO_WITHOUT_EMBEDDING
+            
+            if query_embedding is None:
+                results = self.db.memories.find(_mongo_keyset(filter_query, after), projection)
+                results = results.sort(_MONGO_RECENT_SORT).limit(max_results)
+                return [_doc_to_memory(doc) for doc in results]
+            
+            if self.db_config.mongo_vector_index and execution_mode != "client":
+                results = self.db.memories.aggregate(_mongo_vector_search_pipeline(
+                    self.db_config.mongo_vector_index,
+                    query_embedding,
+                    filter_query,
+                    max_results,
+                    (offset + max_results) * self.db_config.vector_search_candidates,
+                    include_embedding,
+                    recency,
+                    after,
+                    offset
                 ))
-                self.db.commit()
-                
-        elif self.provider == DatabaseProvider.MONGODB:
-            memory_dict = {
-                "_id": memory.id,
-                "content": memory.content,
-                "embedding": memory.embedding.tolist(),
-                "level": memory.level.value if hasattr(memory.level, 'value') else memory.level,
-                "memory_type": memory.memory_type.value if hasattr(memory.memory_type, 'value') else memory.memory_type,
-                "timestamp": memory.timestamp,
-                "metadata": memory.metadata,
-                "relevance_score": memory.relevance_score,
-                "access_count": memory.access_count,
-                "last_accessed": memory.last_accessed,
-                "tags": memory.tags
-            }
-            self.db.memories.insert_one(memory_dict)
+                return [
+                    _doc_to_memory(doc, similarity=(
+                        doc['similarity'] if recency or after else _vector_search_similarity(doc['similarity'])
+                    ))
+                    for doc in results
+                ]
+            
+            # Stream the filtered ids and embeddings in batches, keeping only
+            # the running best, then fetch the winners
+            ids, scores = self._mongo_rank(filter_query, query_embedding, max_results, recency, after)
+            return self._mongo_fetch_ranked(ids, scores, projection)
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            where, params = _sqlite_filters(
+                level, memory_type, min_relevance, tags, metadata_filters, since, until
+            )
+            
+            if query_embedding is None:
+                rows = self.db.execute(
+                    _sqlite_search_sql("recent", where, include_embedding, after=after is not None),
+                    params + _sqlite_keyset(after) + [max_results]
+                )
+                return [_sqlite_row_to_memory(row) for row in rows]
+            
+            ids, scores = self._sqlite_rank(where, params, query_embedding, max_results, recency, after)
+            return self._sqlite_fetch_ranked(ids, scores, include_embedding)
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            return self.db.search(
+                query_embedding, level, memory_type, min_relevance, max_results,
+                tags, metadata_filters, include_embedding, since, until, recency, after
+            )
+        
+        else:
+            raise ValueError(f"Unsupported database provider: {self.provider}")
     
-    def search_memories(
+    def iter_search_memories(
         self,
         query_embedding: Optional[np.ndarray] = None,
         level: Optional[MemoryLevel] = None,
@@ -174,216 +1993,802 @@ class MemoryStore:
         min_relevance: float = 0.0,
         max_results: int = 10,
         tags: Optional[List[str]] = None,
-        metadata_filters: Optional[Dict[str, Any]] = None
-    ) -> List[Memory]:
-        """Search for memories based on query parameters."""
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        page_token: Optional[str] = None,
+        batch_size: int = 100
+    ) -> Iterator[Memory]:
+        """Yield the results of ``search_memories``, best first, as they arrive.
+        
+        Where the database orders the results (searches without an
+        embedding, PostgreSQL ``server`` ranking, MongoDB ``$vectorSearch``),
+        rows are read from a cursor ``batch_size`` at a time. Where
+        similarity is scored here, the candidates are scored first and the
+        winners are then fetched ``batch_size`` at a time. Either way the
+        first results can be used before the rest are transferred, and
+        closing the generator early skips the remaining reads.
+        """
+        if execution_mode not in ("auto", "server", "client"):
+            raise ValueError(f"Unsupported execution mode: {execution_mode}")
+        
+        recency, after, offset = _search_page(page_token, query_embedding, recency_half_life)
+        
         if self.provider == DatabaseProvider.POSTGRESQL:
-            # Build base query
-            query = """
-                SELECT *
-                FROM memories
-                WHERE 1=1
-            """
-            params = []
-            
-            # Add filters
-            if level:
-                query += " AND level = %s"
-                params.append(level.value if hasattr(level, 'value') else level)
-                
-            if memory_type:
-                query += " AND memory_type = %s"
-                params.append(memory_type.value if hasattr(memory_type, 'value') else memory_type)
-                
-            if tags:
-                query += " AND tags && %s"
-                params.append(tags)
-                
-            # Add relevance score filter
-            if min_relevance > 0:
-                query += " AND relevance_score >= %s"
-                params.append(min_relevance)
+            filter_shape, params = _pg_filters(
+                level, memory_type, min_relevance, tags, metadata_filters, since, until
+            )
             
-            # Add metadata filters
-            if metadata_filters:
-                for key, value in metadata_filters.items():
-                    query += f" AND metadata->%s = %s"
-                    params.extend([key, Json(value)])
+            if query_embedding is not None and execution_mode == "auto":
+                execution_mode = self._pg_read(lambda cursor: self._pg_execution_mode(
+                    cursor, filter_shape, params, execution_mode
+                ))
             
-            # Add similarity calculation and order by relevance
-            if query_embedding is not None:
-                query += """
-                    ORDER BY (
-                        embedding <-> %s
-                    ) ASC
-                """
-                params.append(query_embedding.tolist())
-            else:
-                query += " ORDER BY timestamp DESC"
-                
-            # Add limit
-            query += " LIMIT %s"
-            params.append(max_results)
+            if query_embedding is None or execution_mode == "server":
+                rows = self._pg_stream(
+                    _pg_search_shape(filter_shape, query_embedding, include_embedding, recency, after),
+                    _pg_search_params(params, query_embedding, max_results, recency, after),
+                    batch_size
+                )
+                for batch in rows:
+                    yield from (_row_to_memory(row) for row in batch)
+                return
             
-            # Execute query
-            with self.db.cursor() as cursor:
-                cursor.execute(query, params)
-                rows = cursor.fetchall()
-                
-                # Convert rows to Memory objects
-                memories = []
-                for row in rows:
-                    memory = Memory(
-                        id=row[0],
-                        content=row[1],
-                        embedding=np.array(row[2]),
-                        level=MemoryLevel(row[3]) if isinstance(row[3], str) else row[3],
-                        memory_type=MemoryType(row[4]) if isinstance(row[4], str) else row[4],
-                        timestamp=row[5],
-                        metadata=row[6],
-                        relevance_score=row[7],
-                        access_count=row[8],
-                        last_accessed=row[9],
-                        tags=row[10]
-                    )
-                    memories.append(memory)
-                
-                return memories
-                
+            ids, scores = self._pg_read(lambda cursor: self._pg_rank(
+                cursor, filter_shape, params, query_embedding, max_results, recency, after
+            ))
+            for batch_ids, batch_scores in zip(_chunks(ids, batch_size), _chunks(scores, batch_size)):
+                yield from self._pg_read(lambda cursor: self._pg_fetch_ranked(
+                    cursor, batch_ids, batch_scores, include_embedding
+                ))
+        
         elif self.provider == DatabaseProvider.MONGODB:
-            # Build query filter
-            filter_query = {}
+            filter_query = _mongo_filter(
+                level, memory_type, min_relevance, tags, metadata_filters, since, until
+            )
             
-            if level:
-                filter_query['level'] = level.value if hasattr(level, 'value') else level
-                
-            if memory_type:
-                filter_query['memory_type'] = memory_type.value if hasattr(memory_type, 'value') else memory_type
-                
-            if tags:
-                filter_query['tags'] = {'$in': tags}
-                
-            if min_relevance > 0:
-                filter_query['relevance_score'] = {'$gte': min_relevance}
-                
-            if metadata_filters:
-                for key, value in metadata_filters.items():
-                    filter_query[f'metadata.{key}'] = value
+            projection = None if include_embedding else _MONGO_WITHOUT_EMBEDDING
             
-            # Add vector similarity search
-            pipeline = [
-                {'$match': filter_query}
-            ]
+            if query_embedding is None:
+                results = self.db.memories.find(_mongo_keyset(filter_query, after), projection)
+                results = results.sort(_MONGO_RECENT_SORT).limit(max_results)
+                results.batch_size(batch_size)
+                yield from (_doc_to_memory(doc) for doc in results)
+                return
             
-            if query_embedding is not None:
-                pipeline.extend([
-                    {
-                        '$addFields': {
-                            'similarity': {
-                                '$reduce': {
-                                    'input': {'$range': [0, {'$size': '$embedding'}]},
-                                    'initialValue': 0,
-                                    'in': {
-                                        '$add': [
-                                            '$$value',
-                                            {
-                                                '$multiply': [
-                                                    {'$arrayElemAt': ['$embedding', '$$this']},
-                                                    {'$arrayElemAt': [query_embedding.tolist(), '$$this']}
-                                                ]
-                                            }
-                                        ]
-                                    }
-                                }
-                            }
-                        }
-                    },
-                    {'$sort': {'similarity': -1}}
-                ])
-            else:
-                pipeline.append({'$sort': {'timestamp': -1}})
-                
-            pipeline.append({'$limit': max_results})
+            if self.db_config.mongo_vector_index and execution_mode != "client":
+                results = self.db.memories.aggregate(_mongo_vector_search_pipeline(
+                    self.db_config.mongo_vector_index,
+                    query_embedding,
+                    filter_query,
+                    max_results,
+                    (offset + max_results) * self.db_config.vector_search_candidates,
+                    include_embedding,
+                    recency,
+                    after,
+                    offset
+                ), batchSize=batch_size)
+                yield from (
+                    _doc_to_memory(doc, similarity=(
+                        doc['similarity'] if recency or after else _vector_search_similarity(doc['similarity'])
+                    ))
+                    for doc in results
+                )
+                return
             
-            # Execute query
-            results = self.db.memories.aggregate(pipeline)
+            ids, scores = self._mongo_rank(filter_query, query_embedding, max_results, recency, after)
+            for batch_ids, batch_scores in zip(_chunks(ids, batch_size), _chunks(scores, batch_size)):
+                yield from self._mongo_fetch_ranked(batch_ids, batch_scores, projection)
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            where, params = _sqlite_filters(
+                level, memory_type, min_relevance, tags, metadata_filters, since, until
+            )
             
-            # Convert results to Memory objects
-            memories = []
-            for doc in results:
-                memory = Memory(
-                    id=str(doc['_id']),
-                    content=doc['content'],
-                    embedding=np.array(doc['embedding']),
-                    level=MemoryLevel(doc['level']) if isinstance(doc['level'], str) else doc['level'],
-                    memory_type=MemoryType(doc['memory_type']) if isinstance(doc['memory_type'], str) else doc['memory_type'],
-                    timestamp=doc['timestamp'],
-                    metadata=doc['metadata'],
-                    relevance_score=doc['relevance_score'],
-                    access_count=doc['access_count'],
-                    last_accessed=doc['last_accessed'],
-                    tags=doc['tags']
+            if query_embedding is None:
+                cursor = self.db.execute(
+                    _sqlite_search_sql("recent", where, include_embedding, after=after is not None),
+                    params + _sqlite_keyset(after) + [max_results]
                 )
-                memories.append(memory)
-            
-            return memories
+                for rows in iter(lambda: cursor.fetchmany(batch_size), []):
+                    yield from (_sqlite_row_to_memory(row) for row in rows)
+                return
             
+            ids, scores = self._sqlite_rank(where, params, query_embedding, max_results, recency, after)
+            for batch_ids, batch_scores in zip(_chunks(ids, batch_size), _chunks(scores, batch_size)):
+                yield from self._sqlite_fetch_ranked(batch_ids, batch_scores, include_embedding)
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            # Scoring the embedding matrix is a single vectorized pass
+            yield from self.db.search(
+                query_embedding, level, memory_type, min_relevance, max_results,
+                tags, metadata_filters, include_embedding, since, until, recency, after
+            )
+        
         else:
             raise ValueError(f"Unsupported database provider: {self.provider}")
     
+    def _pg_search(
+        self,
+        cursor,
+        filter_shape: tuple,
+        params: list,
+        query_embedding: Optional[np.ndarray],
+        max_results: int,
+        execution_mode: str,
+        include_embedding: bool,
+        recency: Optional[Tuple[datetime, float]] = None,
+        after: Optional[Tuple[Any, str]] = None
+    ) -> List[Memory]:
+        """Run a PostgreSQL search on ``cursor``."""
+        if query_embedding is not None:
+            execution_mode = self._pg_execution_mode(cursor, filter_shape, params, execution_mode)
+        
+        if query_embedding is None or execution_mode == "server":
+            shape = _pg_search_shape(filter_shape, query_embedding, include_embedding, recency, after)
+            self._execute_prepared(
+                cursor, shape, lambda: _pg_search_sql(*shape),
+                _pg_search_params(params, query_embedding, max_results, recency, after)
+            )
+            return [_row_to_memory(row) for row in cursor.fetchall()]
+        
+        ids, scores = self._pg_rank(
+            cursor, filter_shape, params, query_embedding, max_results, recency, after
+        )
+        return self._pg_fetch_ranked(cursor, ids, scores, include_embedding)
+    
+    def _pg_execution_mode(self, cursor, filter_shape: tuple, params: list, execution_mode: str) -> str:
+        """Resolve ``auto`` to ``client`` or ``server`` from the planner's estimate."""
+        if execution_mode != "auto":
+            return execution_mode
+        execution_mode = self._execution_modes.get(filter_shape)
+        if execution_mode is None:
+            estimate = self._pg_estimate_candidates(cursor, filter_shape, params)
+            execution_mode = "client" if estimate <= self.db_config.client_scoring_max_candidates else "server"
+            self._execution_modes.put(filter_shape, execution_mode)
+        return execution_mode
+    
+    def _pg_rank(
+        self,
+        cursor,
+        filter_shape: tuple,
+        params: list,
+        query_embedding: np.ndarray,
+        max_results: int,
+        recency: Optional[Tuple[datetime, float]] = None,
+        after: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """Return the ids and scores of the best matches (below ``after``, if given), scored here."""
+        # Filters run in the database, similarity runs here
+        shape = ("candidates", filter_shape)
+        if recency is not None:
+            # Timestamps and relevance scores come along for the blend
+            shape += (True, True)
+        self._execute_prepared(cursor, shape, lambda: _pg_search_sql(*shape), params)
+        candidates = cursor.fetchall()
+        return _rank_candidates(
+            [row[0] for row in candidates],
+            [row[1] for row in candidates],
+            query_embedding,
+            max_results,
+            _candidate_weights(candidates, recency),
+            after,
+            server_precision=True
+        )
+    
+    def _pg_fetch_ranked(
+        self,
+        cursor,
+        ids: List[str],
+        scores: np.ndarray,
+        include_embedding: bool
+    ) -> List[Memory]:
+        """Fetch ranked memories, best first."""
+        if not ids:
+            return []
+        
+        shape = ("fetch", (), include_embedding)
+        self._execute_prepared(cursor, shape, lambda: _pg_search_sql(*shape), [ids])
+        rows = {row[0]: row for row in cursor.fetchall()}
+        
+        # Convert rows to Memory objects, best first
+        return [
+            _row_to_memory(rows[memory_id] + (float(score),))
+            for memory_id, score in zip(ids, scores)
+            if memory_id in rows
+        ]
+    
+    def _pg_stream(self, shape: tuple, params: list, batch_size: int) -> Iterator[List[tuple]]:
+        """Yield the rows of a search shape in batches from a server-side cursor.
+        
+        Named cursors cannot run prepared statements, so the statement text
+        is sent with ``$n`` turned into named placeholders. The cursor is
+        declared ``WITH HOLD`` and survives the commits of writes made while
+        it is read.
+        """
+        text = re.sub(r"\$(\d+)", r"%(p\1)s", _pg_search_sql(*shape)[0].replace("%", "%%"))
+        params = {f"p{i}": value for i, value in enumerate(params, start=1)}
+        replica = self.replicas.choose() if self.replicas is not None else None
+        connections = ([replica.db] if replica is not None else []) + [self.db]
+        for connection in connections:
+            cursor = connection.cursor(f"memory_stream_{next(_STREAM_NAMES)}", withhold=True)
+            try:
+                cursor.execute(text, params)
+                rows = cursor.fetchmany(batch_size)
+                break
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                if connection is self.db:
+                    raise
+                # Nothing was yielded yet, so the primary can take over
+                self.replicas.eject(replica)
+        
+        try:
+            while rows:
+                yield rows
+                rows = cursor.fetchmany(batch_size)
+        finally:
+            cursor.close()
+    
+    def _mongo_rank(
+        self,
+        filter_query: Dict[str, Any],
+        query_embedding: np.ndarray,
+        max_results: int,
+        recency: Optional[Tuple[datetime, float]] = None,
+        after: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """Return the ids and scores of the best matches (below ``after``, if given), scored here in streamed batches."""
+        scored = _MONGO_RECENCY_SCORED if recency else {'embedding': 1}
+        cursor = self.db.memories.find(filter_query, scored)
+        cursor.batch_size(_SCORING_BATCH_SIZE)
+        ids, scores = [], np.empty(0, dtype=EMBEDDING_DTYPE)
+        while True:
+            docs = list(itertools.islice(cursor, _SCORING_BATCH_SIZE))
+            if not docs:
+                break
+            ids, scores = _rank_mongo_batch(
+                (ids, scores), docs, query_embedding, max_results, recency, after
+            )
+        return ids, scores
+    
+    def _mongo_fetch_ranked(
+        self,
+        ids: List[str],
+        scores: np.ndarray,
+        projection: Optional[Dict[str, int]]
+    ) -> List[Memory]:
+        """Fetch ranked memories, best first."""
+        docs = {
+            doc['_id']: doc
+            for doc in self.db.memories.find({'_id': {'$in': ids}}, projection)
+        }
+        
+        return [
+            _doc_to_memory(docs[memory_id], similarity=float(score))
+            for memory_id, score in zip(ids, scores)
+            if memory_id in docs
+        ]
+    
+    def _sqlite_rank(
+        self,
+        where: str,
+        params: list,
+        query_embedding: np.ndarray,
+        max_results: int,
+        recency: Optional[Tuple[datetime, float]] = None,
+        after: Optional[Tuple[float, str]] = None
+    ) -> Tuple[List[str], np.ndarray]:
+        """Return the ids and scores of the best matches (below ``after``, if given), scored here in batches."""
+        # SQLite has no vector operator: read the filtered ids and
+        # embeddings in batches and score each batch with NumPy
+        cursor = self.db.execute(
+            _sqlite_search_sql("candidates", where, recency=recency is not None), params
+        )
+        ids, scores = [], np.empty(0, dtype=EMBEDDING_DTYPE)
+        for rows in iter(lambda: cursor.fetchmany(_SCORING_BATCH_SIZE), []):
+            batch = _rank_candidates(
+                [row[0] for row in rows],
+                [row[1] for row in rows],
+                query_embedding,
+                max_results,
+                _candidate_weights(rows, recency),
+                after
+            )
+            ids, scores = _merge_ranked((ids, scores), batch, max_results)
+        return ids, scores
+    
+    def _sqlite_fetch_ranked(
+        self,
+        ids: List[str],
+        scores: np.ndarray,
+        include_embedding: bool
+    ) -> List[Memory]:
+        """Fetch ranked memories, best first."""
+        rows = {
+            row[0]: row
+            for row in self.db.execute(
+                _sqlite_search_sql("fetch", include_embedding=include_embedding),
+                (json.dumps(ids),)
+            )
+        }
+        
+        return [
+            _sqlite_row_to_memory(rows[memory_id], float(score))
+            for memory_id, score in zip(ids, scores)
+            if memory_id in rows
+        ]
+    
     def update_memory(self, memory: Memory) -> None:
         """Update an existing memory."""
+        self.update_memories([memory])
+    
+    def update_memories(self, memories: List[Memory]) -> None:
+        """Update several existing memories.
+        
+        PostgreSQL updates them in one transaction; MongoDB sends unordered
+        bulk writes of up to ``write_batch_size`` updates.
+        """
+        if not memories:
+            return
+        
         if self.provider == DatabaseProvider.POSTGRESQL:
+            partitioned = self.db_config.partitioned
             with self.db.cursor() as cursor:
-                cursor.execute("""
-                    UPDATE memories
-                    SET content = %s,
-                        embedding = %s,
-                        level = %s,
-                        memory_type = %s,
-                        metadata = %s,
-                        relevance_score = %s,
-                        access_count = %s,
-                        last_accessed = %s,
-                        tags = %s
-                    WHERE id = %s
-                """, (
-                    memory.content,
-                    memory.embedding.tolist(),
-                    memory.level.value if hasattr(memory.level, 'value') else memory.level,
-                    memory.memory_type.value if hasattr(memory.memory_type, 'value') else memory.memory_type,
-                    Json(memory.metadata),
-                    memory.relevance_score,
-                    memory.access_count,
-                    memory.last_accessed,
-                    memory.tags,
-                    memory.id
-                ))
-                self.db.commit()
+                for memory in memories:
+                    self._ensure_partition(cursor, _enum_value(memory.level), memory.timestamp)
+                    self._execute_prepared(
+                        cursor, ("update", partitioned), lambda: _pg_update_sql(partitioned),
+                        _pg_update_params(memory, partitioned)
+                    )
+                self._pg_commit()
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            for batch in _chunks(memories, self.db_config.write_batch_size):
+                self.db.memories.bulk_write([
+                    UpdateOne({"_id": memory.id}, {"$set": _mongo_update(memory)})
+                    for memory in batch
+                ], ordered=False)
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            with self.db:
+                self.db.executemany(
+                    _SQLITE_UPDATE_SQL, [_sqlite_update_params(memory) for memory in memories]
+                )
+                self._sqlite_replace_tags(memories)
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            self.db.update(memories)
+    
+    def update_fields(self, memory_ids: Union[str, List[str]], fields: Dict[str, Any]) -> int:
+        """Set only the given fields on one or more memories.
+        
+        Unlike ``update_memory`` this leaves every other column untouched (in
+        particular the embedding is not rewritten unless it is patched), so
+        concurrent patches of different fields don't overwrite each other.
+        Returns the number of matched memories.
+        """
+        field_names = _patch_fields(fields)
+        ids = _memory_ids(memory_ids)
+        if not ids:
+            return 0
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            with self.db.cursor() as cursor:
+                if self.db_config.partitioned and "level" in fields:
+                    # Rows moving level need the target partition for their month
+                    cursor.execute(
+                        "SELECT DISTINCT date_trunc('month', timestamp) FROM memories WHERE id = ANY(%s)",
+                        (ids,)
+                    )
+                    for (month,) in cursor.fetchall():
+                        self._ensure_partition(cursor, _enum_value(fields["level"]), month)
                 
+                shape = ("patch", field_names)
+                self._execute_prepared(
+                    cursor, shape, lambda: _pg_patch_sql(field_names),
+                    _pg_patch_params(fields, field_names, ids)
+                )
+                updated = cursor.rowcount
+                self._pg_commit()
+                return updated
+        
         elif self.provider == DatabaseProvider.MONGODB:
-            memory_dict = {
-                "content": memory.content,
-                "embedding": memory.embedding.tolist(),
-                "level": memory.level.value if hasattr(memory.level, 'value') else memory.level,
-                "memory_type": memory.memory_type.value if hasattr(memory.memory_type, 'value') else memory.memory_type,
-                "metadata": memory.metadata,
-                "relevance_score": memory.relevance_score,
-                "access_count": memory.access_count,
-                "last_accessed": memory.last_accessed,
-                "tags": memory.tags
-            }
-            self.db.memories.update_one(
-                {"_id": memory.id},
-                {"$set": memory_dict}
+            result = self.db.memories.update_many(
+                {"_id": {"$in": ids}},
+                {"$set": _mongo_patch(fields)}
+            )
+            return result.matched_count
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            assignments = ", ".join(f"{field} = ?" for field in field_names)
+            with self.db:
+                cursor = self.db.execute(
+                    f"UPDATE memories SET {assignments} WHERE id IN {_SQLITE_IDS}",
+                    [_sqlite_patch_value(field, fields[field]) for field in field_names] + [json.dumps(ids)]
+                )
+                if "tags" in fields:
+                    self.db.executemany(_SQLITE_DELETE_TAGS_SQL, [(memory_id,) for memory_id in ids])
+                    self.db.executemany(_SQLITE_INSERT_TAG_SQL, [
+                        (tag, memory_id) for memory_id in ids for tag in fields["tags"] or []
+                    ])
+                return cursor.rowcount
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            return self.db.patch(ids, fields)
+        
+        return 0
+    
+    def add_tags(self, tags: Dict[str, List[str]]) -> int:
+        """Add tags to memories, keeping the ones they have, e.g. when merging duplicates.
+        
+        The union is computed by the database (``||`` / ``$addToSet``), so
+        concurrent merges into one memory never drop each other's tags.
+        Returns the number of matched memories.
+        """
+        tags = {memory_id: list(new_tags) for memory_id, new_tags in tags.items() if new_tags}
+        if not tags:
+            return 0
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            pairs = [(memory_id, tag) for memory_id, new_tags in tags.items() for tag in new_tags]
+            with self.db.cursor() as cursor:
+                self._execute_prepared(
+                    cursor, ("add_tags",), lambda: (_PG_ADD_TAGS_SQL, []),
+                    [[pair[0] for pair in pairs], [pair[1] for pair in pairs]]
+                )
+                updated = cursor.rowcount
+                self._pg_commit()
+                return updated
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            result = self.db.memories.bulk_write([
+                UpdateOne({'_id': memory_id}, {'$addToSet': {'tags': {'$each': new_tags}}})
+                for memory_id, new_tags in tags.items()
+            ], ordered=False)
+            return result.matched_count
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            updated = 0
+            with self.db:
+                for memory_id, new_tags in tags.items():
+                    if self.db.execute(_SQLITE_ADD_TAGS_SQL, (json.dumps(new_tags), memory_id)).rowcount:
+                        updated += 1
+                        self.db.executemany(_SQLITE_INSERT_TAG_SQL, [(tag, memory_id) for tag in new_tags])
+            return updated
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            return self.db.add_tags(tags)
+        
+        return 0
+    
+    def increment_access(
+        self,
+        memory_ids: Union[str, List[str]],
+        count: int = 1,
+        accessed_at: Optional[datetime] = None
+    ) -> int:
+        """Atomically add ``count`` to the access counters of memories.
+        
+        The increment runs in the database (``access_count + n`` / ``$inc``),
+        so concurrent callers never lose updates. ``last_accessed`` is moved
+        forward to ``accessed_at`` (default: now). Returns the number of
+        matched memories.
+        """
+        ids = _memory_ids(memory_ids)
+        if not ids:
+            return 0
+        if accessed_at is None:
+            accessed_at = datetime.now()
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            with self.db.cursor() as cursor:
+                self._execute_prepared(
+                    cursor, ("increment_access",),
+                    lambda: (_PG_INCREMENT_ACCESS_SQL, _PG_INCREMENT_ACCESS_TYPES),
+                    [count, accessed_at, ids]
+                )
+                updated = cursor.rowcount
+                self._pg_commit()
+                return updated
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            result = self.db.memories.update_many(
+                {"_id": {"$in": ids}},
+                {"$inc": {"access_count": count}, "$max": {"last_accessed": accessed_at}}
+            )
+            return result.matched_count
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            accessed_at = _sqlite_datetime(accessed_at)
+            with self.db:
+                cursor = self.db.execute(
+                    _SQLITE_INCREMENT_ACCESS_SQL, (count, accessed_at, accessed_at, json.dumps(ids))
+                )
+                return cursor.rowcount
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            return self.db.add_access(ids, [count] * len(ids), [accessed_at] * len(ids))
+        
+        return 0
+    
+    def apply_access_deltas(self, deltas: Dict[str, Tuple[int, datetime]]) -> int:
+        """Apply accumulated accesses in one bulk write.
+        
+        ``deltas`` maps memory ids to ``(hits, last_accessed)``; counters are
+        incremented in the database and ``last_accessed`` only moves forward.
+        Returns the number of matched memories.
+        """
+        if not deltas:
+            return 0
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            with self.db.cursor() as cursor:
+                self._execute_prepared(
+                    cursor, ("apply_access_deltas",),
+                    lambda: (_PG_APPLY_ACCESS_DELTAS_SQL, _PG_APPLY_ACCESS_DELTAS_TYPES),
+                    _access_delta_params(deltas)
+                )
+                updated = cursor.rowcount
+                self._pg_commit()
+                return updated
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            result = self.db.memories.bulk_write(_mongo_access_updates(deltas), ordered=False)
+            return result.matched_count
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            with self.db:
+                cursor = self.db.executemany(_SQLITE_APPLY_ACCESS_DELTA_SQL, [
+                    (hits, _sqlite_datetime(accessed_at), _sqlite_datetime(accessed_at), memory_id)
+                    for memory_id, (hits, accessed_at) in deltas.items()
+                ])
+                return cursor.rowcount
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            ids = list(deltas)
+            return self.db.add_access(
+                ids, [deltas[i][0] for i in ids], [deltas[i][1] for i in ids]
+            )
+        
+        return 0
+    
+    def begin_decay_pass(self, now: Optional[datetime] = None) -> float:
+        """Record ``now`` as the start of a decay pass over the store.
+        
+        Returns the seconds since the previous pass started, which the new
+        pass decays by; 0 for the first pass over the store. The time is
+        kept in the store, so it survives restarts, and claimed atomically,
+        so concurrent jobs over one store split it rather than each decaying
+        by all of it. The in-memory store keeps it for the process's life.
+        """
+        if now is None:
+            now = datetime.now()
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            with self.db.cursor() as cursor:
+                cursor.execute(_PG_LAST_PASS_SQL)
+                row = cursor.fetchone()
+                self._execute_prepared(cursor, ("decay_pass",), lambda: (_PG_DECAY_PASS_SQL, []), [now])
+                self._pg_commit()
+            previous = row[0] if row is not None else None
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            doc = self.db.consolidation_state.find_one_and_update(
+                {'_id': 'decay'}, {'$max': {'last_pass': now}}, upsert=True
+            )
+            previous = doc['last_pass'] if doc is not None else None
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            with self.db:
+                # The write comes first, so the transaction holds the write lock when reading
+                self.db.execute(
+                    "INSERT OR IGNORE INTO consolidation_state (name, last_pass) VALUES ('decay', ?)",
+                    (now.isoformat(),)
+                )
+                row = self.db.execute(
+                    "SELECT last_pass FROM consolidation_state WHERE name = 'decay'"
+                ).fetchone()
+                self.db.execute(
+                    "UPDATE consolidation_state SET last_pass = max(last_pass, ?) WHERE name = 'decay'",
+                    (now.isoformat(),)
+                )
+            previous = datetime.fromisoformat(row[0])
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            with self._decay_lock:
+                previous = self._last_decay_pass
+                self._last_decay_pass = max(previous or now, now)
+        
+        else:
+            raise ValueError(f"Unsupported database provider: {self.provider}")
+        
+        return max((now - previous).total_seconds(), 0.0) if previous is not None else 0.0
+    
+    def decay_relevance(
+        self,
+        after_id: str,
+        batch_size: int,
+        elapsed: float,
+        half_life: float,
+        archive_below: float,
+        now: Optional[datetime] = None
+    ) -> Tuple[Optional[str], int, List[str]]:
+        """Decay the relevance of the next batch of memories and archive the faded ones.
+        
+        Memories are visited in id order starting after ``after_id``; each
+        relevance score is multiplied by its ``relevance_decay`` factor for
+        the ``elapsed`` seconds before ``now``, and memories ending below
+        ``archive_below`` are moved to the archive, which searches skip.
+        Every batch is its own transaction. Returns the last id visited
+        (``None`` once every memory was visited), the number of memories
+        decayed and the ids archived.
+        """
+        if now is None:
+            now = datetime.now()
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            with self.db.cursor() as cursor:
+                self._execute_prepared(
+                    cursor, ("decay",), lambda: (_PG_DECAY_SQL, _PG_DECAY_TYPES),
+                    [elapsed, now, half_life, after_id, batch_size]
+                )
+                rows = cursor.fetchall()
+                archived = [memory_id for memory_id, relevance_score in rows if relevance_score < archive_below]
+                if archived:
+                    self._execute_prepared(cursor, ("archive",), lambda: (_PG_ARCHIVE_SQL, []), [archived])
+                self._pg_commit()
+            ids = [row[0] for row in rows]
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            docs = list(self.db.memories.find(
+                {'_id': {'$gt': after_id}}, _MONGO_DECAY_PROJECTION
+            ).sort('_id', 1).limit(batch_size))
+            ids = [doc['_id'] for doc in docs]
+            updates, archived = _mongo_decay(docs, now, elapsed, half_life, archive_below)
+            if updates:
+                self.db.memories.bulk_write(updates, ordered=False)
+            if archived:
+                moving = list(self.db.memories.find({'_id': {'$in': archived}}))
+                self.db.memories_archive.bulk_write(_mongo_archive_writes(moving, now), ordered=False)
+                self.db.memories.delete_many({'_id': {'$in': archived}})
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            rows = self.db.execute(_SQLITE_DECAY_BATCH_SQL, (after_id, batch_size)).fetchall()
+            ids = [row[0] for row in rows]
+            factors = relevance_decay(
+                np.array([row[1] for row in rows], dtype=np.int64),
+                np.array([(now - datetime.fromisoformat(row[2])).total_seconds() for row in rows]),
+                elapsed,
+                half_life
             )
+            with self.db:
+                self.db.executemany(
+                    "UPDATE memories SET relevance_score = relevance_score * ? WHERE id = ?",
+                    [(float(factor), memory_id) for memory_id, factor in zip(ids, factors)]
+                )
+                archived = [
+                    row[0] for row in self.db.execute(
+                        f"SELECT id FROM memories WHERE id IN {_SQLITE_IDS} AND relevance_score < ?",
+                        (json.dumps(ids), archive_below)
+                    )
+                ]
+                if archived:
+                    # Tag rows go with their memory (ON DELETE CASCADE)
+                    self.db.execute(_SQLITE_ARCHIVE_SQL, (json.dumps(archived),))
+                    self.db.execute(f"DELETE FROM memories WHERE id IN {_SQLITE_IDS}", (json.dumps(archived),))
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            ids, moved = self.db.decay(now, elapsed, half_life, archive_below, after_id, batch_size)
+            archived = [memory.id for memory in moved]
+            self.archive.delete(archived)
+            self.archive.insert(moved)
+        
+        else:
+            raise ValueError(f"Unsupported database provider: {self.provider}")
+        
+        last_id = max(ids) if len(ids) == batch_size else None
+        return last_id, len(ids), archived
+    
+    def restore_memories(self, memory_ids: List[str]) -> int:
+        """Move archived memories back into the searchable store. Returns the number restored."""
+        if not memory_ids:
+            return 0
+        
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            with self.db.cursor() as cursor:
+                if self.db_config.partitioned:
+                    self._execute_prepared(
+                        cursor, ("archived_partitions",), lambda: (_PG_ARCHIVED_PARTITIONS_SQL, []),
+                        [list(memory_ids)]
+                    )
+                    for level, timestamp in cursor.fetchall():
+                        self._ensure_partition(cursor, level, timestamp)
+                
+                self._execute_prepared(cursor, ("restore",), lambda: (_PG_RESTORE_SQL, []), [list(memory_ids)])
+                restored = cursor.rowcount
+                self._pg_commit()
+                return restored
+        
+        elif self.provider == DatabaseProvider.MONGODB:
+            docs = list(self.db.memories_archive.find({'_id': {'$in': list(memory_ids)}}))
+            for doc in docs:
+                doc.pop('archived_at', None)
+            if docs:
+                self.db.memories.insert_many(docs, ordered=False)
+                self.db.memories_archive.delete_many({'_id': {'$in': [doc['_id'] for doc in docs]}})
+            return len(docs)
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            ids = json.dumps(list(memory_ids))
+            with self.db:
+                restored = self.db.execute(_SQLITE_RESTORE_SQL, (ids,)).rowcount
+                self.db.execute(_SQLITE_RESTORE_TAGS_SQL, (ids,))
+                self.db.execute(f"DELETE FROM memories_archive WHERE id IN {_SQLITE_IDS}", (ids,))
+                return restored
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            memories = self.archive.get(list(memory_ids))
+            self.db.insert(memories)
+            self.archive.delete([memory.id for memory in memories])
+            return len(memories)
+        
+        return 0
     
     def delete_memory(self, memory_id: str) -> None:
         """Delete a memory by ID."""
+        self.delete_memories([memory_id])
+    
+    def delete_memories(self, memory_ids: List[str]) -> int:
+        """Delete several memories by ID. Returns the number deleted."""
+        if not memory_ids:
+            return 0
+        
         if self.provider == DatabaseProvider.POSTGRESQL:
             with self.db.cursor() as cursor:
-                cursor.execute("DELETE FROM memories WHERE id = %s", (memory_id,))
-                self.db.commit()
-                
+                cursor.execute("DELETE FROM memories WHERE id = ANY(%s)", (list(memory_ids),))
+                deleted = cursor.rowcount
+                self._pg_commit()
+                return deleted
+        
         elif self.provider == DatabaseProvider.MONGODB:
-            self.db.memories.delete_one({"_id": memory_id})
+            deleted = 0
+            for batch in _chunks(list(memory_ids), self.db_config.write_batch_size):
+                deleted += self.db.memories.delete_many({"_id": {"$in": batch}}).deleted_count
+            return deleted
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            # Tag rows go with their memory (ON DELETE CASCADE)
+            with self.db:
+                cursor = self.db.execute(
+                    f"DELETE FROM memories WHERE id IN {_SQLITE_IDS}", (json.dumps(list(memory_ids)),)
+                )
+                return cursor.rowcount
+        
+        elif self.provider == DatabaseProvider.MEMORY:
+            return self.db.delete(list(memory_ids))
+        
+        return 0
+    
+    def close(self) -> None:
+        """Close the database connection (or release the shared MongoDB client).
+        
+        In-memory stores are written to their snapshot path, if configured.
+        """
+        if self.provider == DatabaseProvider.POSTGRESQL:
+            if self.replicas is not None:
+                self.replicas.close()
+            if not self.db.closed:
+                self.db.close()
+        
+        elif self.provider == DatabaseProvider.MONGODB and self._client_key is not None:
+            _release_mongo_client(self._client_key)
+            self._client_key = None
+        
+        elif self.provider == DatabaseProvider.SQLITE:
+            self.db.close()
+        
+        elif self.provider == DatabaseProvider.MEMORY and self.db_config.snapshot_path:
+            self.save_snapshot()
@@ -5,7 +5,9 @@ Models for memory system.
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 from enum import Enum
+import sys
 import numpy as np
+from .vectors import EMBEDDING_DTYPE
 
 class MemoryLevel(str, Enum):
     """Memory level options."""
@@ -20,8 +22,55 @@ class MemoryType(str, Enum):
     INSIGHT = "insight"
     SKILL = "skill"
 
+def _frozen_embedding(embedding: Any) -> Optional[np.ndarray]:
+    """Return an embedding as a read-only float32 array.
+    
+    Read-only float32 arrays, such as those decoded from stored blobs or
+    rows of a shared result matrix, are kept without a copy. Anything else
+    is copied, so the caller's array stays writable without changing the
+    memory.
+    """
+    if embedding is None:
+        return None
+    if isinstance(embedding, np.ndarray) and embedding.dtype == EMBEDDING_DTYPE and not embedding.flags.writeable:
+        return embedding
+    array = np.array(embedding, dtype=EMBEDDING_DTYPE, copy=True)
+    array.flags.writeable = False
+    return array
+
+def _interned_tags(tags: Optional[List[str]]) -> Optional[List[str]]:
+    """Intern the strings of a freshly decoded tag list in place.
+    
+    Decoded rows repeat the same few tags; interned, every memory's list
+    points at one string per tag instead of its own copies.
+    """
+    if tags:
+        for i, tag in enumerate(tags):
+            if type(tag) is str:
+                tags[i] = sys.intern(tag)
+    return tags
+
 class Memory:
-    """Memory model."""
+    """Memory model.
+    
+    Memories use ``__slots__`` and hold their embedding as a read-only
+    float32 array; assigning a list or another dtype converts it.
+    """
+    
+    __slots__ = (
+        "id",
+        "content",
+        "_embedding",
+        "level",
+        "memory_type",
+        "timestamp",
+        "metadata",
+        "relevance_score",
+        "access_count",
+        "last_accessed",
+        "tags",
+        "similarity"
+    )
     
     def __init__(
         self,
@@ -35,7 +84,8 @@ class Memory:
         relevance_score: float = 1.0,
         access_count: int = 0,
         last_accessed: Optional[datetime] = None,
-        tags: Optional[List[str]] = None
+        tags: Optional[List[str]] = None,
+        similarity: Optional[float] = None
     ):
         """Initialize memory."""
         self.id = id
@@ -49,10 +99,39 @@ class Memory:
         self.access_count = access_count
         self.last_accessed = last_accessed
         self.tags = tags or []
+        # Cosine similarity to the query that returned this memory, if any
+        # (blended with recency and relevance for recency-weighted queries)
+        self.similarity = similarity
+    
+    @property
+    def embedding(self) -> Optional[np.ndarray]:
+        """The embedding as a read-only float32 array, or ``None``."""
+        return self._embedding
+    
+    @embedding.setter
+    def embedding(self, embedding: Any) -> None:
+        """Set the embedding from an array or a list of floats."""
+        self._embedding = _frozen_embedding(embedding)
 
 class MemoryQuery:
     """Memory query model."""
     
+    __slots__ = (
+        "content",
+        "level",
+        "memory_type",
+        "min_relevance",
+        "max_results",
+        "tags",
+        "metadata_filters",
+        "since",
+        "until",
+        "recency_half_life",
+        "hierarchical",
+        "min_similarity",
+        "page_token"
+    )
+    
     def __init__(
         self,
         content: str,
@@ -61,7 +140,13 @@ class MemoryQuery:
         min_relevance: float = 0.0,
         max_results: int = 10,
         tags: Optional[List[str]] = None,
-        metadata_filters: Optional[Dict[str, Any]] = None
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        hierarchical: bool = False,
+        min_similarity: Optional[float] = None,
+        page_token: Optional[str] = None
     ):
         """Initialize memory query."""
         self.content = content
@@ -71,3 +156,14 @@ class MemoryQuery:
         self.max_results = max_results
         self.tags = tags or []
         self.metadata_filters = metadata_filters or {}
+        # Time window on memory timestamps, bounds included
+        self.since = since
+        self.until = until
+        # Seconds after which recency halves a memory's score; None ranks by similarity alone
+        self.recency_half_life = recency_half_life
+        # Search from ``level`` (or the narrowest level) outwards, widening only
+        # while fewer than ``max_results`` results reach ``min_similarity``
+        self.hierarchical = hierarchical
+        self.min_similarity = min_similarity
+        # Continue below the last result of a previous page (see MemoryManager.search_page)
+        self.page_token = page_token
@@ -0,0 +1,86 @@
+"""
+Search pagination module.
+"""
+
+from typing import List, Optional, Any, Tuple
+from datetime import datetime
+import base64
+import binascii
+import json
+from .models import Memory
+
+class PageToken:
+    """Opaque position after the last result of a search page.
+    
+    A token records whether the search is ranked by similarity or ordered
+    by timestamp, the sort value and id of the last result, and how many
+    results came before the next page. The next page resumes below that
+    ``(value, id)`` pair with a keyset query instead of skipping an offset.
+    
+    Recency-weighted scores depend on the time ages are measured from, so
+    the token also carries ``now``: start such a walk with a token that
+    has no position but a fixed ``now``, and every page ranks by the same
+    scores.
+    """
+    
+    def __init__(
+        self,
+        ranked: bool,
+        value: Any = None,
+        memory_id: Optional[str] = None,
+        offset: int = 0,
+        now: Optional[datetime] = None
+    ):
+        """Initialize page token."""
+        self.ranked = ranked
+        self.value = value
+        self.memory_id = memory_id
+        self.offset = offset
+        self.now = now
+    
+    @property
+    def after(self) -> Optional[Tuple[Any, str]]:
+        """The ``(similarity or timestamp, id)`` results must rank below, if any."""
+        return (self.value, self.memory_id) if self.memory_id is not None else None
+    
+    def encode(self) -> str:
+        """Return the token as a URL-safe string."""
+        value = self.value if self.ranked or self.value is None else self.value.isoformat()
+        payload = {
+            "ranked": self.ranked,
+            "value": value,
+            "id": self.memory_id,
+            "offset": self.offset,
+            "now": self.now.isoformat() if self.now is not None else None
+        }
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+    
+    @classmethod
+    def decode(cls, token: str, ranked: bool) -> "PageToken":
+        """Parse a token for a search that is ``ranked`` by similarity or not."""
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()))
+            value = payload["value"]
+            if not payload["ranked"] and value is not None:
+                value = datetime.fromisoformat(value)
+            now = datetime.fromisoformat(payload["now"]) if payload["now"] else None
+            page = cls(payload["ranked"], value, payload["id"], int(payload["offset"]), now)
+        except (binascii.Error, ValueError, TypeError, KeyError) as e:
+            raise ValueError(f"Invalid page token: {str(e)}")
+        
+        if page.ranked != ranked:
+            raise ValueError("Page token belongs to a search with a different ordering")
+        return page
+    
+    def next(self, results: List[Memory], max_results: int) -> Optional["PageToken"]:
+        """Return the token of the page after ``results``, or ``None`` after the last page."""
+        if not results or len(results) < max_results:
+            return None
+        last = results[-1]
+        return PageToken(
+            self.ranked,
+            last.similarity if self.ranked else last.timestamp,
+            last.id,
+            self.offset + len(results),
+            self.now
+        )
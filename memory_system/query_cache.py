@@ -0,0 +1,583 @@
+"""
+Query result caching module.
+"""
+
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Hashable, Iterable, Iterator, Tuple, Union, Callable
+from datetime import datetime
+import copy
+import itertools
+import json
+import threading
+import time
+import numpy as np
+from .models import Memory, MemoryLevel, MemoryType, MemoryQuery
+from .memory_store import _enum_value, _memory_ids
+from .vectors import EMBEDDING_DTYPE, cosine_scores, recency_weights, top_k
+from .recall import recall_levels
+
+# Stands for a field whose new value is unknown (partial updates)
+_UNKNOWN = object()
+
+# Fields that neither filter nor rank search results
+_ACCESS_FIELDS = {"access_count", "last_accessed"}
+
+def filter_key(query: MemoryQuery) -> Hashable:
+    """Normalize the filters and the ranking of a query.
+    
+    Tag order and metadata key order do not change the key.
+    """
+    return (
+        _enum_value(query.level),
+        _enum_value(query.memory_type),
+        float(query.min_relevance),
+        tuple(sorted(set(query.tags))),
+        json.dumps(query.metadata_filters, sort_keys=True, default=str),
+        query.since,
+        query.until,
+        query.recency_half_life or None,
+        bool(query.hierarchical),
+        query.min_similarity if query.hierarchical else None
+    )
+
+def query_key(query: MemoryQuery) -> Hashable:
+    """Normalize a query into a cache key."""
+    return (query.content, query.max_results, query.page_token) + filter_key(query)
+
+def _could_match(
+    query: MemoryQuery,
+    level: Any = _UNKNOWN,
+    memory_type: Any = _UNKNOWN,
+    tags: Any = _UNKNOWN,
+    relevance_score: Any = _UNKNOWN,
+    metadata: Any = _UNKNOWN,
+    timestamp: Any = _UNKNOWN
+) -> bool:
+    """Return whether a memory with these fields could pass the query's filters."""
+    if query.hierarchical:
+        if level is not _UNKNOWN and _enum_value(level) not in [
+            _enum_value(wider) for wider in recall_levels(query.level)
+        ]:
+            return False
+    elif query.level and level is not _UNKNOWN and _enum_value(level) != _enum_value(query.level):
+        return False
+    if (
+        query.memory_type
+        and memory_type is not _UNKNOWN
+        and _enum_value(memory_type) != _enum_value(query.memory_type)
+    ):
+        return False
+    if query.tags and tags is not _UNKNOWN and not set(query.tags) & set(tags or []):
+        return False
+    if query.min_relevance > 0 and relevance_score is not _UNKNOWN and relevance_score < query.min_relevance:
+        return False
+    if timestamp is not _UNKNOWN and (
+        (query.since is not None and timestamp < query.since)
+        or (query.until is not None and timestamp > query.until)
+    ):
+        return False
+    if query.metadata_filters and metadata is not _UNKNOWN:
+        metadata = metadata or {}
+        missing = object()
+        if any(metadata.get(key, missing) != value for key, value in query.metadata_filters.items()):
+            return False
+    return True
+
+def _stored(memories: List[Memory]) -> Callable[["_Entry"], bool]:
+    """Select the entries that storing or replacing memories could change."""
+    return lambda entry: any(
+        memory.id in entry.ids or _could_match(
+            entry.query,
+            level=memory.level,
+            memory_type=memory.memory_type,
+            tags=memory.tags,
+            relevance_score=memory.relevance_score,
+            metadata=memory.metadata,
+            timestamp=memory.timestamp
+        )
+        for memory in memories
+    )
+
+def _patched(memory_ids: Iterable[str], fields: Dict[str, Any]) -> Callable[["_Entry"], bool]:
+    """Select the entries that a partial update could change.
+    
+    Fields not being set are unknown here, so any value is assumed.
+    """
+    if set(fields) <= _ACCESS_FIELDS:
+        return lambda entry: False
+    
+    ids = set(memory_ids)
+    filters = {
+        field: fields[field]
+        for field in ("level", "memory_type", "tags", "relevance_score", "metadata")
+        if field in fields
+    }
+    return lambda entry: bool(entry.ids & ids) or _could_match(entry.query, **filters)
+
+class _Entry:
+    """A cached result list."""
+    
+    __slots__ = ("query", "results", "ids", "expires_at")
+    
+    def __init__(self, query: MemoryQuery, results: List[Memory], expires_at: float):
+        self.query = query
+        self.results = results
+        self.ids = {memory.id for memory in results}
+        self.expires_at = expires_at
+
+class QueryCache:
+    """Cache search results per normalized query.
+    
+    Entries expire after ``ttl`` seconds and the least recently used ones
+    are evicted beyond ``max_entries``. Writes invalidate precisely: a new
+    or changed memory drops only the cached queries whose level, type,
+    tag, relevance and metadata filters it could pass, and a changed or
+    deleted memory drops the queries whose results contain it. Access
+    counter updates leave entries in place, since they neither filter nor
+    rank results.
+    """
+    
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        """Initialize query cache."""
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+    
+    def get(self, query: MemoryQuery) -> Optional[List[Memory]]:
+        """Return cached results for a query, or ``None`` on a miss.
+        
+        The memories are copies, so callers may update them freely.
+        """
+        key = query_key(query)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self.hits += 1
+            self._entries.move_to_end(key)
+            results = entry.results
+        return [copy.copy(memory) for memory in results]
+    
+    def put(self, query: MemoryQuery, results: List[Memory]) -> None:
+        """Cache the results of a query."""
+        key = query_key(query)
+        entry = _Entry(
+            copy.copy(query),
+            [copy.copy(memory) for memory in results],
+            time.monotonic() + self.ttl
+        )
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def _drop(self, should_drop) -> int:
+        """Drop the entries ``should_drop`` selects."""
+        with self._lock:
+            keys = [key for key, entry in self._entries.items() if should_drop(entry)]
+            for key in keys:
+                del self._entries[key]
+            self.invalidations += len(keys)
+            return len(keys)
+    
+    def invalidate_memories(self, memories: Iterable[Memory]) -> int:
+        """Drop entries affected by storing or replacing memories."""
+        return self._drop(_stored(list(memories)))
+    
+    def invalidate_fields(self, memory_ids: Iterable[str], fields: Dict[str, Any]) -> int:
+        """Drop entries affected by a partial update."""
+        if set(fields) <= _ACCESS_FIELDS:
+            return 0
+        return self._drop(_patched(memory_ids, fields))
+    
+    def invalidate_ids(self, memory_ids: Iterable[str]) -> int:
+        """Drop entries whose results contain deleted memories."""
+        ids = set(memory_ids)
+        return self._drop(lambda entry: bool(entry.ids & ids))
+    
+    def clear(self) -> int:
+        """Drop every entry."""
+        return self._drop(lambda entry: True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+class _SemanticEntry(_Entry):
+    """Cached results of a similarity search."""
+    
+    __slots__ = ("key", "direction", "fetched")
+    
+    def __init__(
+        self,
+        query: MemoryQuery,
+        query_embedding: np.ndarray,
+        results: List[Memory],
+        fetched: int,
+        expires_at: float
+    ):
+        super().__init__(query, results, expires_at)
+        self.key = filter_key(query)
+        norm = np.linalg.norm(query_embedding)
+        self.direction = query_embedding / norm if norm > 0 else query_embedding
+        # Number of results asked of the store; fewer returned means every match is cached
+        self.fetched = fetched
+    
+    def covers(self, max_results: int) -> bool:
+        """Whether the cached results hold the top ``max_results`` of the store."""
+        return self.fetched >= max_results or len(self.results) < self.fetched
+
+class SemanticCacheStore:
+    """Answer similarity searches for near-duplicate queries from cache.
+    
+    Wraps a store and keeps the embeddings of recent search queries with
+    their results. A search whose filters equal those of a cached query and
+    whose embedding lies within ``similarity_threshold`` (cosine) of it is
+    answered by re-ranking the cached memories against the new embedding,
+    so paraphrases of a query cost one small matrix product. Misses fetch
+    ``overfetch`` times ``max_results`` memories to leave room for the
+    re-ranking.
+    
+    Entries expire after ``ttl`` seconds and the least recently used are
+    evicted beyond ``max_entries``. Writes through this store invalidate
+    the entries they could change, as in ``QueryCache``; access counter
+    updates do not, so cached memories may show stale counters.
+    """
+    
+    def __init__(
+        self,
+        memory_store,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 256,
+        ttl: float = 60.0,
+        overfetch: int = 2
+    ):
+        """Initialize semantic cache store."""
+        self.memory_store = memory_store
+        self.similarity_threshold = similarity_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.overfetch = overfetch
+        self._entries: "OrderedDict[int, _SemanticEntry]" = OrderedDict()
+        self._keys = itertools.count()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    def _lookup(self, query: MemoryQuery, query_embedding: np.ndarray) -> Optional[_SemanticEntry]:
+        """Return the live entry closest to a query, if within the threshold."""
+        key = filter_key(query)
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, entry in self._entries.items() if entry.expires_at <= now]
+            for k in expired:
+                del self._entries[k]
+            
+            candidates = [
+                (k, entry) for k, entry in self._entries.items()
+                if entry.key == key
+                and entry.covers(query.max_results)
+                and len(entry.direction) == len(query_embedding)
+            ]
+            if not candidates:
+                return None
+            
+            scores = cosine_scores(np.stack([entry.direction for _, entry in candidates]), query_embedding)
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity_threshold:
+                return None
+            
+            k, entry = candidates[best]
+            self._entries.move_to_end(k)
+            return entry
+    
+    def _remember(self, entry: _SemanticEntry) -> None:
+        """Add an entry, evicting the least recently used beyond capacity."""
+        with self._lock:
+            self._entries[next(self._keys)] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def _drop(self, should_drop: Callable[[_Entry], bool]) -> int:
+        """Drop the entries ``should_drop`` selects."""
+        with self._lock:
+            keys = [k for k, entry in self._entries.items() if should_drop(entry)]
+            for k in keys:
+                del self._entries[k]
+            self.invalidations += len(keys)
+            return len(keys)
+    
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._drop(lambda entry: True)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+    
+    def search_memories(
+        self,
+        query_embedding: Optional[np.ndarray] = None,
+        level: Optional[MemoryLevel] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_relevance: float = 0.0,
+        max_results: int = 10,
+        tags: Optional[List[str]] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        page_token: Optional[str] = None
+    ) -> List[Memory]:
+        """Search, reusing the results of a near-duplicate query when cached."""
+        if query_embedding is None or page_token is not None:
+            # Later pages are read from the store, below the previous page
+            return self.memory_store.search_memories(
+                query_embedding=query_embedding,
+                level=level,
+                memory_type=memory_type,
+                min_relevance=min_relevance,
+                max_results=max_results,
+                tags=tags,
+                metadata_filters=metadata_filters,
+                execution_mode=execution_mode,
+                include_embedding=include_embedding,
+                since=since,
+                until=until,
+                recency_half_life=recency_half_life,
+                page_token=page_token
+            )
+        
+        query_embedding = np.asarray(query_embedding, dtype=EMBEDDING_DTYPE)
+        query = MemoryQuery(
+            content="",
+            level=level,
+            memory_type=memory_type,
+            min_relevance=min_relevance,
+            max_results=max_results,
+            tags=tags,
+            metadata_filters=metadata_filters,
+            since=since,
+            until=until,
+            recency_half_life=recency_half_life
+        )
+        entry = self._lookup(query, query_embedding)
+        if entry is None:
+            self.misses += 1
+            fetched = max_results * max(self.overfetch, 1)
+            # Embeddings are kept so that later paraphrases can be re-ranked
+            results = self.memory_store.search_memories(
+                query_embedding=query_embedding,
+                level=level,
+                memory_type=memory_type,
+                min_relevance=min_relevance,
+                max_results=fetched,
+                tags=tags,
+                metadata_filters=metadata_filters,
+                execution_mode=execution_mode,
+                include_embedding=True,
+                since=since,
+                until=until,
+                recency_half_life=recency_half_life
+            )
+            entry = _SemanticEntry(
+                query, query_embedding, [copy.copy(memory) for memory in results],
+                fetched, time.monotonic() + self.ttl
+            )
+            self._remember(entry)
+        else:
+            self.hits += 1
+        
+        cached = entry.results
+        # Embeddings of another dimension score 0, as in the stores
+        matrix = np.zeros((len(cached), len(query_embedding)), dtype=EMBEDDING_DTYPE)
+        for i, memory in enumerate(cached):
+            if memory.embedding is not None and len(memory.embedding) == len(query_embedding):
+                matrix[i] = memory.embedding
+        scores = cosine_scores(matrix, query_embedding)
+        if recency_half_life:
+            scores = scores * recency_weights(
+                [memory.timestamp for memory in cached],
+                [memory.relevance_score for memory in cached],
+                datetime.now(),
+                recency_half_life
+            )
+        
+        results = []
+        for i in top_k(scores, max_results):
+            memory = copy.copy(cached[i])
+            memory.similarity = float(scores[i])
+            if not include_embedding:
+                memory.embedding = None
+            results.append(memory)
+        return results
+    
+    def iter_search_memories(
+        self,
+        query_embedding: Optional[np.ndarray] = None,
+        level: Optional[MemoryLevel] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_relevance: float = 0.0,
+        max_results: int = 10,
+        tags: Optional[List[str]] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        page_token: Optional[str] = None,
+        batch_size: int = 100
+    ) -> Iterator[Memory]:
+        """Yield search results; similarity searches are re-ranked as a whole, so they arrive at once."""
+        if query_embedding is None or page_token is not None:
+            yield from self.memory_store.iter_search_memories(
+                query_embedding=query_embedding,
+                level=level,
+                memory_type=memory_type,
+                min_relevance=min_relevance,
+                max_results=max_results,
+                tags=tags,
+                metadata_filters=metadata_filters,
+                execution_mode=execution_mode,
+                include_embedding=include_embedding,
+                since=since,
+                until=until,
+                recency_half_life=recency_half_life,
+                page_token=page_token,
+                batch_size=batch_size
+            )
+            return
+        
+        yield from self.search_memories(
+            query_embedding=query_embedding,
+            level=level,
+            memory_type=memory_type,
+            min_relevance=min_relevance,
+            max_results=max_results,
+            tags=tags,
+            metadata_filters=metadata_filters,
+            execution_mode=execution_mode,
+            include_embedding=include_embedding,
+            since=since,
+            until=until,
+            recency_half_life=recency_half_life
+        )
+    
+    def store_memory(self, memory: Memory) -> None:
+        """Store a memory."""
+        self.store_memories([memory])
+    
+    def store_memories(self, memories: List[Memory]) -> None:
+        """Store memories and drop the cached searches they could enter."""
+        self.memory_store.store_memories(memories)
+        self._drop(_stored(memories))
+    
+    def get_memories(self, memory_ids: List[str], include_embedding: bool = True) -> List[Memory]:
+        """Fetch memories by id, in the order given; missing ids are skipped."""
+        return self.memory_store.get_memories(memory_ids, include_embedding)
+    
+    def update_memory(self, memory: Memory) -> None:
+        """Update an existing memory."""
+        self.update_memories([memory])
+    
+    def update_memories(self, memories: List[Memory]) -> None:
+        """Update memories and drop the cached searches they could change."""
+        self.memory_store.update_memories(memories)
+        self._drop(_stored(memories))
+    
+    def update_fields(self, memory_ids: Union[str, List[str]], fields: Dict[str, Any]) -> int:
+        """Set only the given fields on memories."""
+        updated = self.memory_store.update_fields(memory_ids, fields)
+        if not set(fields) <= _ACCESS_FIELDS:
+            self._drop(_patched(_memory_ids(memory_ids), fields))
+        return updated
+    
+    def add_tags(self, tags: Dict[str, List[str]]) -> int:
+        """Add tags to memories and drop the cached searches they could enter."""
+        updated = self.memory_store.add_tags(tags)
+        self._drop(_patched(list(tags), {"tags": [tag for new_tags in tags.values() for tag in new_tags]}))
+        return updated
+    
+    def increment_access(
+        self,
+        memory_ids: Union[str, List[str]],
+        count: int = 1,
+        accessed_at: Optional[datetime] = None
+    ) -> int:
+        """Atomically add ``count`` to access counters."""
+        return self.memory_store.increment_access(memory_ids, count, accessed_at)
+    
+    def apply_access_deltas(self, deltas: Dict[str, Tuple[int, datetime]]) -> int:
+        """Apply accumulated accesses."""
+        return self.memory_store.apply_access_deltas(deltas)
+    
+    def delete_memory(self, memory_id: str) -> None:
+        """Delete a memory by ID."""
+        self.delete_memories([memory_id])
+    
+    def delete_memories(self, memory_ids: List[str]) -> int:
+        """Delete memories and drop the cached searches holding them."""
+        deleted = self.memory_store.delete_memories(memory_ids)
+        ids = set(memory_ids)
+        self._drop(lambda entry: bool(entry.ids & ids))
+        return deleted
+    
+    def restore_memories(self, memory_ids: List[str]) -> int:
+        """Restore archived memories and drop the cached searches they could enter."""
+        restored = self.memory_store.restore_memories(memory_ids)
+        if restored:
+            self._drop(_stored(self.memory_store.get_memories(list(memory_ids), include_embedding=False)))
+        return restored
+    
+    def discard(self, memory_ids: List[str]) -> None:
+        """Drop cached searches holding memories the wrapped store lost behind this store's back."""
+        ids = set(memory_ids)
+        self._drop(lambda entry: bool(entry.ids & ids))
+    
+    def invalidate_relevance(self) -> None:
+        """Drop every cached search, as relevance scores changed behind this store's back (e.g. decayed)."""
+        self.clear()
+    
+    def close(self) -> None:
+        """Drop the cache and close the wrapped store."""
+        self.clear()
+        self.memory_store.close()
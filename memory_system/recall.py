@@ -0,0 +1,97 @@
+"""
+Hierarchical recall module.
+"""
+
+from typing import List, Optional, Callable, Awaitable, Tuple
+import asyncio
+import copy
+from .models import Memory, MemoryLevel, MemoryQuery
+
+def recall_levels(level: Optional[MemoryLevel] = None) -> List[MemoryLevel]:
+    """Return the levels a hierarchical recall searches, narrowest first.
+    
+    The recall starts at ``level`` (the narrowest level when ``None``) and
+    widens towards the organization.
+    """
+    levels = list(MemoryLevel)
+    return levels[levels.index(MemoryLevel(level)):] if level else levels
+
+def level_query(query: MemoryQuery, level: MemoryLevel) -> MemoryQuery:
+    """Return the part of a hierarchical query that searches one level."""
+    narrowed = copy.copy(query)
+    narrowed.level = level
+    narrowed.hierarchical = False
+    return narrowed
+
+def merge_levels(
+    results: List[List[Memory]],
+    max_results: int,
+    min_similarity: Optional[float] = None
+) -> Tuple[List[Memory], bool]:
+    """Combine the results of the levels searched so far, narrowest level first.
+    
+    Results reaching ``min_similarity`` (all of them when it is ``None``)
+    come first, in level order, followed by the others by score. Also
+    returns whether ``max_results`` of them reached it, so wider levels
+    need not be searched.
+    """
+    passing, rest = [], []
+    for level_results in results:
+        for memory in level_results:
+            if min_similarity is None or (memory.similarity or 0.0) >= min_similarity:
+                passing.append(memory)
+            else:
+                rest.append(memory)
+    rest.sort(key=lambda memory: memory.similarity or 0.0, reverse=True)
+    return (passing + rest)[:max_results], len(passing) >= max_results
+
+def hierarchical_search(
+    search: Callable[[MemoryLevel], List[Memory]],
+    levels: List[MemoryLevel],
+    max_results: int,
+    min_similarity: Optional[float] = None
+) -> List[Memory]:
+    """Search one level at a time, narrowest first, until the results suffice.
+    
+    Levels are not searched concurrently: a synchronous store serves every
+    search over its one connection (SQLite's cannot even be shared between
+    threads), so a thread pool would only queue the wider levels behind
+    the narrowest one. A level that is needed costs its full latency.
+    """
+    results: List[List[Memory]] = []
+    merged: List[Memory] = []
+    for level in levels:
+        results.append(search(level))
+        merged, satisfied = merge_levels(results, max_results, min_similarity)
+        if satisfied:
+            break
+    return merged
+
+async def async_hierarchical_search(
+    search: Callable[[MemoryLevel], Awaitable[List[Memory]]],
+    levels: List[MemoryLevel],
+    max_results: int,
+    min_similarity: Optional[float] = None
+) -> List[Memory]:
+    """Search every level concurrently, cancelling the wider ones once narrower results suffice.
+    
+    Results are still taken narrowest level first, so they equal those of
+    ``hierarchical_search``; a wider level only costs latency when it is
+    actually needed.
+    """
+    tasks = [asyncio.ensure_future(search(level)) for level in levels]
+    results: List[List[Memory]] = []
+    merged: List[Memory] = []
+    try:
+        for task in tasks:
+            results.append(await task)
+            merged, satisfied = merge_levels(results, max_results, min_similarity)
+            if satisfied:
+                break
+    finally:
+        pending = [task for task in tasks if not task.done()]
+        for task in pending:
+            task.cancel()
+        # Cancelled searches release their pooled connections before returning
+        await asyncio.gather(*pending, return_exceptions=True)
+    return merged
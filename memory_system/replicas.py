@@ -0,0 +1,153 @@
+"""
+Read replica routing module.
+"""
+
+from typing import List, Optional, Dict, Any, Callable
+import itertools
+import threading
+import time
+from .statements import StatementCache
+
+# Seconds of replay lag; a replica that has replayed everything it received
+# is current even when the primary has been idle for a while
+_PG_REPLICA_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+# How often a replica's lag is measured, in seconds
+_LAG_CHECK_INTERVAL = 1.0
+
+class Replica:
+    """A read-only endpoint and the state of its session."""
+    
+    def __init__(self, endpoint: Dict[str, Any], statement_cache_size: int):
+        """Initialize replica."""
+        self.endpoint = endpoint
+        self.statement_cache_size = statement_cache_size
+        self.db = None
+        self.statement_cache: Optional[StatementCache] = None
+        self.lag: Optional[float] = None
+        self.lag_checked_at = float('-inf')
+        self.ejected_until = float('-inf')
+        self.failures = 0
+        self.reads = 0
+
+class ReplicaRouter:
+    """Spread reads over replicas that are healthy and fresh enough.
+    
+    Replicas are tried round-robin. One that fails to connect or to answer
+    is ejected for ``retry_interval`` seconds; one whose replay lag exceeds
+    ``max_lag`` seconds is skipped until it catches up. When no replica is
+    usable, or for ``max_lag`` seconds after this session's last write if
+    ``read_your_writes`` is set, reads go to the primary.
+    """
+    
+    def __init__(
+        self,
+        endpoints: List[Dict[str, Any]],
+        connect: Callable[[Dict[str, Any]], Any],
+        statement_cache_size: int = 64,
+        max_lag: float = 10.0,
+        retry_interval: float = 30.0,
+        read_your_writes: bool = False
+    ):
+        """Initialize replica router."""
+        self.replicas = [Replica(endpoint, statement_cache_size) for endpoint in endpoints]
+        self.connect = connect
+        self.max_lag = max_lag
+        self.retry_interval = retry_interval
+        self.read_your_writes = read_your_writes
+        self._next = itertools.count()
+        self._last_write = float('-inf')
+        self._lock = threading.Lock()
+    
+    def note_write(self) -> None:
+        """Record a write by this session."""
+        self._last_write = time.monotonic()
+    
+    def choose(self) -> Optional[Replica]:
+        """Return the replica the next read should use, or ``None`` for the primary."""
+        now = time.monotonic()
+        if self.read_your_writes and now - self._last_write < self.max_lag:
+            return None
+        
+        with self._lock:
+            start = next(self._next)
+            for offset in range(len(self.replicas)):
+                replica = self.replicas[(start + offset) % len(self.replicas)]
+                if replica.ejected_until > now:
+                    continue
+                
+                try:
+                    self._check(replica, now)
+                except Exception:
+                    self.eject(replica)
+                    continue
+                
+                if replica.lag > self.max_lag:
+                    continue
+                replica.reads += 1
+                return replica
+        return None
+    
+    def _check(self, replica: Replica, now: float) -> None:
+        """Connect to a replica if needed and refresh its measured lag."""
+        if replica.db is None:
+            replica.db = self.connect(replica.endpoint)
+            # Reads never hold a transaction open, which would delay replay
+            replica.db.autocommit = True
+            replica.statement_cache = StatementCache(replica.statement_cache_size)
+            replica.lag_checked_at = float('-inf')
+        
+        if now - replica.lag_checked_at >= _LAG_CHECK_INTERVAL:
+            with replica.db.cursor() as cursor:
+                cursor.execute(_PG_REPLICA_LAG_SQL)
+                replica.lag = float(cursor.fetchone()[0])
+            replica.lag_checked_at = now
+    
+    def eject(self, replica: Replica) -> None:
+        """Take a failed replica out of rotation for ``retry_interval`` seconds."""
+        replica.failures += 1
+        replica.ejected_until = time.monotonic() + self.retry_interval
+        self._disconnect(replica)
+    
+    def _disconnect(self, replica: Replica) -> None:
+        """Drop a replica's session."""
+        if replica.db is not None:
+            try:
+                replica.db.close()
+            except Exception:
+                pass
+        replica.db = None
+        replica.statement_cache = None
+    
+    def statement_cache(self, connection) -> Optional[StatementCache]:
+        """Return the statement cache of the replica session ``connection``."""
+        for replica in self.replicas:
+            if replica.db is connection:
+                return replica.statement_cache
+        return None
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return the state of every replica."""
+        now = time.monotonic()
+        return [
+            {
+                "endpoint": replica.endpoint,
+                "connected": replica.db is not None,
+                "ejected": replica.ejected_until > now,
+                "lag": replica.lag,
+                "failures": replica.failures,
+                "reads": replica.reads
+            }
+            for replica in self.replicas
+        ]
+    
+    def close(self) -> None:
+        """Close every replica session."""
+        for replica in self.replicas:
+            self._disconnect(replica)
@@ -0,0 +1,405 @@
+"""
+Sharded storage module.
+"""
+
+from typing import List, Optional, Dict, Any, Iterator, Tuple, Union, Callable
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from datetime import datetime
+import heapq
+import itertools
+import json
+import threading
+import zlib
+import numpy as np
+from .models import Memory, MemoryLevel, MemoryType
+from .memory_store import MemoryStore, _enum_value, _memory_ids
+from .config import DatabaseConfig
+
+def _stable_hash(key: str) -> int:
+    """Hash a routing key identically in every process."""
+    return zlib.crc32(key.encode())
+
+class ShardSearchReport:
+    """Outcome of a scatter-gather search."""
+    
+    def __init__(self, shards: int):
+        """Initialize search report."""
+        self.shards = shards
+        self.succeeded: List[int] = []
+        self.failed: Dict[int, str] = {}
+        self.timed_out: List[int] = []
+        # Skipped while a search that timed out earlier still runs there
+        self.degraded: List[int] = []
+    
+    @property
+    def partial(self) -> bool:
+        """Whether some shards did not contribute results."""
+        return len(self.succeeded) < self.shards
+
+class ShardedMemoryStore:
+    """Spread memories over several databases and search them in parallel.
+    
+    Each ``DatabaseConfig`` becomes a ``MemoryStore`` shard. New memories
+    are routed by a stable hash of their id (``shard_key="id"``), of their
+    level (``"level"``) or of the string returned by a callable. Memories
+    stay on the shard they were written to; with a key other than the id,
+    writes addressing existing memories by id are sent to every shard.
+    
+    Every shard owns one worker thread that opens and uses its connection,
+    so drivers that bind connections to a thread (sqlite3) work too.
+    Searches run on all shards at once; shards that fail or do not answer
+    within ``shard_timeout`` seconds are left out and reported, and the
+    per-shard top-k lists are merged with a heap. A running search cannot
+    be interrupted, so a shard whose search timed out is degraded: later
+    searches skip it, rather than queueing behind the stuck one and timing
+    out too, until that search returns. Writes still wait for the shard.
+    """
+    
+    def __init__(
+        self,
+        db_configs: List[DatabaseConfig],
+        shard_key: Union[str, Callable[[Memory], str]] = "id",
+        shard_timeout: float = 5.0
+    ):
+        """Initialize sharded memory store."""
+        if not db_configs:
+            raise ValueError("At least one shard is required")
+        if not callable(shard_key) and shard_key not in ("id", "level"):
+            raise ValueError(f"Unsupported shard key: {shard_key}")
+        
+        self.shard_key = shard_key
+        self.shard_timeout = shard_timeout
+        self._executors = [
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"memory-shard-{i}")
+            for i in range(len(db_configs))
+        ]
+        self.shards: List[MemoryStore] = []
+        try:
+            for executor, db_config in zip(self._executors, db_configs):
+                self.shards.append(executor.submit(MemoryStore, db_config).result())
+        except Exception:
+            self.close()
+            raise
+        self.last_search_report: Optional[ShardSearchReport] = None
+        # Timed-out searches still running, by shard
+        self._stuck: Dict[int, Future] = {}
+        self._stuck_lock = threading.Lock()
+    
+    def shard_for(self, memory: Memory) -> int:
+        """Return the index of the shard a new memory is written to."""
+        if callable(self.shard_key):
+            key = self.shard_key(memory)
+        elif self.shard_key == "level":
+            key = _enum_value(memory.level)
+        else:
+            key = memory.id
+        return _stable_hash(key) % len(self.shards)
+    
+    def _shards_for_ids(self, memory_ids: List[str]) -> Dict[int, List[str]]:
+        """Group ids by the shards that may hold them."""
+        if self.shard_key != "id":
+            return {shard: list(memory_ids) for shard in range(len(self.shards))}
+        
+        groups: Dict[int, List[str]] = {}
+        for memory_id in memory_ids:
+            groups.setdefault(_stable_hash(memory_id) % len(self.shards), []).append(memory_id)
+        return groups
+    
+    def _run(self, calls: Dict[int, Callable[[MemoryStore], Any]]) -> Dict[int, Any]:
+        """Run one call per shard on the shards' threads and wait for all of them."""
+        futures = {
+            shard: self._executors[shard].submit(call, self.shards[shard])
+            for shard, call in calls.items()
+        }
+        return {shard: future.result() for shard, future in futures.items()}
+    
+    def store_memory(self, memory: Memory) -> None:
+        """Store a memory."""
+        self.store_memories([memory])
+    
+    def store_memories(self, memories: List[Memory]) -> None:
+        """Store memories, each on the shard its key routes to."""
+        groups: Dict[int, List[Memory]] = {}
+        for memory in memories:
+            groups.setdefault(self.shard_for(memory), []).append(memory)
+        self._run({
+            shard: lambda store, batch=batch: store.store_memories(batch)
+            for shard, batch in groups.items()
+        })
+    
+    def get_memories(self, memory_ids: List[str], include_embedding: bool = True) -> List[Memory]:
+        """Fetch memories by id, in the order given; missing ids are skipped."""
+        results = self._run({
+            shard: lambda store, ids=ids: store.get_memories(ids, include_embedding)
+            for shard, ids in self._shards_for_ids(memory_ids).items()
+        })
+        found = {memory.id: memory for memories in results.values() for memory in memories}
+        return [found[memory_id] for memory_id in memory_ids if memory_id in found]
+    
+    def scan_memories(
+        self,
+        after_id: str = "",
+        batch_size: int = 1000,
+        include_embedding: bool = True
+    ) -> List[Memory]:
+        """Return up to ``batch_size`` memories with ids after ``after_id``, in id order.
+        
+        Every shard reads its next batch and the batches are merged by id.
+        """
+        results = self._run({
+            shard: lambda store: store.scan_memories(after_id, batch_size, include_embedding)
+            for shard in range(len(self.shards))
+        })
+        merged = heapq.merge(*results.values(), key=lambda memory: memory.id)
+        return list(itertools.islice(merged, batch_size))
+    
+    def search_memories_with_report(
+        self,
+        query_embedding: Optional[np.ndarray] = None,
+        level: Optional[MemoryLevel] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_relevance: float = 0.0,
+        max_results: int = 10,
+        tags: Optional[List[str]] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        page_token: Optional[str] = None
+    ) -> Tuple[List[Memory], ShardSearchReport]:
+        """Search every shard and merge their results.
+        
+        Returns the merged results and a report naming the shards that
+        failed, timed out or were skipped as degraded; their memories are
+        missing from the results.
+        """
+        report = ShardSearchReport(len(self.shards))
+        with self._stuck_lock:
+            report.degraded = sorted(self._stuck)
+        
+        futures = {
+            self._executors[shard].submit(
+                store.search_memories,
+                query_embedding=query_embedding,
+                level=level,
+                memory_type=memory_type,
+                min_relevance=min_relevance,
+                max_results=max_results,
+                tags=tags,
+                metadata_filters=metadata_filters,
+                execution_mode=execution_mode,
+                include_embedding=include_embedding,
+                since=since,
+                until=until,
+                recency_half_life=recency_half_life,
+                page_token=page_token
+            ): shard
+            for shard, store in enumerate(self.shards)
+            if shard not in report.degraded
+        }
+        done, not_done = wait(futures, timeout=self.shard_timeout)
+        
+        ranked = []
+        for future in done:
+            shard = futures[future]
+            try:
+                ranked.append(future.result())
+                report.succeeded.append(shard)
+            except Exception as e:
+                report.failed[shard] = str(e)
+        
+        for future in not_done:
+            shard = futures[future]
+            report.timed_out.append(shard)
+            # A search that has not started yet is dropped from the shard's queue
+            if not future.cancel():
+                with self._stuck_lock:
+                    self._stuck[shard] = future
+                future.add_done_callback(lambda future, shard=shard: self._recovered(shard, future))
+        
+        report.succeeded.sort()
+        report.timed_out.sort()
+        self.last_search_report = report
+        
+        # Each shard returns its best first, ties by descending id, so a
+        # k-way merge yields the global top-k
+        if query_embedding is None:
+            key = lambda memory: (memory.timestamp, memory.id)
+        else:
+            key = lambda memory: (memory.similarity, memory.id)
+        merged = heapq.merge(*ranked, key=key, reverse=True)
+        return list(itertools.islice(merged, max_results)), report
+    
+    def _recovered(self, shard: int, future: Future) -> None:
+        """Bring a shard back once its timed-out search has returned."""
+        with self._stuck_lock:
+            if self._stuck.get(shard) is future:
+                del self._stuck[shard]
+    
+    def search_memories(
+        self,
+        query_embedding: Optional[np.ndarray] = None,
+        level: Optional[MemoryLevel] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_relevance: float = 0.0,
+        max_results: int = 10,
+        tags: Optional[List[str]] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        page_token: Optional[str] = None
+    ) -> List[Memory]:
+        """Search every shard; see ``last_search_report`` for partial results."""
+        results, _ = self.search_memories_with_report(
+            query_embedding, level, memory_type, min_relevance, max_results,
+            tags, metadata_filters, execution_mode, include_embedding,
+            since, until, recency_half_life, page_token
+        )
+        return results
+    
+    def iter_search_memories(
+        self,
+        query_embedding: Optional[np.ndarray] = None,
+        level: Optional[MemoryLevel] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_relevance: float = 0.0,
+        max_results: int = 10,
+        tags: Optional[List[str]] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        page_token: Optional[str] = None,
+        batch_size: int = 100
+    ) -> Iterator[Memory]:
+        """Yield search results; the shards' lists are merged once every shard has answered."""
+        yield from self.search_memories(
+            query_embedding, level, memory_type, min_relevance, max_results,
+            tags, metadata_filters, execution_mode, include_embedding,
+            since, until, recency_half_life, page_token
+        )
+    
+    def update_memory(self, memory: Memory) -> None:
+        """Update an existing memory."""
+        self.update_memories([memory])
+    
+    def update_memories(self, memories: List[Memory]) -> None:
+        """Update memories on the shards that may hold them."""
+        by_id = {memory.id: memory for memory in memories}
+        self._run({
+            shard: lambda store, ids=ids: store.update_memories([by_id[i] for i in ids])
+            for shard, ids in self._shards_for_ids(list(by_id)).items()
+        })
+    
+    def update_fields(self, memory_ids: Union[str, List[str]], fields: Dict[str, Any]) -> int:
+        """Set only the given fields on memories. Returns the number matched."""
+        results = self._run({
+            shard: lambda store, ids=ids: store.update_fields(ids, fields)
+            for shard, ids in self._shards_for_ids(_memory_ids(memory_ids)).items()
+        })
+        return sum(results.values())
+    
+    def add_tags(self, tags: Dict[str, List[str]]) -> int:
+        """Add tags to memories on the shards that may hold them."""
+        results = self._run({
+            shard: lambda store, ids=ids: store.add_tags({i: tags[i] for i in ids})
+            for shard, ids in self._shards_for_ids(list(tags)).items()
+        })
+        return sum(results.values())
+    
+    def increment_access(
+        self,
+        memory_ids: Union[str, List[str]],
+        count: int = 1,
+        accessed_at: Optional[datetime] = None
+    ) -> int:
+        """Atomically add ``count`` to access counters. Returns the number matched."""
+        if accessed_at is None:
+            accessed_at = datetime.now()
+        results = self._run({
+            shard: lambda store, ids=ids: store.increment_access(ids, count, accessed_at)
+            for shard, ids in self._shards_for_ids(_memory_ids(memory_ids)).items()
+        })
+        return sum(results.values())
+    
+    def apply_access_deltas(self, deltas: Dict[str, Tuple[int, datetime]]) -> int:
+        """Apply accumulated accesses on every shard concerned."""
+        results = self._run({
+            shard: lambda store, ids=ids: store.apply_access_deltas({i: deltas[i] for i in ids})
+            for shard, ids in self._shards_for_ids(list(deltas)).items()
+        })
+        return sum(results.values())
+    
+    def delete_memory(self, memory_id: str) -> None:
+        """Delete a memory by ID."""
+        self.delete_memories([memory_id])
+    
+    def delete_memories(self, memory_ids: List[str]) -> int:
+        """Delete memories by ID. Returns the number deleted."""
+        results = self._run({
+            shard: lambda store, ids=ids: store.delete_memories(ids)
+            for shard, ids in self._shards_for_ids(list(memory_ids)).items()
+        })
+        return sum(results.values())
+    
+    def restore_memories(self, memory_ids: List[str]) -> int:
+        """Move archived memories back on the shards that may hold them. Returns the number restored."""
+        results = self._run({
+            shard: lambda store, ids=ids: store.restore_memories(ids)
+            for shard, ids in self._shards_for_ids(list(memory_ids)).items()
+        })
+        return sum(results.values())
+    
+    def begin_decay_pass(self, now: Optional[datetime] = None) -> float:
+        """Record the start of a decay pass; the time of the last one is kept on the first shard."""
+        return self._run({0: lambda store: store.begin_decay_pass(now)})[0]
+    
+    def decay_relevance(
+        self,
+        after_id: str,
+        batch_size: int,
+        elapsed: float,
+        half_life: float,
+        archive_below: float,
+        now: Optional[datetime] = None
+    ) -> Tuple[Optional[str], int, List[str]]:
+        """Decay the next batch of every shard in parallel and archive the faded memories.
+        
+        Shards walk their ids independently, so instead of an id this
+        returns an opaque cursor holding every shard's position, to pass
+        back as ``after_id`` (``""`` starts a pass, ``None`` ends it); see
+        ``MemoryStore.decay_relevance`` for the rest.
+        """
+        if now is None:
+            now = datetime.now()
+        positions = json.loads(after_id) if after_id else [""] * len(self.shards)
+        
+        results = self._run({
+            shard: lambda store, position=position: store.decay_relevance(
+                position, batch_size, elapsed, half_life, archive_below, now
+            )
+            for shard, position in enumerate(positions)
+            if position is not None
+        })
+        for shard, (last_id, _, _) in results.items():
+            positions[shard] = last_id
+        
+        decayed = sum(result[1] for result in results.values())
+        archived = [memory_id for result in results.values() for memory_id in result[2]]
+        cursor = json.dumps(positions) if any(position is not None for position in positions) else None
+        return cursor, decayed, archived
+    
+    def close(self) -> None:
+        """Close every shard and stop their threads."""
+        for shard, store in enumerate(self.shards):
+            self._executors[shard].submit(store.close).result()
+        for executor in self._executors:
+            executor.shutdown()
+        self.shards = []
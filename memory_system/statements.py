@@ -0,0 +1,78 @@
+"""
+Prepared statement cache module.
+"""
+
+from collections import OrderedDict
+from typing import Dict, Any, Hashable, Optional, Set, Tuple
+import itertools
+
+class StatementCache:
+    """Track server-side prepared statements keyed by query shape.
+    
+    A shape is any hashable description of the parts of a query that change
+    its SQL text (which filters are present, which metadata keys are used,
+    whether an embedding is ranked). Each shape is prepared once per
+    connection and then executed by name, so the server skips parsing and
+    can reuse its cached plan.
+    """
+    
+    def __init__(self, max_size: int = 64, prefix: str = "memory_stmt"):
+        """Initialize statement cache."""
+        self.max_size = max_size
+        self.prefix = prefix
+        self._statements: "OrderedDict[Hashable, str]" = OrderedDict()
+        self._names = itertools.count(1)
+        # Statements executed in the connection's current transaction; a
+        # session is only reset between transactions, so these cannot be lost
+        self.confirmed: Set[str] = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, shape: Hashable) -> Optional[str]:
+        """Return the statement name prepared for a shape, if any."""
+        name = self._statements.get(shape)
+        if name is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        self._statements.move_to_end(shape)
+        return name
+    
+    def new_name(self) -> str:
+        """Return an unused statement name."""
+        return f"{self.prefix}_{next(self._names)}"
+    
+    def add(self, shape: Hashable, name: Optional[str] = None) -> Tuple[str, Optional[str]]:
+        """Register a shape, once its statement is prepared.
+        
+        Returns the statement name (a new one unless given) and, when the
+        cache is full, the name of the least recently used statement to
+        deallocate.
+        """
+        name = name or self.new_name()
+        self._statements[shape] = name
+        
+        evicted = None
+        if len(self._statements) > self.max_size:
+            _, evicted = self._statements.popitem(last=False)
+            self.evictions += 1
+        return name, evicted
+    
+    def clear(self) -> None:
+        """Forget all statements, e.g. after the session was reset."""
+        self._statements.clear()
+        self.confirmed.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return cache statistics."""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._statements),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,384 @@
+"""
+Tiered storage module.
+"""
+
+from typing import List, Optional, Dict, Any, Iterator, Tuple, Union
+from datetime import datetime
+import copy
+import threading
+import time
+import numpy as np
+from .models import Memory, MemoryLevel, MemoryType
+from .columnar_store import ColumnarMemoryTable
+
+class TieredMemoryStore:
+    """Serve recalls from a bounded in-process hot tier in front of a store.
+    
+    The backing store stays the system of record: every write goes to it
+    and is mirrored into the hot tier for memories held there. Searches run
+    against the hot tier first and fall through to the backing store only
+    when it returns fewer than ``max_results`` matches (filters such as
+    ``min_relevance`` apply in both tiers) or, for similarity searches,
+    when a match scores below ``min_hot_similarity``.
+    
+    New and recalled memories are queued for promotion. Queued memories are
+    admitted in one batch once ``promotion_batch_size`` are waiting or
+    ``rebalance_interval`` seconds have passed, and the tier is then
+    trimmed back to ``hot_capacity`` by demoting the memories with the
+    lowest retention score (relevance, access count and recency, see
+    ``retention_scores``). Rebalancing is triggered by the store's own
+    calls, so no background thread touches the backing store's connection.
+    For the same reason, relevance scores changed behind this store's back
+    (see ``invalidate_relevance``) are reloaded by its next read.
+    """
+    
+    def __init__(
+        self,
+        memory_store,
+        hot_capacity: int = 10000,
+        promotion_batch_size: int = 100,
+        rebalance_interval: float = 5.0,
+        recency_half_life: float = 86400.0,
+        min_hot_similarity: float = 0.0
+    ):
+        """Initialize tiered memory store."""
+        self.memory_store = memory_store
+        self.hot_capacity = hot_capacity
+        self.promotion_batch_size = promotion_batch_size
+        self.rebalance_interval = rebalance_interval
+        self.recency_half_life = recency_half_life
+        self.min_hot_similarity = min_hot_similarity
+        self.hot = ColumnarMemoryTable()
+        self._pending: Dict[str, Memory] = {}
+        self._lock = threading.Lock()
+        self._rebalance_lock = threading.Lock()
+        self._last_rebalance = time.monotonic()
+        self._stale_relevance = False
+        self._hits = 0
+        self._misses = 0
+    
+    def _queue(self, memories: List[Memory]) -> None:
+        """Queue memories for promotion and rebalance when due."""
+        with self._lock:
+            for memory in memories:
+                if memory.embedding is not None and memory.id not in self.hot:
+                    # Callers may keep mutating the memories they were given
+                    self._pending[memory.id] = copy.copy(memory)
+            due = (
+                len(self._pending) >= self.promotion_batch_size
+                or time.monotonic() - self._last_rebalance >= self.rebalance_interval
+            )
+        if due:
+            self.rebalance()
+    
+    def rebalance(self) -> int:
+        """Promote queued memories and demote the least worth keeping.
+        
+        Returns the number of memories demoted.
+        """
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_rebalance = time.monotonic()
+        
+        with self._rebalance_lock:
+            dim = self.hot.dim
+            self.hot.insert([
+                memory for memory in pending.values()
+                if memory.id not in self.hot and (dim is None or len(memory.embedding) == dim)
+            ])
+            
+            excess = len(self.hot) - self.hot_capacity
+            if excess <= 0:
+                return 0
+            
+            ids, scores = self.hot.retention(datetime.now(), self.recency_half_life)
+            demoted = [ids[i] for i in np.argsort(scores, kind='stable')[:excess]]
+            return self.hot.delete(demoted)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Return tier sizes and how many searches the hot tier answered."""
+        searches = self._hits + self._misses
+        return {
+            "hot_size": len(self.hot),
+            "pending_promotions": len(self._pending),
+            "hot_hits": self._hits,
+            "hot_misses": self._misses,
+            "hot_hit_rate": self._hits / searches if searches else 0.0
+        }
+    
+    def store_memory(self, memory: Memory) -> None:
+        """Store a memory."""
+        self.store_memories([memory])
+    
+    def store_memories(self, memories: List[Memory]) -> None:
+        """Store memories in the backing store and queue them for the hot tier."""
+        self.memory_store.store_memories(memories)
+        self._queue(memories)
+    
+    def get_memories(self, memory_ids: List[str], include_embedding: bool = True) -> List[Memory]:
+        """Fetch memories by id, reading the backing store only for cold ids."""
+        self._refresh_relevance()
+        found = {memory.id: memory for memory in self.hot.get(list(memory_ids), include_embedding)}
+        cold = [memory_id for memory_id in memory_ids if memory_id not in found]
+        if cold:
+            for memory in self.memory_store.get_memories(cold, include_embedding):
+                found[memory.id] = memory
+        return [found[memory_id] for memory_id in memory_ids if memory_id in found]
+    
+    def search_memories(
+        self,
+        query_embedding: Optional[np.ndarray] = None,
+        level: Optional[MemoryLevel] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_relevance: float = 0.0,
+        max_results: int = 10,
+        tags: Optional[List[str]] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        page_token: Optional[str] = None
+    ) -> List[Memory]:
+        """Search the hot tier, falling through to the backing store."""
+        results = self._search_hot(
+            query_embedding, level, memory_type, min_relevance, max_results,
+            tags, metadata_filters, include_embedding, since, until, recency_half_life, page_token
+        )
+        if results is not None:
+            return results
+        
+        self._misses += 1
+        results = self.memory_store.search_memories(
+            query_embedding=query_embedding,
+            level=level,
+            memory_type=memory_type,
+            min_relevance=min_relevance,
+            max_results=max_results,
+            tags=tags,
+            metadata_filters=metadata_filters,
+            execution_mode=execution_mode,
+            include_embedding=include_embedding,
+            since=since,
+            until=until,
+            recency_half_life=recency_half_life,
+            page_token=page_token
+        )
+        self._queue(results)
+        return results
+    
+    def iter_search_memories(
+        self,
+        query_embedding: Optional[np.ndarray] = None,
+        level: Optional[MemoryLevel] = None,
+        memory_type: Optional[MemoryType] = None,
+        min_relevance: float = 0.0,
+        max_results: int = 10,
+        tags: Optional[List[str]] = None,
+        metadata_filters: Optional[Dict[str, Any]] = None,
+        execution_mode: str = "auto",
+        include_embedding: bool = True,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        recency_half_life: Optional[float] = None,
+        page_token: Optional[str] = None,
+        batch_size: int = 100
+    ) -> Iterator[Memory]:
+        """Yield search results as they arrive, streaming from the backing store on a miss."""
+        results = self._search_hot(
+            query_embedding, level, memory_type, min_relevance, max_results,
+            tags, metadata_filters, include_embedding, since, until, recency_half_life, page_token
+        )
+        if results is not None:
+            yield from results
+            return
+        
+        self._misses += 1
+        streamed = []
+        try:
+            for memory in self.memory_store.iter_search_memories(
+                query_embedding=query_embedding,
+                level=level,
+                memory_type=memory_type,
+                min_relevance=min_relevance,
+                max_results=max_results,
+                tags=tags,
+                metadata_filters=metadata_filters,
+                execution_mode=execution_mode,
+                include_embedding=include_embedding,
+                since=since,
+                until=until,
+                recency_half_life=recency_half_life,
+                page_token=page_token,
+                batch_size=batch_size
+            ):
+                streamed.append(memory)
+                yield memory
+        finally:
+            # Only the results the caller consumed are queued for promotion
+            self._queue(streamed)
+    
+    def _search_hot(
+        self,
+        query_embedding: Optional[np.ndarray],
+        level: Optional[MemoryLevel],
+        memory_type: Optional[MemoryType],
+        min_relevance: float,
+        max_results: int,
+        tags: Optional[List[str]],
+        metadata_filters: Optional[Dict[str, Any]],
+        include_embedding: bool,
+        since: Optional[datetime],
+        until: Optional[datetime],
+        recency_half_life: Optional[float],
+        page_token: Optional[str] = None
+    ) -> Optional[List[Memory]]:
+        """Return the hot tier's results when they answer the search, else ``None``."""
+        self._refresh_relevance()
+        # Later pages rank below results the hot tier may not hold
+        searchable = page_token is None and (
+            query_embedding is None or len(query_embedding) == self.hot.dim
+        )
+        if not searchable or len(self.hot) < max_results:
+            return None
+        
+        recency = (datetime.now(), recency_half_life) if recency_half_life else None
+        results = self.hot.search(
+            query_embedding, level, memory_type, min_relevance, max_results,
+            tags, metadata_filters, include_embedding, since, until, recency
+        )
+        if len(results) >= max_results and (
+            query_embedding is None
+            or results[-1].similarity >= self.min_hot_similarity
+        ):
+            self._hits += 1
+            return results
+        return None
+    
+    def update_memory(self, memory: Memory) -> None:
+        """Update an existing memory."""
+        self.update_memories([memory])
+    
+    def update_memories(self, memories: List[Memory]) -> None:
+        """Update memories in both tiers."""
+        self.memory_store.update_memories(memories)
+        self._discard_pending([memory.id for memory in memories])
+        hot = [memory for memory in memories if memory.id in self.hot]
+        try:
+            self.hot.update(hot)
+        except ValueError:
+            # An embedding of another dimension can only live in the backing store
+            self.hot.delete([memory.id for memory in hot])
+    
+    def update_fields(self, memory_ids: Union[str, List[str]], fields: Dict[str, Any]) -> int:
+        """Set only the given fields on memories in both tiers."""
+        updated = self.memory_store.update_fields(memory_ids, fields)
+        ids = [memory_ids] if isinstance(memory_ids, str) else list(memory_ids)
+        self._discard_pending(ids)
+        try:
+            self.hot.patch(ids, fields)
+        except ValueError:
+            self.hot.delete(ids)
+        return updated
+    
+    def add_tags(self, tags: Dict[str, List[str]]) -> int:
+        """Add tags to memories in both tiers."""
+        updated = self.memory_store.add_tags(tags)
+        self._discard_pending(list(tags))
+        self.hot.add_tags(tags)
+        return updated
+    
+    def increment_access(
+        self,
+        memory_ids: Union[str, List[str]],
+        count: int = 1,
+        accessed_at: Optional[datetime] = None
+    ) -> int:
+        """Add to access counters in both tiers."""
+        if accessed_at is None:
+            accessed_at = datetime.now()
+        ids = [memory_ids] if isinstance(memory_ids, str) else list(memory_ids)
+        return self.apply_access_deltas({memory_id: (count, accessed_at) for memory_id in ids})
+    
+    def apply_access_deltas(self, deltas: Dict[str, Tuple[int, datetime]]) -> int:
+        """Apply accumulated accesses to both tiers and queued promotions."""
+        updated = self.memory_store.apply_access_deltas(deltas)
+        self.mirror_access(deltas)
+        return updated
+    
+    def mirror_access(self, deltas: Dict[str, Tuple[int, datetime]]) -> None:
+        """Apply accesses already written to the backing store to the hot tier and queued promotions."""
+        ids = list(deltas)
+        self.hot.add_access(ids, [deltas[i][0] for i in ids], [deltas[i][1] for i in ids])
+        
+        with self._lock:
+            for memory_id, (hits, accessed_at) in deltas.items():
+                memory = self._pending.get(memory_id)
+                if memory is not None:
+                    memory.access_count += hits
+                    if memory.last_accessed is None or accessed_at > memory.last_accessed:
+                        memory.last_accessed = accessed_at
+    
+    def delete_memory(self, memory_id: str) -> None:
+        """Delete a memory by ID."""
+        self.delete_memories([memory_id])
+    
+    def delete_memories(self, memory_ids: List[str]) -> int:
+        """Delete memories from both tiers. Returns the number deleted."""
+        deleted = self.memory_store.delete_memories(memory_ids)
+        self._discard_pending(memory_ids)
+        self.hot.delete(list(memory_ids))
+        return deleted
+    
+    def restore_memories(self, memory_ids: List[str]) -> int:
+        """Restore archived memories and queue them for the hot tier."""
+        restored = self.memory_store.restore_memories(memory_ids)
+        if restored:
+            self._queue(self.memory_store.get_memories(list(memory_ids)))
+        return restored
+    
+    def discard(self, memory_ids: List[str]) -> None:
+        """Drop hot copies of memories the backing store lost behind this store's back (e.g. archived)."""
+        self._discard_pending(list(memory_ids))
+        self.hot.delete(list(memory_ids))
+    
+    def invalidate_relevance(self) -> None:
+        """Mark every relevance score stale, e.g. after the backing store decayed them."""
+        with self._lock:
+            self._stale_relevance = True
+    
+    def _refresh_relevance(self, batch_size: int = 1000) -> None:
+        """Reload stale relevance scores from the backing store, dropping memories it no longer holds."""
+        with self._lock:
+            if not self._stale_relevance:
+                return
+            self._stale_relevance = False
+            pending = list(self._pending)
+        
+        ids = self.hot.ids() + pending
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            scores = {
+                memory.id: memory.relevance_score
+                for memory in self.memory_store.get_memories(batch, include_embedding=False)
+            }
+            self.hot.set_relevance(list(scores), list(scores.values()))
+            with self._lock:
+                for memory_id in batch:
+                    memory = self._pending.get(memory_id)
+                    if memory is not None and memory_id in scores:
+                        memory.relevance_score = scores[memory_id]
+            self.discard([memory_id for memory_id in batch if memory_id not in scores])
+    
+    def _discard_pending(self, memory_ids: List[str]) -> None:
+        """Drop queued promotions that no longer match the backing store."""
+        with self._lock:
+            for memory_id in memory_ids:
+                self._pending.pop(memory_id, None)
+    
+    def close(self) -> None:
+        """Drop the hot tier and close the backing store."""
+        self.hot = ColumnarMemoryTable()
+        self._pending = {}
+        self.memory_store.close()
@@ -0,0 +1,127 @@
+"""
+Vector encoding and scoring module.
+"""
+
+from typing import List, Optional, Any, Callable, Sequence, Tuple, Union
+from datetime import datetime
+import numpy as np
+
+# Embeddings are persisted as little-endian float32: blobs in SQLite and
+# MongoDB, REAL[] in PostgreSQL
+EMBEDDING_DTYPE = np.dtype('<f4')
+
+def encode_embedding(embedding: Union[np.ndarray, List[float]]) -> bytes:
+    """Encode an embedding as a little-endian float32 blob."""
+    return np.asarray(embedding, dtype=EMBEDDING_DTYPE).tobytes()
+
+def decode_embedding(blob: Union[bytes, memoryview, List[float]]) -> np.ndarray:
+    """Decode a stored embedding without copying the underlying buffer."""
+    if isinstance(blob, (bytes, bytearray, memoryview)):
+        return np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+    # Documents written before the binary format stored plain float lists
+    return np.asarray(blob, dtype=EMBEDDING_DTYPE)
+
+def stack_embeddings(blobs: Sequence[Union[bytes, memoryview, List[float]]], dim: int) -> np.ndarray:
+    """Stack stored embeddings, blobs or float lists, into an (n, dim) matrix.
+    
+    Rows whose dimension differs from ``dim`` are left as zeros so that they
+    score 0, matching the behaviour of the server-side similarity function.
+    """
+    nbytes = dim * EMBEDDING_DTYPE.itemsize
+    blobs = [bytes(b) if isinstance(b, memoryview) else b for b in blobs]
+    if all(isinstance(b, bytes) and len(b) == nbytes for b in blobs):
+        return np.frombuffer(b''.join(blobs), dtype=EMBEDDING_DTYPE).reshape(len(blobs), dim)
+    if blobs and all(isinstance(b, list) and len(b) == dim for b in blobs):
+        # PostgreSQL REAL[] columns arrive as lists
+        return np.array(blobs, dtype=EMBEDDING_DTYPE)
+    
+    matrix = np.zeros((len(blobs), dim), dtype=EMBEDDING_DTYPE)
+    for i, blob in enumerate(blobs):
+        vector = decode_embedding(blob)
+        if vector.shape[0] == dim:
+            matrix[i] = vector
+    return matrix
+
+def cosine_scores(
+    matrix: np.ndarray,
+    query: Union[np.ndarray, List[float]],
+    dtype: np.dtype = EMBEDDING_DTYPE
+) -> np.ndarray:
+    """Compute cosine similarity of every row of ``matrix`` against ``query``, in ``dtype``."""
+    matrix = np.asarray(matrix, dtype=dtype)
+    query = np.asarray(query, dtype=dtype)
+    if matrix.shape[0] == 0:
+        return np.empty(0, dtype=dtype)
+    
+    denominator = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    scores = np.zeros(matrix.shape[0], dtype=dtype)
+    np.divide(matrix @ query, denominator, out=scores, where=denominator > 0)
+    return scores
+
+def float32_scores(scores: np.ndarray) -> np.ndarray:
+    """Round float64 scores to float32 as PostgreSQL's ``float4_score`` does.
+    
+    Scores too small for a normal float32 become 0.
+    """
+    return np.where(np.abs(scores) < np.finfo(np.float32).tiny, 0, scores).astype(np.float32)
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Return indices of the ``k`` highest scores, best first."""
+    if k <= 0 or scores.shape[0] == 0:
+        return np.empty(0, dtype=np.intp)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind='stable')]
+
+def top_k_after(
+    scores: np.ndarray,
+    k: int,
+    id_of: Callable[[int], Any],
+    after: Optional[Tuple[Any, Any]] = None
+) -> np.ndarray:
+    """Return indices of the ``k`` highest scores, best first, equal scores by descending id.
+    
+    With ``after`` (the score and id of an earlier result), only entries
+    ranked below it are considered, so a ranking can be walked page by
+    page. ``id_of`` maps an index to its id and is only called for
+    entries whose score ties with another.
+    """
+    candidates = None
+    if after is not None:
+        value, last_id = after
+        below = scores <= value
+        for i in np.flatnonzero(scores == value):
+            below[i] = id_of(int(i)) < last_id
+        candidates = np.flatnonzero(below)
+        best = candidates[top_k(scores[candidates], k)]
+    else:
+        best = top_k(scores, k)
+    if best.shape[0] == 0:
+        return best
+    
+    # Ties at the cut are settled by id too, so a page ends at its lowest (score, id)
+    ranked = scores[best]
+    cut = ranked[-1]
+    tied = np.flatnonzero(scores == cut) if candidates is None else candidates[scores[candidates] == cut]
+    if tied.shape[0] == 1 and not np.any(ranked[:-1] == ranked[1:]):
+        return best
+    pool = np.concatenate([best[ranked > cut], tied])
+    order = sorted(pool, key=lambda i: (scores[i], id_of(int(i))), reverse=True)
+    return np.asarray(order[:k], dtype=np.intp)
+
+def recency_weights(
+    timestamps: Sequence,
+    relevance_scores: Sequence[float],
+    now: datetime,
+    half_life: float
+) -> np.ndarray:
+    """Return the factors that blend similarities with recency and relevance.
+    
+    A memory's similarity times its factor is ``similarity * 2 ** (-age /
+    half_life) * relevance_score``, with its age in seconds before ``now``.
+    ``timestamps`` may hold datetimes or ISO 8601 strings.
+    """
+    age = (np.datetime64(now, 'us') - np.asarray(timestamps, dtype='datetime64[us]')) / np.timedelta64(1, 's')
+    return np.exp2(-np.clip(age, 0, None) / half_life) * np.asarray(relevance_scores, dtype=np.float64)
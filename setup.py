@@ -11,7 +11,8 @@ setup(
         "python-dotenv>=1.0.0",
         "sentence-transformers>=2.2.2",
         "psycopg2-binary>=2.9.9",
-        "pymongo>=4.6.0",
+        "asyncpg>=0.29.0",
+        "pymongo>=4.10.0",
         "redis>=5.0.1",
         "elasticsearch>=8.11.0",
         "openai>=1.3.0",
@@ -0,0 +1,83 @@
+"""Shared test fixtures."""
+
+import itertools
+import os
+import pytest
+from memory_system import DatabaseConfig, DatabaseProvider
+
+# PostgreSQL server for the tests that need one; they are skipped when it is unreachable
+PG_SETTINGS = {
+    "host": os.environ.get("MEMORY_SYSTEM_TEST_PG_HOST", "localhost"),
+    "port": int(os.environ.get("MEMORY_SYSTEM_TEST_PG_PORT", "5433")),
+    "user": os.environ.get("MEMORY_SYSTEM_TEST_PG_USER", "memory_system"),
+    "password": os.environ.get("MEMORY_SYSTEM_TEST_PG_PASSWORD", "memory_system_pass")
+}
+
+# MongoDB server for the tests that need one; they are skipped when it is unreachable
+MONGO_SETTINGS = {
+    "host": os.environ.get("MEMORY_SYSTEM_TEST_MONGO_HOST", "localhost"),
+    "port": int(os.environ.get("MEMORY_SYSTEM_TEST_MONGO_PORT", "27017"))
+}
+
+_DATABASES = itertools.count(1)
+
+def _admin_connection():
+    """Connect to the server's maintenance database, or skip the test."""
+    psycopg2 = pytest.importorskip("psycopg2")
+    try:
+        connection = psycopg2.connect(database="postgres", connect_timeout=2, **PG_SETTINGS)
+    except psycopg2.OperationalError as e:
+        pytest.skip(f"PostgreSQL unavailable: {e}")
+    connection.autocommit = True
+    return connection
+
+@pytest.fixture
+def pg_config():
+    """Create a scratch PostgreSQL database; returns a factory of configs for it."""
+    name = f"memory_system_test_{os.getpid()}_{next(_DATABASES)}"
+    admin = _admin_connection()
+    with admin.cursor() as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS {name}")
+        cursor.execute(f"CREATE DATABASE {name}")
+    
+    def config(**options) -> DatabaseConfig:
+        return DatabaseConfig(
+            provider=DatabaseProvider.POSTGRESQL,
+            host=PG_SETTINGS["host"],
+            port=PG_SETTINGS["port"],
+            database=name,
+            username=PG_SETTINGS["user"],
+            password=PG_SETTINGS["password"],
+            **options
+        )
+    
+    yield config
+    with admin.cursor() as cursor:
+        cursor.execute(f"DROP DATABASE IF EXISTS {name} WITH (FORCE)")
+    admin.close()
+
+@pytest.fixture
+def mongo_config():
+    """Name a scratch MongoDB database; returns a factory of configs for it."""
+    pymongo = pytest.importorskip("pymongo")
+    client = pymongo.MongoClient(serverSelectionTimeoutMS=2000, **MONGO_SETTINGS)
+    try:
+        client.admin.command("ping")
+    except pymongo.errors.PyMongoError as e:
+        pytest.skip(f"MongoDB unavailable: {e}")
+    name = f"memory_system_test_{os.getpid()}_{next(_DATABASES)}"
+    
+    def config(**options) -> DatabaseConfig:
+        return DatabaseConfig(
+            provider=DatabaseProvider.MONGODB,
+            host=MONGO_SETTINGS["host"],
+            port=MONGO_SETTINGS["port"],
+            database=name,
+            username=None,
+            password=None,
+            **options
+        )
+    
+    yield config
+    client.drop_database(name)
+    client.close()
@@ -0,0 +1,105 @@
+"""Test write-behind access tracking."""
+
+import pytest
+import time
+from datetime import datetime
+import numpy as np
+from memory_system import MemoryManager, MemoryLevel, MemoryQuery, LLMConfig, DatabaseConfig, DatabaseProvider
+from memory_system.access_tracker import AccessTracker
+
+class RecordingStore:
+    """Store stand-in that records applied deltas."""
+    
+    def __init__(self, fail: bool = False):
+        self.fail = fail
+        self.batches = []
+    
+    def apply_access_deltas(self, deltas):
+        if self.fail:
+            raise RuntimeError("store unavailable")
+        self.batches.append(deltas)
+        return len(deltas)
+
+def test_access_tracker_aggregates_and_flushes_on_size():
+    """Test that hits are summed per memory and flushed at the size threshold."""
+    store = RecordingStore()
+    tracker = AccessTracker(store, flush_interval=3600, max_pending=2)
+    
+    assert not tracker.record(["a"], datetime(2024, 1, 1))
+    assert not tracker.record(["a"], datetime(2024, 1, 2))
+    assert tracker.record(["b"], datetime(2024, 1, 3))
+    
+    assert tracker.flush() == 2
+    assert store.batches == [{"a": (2, datetime(2024, 1, 2)), "b": (1, datetime(2024, 1, 3))}]
+    assert tracker.pending() == 0
+
+def test_access_tracker_keeps_deltas_after_failed_flush():
+    """Test that a failed flush merges its deltas back."""
+    store = RecordingStore(fail=True)
+    tracker = AccessTracker(store)
+    tracker.record(["a"], datetime(2024, 1, 1))
+    
+    with pytest.raises(RuntimeError):
+        tracker.flush()
+    tracker.record(["a"], datetime(2024, 1, 2))
+    
+    store.fail = False
+    tracker.close()
+    assert store.batches == [{"a": (2, datetime(2024, 1, 2))}]
+
+def test_access_tracker_flushes_while_idle():
+    """Test that the background thread flushes without further records."""
+    store = RecordingStore()
+    flushed = []
+    tracker = AccessTracker(store, flush_interval=0.05, on_flush=flushed.append)
+    tracker.start()
+    tracker.record(["a"], datetime(2024, 1, 1))
+    
+    deadline = time.monotonic() + 2
+    while not store.batches and time.monotonic() < deadline:
+        time.sleep(0.01)
+    tracker.close()
+    assert store.batches == [{"a": (1, datetime(2024, 1, 1))}]
+    assert flushed == store.batches
+
+def test_background_flush_failures_are_reported_in_stats():
+    """Test that failed background flushes are counted with their last error."""
+    store = RecordingStore(fail=True)
+    tracker = AccessTracker(store, flush_interval=0.05)
+    tracker.start()
+    tracker.record(["a"], datetime(2024, 1, 1))
+    
+    deadline = time.monotonic() + 2
+    while not tracker.stats()["failures"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    tracker.stop()
+    stats = tracker.stats()
+    assert stats["failures"] >= 1
+    assert stats["last_error"] == "store unavailable"
+    assert stats["last_error_at"] is not None
+    assert stats["pending"] == 1
+    
+    store.fail = False
+    tracker.close()
+    assert tracker.stats()["flushes"] == 1
+
+@pytest.mark.parametrize("provider", [DatabaseProvider.MEMORY, DatabaseProvider.SQLITE])
+def test_idle_manager_persists_access(provider, tmp_path):
+    """Test that an idle manager writes recalled access counts to the store and hot tier."""
+    config = DatabaseConfig(provider=provider, database=str(tmp_path / "memories.db"))
+    manager = MemoryManager(
+        LLMConfig(provider="openai"), config, track_access=True, access_flush_interval=0.05, hot_tier_size=10
+    )
+    embedding = np.ones(8, dtype=np.float32)
+    manager.embedding_generator.generate = lambda text: embedding
+    memory = manager.add_experience("Idle note", MemoryLevel.TEAM)
+    manager.memory_store.rebalance()
+    assert len(manager.search_memories(MemoryQuery(content="note"))) == 1
+    
+    base_store = manager.memory_store.memory_store
+    deadline = time.monotonic() + 2
+    while base_store.get_memories([memory.id])[0].access_count == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert base_store.get_memories([memory.id])[0].access_count == 1
+    assert manager.memory_store.hot.get([memory.id])[0].access_count == 1
+    manager.close()
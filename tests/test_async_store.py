@@ -0,0 +1,137 @@
+"""Test the asyncio store and manager against live servers."""
+
+from datetime import datetime, timedelta
+import asyncio
+import numpy as np
+import pytest
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryQuery,
+    MemoryStore,
+    AsyncMemoryStore,
+    AsyncMemoryManager,
+    LLMConfig
+)
+
+def make_memory(i: int, embedding, start: datetime) -> Memory:
+    """Create a memory; pairs of memories share a timestamp."""
+    return Memory(
+        id=f"m{i:04d}",
+        content=f"Memory {i}",
+        embedding=embedding,
+        level=MemoryLevel.TEAM if i % 3 else MemoryLevel.ORGANIZATION,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=start - timedelta(minutes=i // 2),
+        tags=["even"] if i % 2 == 0 else []
+    )
+
+def check_matches_sync(config):
+    """Store, search and update through the async store, checking against the sync store."""
+    rng = np.random.default_rng(0)
+    start = datetime(2024, 6, 1, 12, 0)
+    memories = [make_memory(i, rng.standard_normal(16).astype(np.float32), start) for i in range(40)]
+    query = rng.standard_normal(16)
+    
+    searches = [
+        dict(max_results=8),
+        dict(query_embedding=query, max_results=8, execution_mode="server"),
+        dict(query_embedding=query, max_results=8, execution_mode="client"),
+        dict(query_embedding=query, max_results=8, level=MemoryLevel.TEAM, tags=["even"]),
+        # Each call measures ages from its own clock, which scales every weight alike
+        dict(query_embedding=query, max_results=8, recency_half_life=600.0)
+    ]
+    
+    async def run():
+        async with AsyncMemoryStore(config) as store:
+            await store.store_memories(memories)
+            results = [await store.search_memories(**search) for search in searches]
+            
+            assert await store.update_fields("m0003", {"content": "Changed"}) == 1
+            assert await store.apply_access_deltas({"m0003": (2, start)}) == 1
+            assert await store.delete_memories(["m0004"]) == 1
+            return results, await store.get_memories(["m0003", "m0004"])
+    
+    results, fetched = asyncio.run(run())
+    # Timestamp ties are broken by id, newest first
+    assert [memory.id for memory in results[0]] == [f"m{i:04d}" for i in (1, 0, 3, 2, 5, 4, 7, 6)]
+    assert [memory.id for memory in fetched] == ["m0003"]
+    assert fetched[0].content == "Changed"
+    assert fetched[0].access_count == 2
+    
+    sync_store = MemoryStore(config)
+    sync_store.store_memories([memories[4]])
+    sync_store.update_fields("m0003", {"content": memories[3].content})
+    for search, expected in zip(searches, results):
+        assert [memory.id for memory in sync_store.search_memories(**search)] == [memory.id for memory in expected]
+    sync_store.close()
+
+def test_async_postgresql_store(pg_config):
+    """Test the async PostgreSQL store against the sync one."""
+    check_matches_sync(pg_config())
+
+def test_async_mongodb_store(mongo_config):
+    """Test the async MongoDB store against the sync one."""
+    check_matches_sync(mongo_config())
+
+def test_async_manager_flushes_access_while_idle(pg_config):
+    """Test that recalled access counts reach the store without further activity."""
+    config = pg_config()
+    
+    async def run():
+        async with AsyncMemoryManager(LLMConfig(provider="openai"), config, track_access=True, access_flush_interval=0.05) as manager:
+            memory = await manager.add_experience("Idle note", MemoryLevel.TEAM)
+            assert len(await manager.search_memories(MemoryQuery(content="note", max_results=5))) == 1
+            await asyncio.sleep(0.3)
+            stored = await manager.memory_store.get_memories([memory.id])
+            assert manager.access_tracker.pending() == 0
+            return stored[0]
+    
+    stored = asyncio.run(run())
+    assert stored.access_count == 1
+    assert stored.last_accessed is not None
+
+def check_consolidation(config):
+    """Store atomically, scan, decay, archive and restore through the async store."""
+    start = datetime(2024, 6, 1, 12, 0)
+    memories = [make_memory(i, np.ones(4, dtype=np.float32), start) for i in range(10)]
+    for memory in memories[:4]:
+        memory.relevance_score = 0.1
+    
+    async def run():
+        async with AsyncMemoryStore(config) as store:
+            await store.store_memories(memories)
+            # A batch with a duplicate id is stored entirely or not at all
+            with pytest.raises(Exception):
+                await store.store_memories([make_memory(10, np.ones(4), start), memories[0]])
+            scanned = await store.scan_memories("m0002", 5, include_embedding=False)
+            
+            assert await store.begin_decay_pass(start) == 0
+            elapsed = await store.begin_decay_pass(start + timedelta(hours=1))
+            assert elapsed == 3600
+            batches = []
+            after_id = ""
+            while after_id is not None:
+                after_id, decayed, archived = await store.decay_relevance(
+                    after_id, 4, elapsed, 3600.0, 0.06, start + timedelta(hours=1)
+                )
+                batches.append((decayed, archived))
+            restored = await store.restore_memories(["m0000", "m0009"])
+            return scanned, batches, restored, await store.scan_memories(include_embedding=False)
+    
+    scanned, batches, restored, remaining = asyncio.run(run())
+    assert [memory.id for memory in scanned] == ["m0003", "m0004", "m0005", "m0006", "m0007"]
+    assert batches == [(4, ["m0000", "m0001", "m0002", "m0003"]), (4, []), (2, [])]
+    assert restored == 1
+    assert [memory.id for memory in remaining] == ["m0000"] + [f"m{i:04d}" for i in range(4, 10)]
+    assert remaining[0].relevance_score == pytest.approx(0.05)
+    assert remaining[1].relevance_score == pytest.approx(0.5)
+
+def test_async_postgresql_consolidation(pg_config):
+    """Test async consolidation on PostgreSQL."""
+    check_consolidation(pg_config())
+
+def test_async_mongodb_consolidation(mongo_config):
+    """Test async consolidation on MongoDB."""
+    check_consolidation(mongo_config())
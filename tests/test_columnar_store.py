@@ -0,0 +1,93 @@
+"""Test the in-memory columnar store."""
+
+import pytest
+import numpy as np
+from datetime import datetime
+from memory_system import Memory, MemoryLevel, MemoryType, MemoryStore, DatabaseConfig, DatabaseProvider
+
+@pytest.fixture
+def memory_store():
+    """Create an in-memory store."""
+    store = MemoryStore(DatabaseConfig(provider=DatabaseProvider.MEMORY))
+    yield store
+    store.close()
+
+def make_memory(i: int) -> Memory:
+    """Create a test memory."""
+    return Memory(
+        id=f"memory-{i}",
+        content=f"Memory {i}",
+        embedding=[1.0, float(i), 0.0],
+        level=MemoryLevel.TEAM if i % 2 else MemoryLevel.INDIVIDUAL,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime(2024, 1, 1 + i),
+        metadata={"parity": i % 2},
+        relevance_score=1.0,
+        access_count=0,
+        last_accessed=None,
+        tags=["test", f"tag-{i}"]
+    )
+
+def test_columnar_search(memory_store):
+    """Test similarity search and filters."""
+    memory_store.store_memories([make_memory(i) for i in range(6)])
+    
+    results = memory_store.search_memories(np.array([1.0, 2.0, 0.0]), max_results=2)
+    assert [memory.id for memory in results] == ["memory-2", "memory-3"]
+    assert results[0].similarity == pytest.approx(1.0)
+    assert results[0].embedding.tolist() == [1.0, 2.0, 0.0]
+    
+    # A query of another dimension scores 0, as in the database backends
+    results = memory_store.search_memories(np.ones(4), max_results=2)
+    assert [memory.similarity for memory in results] == [0.0, 0.0]
+    
+    results = memory_store.search_memories(
+        level=MemoryLevel.TEAM,
+        tags=["tag-1", "tag-2", "tag-3"],
+        metadata_filters={"parity": 1}
+    )
+    assert [memory.id for memory in results] == ["memory-3", "memory-1"]
+    assert results[0].timestamp == datetime(2024, 1, 4)
+
+def test_columnar_updates_and_deletes(memory_store):
+    """Test partial updates, access counters and deletes."""
+    memory_store.store_memories([make_memory(i) for i in range(3)])
+    
+    assert memory_store.update_fields(["memory-0", "memory-1"], {"tags": ["moved"]}) == 2
+    assert memory_store.increment_access("memory-0", count=2) == 1
+    
+    moved = memory_store.search_memories(tags=["moved"])
+    assert sorted(memory.id for memory in moved) == ["memory-0", "memory-1"]
+    assert memory_store.get_memories(["memory-0"])[0].access_count == 2
+    
+    assert memory_store.delete_memories(["memory-0", "memory-1"]) == 2
+    assert memory_store.search_memories(tags=["moved"]) == []
+    assert [memory.id for memory in memory_store.search_memories()] == ["memory-2"]
+
+def test_columnar_rejects_duplicate_ids(memory_store):
+    """Test that storing an existing id writes nothing."""
+    memory_store.store_memory(make_memory(0))
+    
+    with pytest.raises(ValueError):
+        memory_store.store_memories([make_memory(1), make_memory(0)])
+    assert memory_store.get_memories(["memory-1"]) == []
+
+def test_columnar_snapshot(tmp_path):
+    """Test that a snapshot written on close is loaded on start."""
+    config = DatabaseConfig(
+        provider=DatabaseProvider.MEMORY,
+        snapshot_path=str(tmp_path / "memories.npz")
+    )
+    store = MemoryStore(config)
+    store.store_memories([make_memory(i) for i in range(3)])
+    store.update_fields("memory-0", {"metadata": {"due": datetime(2024, 3, 1)}})
+    store.increment_access("memory-1", accessed_at=datetime(2024, 2, 1))
+    store.close()
+    
+    restored = MemoryStore(config)
+    memory = restored.get_memories(["memory-1"])[0]
+    assert memory.access_count == 1
+    assert memory.last_accessed == datetime(2024, 2, 1)
+    assert memory.metadata == {"parity": 1}
+    assert [m.id for m in restored.search_memories(tags=["tag-2"])] == ["memory-2"]
+    assert restored.get_memories(["memory-0"])[0].metadata == {"due": datetime(2024, 3, 1)}
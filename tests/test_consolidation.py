@@ -0,0 +1,153 @@
+"""Test relevance decay and archival."""
+
+from datetime import datetime, timedelta
+import time
+import numpy as np
+import pytest
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryStore,
+    MemoryQuery,
+    MemoryManager,
+    ConsolidationJob,
+    LLMConfig,
+    DatabaseConfig,
+    DatabaseProvider
+)
+
+def make_memories(now: datetime):
+    """Create idle memories, every other one recently and often recalled."""
+    memories = []
+    for i in range(20):
+        memory = Memory(
+            id=f"m{i:02d}",
+            content=f"Memory {i}",
+            embedding=np.ones(4, dtype=np.float32),
+            level=MemoryLevel.TEAM,
+            memory_type=MemoryType.EXPERIENCE,
+            timestamp=now - timedelta(days=60),
+            relevance_score=0.5,
+            tags=["project"]
+        )
+        if i % 2:
+            memory.access_count = 20
+            memory.last_accessed = now - timedelta(days=1)
+        memories.append(memory)
+    return memories
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Create an in-memory or SQLite store."""
+    if request.param == "memory":
+        config = DatabaseConfig(provider=DatabaseProvider.MEMORY)
+    else:
+        config = DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db"))
+    store = MemoryStore(config)
+    yield store
+    store.close()
+
+def test_decay_archives_faded_memories(store):
+    """Test that idle memories decay and fade into the archive."""
+    now = datetime.now()
+    store.store_memories(make_memories(now))
+    archived = []
+    job = ConsolidationJob(
+        store, half_life=10 * 86400, archive_below=0.2, batch_size=7, batch_pause=0,
+        on_archive=archived.extend
+    )
+    store.begin_decay_pass(now - timedelta(days=30))
+    
+    assert job.run_once() == {"decayed": 20, "archived": 10}
+    live = store.search_memories(max_results=100, tags=["project"])
+    assert sorted(archived) == [f"m{i:02d}" for i in range(0, 20, 2)]
+    assert {memory.id for memory in live} == {f"m{i:02d}" for i in range(1, 20, 2)}
+    
+    # One idle day counts, with a half-life stretched by 20 accesses
+    expected = 0.5 * 2 ** (-1 / (10 * (1 + np.log(21))))
+    assert live[0].relevance_score == pytest.approx(expected)
+    
+    assert store.restore_memories(["m00"]) == 1
+    restored = store.search_memories(max_results=100, tags=["project"])
+    assert "m00" in {memory.id for memory in restored}
+    assert store.get_memories(["m00"])[0].relevance_score == pytest.approx(0.5 / 8)
+
+def test_decay_visits_one_batch_at_a_time(store):
+    """Test that each call decays only the batch after ``after_id``."""
+    now = datetime.now()
+    store.store_memories(make_memories(now))
+    
+    last_id, decayed, archived = store.decay_relevance("", 7, 30 * 86400, 10 * 86400, 0.2, now=now)
+    assert (last_id, decayed, archived) == ("m06", 7, ["m00", "m02", "m04", "m06"])
+    assert store.get_memories(["m07"])[0].relevance_score == 0.5
+    
+    last_id, decayed, archived = store.decay_relevance("m13", 7, 30 * 86400, 10 * 86400, 0.2, now=now)
+    assert (last_id, decayed, archived) == (None, 6, ["m14", "m16", "m18"])
+
+def test_decay_pass_time_is_claimed_once(store):
+    """Test that every second between passes is decayed by exactly one pass."""
+    now = datetime.now()
+    assert store.begin_decay_pass(now - timedelta(days=3)) == 0
+    assert store.begin_decay_pass(now - timedelta(days=1)) == 2 * 86400
+    # A pass that started earlier finds its time already claimed
+    assert store.begin_decay_pass(now - timedelta(days=2)) == 0
+    assert store.begin_decay_pass(now) == 86400
+
+def test_restarted_and_concurrent_jobs_do_not_compound_decay(tmp_path):
+    """Test that the last pass is read from the store, not the job."""
+    config = DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db"))
+    store = MemoryStore(config)
+    now = datetime.now()
+    store.store_memories(make_memories(now))
+    store.begin_decay_pass(now - timedelta(days=10))
+    
+    options = dict(half_life=10 * 86400, archive_below=0, batch_pause=0)
+    ConsolidationJob(store, **options).run_once()
+    other = MemoryStore(config)
+    ConsolidationJob(other, **options).run_once()
+    
+    # Ten idle days in all: one half-life
+    assert store.get_memories(["m00"])[0].relevance_score == pytest.approx(0.25, rel=1e-4)
+    other.close()
+    store.close()
+
+def test_background_failures_are_reported_in_stats():
+    """Test that failed background passes are counted with their last error."""
+    store = MemoryStore(DatabaseConfig(provider=DatabaseProvider.MEMORY))
+    
+    def fail(*args):
+        raise RuntimeError("store unavailable")
+    
+    store.begin_decay_pass = fail
+    job = ConsolidationJob(store, interval=0.05)
+    job.start()
+    deadline = time.monotonic() + 2
+    while not job.stats()["failures"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    job.stop()
+    
+    stats = job.stats()
+    assert stats["failures"] >= 1
+    assert stats["last_error"] == "store unavailable"
+    assert stats["last_error_at"] is not None
+    assert stats["passes"] == 0
+    store.close()
+
+def test_decay_drops_cached_results(tmp_path):
+    """Test that cached searches do not outlive the relevance scores they were ranked by."""
+    manager = MemoryManager(
+        LLMConfig(provider="openai"),
+        DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db")),
+        query_cache_size=10, semantic_cache_size=10, hot_tier_size=100, consolidation_interval=3600
+    )
+    now = datetime.now()
+    manager.memory_store.store_memories(make_memories(now))
+    query = MemoryQuery("memory", min_relevance=0.3, max_results=100, tags=["project"])
+    assert len(manager.search_memories(query)) == 20
+    
+    manager.consolidation.memory_store.begin_decay_pass(now - timedelta(days=30))
+    manager.consolidation.run_once()
+    # Idle for the whole month, the memories never recalled fall below 0.3
+    assert {memory.id for memory in manager.search_memories(query)} == {f"m{i:02d}" for i in range(1, 20, 2)}
+    manager.close()
@@ -0,0 +1,130 @@
+"""Test near-duplicate detection."""
+
+from datetime import datetime
+import numpy as np
+import pytest
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryManager,
+    MemoryStore,
+    DuplicateIndex,
+    IngestionPipeline,
+    EmbeddingGenerator,
+    LLMConfig,
+    DatabaseConfig,
+    DatabaseProvider
+)
+from memory_system.dedup import find_duplicates, resolve_duplicates
+
+def make_memory(memory_id: str, embedding, content: str = None, tags=None) -> Memory:
+    """Create a team memory."""
+    return Memory(
+        id=memory_id,
+        content=content or f"Memory {memory_id}",
+        embedding=np.asarray(embedding, dtype=np.float32),
+        level=MemoryLevel.TEAM,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime.now(),
+        tags=tags or []
+    )
+
+def test_near_duplicates_found_through_buckets(tmp_path):
+    """Test that close embeddings match, distant ones do not, and the index persists."""
+    store = MemoryStore(DatabaseConfig(provider=DatabaseProvider.MEMORY))
+    rng = np.random.default_rng(1)
+    base = rng.standard_normal(64)
+    original = make_memory("a", base)
+    store.store_memory(original)
+    
+    path = str(tmp_path / "dedup.db")
+    index = DuplicateIndex(path, threshold=0.95)
+    index.add([original])
+    index.close()
+    
+    index = DuplicateIndex(path, threshold=0.95)
+    near = make_memory("b", base + rng.normal(scale=0.05, size=64))
+    far = make_memory("c", rng.standard_normal(64))
+    same_text = make_memory("d", rng.standard_normal(64), content=original.content)
+    duplicates = find_duplicates(index, [near, far, same_text], store)
+    assert {key: value.id for key, value in duplicates.items()} == {"b": "a", "d": "a"}
+    
+    with pytest.raises(ValueError):
+        DuplicateIndex(path, bands=8)
+
+def test_policies():
+    """Test skipping, merging and linking duplicates."""
+    store = MemoryStore(DatabaseConfig(provider=DatabaseProvider.MEMORY))
+    original = make_memory("a", [1, 0, 0], tags=["x"])
+    store.store_memory(original)
+    duplicate = make_memory("b", [1, 0, 0.01], tags=["y"])
+    
+    assert resolve_duplicates([duplicate], {"b": original}, "skip", store) == []
+    assert resolve_duplicates([duplicate], {"b": original}, "merge", store) == []
+    merged = store.get_memories(["a"])[0]
+    assert merged.access_count == 1 and merged.tags == ["x", "y"]
+    
+    kept = resolve_duplicates([duplicate], {"b": original}, "link", store)
+    assert kept[0].metadata["duplicate_of"] == "a"
+
+def test_manager_and_ingestion_dedupe():
+    """Test that repeated experiences are merged and batch duplicates dropped."""
+    manager = MemoryManager(
+        LLMConfig(provider="openai"),
+        DatabaseConfig(provider=DatabaseProvider.MEMORY),
+        track_access=False,
+        dedup_policy="merge"
+    )
+    first = manager.add_experience("Deployed the API", MemoryLevel.TEAM, tags=["ops"])
+    again = manager.add_experience("Deployed the API", MemoryLevel.TEAM, tags=["release"])
+    assert again.id == first.id and again.tags == ["ops", "release"]
+    
+    records = [{"content": "Deployed the API", "level": "team"}] + [
+        {"content": f"Note {i % 3}", "level": "team"} for i in range(6)
+    ]
+    assert manager.ingest(records, dedupe=False) == 3
+    assert len(manager.memory_store.db) == 4
+    manager.close()
+
+def test_manager_dedupes_against_memories_stored_before_startup(tmp_path):
+    """Test that a new duplicate index is filled from the store only when asked to."""
+    config = DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db"))
+    manager = MemoryManager(LLMConfig(provider="openai"), config, track_access=False)
+    first = manager.add_experience("Deployed the API", MemoryLevel.TEAM)
+    manager.close()
+    
+    manager = MemoryManager(LLMConfig(provider="openai"), config, track_access=False, dedup_policy="skip")
+    assert len(manager.dedup_index) == 0
+    manager.close()
+    
+    options = dict(dedup_policy="skip", dedup_rebuild=True, dedup_index_path=str(tmp_path / "dedup.db"))
+    manager = MemoryManager(LLMConfig(provider="openai"), config, track_access=False, **options)
+    assert len(manager.dedup_index) == 1
+    assert manager.add_experience("Deployed the API", MemoryLevel.TEAM).id == first.id
+    manager.close()
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Create an in-memory or SQLite store."""
+    if request.param == "memory":
+        config = DatabaseConfig(provider=DatabaseProvider.MEMORY)
+    else:
+        config = DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db"))
+    store = MemoryStore(config)
+    yield store
+    store.close()
+
+def test_merges_from_stale_copies_keep_every_tag(store):
+    """Test that merges into one original union their tags in the store."""
+    store.store_memory(make_memory("a", [1, 0, 0], tags=["x"]))
+    # Two writers each hold the original as it was before either merged
+    first, second = store.get_memories(["a"]) + store.get_memories(["a"])
+    resolve_duplicates([make_memory("b", [1, 0, 0], tags=["y", "x"])], {"b": first}, "merge", store)
+    resolve_duplicates([make_memory("c", [1, 0, 0], tags=["z"])], {"c": second}, "merge", store)
+    
+    merged = store.get_memories(["a"])[0]
+    assert merged.tags == ["x", "y", "z"]
+    assert merged.access_count == 2
+    assert [memory.id for memory in store.search_memories(tags=["z"])] == ["a"]
+    assert store.add_tags({"missing": ["x"]}) == 0
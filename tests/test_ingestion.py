@@ -0,0 +1,122 @@
+"""Test the bulk ingestion pipeline."""
+
+import pytest
+from memory_system import (
+    IngestionPipeline,
+    MemoryStore,
+    EmbeddingGenerator,
+    LLMConfig,
+    DatabaseConfig,
+    DatabaseProvider
+)
+
+class FailingStore(MemoryStore):
+    """In-memory store whose writes fail after a number of batches."""
+    
+    def __init__(self, fail_after: int):
+        super().__init__(DatabaseConfig(provider=DatabaseProvider.MEMORY))
+        self.fail_after = fail_after
+    
+    def store_memories(self, memories):
+        if self.fail_after == 0:
+            raise RuntimeError("write failed")
+        self.fail_after -= 1
+        super().store_memories(memories)
+
+def make_records(count: int):
+    """Create ingestion records."""
+    return [
+        {"content": f"Record {i} " + "word " * 10, "level": "team", "tags": ["import"]}
+        for i in range(count)
+    ]
+
+def test_pipeline_chunks_dedupes_and_writes():
+    """Test that every stage runs and reports metrics."""
+    store = MemoryStore(DatabaseConfig(provider=DatabaseProvider.MEMORY))
+    pipeline = IngestionPipeline(
+        store, EmbeddingGenerator(LLMConfig(provider="openai")),
+        embed_batch_size=4, write_batch_size=5, max_chunk_chars=40
+    )
+    
+    written = pipeline.run(make_records(10) + make_records(3))
+    assert written == 20
+    assert len(store.search_memories(tags=["import"], max_results=100)) == 20
+    
+    metrics = pipeline.metrics()
+    assert metrics["parse"]["items"] == 13
+    assert metrics["dedupe"]["items"] == 10
+    assert metrics["embed"]["items"] == 20
+    assert metrics["write"]["batches"] == 4
+
+def test_pipeline_resumes_from_checkpoint(tmp_path):
+    """Test that a failed import continues after its last written batch."""
+    store = FailingStore(fail_after=2)
+    options = dict(
+        embed_batch_size=3, write_batch_size=4, max_chunk_chars=40,
+        checkpoint_path=str(tmp_path / "import.json")
+    )
+    generator = EmbeddingGenerator(LLMConfig(provider="openai"))
+    
+    with pytest.raises(RuntimeError):
+        IngestionPipeline(store, generator, **options).run(make_records(10))
+    assert IngestionPipeline(store, generator, **options).load_checkpoint() == (4, 0)
+    
+    store.fail_after = -1
+    assert IngestionPipeline(store, generator, **options).run(make_records(10)) == 12
+    assert len(store.search_memories(tags=["import"], max_results=100)) == 20
+
+def test_pipeline_resume_skips_chunks_written_before_the_checkpoint(tmp_path):
+    """Test that a batch stored just before a crash is not written twice."""
+    class CrashingStore(MemoryStore):
+        """In-memory store that crashes right after its second write."""
+        
+        def __init__(self):
+            super().__init__(DatabaseConfig(provider=DatabaseProvider.MEMORY))
+            self.writes = 0
+        
+        def store_memories(self, memories):
+            super().store_memories(memories)
+            self.writes += 1
+            if self.writes == 2:
+                raise RuntimeError("crashed before the checkpoint")
+    
+    store = CrashingStore()
+    options = dict(
+        embed_batch_size=3, write_batch_size=4, max_chunk_chars=40,
+        checkpoint_path=str(tmp_path / "import.json"), source="records.jsonl"
+    )
+    generator = EmbeddingGenerator(LLMConfig(provider="openai"))
+    
+    with pytest.raises(RuntimeError):
+        IngestionPipeline(store, generator, **options).run(make_records(10))
+    assert IngestionPipeline(store, generator, **options).load_checkpoint() == (2, 0)
+    
+    assert IngestionPipeline(store, generator, **options).run(make_records(10)) == 12
+    memories = store.search_memories(tags=["import"], max_results=100)
+    assert len(memories) == 20
+    assert sum(memory.metadata["chunk"] == 0 for memory in memories) == 10
+    
+    # Importing the same stream again from scratch writes nothing
+    del options["checkpoint_path"]
+    assert IngestionPipeline(store, generator, **options).run(make_records(10)) == 0
+
+def test_distinct_streams_with_the_same_records_are_both_written(tmp_path):
+    """Test that chunk ids of different streams never collide."""
+    store = MemoryStore(DatabaseConfig(provider=DatabaseProvider.MEMORY))
+    generator = EmbeddingGenerator(LLMConfig(provider="openai"))
+    options = dict(embed_batch_size=3, write_batch_size=4, max_chunk_chars=40)
+    
+    # Unnamed streams, with and without a checkpoint
+    assert IngestionPipeline(store, generator, **options).run(make_records(5)) == 10
+    assert IngestionPipeline(store, generator, **options).run(make_records(5)) == 10
+    for name in ("a.json", "b.json"):
+        pipeline = IngestionPipeline(
+            store, generator, checkpoint_path=str(tmp_path / name), **options
+        )
+        assert pipeline.run(make_records(5)) == 10
+    
+    # Named streams overlapping at the same offsets
+    assert IngestionPipeline(store, generator, source="a.jsonl", **options).run(make_records(5)) == 10
+    assert IngestionPipeline(store, generator, source="b.jsonl", **options).run(make_records(8)) == 16
+    assert IngestionPipeline(store, generator, source="a.jsonl", **options).run(make_records(5)) == 0
+    assert len(store.search_memories(tags=["import"], max_results=200)) == 66
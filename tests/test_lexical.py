@@ -0,0 +1,99 @@
+"""Test the BM25 lexical index and hybrid search."""
+
+from datetime import datetime
+import math
+import numpy as np
+import pytest
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryQuery,
+    MemoryManager,
+    MemoryStore,
+    LexicalIndex,
+    EmbeddingGenerator,
+    LLMConfig,
+    DatabaseConfig,
+    DatabaseProvider
+)
+from memory_system.lexical import tokenize, fuse_rankings
+
+def make_memory(memory_id: str, content: str, level: MemoryLevel = MemoryLevel.TEAM) -> Memory:
+    """Create a memory without embedding."""
+    return Memory(
+        id=memory_id,
+        content=content,
+        embedding=None,
+        level=level,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime.now()
+    )
+
+def test_tokenize_keeps_identifiers():
+    """Test that compound identifiers are indexed whole and by part."""
+    assert tokenize("Fixed PROJ-1234 in v2.1") == ["fixed", "proj-1234", "proj", "1234", "in", "v2.1", "v2", "1"]
+
+def test_bm25_ranking_matches_exhaustive_scoring():
+    """Test that early termination returns the exhaustive top results."""
+    rng = np.random.default_rng(0)
+    words = [f"w{i}" for i in range(50)]
+    contents = [" ".join(rng.choice(words, size=rng.integers(3, 30))) for _ in range(2000)]
+    index = LexicalIndex(block_size=64)
+    index.add([make_memory(str(i), content) for i, content in enumerate(contents)])
+    index.remove([str(i) for i in range(0, 2000, 3)])
+    
+    live = {str(i): tokenize(content) for i, content in enumerate(contents) if i % 3}
+    average_length = sum(len(terms) for terms in live.values()) / len(live)
+    
+    def bm25(terms, query_terms):
+        score = 0.0
+        for term in query_terms:
+            frequency = terms.count(term)
+            if frequency:
+                document_frequency = sum(term in other for other in live.values())
+                idf = math.log(1 + (len(live) - document_frequency + 0.5) / (document_frequency + 0.5))
+                norm = 1.2 * (0.25 + 0.75 * len(terms) / average_length)
+                score += idf * 2.2 * frequency / (frequency + norm)
+        return score
+    
+    expected = sorted((bm25(terms, ["w3", "w7"]) for terms in live.values()), reverse=True)[:5]
+    assert [score for _, score in index.search("w3 w7", 5)] == pytest.approx(expected)
+
+def test_fuse_rankings():
+    """Test reciprocal rank and weighted fusion."""
+    rankings = [[("a", 0.9), ("b", 0.8)], [("b", 12.0), ("c", 6.0)]]
+    assert [memory_id for memory_id, _ in fuse_rankings(rankings)] == ["b", "a", "c"]
+    assert fuse_rankings(rankings, "weighted", [0.5, 0.5])[0] == ("b", pytest.approx(0.5 * 0.8 / 0.9 + 0.5))
+    with pytest.raises(ValueError):
+        fuse_rankings(rankings, "max")
+
+def test_manager_hybrid_search(tmp_path):
+    """Test that exact identifiers are recalled, filtered and kept in sync."""
+    config = DatabaseConfig(provider=DatabaseProvider.MEMORY, snapshot_path=str(tmp_path / "memories.npz"))
+    store = MemoryStore(config)
+    stored = make_memory("stored", "Outage tracked in INC-4821")
+    stored.embedding = EmbeddingGenerator(LLMConfig(provider="openai")).generate(stored.content)
+    store.store_memory(stored)
+    store.close()
+    
+    # Memories already stored are indexed when the manager starts; test
+    # embeddings are random, so keyword matches get the larger weight
+    manager = MemoryManager(
+        LLMConfig(provider="openai"), config, track_access=False, lexical_search=True, hybrid_weight=0.7
+    )
+    
+    for i in range(20):
+        manager.add_experience(f"Routine standup notes {i}", MemoryLevel.TEAM)
+    ticket = manager.add_experience("Customer escalation for ticket ACME-7731", MemoryLevel.TEAM)
+    manager.add_experience("Individual note on ACME-7731", MemoryLevel.INDIVIDUAL)
+    
+    results = manager.search_memories(MemoryQuery(content="ACME-7731", level=MemoryLevel.TEAM, max_results=3))
+    assert results[0].id == ticket.id
+    assert all(memory.level == MemoryLevel.TEAM for memory in results)
+    assert manager.search_memories(MemoryQuery(content="INC-4821", max_results=3))[0].id == "stored"
+    
+    manager.delete_memory(ticket.id)
+    results = manager.search_memories(MemoryQuery(content="ACME-7731", level=MemoryLevel.TEAM, max_results=3))
+    assert ticket.id not in [memory.id for memory in results]
+    manager.close()
@@ -2,7 +2,9 @@
 
 import pytest
 from datetime import datetime
+import numpy as np
 from memory_system import (
+    MemoryStore,
     MemoryManager,
     MemoryLevel,
     MemoryType,
@@ -59,6 +61,34 @@ def test_memory_creation():
     assert memory.metadata == {"test": "metadata"}
     assert memory.tags == ["test", "memory"]
 
+def test_memory_representation_is_compact(tmp_path):
+    """Test slotted memories, read-only float32 embeddings and interned decoded tags."""
+    memory = Memory(
+        id="test-id",
+        content="Test memory content",
+        embedding=[0.1, 0.2, 0.3],
+        level=MemoryLevel.TEAM,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime.now(),
+        tags=["test"]
+    )
+    assert not hasattr(memory, "__dict__")
+    assert memory.embedding.dtype == np.float32 and not memory.embedding.flags.writeable
+    
+    # The caller's array stays writable, and writing to it leaves the memory alone
+    vector = np.ones(3, dtype=np.float32)
+    memory.embedding = vector
+    vector[0] = 2.0
+    assert vector.flags.writeable and memory.embedding[0] == 1.0
+    
+    store = MemoryStore(DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db")))
+    for i in range(2):
+        memory.id = f"test-{i}"
+        store.store_memory(memory)
+    first, second = store.get_memories(["test-0", "test-1"])
+    assert first.level is MemoryLevel.TEAM and first.tags[0] is second.tags[0]
+    store.close()
+
 def test_memory_query_creation():
     """Test creating a memory query."""
     query = MemoryQuery(
@@ -0,0 +1,32 @@
+"""Test the shared MongoDB client cache."""
+
+from memory_system.config import DatabaseConfig, DatabaseProvider
+from memory_system.memory_store import (
+    _MONGO_CLIENTS,
+    _acquire_mongo_client,
+    _release_mongo_client,
+    _chunks
+)
+
+def test_mongo_clients_are_shared_per_connection_parameters():
+    """Test that stores with the same parameters reuse one client."""
+    config = DatabaseConfig(provider=DatabaseProvider.MONGODB, port=27999, pool_max_size=4)
+    other = DatabaseConfig(provider=DatabaseProvider.MONGODB, port=27999, pool_max_size=8)
+    
+    key, client = _acquire_mongo_client(config)
+    same_key, same_client = _acquire_mongo_client(config)
+    other_key, other_client = _acquire_mongo_client(other)
+    
+    assert same_key == key and same_client is client
+    assert other_client is not client
+    assert client.options.pool_options.max_pool_size == 4
+    
+    _release_mongo_client(key)
+    assert key in _MONGO_CLIENTS
+    _release_mongo_client(same_key)
+    _release_mongo_client(other_key)
+    assert key not in _MONGO_CLIENTS and other_key not in _MONGO_CLIENTS
+
+def test_chunks():
+    """Test splitting bulk writes into batches."""
+    assert list(_chunks([1, 2, 3, 4, 5], 2)) == [[1, 2], [3, 4], [5]]
@@ -0,0 +1,39 @@
+"""Test MongoDB embedding encoding and streamed ranking."""
+
+import pytest
+import numpy as np
+from bson.binary import Binary, BinaryVectorDtype
+from memory_system.vectors import decode_embedding, encode_embedding
+from memory_system.memory_store import (
+    _mongo_vector,
+    _mongo_embedding_blob,
+    _rank_mongo_batch,
+    _vector_search_similarity
+)
+
+def test_mongo_vector_round_trip():
+    """Test that embeddings are stored as BSON float32 vectors."""
+    vector = _mongo_vector([0.5, -1.25, 3.0])
+    
+    assert vector.as_vector().dtype == BinaryVectorDtype.FLOAT32
+    assert vector.as_vector().data == [0.5, -1.25, 3.0]
+    assert decode_embedding(_mongo_embedding_blob(vector)).tolist() == [0.5, -1.25, 3.0]
+    
+    # Raw blobs and float lists written by earlier versions are still readable
+    assert decode_embedding(_mongo_embedding_blob(encode_embedding([1.0]))).tolist() == [1.0]
+    assert _mongo_embedding_blob([1.0, 2.0]) == [1.0, 2.0]
+    assert _vector_search_similarity(1.0) == 1.0
+
+def test_rank_mongo_batches_keeps_running_top_k():
+    """Test that ranking batch by batch matches ranking all at once."""
+    best = ([], np.empty(0, dtype=np.float32))
+    batches = [
+        [{'_id': 'a', 'embedding': _mongo_vector([0.0, 1.0])}, {'_id': 'b', 'embedding': _mongo_vector([1.0, 0.1])}],
+        [{'_id': 'c', 'embedding': _mongo_vector([1.0, 0.0])}, {'_id': 'd', 'embedding': _mongo_vector([1.0, 1.0])}]
+    ]
+    for docs in batches:
+        best = _rank_mongo_batch(best, docs, np.array([1.0, 0.0]), 2)
+    
+    ids, scores = best
+    assert ids == ['c', 'b']
+    assert scores[0] == pytest.approx(1.0)
@@ -0,0 +1,99 @@
+"""Test keyset pagination of search results."""
+
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryQuery,
+    MemoryManager,
+    MemoryStore,
+    LLMConfig,
+    DatabaseConfig,
+    DatabaseProvider,
+    PageToken
+)
+
+def make_memory(i: int, start: datetime) -> Memory:
+    """Create a memory; every fourth one ties with the next on timestamp and embedding."""
+    group = i - 1 if i % 4 == 1 else i
+    return Memory(
+        id=f"{i:03d}",
+        content=f"Memory {i}",
+        embedding=np.random.default_rng(group).standard_normal(16).astype(np.float32),
+        level=MemoryLevel.TEAM,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=start - timedelta(minutes=group)
+    )
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Create an in-memory or SQLite store."""
+    if request.param == "memory":
+        config = DatabaseConfig(provider=DatabaseProvider.MEMORY)
+    else:
+        config = DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db"))
+    store = MemoryStore(config)
+    start = datetime(2024, 1, 1, 12, 0, 0, 500000)
+    store.store_memories([make_memory(i, start) for i in range(60)])
+    yield store
+    store.close()
+
+@pytest.mark.parametrize("recency_half_life", [None, 3600.0])
+def test_pages_walk_the_full_ranking(store, recency_half_life):
+    """Test that consecutive pages equal one large search, ties included."""
+    query = np.random.default_rng(1).standard_normal(16)
+    for query_embedding in (None, query):
+        ranked = query_embedding is not None
+        # Pages share the instant recency is measured from
+        page = PageToken(ranked, now=datetime.now())
+        expected = store.search_memories(
+            query_embedding, max_results=60, recency_half_life=recency_half_life,
+            page_token=page.encode()
+        )
+        walked = []
+        while page is not None:
+            results = store.search_memories(
+                query_embedding, max_results=7, recency_half_life=recency_half_life,
+                page_token=page.encode()
+            )
+            walked.extend(results)
+            page = page.next(results, 7)
+        assert [memory.id for memory in walked] == [memory.id for memory in expected]
+
+def test_invalid_page_token(store):
+    """Test that malformed tokens and tokens of another ordering are rejected."""
+    with pytest.raises(ValueError):
+        store.search_memories(max_results=5, page_token="not a token")
+    with pytest.raises(ValueError):
+        store.search_memories(max_results=5, page_token=PageToken(True).encode())
+
+def test_manager_search_page():
+    """Test that memories stored between pages do not repeat or skip results."""
+    manager = MemoryManager(
+        LLMConfig(provider="openai"),
+        DatabaseConfig(provider=DatabaseProvider.MEMORY),
+        track_access=False
+    )
+    for i in range(25):
+        manager.add_experience(f"Note {i}", MemoryLevel.TEAM)
+    
+    # Test embeddings are random; pin the query's so every page ranks alike
+    embedding = manager.embedding_generator.generate("note")
+    manager.embedding_generator.generate = lambda text: embedding
+    
+    query = MemoryQuery(content="note", max_results=10)
+    first, token = manager.search_page(query)
+    # The best match of all arrives before the second page
+    late = manager.add_experience("Late note", MemoryLevel.TEAM)
+    query.page_token = token
+    second, token = manager.search_page(query)
+    
+    similarities = [memory.similarity for memory in first + second]
+    assert len(set(memory.id for memory in first + second)) == 20
+    assert late.id not in [memory.id for memory in second]
+    assert similarities == sorted(similarities, reverse=True)
+    assert token is not None
+    manager.close()
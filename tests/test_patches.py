@@ -0,0 +1,25 @@
+"""Test partial update statements."""
+
+import pytest
+from memory_system.models import MemoryLevel
+from memory_system.memory_store import _patch_fields, _pg_patch_sql, _mongo_patch
+
+def test_patch_sql_sets_only_given_fields():
+    """Test building a partial UPDATE over several ids."""
+    field_names = _patch_fields({"relevance_score": 0.5, "level": MemoryLevel.TEAM})
+    text, types = _pg_patch_sql(field_names)
+    
+    assert field_names == ("level", "relevance_score")
+    assert text == (
+        "UPDATE memories SET level = $1::varchar, relevance_score = $2::float8 "
+        "WHERE id = ANY($3::text[])"
+    )
+    assert types == ["varchar", "float8", "text[]"]
+    assert _mongo_patch({"level": MemoryLevel.TEAM}) == {"level": "team"}
+
+def test_patch_rejects_immutable_fields():
+    """Test that ids and timestamps cannot be patched."""
+    with pytest.raises(ValueError):
+        _patch_fields({"timestamp": None})
+    with pytest.raises(ValueError):
+        _patch_fields({})
@@ -0,0 +1,346 @@
+"""Test the PostgreSQL store against a live server."""
+
+from datetime import datetime, timedelta
+import itertools
+import json
+import time
+import numpy as np
+import psycopg2
+import pytest
+from memory_system import Memory, MemoryLevel, MemoryType, MemoryQuery, MemoryStore, MemoryManager, LLMConfig, PageToken
+from memory_system.memory_store import _PG_SETUP_SQL
+
+def make_memory(i: int, embedding, level: MemoryLevel = MemoryLevel.TEAM, **fields) -> Memory:
+    """Create a memory stored ``i`` minutes ago."""
+    fields.setdefault("timestamp", datetime.now() - timedelta(minutes=i))
+    return Memory(
+        id=f"m{i:04d}",
+        content=f"Memory {i}",
+        embedding=embedding,
+        level=level,
+        memory_type=MemoryType.EXPERIENCE,
+        **fields
+    )
+
+def connect(config):
+    """Open a plain connection to the test database."""
+    return psycopg2.connect(
+        host=config.host, port=config.port, database=config.database,
+        user=config.username, password=config.password
+    )
+
+def test_server_scoring_matches_client(pg_config):
+    """Test that decoded server-side scores equal the client's, other dimensions scoring 0."""
+    store = MemoryStore(pg_config())
+    rng = np.random.default_rng(0)
+    memories = [make_memory(i, rng.standard_normal(32).astype(np.float32)) for i in range(200)]
+    memories.append(make_memory(200, rng.standard_normal(8).astype(np.float32)))
+    store.store_memories(memories)
+    
+    query = rng.standard_normal(32)
+    server = store.search_memories(query, max_results=201, execution_mode="server")
+    client = store.search_memories(query, max_results=201, execution_mode="client")
+    assert [memory.id for memory in server] == [memory.id for memory in client]
+    assert [memory.similarity for memory in server] == pytest.approx([memory.similarity for memory in client], abs=1e-6)
+    assert next(memory.similarity for memory in server if memory.id == "m0200") == 0
+    
+    # The decoded column follows embedding updates
+    store.update_fields("m0007", {"embedding": query})
+    assert store.search_memories(query, max_results=1, execution_mode="server")[0].id == "m0007"
+    store.close()
+
+def test_float_array_tables_are_migrated(pg_config):
+    """Test that tables of FLOAT[] embeddings are converted on connect."""
+    config = pg_config()
+    connection = connect(config)
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            CREATE TABLE memories (
+                id VARCHAR(36) PRIMARY KEY, content TEXT NOT NULL, embedding FLOAT[] NOT NULL,
+                level VARCHAR(50) NOT NULL, memory_type VARCHAR(50) NOT NULL, timestamp TIMESTAMP NOT NULL,
+                metadata JSONB, relevance_score FLOAT NOT NULL, access_count INTEGER NOT NULL,
+                last_accessed TIMESTAMP, tags TEXT[]
+            )
+        """)
+        cursor.execute(
+            "INSERT INTO memories VALUES ('a', 'x', '{1, 0.5, -2}', 'team', 'experience', now(), '{}', 1, 0, NULL, '{}')"
+        )
+    connection.commit()
+    connection.close()
+    
+    store = MemoryStore(config)
+    result = store.search_memories(np.array([1.0, 0.5, -2.0]), max_results=1, execution_mode="server")
+    assert result[0].embedding.tolist() == [1.0, 0.5, -2.0]
+    assert result[0].similarity == pytest.approx(1.0)
+    store.close()
+
+def test_blob_tables_are_migrated(pg_config):
+    """Test that float32 blob tables with a generated REAL[] copy keep one REAL[] column."""
+    config = pg_config()
+    connection = connect(config)
+    blob = np.array([1.0, 0.5, -2.0], dtype="<f4").tobytes()
+    with connection.cursor() as cursor:
+        cursor.execute(_PG_SETUP_SQL)
+        for table in ("memories", "memories_archive"):
+            cursor.execute(f"""
+                CREATE TABLE {table} (
+                    id VARCHAR(36) PRIMARY KEY, content TEXT NOT NULL, embedding BYTEA NOT NULL,
+                    level VARCHAR(50) NOT NULL, memory_type VARCHAR(50) NOT NULL, timestamp TIMESTAMP NOT NULL,
+                    metadata JSONB, relevance_score FLOAT NOT NULL, access_count INTEGER NOT NULL,
+                    last_accessed TIMESTAMP, tags TEXT[]
+                )
+            """)
+            cursor.execute(
+                f"INSERT INTO {table} VALUES (%s, 'x', %s, 'team', 'experience', now(), '{{}}', 1, 0, NULL, '{{}}')",
+                (table, blob)
+            )
+        cursor.execute("""
+            ALTER TABLE memories ADD COLUMN embedding_values REAL[]
+            GENERATED ALWAYS AS (float4_array_from_blob(embedding)) STORED
+        """)
+    connection.commit()
+    connection.close()
+    
+    store = MemoryStore(config)
+    result = store.search_memories(np.array([1.0, 0.5, -2.0]), max_results=1, execution_mode="server")
+    assert result[0].embedding.tolist() == [1.0, 0.5, -2.0]
+    assert result[0].similarity == pytest.approx(1.0)
+    assert store.restore_memories(["memories_archive"]) == 1
+    connection = connect(config)
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT table_name, column_name, udt_name FROM information_schema.columns
+            WHERE table_name IN ('memories', 'memories_archive') AND column_name LIKE 'embedding%'
+            ORDER BY table_name
+        """)
+        assert cursor.fetchall() == [("memories", "embedding", "_float4"), ("memories_archive", "embedding", "_float4")]
+    connection.close()
+    store.close()
+
+def test_lost_statements_keep_earlier_uncommitted_work(pg_config):
+    """Test that re-preparing after a session reset keeps the transaction's earlier statements."""
+    store = MemoryStore(pg_config(partitioned=True))
+    store.store_memories([make_memory(0, np.ones(4, dtype=np.float32))])
+    # Statements lost with the session, as after a pooler reset
+    with store.db.cursor() as cursor:
+        cursor.execute("DEALLOCATE ALL")
+    
+    # The new month's partition is created in the transaction before the insert re-prepares
+    old = make_memory(1, np.ones(4, dtype=np.float32), timestamp=datetime(2020, 1, 15))
+    store.store_memories([old])
+    assert [memory.id for memory in store.search_memories(max_results=5)] == ["m0000", "m0001"]
+    store.close()
+
+def test_failed_prepare_is_not_cached(pg_config):
+    """Test that a statement failing to prepare leaves no cache entry behind."""
+    store = MemoryStore(pg_config())
+    with store.db.cursor() as cursor:
+        with pytest.raises(psycopg2.errors.UndefinedColumn):
+            store._execute_prepared(cursor, ("broken",), lambda: ("SELECT missing FROM memories", []), [])
+    store.db.rollback()
+    assert store.statement_cache.get(("broken",)) is None
+    store.close()
+
+def partition_names(config) -> set:
+    """Return the names of the tables attached below ``memories``."""
+    connection = connect(config)
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT child.relname
+            FROM pg_partition_tree('memories') AS tree
+            JOIN pg_class child ON child.oid = tree.relid
+            WHERE tree.level > 0
+        """)
+        names = {row[0] for row in cursor.fetchall()}
+    connection.close()
+    return names
+
+def test_partitions_are_created_pruned_and_detached(pg_config):
+    """Test level and month partitions, pruning of windowed queries and detaching old months."""
+    config = pg_config(partitioned=True)
+    store = MemoryStore(config)
+    embedding = np.ones(4, dtype=np.float32)
+    store.store_memories([
+        make_memory(i, embedding, level=level, timestamp=datetime(2024, month, 10))
+        for i, (level, month) in enumerate([
+            (MemoryLevel.TEAM, 1), (MemoryLevel.TEAM, 2), (MemoryLevel.TEAM, 3), (MemoryLevel.ORGANIZATION, 1)
+        ])
+    ])
+    assert partition_names(config) == {
+        "memories_team", "memories_team_2024_01", "memories_team_2024_02", "memories_team_2024_03",
+        "memories_organization", "memories_organization_2024_01"
+    }
+    
+    connection = connect(config)
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            EXPLAIN (FORMAT JSON) SELECT id FROM memories
+            WHERE level = 'team' AND timestamp >= '2024-02-01' AND timestamp < '2024-03-01'
+        """)
+        plan = json.dumps(cursor.fetchone()[0])
+    connection.close()
+    assert "memories_team_2024_02" in plan
+    assert "memories_team_2024_01" not in plan and "memories_organization_2024_01" not in plan
+    
+    detached = store.detach_partitions_before(datetime(2024, 2, 1))
+    assert sorted(name.split("_detached_")[0] for name in detached) == [
+        "memories_organization_2024_01", "memories_team_2024_01"
+    ]
+    assert [memory.id for memory in store.search_memories(max_results=10)] == ["m0002", "m0001"]
+    # Detached months stay as standalone tables
+    assert "memories_team_2024_01" not in partition_names(config)
+    connection = connect(config)
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT id FROM "{sorted(detached)[1]}"')
+        assert cursor.fetchall() == [("m0000",)]
+    connection.close()
+    
+    # Their ids are free again, and storing into a detached month recreates it
+    store.store_memories([make_memory(0, embedding, timestamp=datetime(2024, 1, 20))])
+    assert "memories_team_2024_01" in partition_names(config)
+    store.close()
+
+def test_partitioned_ids_are_unique(pg_config):
+    """Test that an id cannot be stored twice in different partitions."""
+    store = MemoryStore(pg_config(partitioned=True))
+    embedding = np.ones(4, dtype=np.float32)
+    store.store_memories([make_memory(1, embedding, timestamp=datetime(2024, 1, 10))])
+    
+    duplicate = make_memory(1, embedding, level=MemoryLevel.ORGANIZATION, timestamp=datetime(2024, 5, 10))
+    with pytest.raises(psycopg2.errors.UniqueViolation):
+        store.store_memories([duplicate])
+    store.db.rollback()
+    store._partitions.clear()
+    
+    # Moving a memory across partitions keeps its id registered once
+    store.update_fields("m0001", {"level": MemoryLevel.ORGANIZATION})
+    with pytest.raises(psycopg2.errors.UniqueViolation):
+        store.store_memories([duplicate])
+    store.db.rollback()
+    store._partitions.clear()
+    
+    # Deleted ids can be reused
+    store.delete_memories(["m0001"])
+    store.store_memories([duplicate])
+    assert [memory.level for memory in store.search_memories(max_results=5)] == [MemoryLevel.ORGANIZATION]
+    store.close()
+
+def test_execution_modes_agree_and_auto_is_cached(pg_config):
+    """Test that every mode ranks alike and ``auto`` estimates once per filter shape."""
+    store = MemoryStore(pg_config(client_scoring_max_candidates=50))
+    rng = np.random.default_rng(1)
+    store.store_memories([
+        make_memory(i, rng.standard_normal(16).astype(np.float32),
+                    level=MemoryLevel.TEAM if i < 30 else MemoryLevel.ORGANIZATION)
+        for i in range(100)
+    ])
+    with store.db.cursor() as cursor:
+        cursor.execute("ANALYZE memories")
+    store.db.commit()
+    
+    estimates, client_ranks = [], []
+    estimate, rank = store._pg_estimate_candidates, store._pg_rank
+    store._pg_estimate_candidates = lambda *args: estimates.append(args[1]) or estimate(*args)
+    store._pg_rank = lambda *args: client_ranks.append(args[1]) or rank(*args)
+    
+    query = rng.standard_normal(16)
+    for level in (MemoryLevel.TEAM, None):
+        expected = [memory.id for memory in store.search_memories(query, level=level, execution_mode="server")]
+        for mode in ("client", "auto", "auto"):
+            results = store.search_memories(query, level=level, execution_mode=mode)
+            assert [memory.id for memory in results] == expected
+    
+    # 30 team candidates are scored here, all 100 rows on the server
+    assert len(estimates) == 2
+    team, unfiltered = sorted(set(estimates), reverse=True)
+    assert client_ranks == [team, team, team, unfiltered]
+    store.close()
+
+def test_idle_manager_persists_access(pg_config):
+    """Test that background access flushes open their session beside a reading manager."""
+    manager = MemoryManager(LLMConfig(provider="openai"), pg_config(), track_access=True, access_flush_interval=0.05)
+    memory = manager.add_experience("Idle note", MemoryLevel.TEAM)
+    # The search leaves the manager's session inside a read transaction
+    assert len(manager.search_memories(MemoryQuery(content="note"))) == 1
+    
+    def stored_count():
+        # A new transaction sees the flush thread's commit
+        manager.memory_store.db.rollback()
+        return manager.memory_store.get_memories([memory.id])[0].access_count
+    
+    deadline = time.monotonic() + 5
+    while stored_count() == 0 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert stored_count() == 1
+    manager.close()
+
+def test_decay_of_long_idle_memories_does_not_underflow(pg_config):
+    """Test that memories idle for many half-lives decay to zero instead of aborting the batch."""
+    store = MemoryStore(pg_config())
+    now = datetime.now()
+    embedding = np.ones(4, dtype=np.float32)
+    store.store_memories([
+        make_memory(0, embedding, relevance_score=1.0, timestamp=now - timedelta(days=30)),
+        make_memory(1, embedding, relevance_score=1e-200, timestamp=now - timedelta(days=30)),
+        make_memory(2, embedding, relevance_score=1.0, timestamp=now)
+    ])
+    last_id, decayed, archived = store.decay_relevance("", 10, 1e9, 1.0, 0.0, now=now)
+    assert (last_id, decayed, archived) == (None, 3, [])
+    scores = {memory.id: memory.relevance_score for memory in store.get_memories(["m0000", "m0001", "m0002"])}
+    # The exponent is capped at 1000 halvings, as in the ranking's recency factor
+    assert scores == {"m0000": 2.0 ** -1000, "m0001": 0.0, "m0002": 1.0}
+    store.close()
+
+def test_decay_pass_time_is_shared_by_sessions(pg_config):
+    """Test that two sessions split the time since the last pass instead of both claiming it."""
+    first, second = MemoryStore(pg_config()), MemoryStore(pg_config())
+    now = datetime.now()
+    assert first.begin_decay_pass(now - timedelta(days=2)) == 0
+    assert second.begin_decay_pass(now - timedelta(days=1)) == 86400
+    assert first.begin_decay_pass(now - timedelta(days=1)) == 0
+    assert first.begin_decay_pass(now) == 86400
+    first.close()
+    second.close()
+
+def test_tags_are_added_in_place(pg_config):
+    """Test that tags from two sessions are unioned in the row, keeping their order."""
+    first, second = MemoryStore(pg_config()), MemoryStore(pg_config())
+    embedding = np.ones(4, dtype=np.float32)
+    first.store_memories([make_memory(i, embedding, tags=["x"]) for i in range(2)])
+    
+    assert first.add_tags({"m0000": ["y", "x", "y"], "m0001": ["z"]}) == 2
+    assert second.add_tags({"m0000": ["z"], "missing": ["z"]}) == 1
+    tags = {memory.id: memory.tags for memory in first.get_memories(["m0000", "m0001"])}
+    assert tags == {"m0000": ["x", "y", "z"], "m0001": ["x", "z"]}
+    first.close()
+    second.close()
+
+def test_pages_agree_across_execution_modes(pg_config):
+    """Test that a page walk switching between server and client scoring neither repeats nor skips."""
+    store = MemoryStore(pg_config())
+    rng = np.random.default_rng(2)
+    # Memories in groups of three share an embedding, so page boundaries fall on ties
+    vectors = rng.standard_normal((20, 16)).astype(np.float32)
+    store.store_memories([
+        make_memory(i, vectors[i // 3], relevance_score=0.25 + (i % 3) / 4) for i in range(60)
+    ])
+    query = rng.standard_normal(16)
+    
+    for recency_half_life in (None, 600.0):
+        page = PageToken(True, now=datetime.now())
+        expected = store.search_memories(
+            query, max_results=60, recency_half_life=recency_half_life,
+            execution_mode="server", page_token=page.encode()
+        )
+        walked = []
+        for mode in itertools.cycle(("client", "server")):
+            results = store.search_memories(
+                query, max_results=7, recency_half_life=recency_half_life,
+                execution_mode=mode, page_token=page.encode()
+            )
+            walked.extend(results)
+            page = page.next(results, 7)
+            if page is None:
+                break
+        assert [memory.id for memory in walked] == [memory.id for memory in expected]
+    store.close()
@@ -0,0 +1,103 @@
+"""Test the query result cache."""
+
+import time
+from datetime import datetime
+import numpy as np
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryQuery,
+    MemoryStore,
+    QueryCache,
+    SemanticCacheStore,
+    DatabaseConfig,
+    DatabaseProvider
+)
+
+def make_memory(memory_id: str, level: MemoryLevel, tags) -> Memory:
+    """Create a memory."""
+    return Memory(
+        id=memory_id,
+        content=f"Memory {memory_id}",
+        embedding=np.ones(4, dtype=np.float32),
+        level=level,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime.now(),
+        metadata={},
+        tags=list(tags)
+    )
+
+def test_hit_ignores_tag_order():
+    """Test that equivalent queries share an entry and hits return copies."""
+    cache = QueryCache()
+    cache.put(MemoryQuery(content="deploy", tags=["a", "b"]), [make_memory("1", MemoryLevel.TEAM, ["a"])])
+    
+    hit = cache.get(MemoryQuery(content="deploy", tags=["b", "a"]))
+    assert [memory.id for memory in hit] == ["1"]
+    hit[0].access_count = 99
+    assert cache.get(MemoryQuery(content="deploy", tags=["a", "b"]))[0].access_count == 0
+    assert cache.get(MemoryQuery(content="deploy")) is None
+    assert cache.stats()["hit_ratio"] == 2 / 3
+
+def test_ttl_and_lru_eviction():
+    """Test that entries expire and the least recently used is evicted."""
+    cache = QueryCache(max_entries=2, ttl=60.0)
+    for content in ("a", "b"):
+        cache.put(MemoryQuery(content=content), [])
+    cache.get(MemoryQuery(content="a"))
+    cache.put(MemoryQuery(content="c"), [])
+    assert cache.get(MemoryQuery(content="b")) is None
+    assert cache.get(MemoryQuery(content="a")) == []
+    
+    cache = QueryCache(ttl=0.01)
+    cache.put(MemoryQuery(content="a"), [])
+    time.sleep(0.02)
+    assert cache.get(MemoryQuery(content="a")) is None
+    assert cache.stats()["expirations"] == 1
+
+def test_invalidation_is_precise():
+    """Test that writes only drop the queries they could affect."""
+    cache = QueryCache()
+    team = MemoryQuery(content="x", level=MemoryLevel.TEAM, tags=["ops"])
+    individual = MemoryQuery(content="x", level=MemoryLevel.INDIVIDUAL)
+    cache.put(team, [make_memory("1", MemoryLevel.TEAM, ["ops"])])
+    cache.put(individual, [])
+    
+    assert cache.invalidate_memories([make_memory("2", MemoryLevel.TEAM, ["billing"])]) == 0
+    assert cache.invalidate_fields(["1"], {"access_count": 5}) == 0
+    assert cache.invalidate_memories([make_memory("3", MemoryLevel.INDIVIDUAL, [])]) == 1
+    assert cache.get(individual) is None and cache.get(team) is not None
+    
+    assert cache.invalidate_ids(["1"]) == 1
+    assert cache.get(team) is None
+
+def test_semantic_cache_reranks_near_duplicates():
+    """Test that a close query reuses cached results re-ranked for itself."""
+    store = SemanticCacheStore(
+        MemoryStore(DatabaseConfig(provider=DatabaseProvider.MEMORY)),
+        similarity_threshold=0.9
+    )
+    rng = np.random.default_rng(0)
+    memories = [make_memory(str(i), MemoryLevel.TEAM, ["ops"]) for i in range(20)]
+    for memory in memories:
+        memory.embedding = rng.normal(size=4).astype(np.float32)
+    store.store_memories(memories)
+    
+    query = memories[3].embedding
+    first = store.search_memories(query, level=MemoryLevel.TEAM, max_results=5)
+    paraphrase = query + np.float32(0.05)
+    second = store.search_memories(paraphrase, level=MemoryLevel.TEAM, max_results=5, include_embedding=False)
+    exact = store.memory_store.search_memories(paraphrase, level=MemoryLevel.TEAM, max_results=5)
+    
+    assert first[0].id == "3"
+    assert [m.id for m in second] == [m.id for m in exact]
+    assert second[0].embedding is None
+    assert store.stats()["hits"] == 1
+    
+    store.search_memories(query, level=MemoryLevel.INDIVIDUAL, max_results=5)
+    store.search_memories(-query, level=MemoryLevel.TEAM, max_results=5)
+    assert store.stats()["hits"] == 1
+    
+    store.store_memory(make_memory("new", MemoryLevel.TEAM, ["ops"]))
+    assert store.stats()["size"] == 1
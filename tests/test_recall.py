@@ -0,0 +1,102 @@
+"""Test hierarchical multi-level recall."""
+
+from datetime import datetime
+import asyncio
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryQuery,
+    MemoryManager,
+    LLMConfig,
+    DatabaseConfig,
+    DatabaseProvider
+)
+from memory_system.recall import recall_levels, hierarchical_search, async_hierarchical_search
+
+def make_memory(memory_id: str, level: MemoryLevel, similarity: float) -> Memory:
+    """Create a search result."""
+    return Memory(
+        id=memory_id,
+        content=f"Memory {memory_id}",
+        embedding=None,
+        level=level,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime.now(),
+        similarity=similarity
+    )
+
+RESULTS = {
+    MemoryLevel.INDIVIDUAL: [make_memory("i1", MemoryLevel.INDIVIDUAL, 0.9), make_memory("i2", MemoryLevel.INDIVIDUAL, 0.4)],
+    MemoryLevel.TEAM: [make_memory("t1", MemoryLevel.TEAM, 0.8), make_memory("t2", MemoryLevel.TEAM, 0.7)],
+    MemoryLevel.ORGANIZATION: [make_memory("o1", MemoryLevel.ORGANIZATION, 0.95)]
+}
+
+def test_recall_levels():
+    """Test that recall widens from the starting level."""
+    assert recall_levels() == [MemoryLevel.INDIVIDUAL, MemoryLevel.TEAM, MemoryLevel.ORGANIZATION]
+    assert recall_levels(MemoryLevel.TEAM) == [MemoryLevel.TEAM, MemoryLevel.ORGANIZATION]
+
+def test_widens_only_when_needed():
+    """Test that wider levels are searched only for missing results."""
+    searched = []
+    
+    def search(level):
+        searched.append(level)
+        return RESULTS[level]
+    
+    results = hierarchical_search(search, recall_levels(), 2)
+    assert [memory.id for memory in results] == ["i1", "i2"]
+    assert searched == [MemoryLevel.INDIVIDUAL]
+    
+    # i2 misses the threshold, so the team level fills in before it
+    searched.clear()
+    results = hierarchical_search(search, recall_levels(), 3, min_similarity=0.5)
+    assert [memory.id for memory in results] == ["i1", "t1", "t2"]
+    assert searched == [MemoryLevel.INDIVIDUAL, MemoryLevel.TEAM]
+    
+    # Short everywhere: every level is searched and the rest fill in by score
+    results = hierarchical_search(search, recall_levels(), 5, min_similarity=0.85)
+    assert [memory.id for memory in results] == ["i1", "o1", "t1", "t2", "i2"]
+
+def test_async_cancels_wider_levels():
+    """Test that concurrent searches of wider levels are cancelled once satisfied."""
+    cancelled = []
+    
+    async def search(level):
+        try:
+            await asyncio.sleep(0 if level == MemoryLevel.INDIVIDUAL else 10)
+        except asyncio.CancelledError:
+            cancelled.append(level)
+            raise
+        return RESULTS[level]
+    
+    results = asyncio.run(async_hierarchical_search(search, recall_levels(), 2))
+    assert [memory.id for memory in results] == ["i1", "i2"]
+    assert cancelled == [MemoryLevel.TEAM, MemoryLevel.ORGANIZATION]
+
+def test_manager_hierarchical_search():
+    """Test that the manager returns narrower levels first."""
+    manager = MemoryManager(
+        LLMConfig(provider="openai"),
+        DatabaseConfig(provider=DatabaseProvider.MEMORY),
+        track_access=False,
+        query_cache_size=16
+    )
+    for i in range(3):
+        manager.add_experience(f"Individual note {i}", MemoryLevel.INDIVIDUAL)
+    for i in range(5):
+        manager.add_experience(f"Team note {i}", MemoryLevel.TEAM)
+    
+    query = MemoryQuery(content="notes", max_results=5, hierarchical=True)
+    levels = [memory.level for memory in manager.search_memories(query)]
+    assert levels == [MemoryLevel.INDIVIDUAL] * 3 + [MemoryLevel.TEAM] * 2
+    
+    # A cached hierarchical query is dropped by writes to the levels it spans
+    query = MemoryQuery(content="notes", level=MemoryLevel.TEAM, max_results=5, hierarchical=True)
+    manager.search_memories(query)
+    manager.add_experience("Individual note 3", MemoryLevel.INDIVIDUAL)
+    assert manager.query_cache.get(query) is not None
+    manager.add_experience("Organization note", MemoryLevel.ORGANIZATION)
+    assert manager.query_cache.get(query) is None
+    manager.close()
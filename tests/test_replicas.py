@@ -0,0 +1,75 @@
+"""Test read replica routing."""
+
+from memory_system.replicas import ReplicaRouter
+
+class FakeCursor:
+    """Cursor answering the lag query."""
+    
+    def __init__(self, lag: float):
+        self.lag = lag
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *args):
+        pass
+    
+    def execute(self, sql):
+        pass
+    
+    def fetchone(self):
+        return (self.lag,)
+
+class FakeConnection:
+    """Connection to a replica with a fixed lag."""
+    
+    def __init__(self, lag: float):
+        self.lag = lag
+        self.autocommit = False
+        self.closed = False
+    
+    def cursor(self):
+        return FakeCursor(self.lag)
+    
+    def close(self):
+        self.closed = True
+
+def connect(endpoint):
+    """Connect to a fake replica, failing for endpoints marked down."""
+    if endpoint.get("down"):
+        raise ConnectionError("replica down")
+    return FakeConnection(endpoint.get("lag", 0.0))
+
+def test_round_robin_skips_unhealthy_and_stale():
+    """Test that reads rotate over healthy replicas within the lag bound."""
+    router = ReplicaRouter(
+        [{"host": "a"}, {"host": "b", "down": True}, {"host": "c", "lag": 60.0}, {"host": "d"}],
+        connect,
+        max_lag=10.0
+    )
+    
+    chosen = [router.choose().endpoint["host"] for _ in range(4)]
+    assert sorted(set(chosen)) == ["a", "d"]
+    assert router.replicas[0].db.autocommit
+    
+    stats = {replica["endpoint"]["host"]: replica for replica in router.stats()}
+    assert stats["b"]["ejected"] and stats["b"]["failures"] == 1
+    assert stats["c"]["lag"] == 60.0 and not stats["c"]["ejected"]
+
+def test_read_your_writes_pins_primary():
+    """Test that reads go to the primary right after a write."""
+    router = ReplicaRouter([{"host": "a"}], connect, read_your_writes=True)
+    assert router.choose() is not None
+    
+    router.note_write()
+    assert router.choose() is None
+
+def test_ejected_replica_returns_after_retry_interval():
+    """Test that an ejected replica is retried once its interval has passed."""
+    router = ReplicaRouter([{"host": "a"}], connect, retry_interval=0.0)
+    replica = router.choose()
+    connection = replica.db
+    
+    router.eject(replica)
+    assert connection.closed
+    assert router.choose() is replica
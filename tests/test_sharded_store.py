@@ -0,0 +1,142 @@
+"""Test the sharded memory store."""
+
+import threading
+import time
+import pytest
+import numpy as np
+from datetime import datetime, timedelta
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    ShardedMemoryStore,
+    ConsolidationJob,
+    DatabaseConfig,
+    DatabaseProvider
+)
+
+@pytest.fixture
+def sharded_store(tmp_path):
+    """Create a store sharded over three SQLite files."""
+    store = ShardedMemoryStore([
+        DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / f"shard-{i}.db"))
+        for i in range(3)
+    ])
+    yield store
+    store.close()
+
+def make_memory(i: int) -> Memory:
+    """Create a test memory."""
+    return Memory(
+        id=f"memory-{i}",
+        content=f"Memory {i}",
+        embedding=[1.0, float(i), 0.0],
+        level=MemoryLevel.TEAM,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime(2024, 1, 1 + i),
+        tags=["test"]
+    )
+
+def test_scatter_gather_search(sharded_store):
+    """Test that merged shard results match a single store's ranking."""
+    sharded_store.store_memories([make_memory(i) for i in range(12)])
+    assert len({sharded_store.shard_for(make_memory(i)) for i in range(12)}) == 3
+    
+    results, report = sharded_store.search_memories_with_report(
+        np.array([1.0, 5.0, 0.0]), max_results=3
+    )
+    assert [memory.id for memory in results] == ["memory-5", "memory-6", "memory-4"]
+    assert not report.partial
+    
+    recent = sharded_store.search_memories(max_results=2)
+    assert [memory.id for memory in recent] == ["memory-11", "memory-10"]
+
+def test_writes_by_id(sharded_store):
+    """Test that id-addressed writes reach the owning shard."""
+    sharded_store.store_memories([make_memory(i) for i in range(6)])
+    
+    assert sharded_store.increment_access(["memory-1", "memory-4"], count=3) == 2
+    assert [m.access_count for m in sharded_store.get_memories(["memory-4", "memory-1"])] == [3, 3]
+    assert sharded_store.delete_memories(["memory-0", "memory-5", "missing"]) == 2
+
+def test_partial_results(sharded_store):
+    """Test that failing and slow shards are reported and skipped."""
+    sharded_store.store_memories([make_memory(i) for i in range(12)])
+    sharded_store.shard_timeout = 0.2
+    
+    def fail(**kwargs):
+        raise RuntimeError("shard down")
+    
+    def stall(**kwargs):
+        time.sleep(1)
+        return []
+    
+    sharded_store.shards[0].search_memories = fail
+    sharded_store.shards[1].search_memories = stall
+    
+    results, report = sharded_store.search_memories_with_report(max_results=12)
+    assert report.partial
+    assert report.succeeded == [2]
+    assert report.failed == {0: "shard down"}
+    assert report.timed_out == [1]
+    expected = [f"memory-{i}" for i in reversed(range(12)) if sharded_store.shard_for(make_memory(i)) == 2]
+    assert [memory.id for memory in results] == expected
+
+def test_stuck_shard_is_degraded_until_it_answers(sharded_store):
+    """Test that searches skip a shard whose timed-out search is still running."""
+    sharded_store.store_memories([make_memory(i) for i in range(12)])
+    sharded_store.shard_timeout = 0.2
+    search = sharded_store.shards[1].search_memories
+    released = threading.Event()
+    
+    def stall(**kwargs):
+        released.wait()
+        return search(**kwargs)
+    
+    sharded_store.shards[1].search_memories = stall
+    _, report = sharded_store.search_memories_with_report(max_results=12)
+    assert report.timed_out == [1]
+    
+    # Nothing queues behind the stuck search
+    start = time.monotonic()
+    _, report = sharded_store.search_memories_with_report(max_results=12)
+    assert time.monotonic() - start < 0.2
+    assert report.degraded == [1]
+    assert report.timed_out == []
+    assert report.succeeded == [0, 2]
+    assert report.partial
+    
+    sharded_store.shards[1].search_memories = search
+    released.set()
+    deadline = time.monotonic() + 2
+    while sharded_store.search_memories_with_report(max_results=12)[1].degraded and time.monotonic() < deadline:
+        time.sleep(0.01)
+    results, report = sharded_store.search_memories_with_report(max_results=12)
+    assert not report.partial
+    assert len(results) == 12
+
+def test_scans_and_consolidation_cover_every_shard(sharded_store):
+    """Test that keyset scans and decay passes walk all shards exactly once."""
+    memories = [make_memory(i) for i in range(12)]
+    for memory in memories[1::2]:
+        memory.relevance_score = 2.0
+    sharded_store.store_memories(memories)
+    
+    scanned, after_id = [], ""
+    while True:
+        batch = sharded_store.scan_memories(after_id, 5, include_embedding=False)
+        if not batch:
+            break
+        scanned.extend(memory.id for memory in batch)
+        after_id = batch[-1].id
+    assert scanned == sorted(memory.id for memory in memories)
+    
+    sharded_store.begin_decay_pass(datetime.now() - timedelta(hours=1))
+    job = ConsolidationJob(sharded_store, half_life=3600, archive_below=0.6, batch_size=2, batch_pause=0)
+    assert job.run_once() == {"decayed": 12, "archived": 6}
+    # One half-life, applied once to every memory
+    remaining = sharded_store.scan_memories(include_embedding=False)
+    assert [m.relevance_score for m in remaining] == pytest.approx([1.0] * 6, rel=1e-4)
+    
+    assert sharded_store.restore_memories(["memory-0", "memory-2", "missing"]) == 2
+    assert len(sharded_store.scan_memories()) == 8
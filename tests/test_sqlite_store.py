@@ -0,0 +1,66 @@
+"""Test the SQLite memory store."""
+
+import pytest
+import numpy as np
+from datetime import datetime
+from memory_system import Memory, MemoryLevel, MemoryType, MemoryStore, DatabaseConfig, DatabaseProvider
+
+@pytest.fixture
+def memory_store(tmp_path):
+    """Create a SQLite memory store in a temporary directory."""
+    store = MemoryStore(DatabaseConfig(
+        provider=DatabaseProvider.SQLITE,
+        database=str(tmp_path / "memories.db")
+    ))
+    yield store
+    store.close()
+
+def make_memory(i: int) -> Memory:
+    """Create a test memory."""
+    return Memory(
+        id=f"memory-{i}",
+        content=f"Memory {i}",
+        embedding=[1.0, float(i), 0.0],
+        level=MemoryLevel.TEAM if i % 2 else MemoryLevel.INDIVIDUAL,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime(2024, 1, 1 + i),
+        metadata={"parity": i % 2},
+        relevance_score=1.0,
+        access_count=0,
+        last_accessed=None,
+        tags=["test", f"tag-{i}"]
+    )
+
+def test_sqlite_store_uses_wal(memory_store):
+    """Test that the database is opened in WAL mode."""
+    assert memory_store.db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_sqlite_search(memory_store):
+    """Test similarity search and filters."""
+    memory_store.store_memories([make_memory(i) for i in range(6)])
+    
+    results = memory_store.search_memories(np.array([1.0, 2.0, 0.0]), max_results=2)
+    assert [memory.id for memory in results] == ["memory-2", "memory-3"]
+    assert results[0].similarity == pytest.approx(1.0)
+    assert results[0].embedding.tolist() == [1.0, 2.0, 0.0]
+    
+    results = memory_store.search_memories(
+        level=MemoryLevel.TEAM,
+        tags=["tag-1", "tag-2", "tag-3"],
+        metadata_filters={"parity": 1}
+    )
+    assert [memory.id for memory in results] == ["memory-3", "memory-1"]
+
+def test_sqlite_updates_and_deletes(memory_store):
+    """Test partial updates, access counters and deletes."""
+    memory_store.store_memories([make_memory(i) for i in range(3)])
+    
+    assert memory_store.update_fields(["memory-0", "memory-1"], {"tags": ["moved"]}) == 2
+    assert memory_store.increment_access("memory-0", count=2) == 1
+    
+    moved = memory_store.search_memories(tags=["moved"])
+    assert sorted(memory.id for memory in moved) == ["memory-0", "memory-1"]
+    assert memory_store.get_memories(["memory-0"])[0].access_count == 2
+    
+    assert memory_store.delete_memories(["memory-0", "memory-1"]) == 2
+    assert memory_store.search_memories(tags=["moved"]) == []
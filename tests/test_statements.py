@@ -0,0 +1,42 @@
+"""Test prepared statement cache."""
+
+import pytest
+from memory_system.statements import StatementCache
+
+def test_statement_cache_hits_and_eviction():
+    """Test shape lookups, naming and LRU eviction."""
+    cache = StatementCache(max_size=2, prefix="stmt")
+    
+    assert cache.get(("search", True)) is None
+    name, evicted = cache.add(("search", True))
+    assert name == "stmt_1"
+    assert evicted is None
+    assert cache.get(("search", True)) == "stmt_1"
+    
+    cache.add(("search", False))
+    cache.get(("search", True))
+    
+    # The least recently used shape is evicted
+    name, evicted = cache.add(("insert",))
+    assert name == "stmt_3"
+    assert evicted == "stmt_2"
+    
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+    assert stats["hit_rate"] == pytest.approx(2 / 3)
+
+def test_statement_cache_registers_given_names():
+    """Test that a statement is only cached under the name it was prepared with."""
+    cache = StatementCache(max_size=2, prefix="stmt")
+    name = cache.new_name()
+    assert cache.get(("search", True)) is None
+    
+    assert cache.add(("search", True), name) == ("stmt_1", None)
+    assert cache.get(("search", True)) == "stmt_1"
+    cache.confirmed.add("stmt_1")
+    cache.clear()
+    assert cache.get(("search", True)) is None
+    assert not cache.confirmed
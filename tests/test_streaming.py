@@ -0,0 +1,68 @@
+"""Test streaming search results."""
+
+from datetime import datetime, timedelta
+import itertools
+import numpy as np
+import pytest
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryQuery,
+    MemoryManager,
+    MemoryStore,
+    LLMConfig,
+    DatabaseConfig,
+    DatabaseProvider
+)
+
+def make_memory(i: int, rng) -> Memory:
+    """Create a memory with a random embedding."""
+    return Memory(
+        id=f"{i:03d}",
+        content=f"Memory {i}",
+        embedding=rng.standard_normal(16).astype(np.float32),
+        level=MemoryLevel.TEAM,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime.now() - timedelta(minutes=i)
+    )
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Create an in-memory or SQLite store."""
+    if request.param == "memory":
+        config = DatabaseConfig(provider=DatabaseProvider.MEMORY)
+    else:
+        config = DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db"))
+    store = MemoryStore(config)
+    rng = np.random.default_rng(0)
+    store.store_memories([make_memory(i, rng) for i in range(200)])
+    yield store
+    store.close()
+
+@pytest.mark.parametrize("options", [{}, {"recency_half_life": 3600.0}, {"include_embedding": False}])
+def test_iter_search_matches_search(store, options):
+    """Test that streamed results equal the listed ones, in order."""
+    query = np.random.default_rng(1).standard_normal(16)
+    for query_embedding in (None, query):
+        expected = store.search_memories(query_embedding, max_results=50, **options)
+        streamed = list(store.iter_search_memories(query_embedding, max_results=50, batch_size=7, **options))
+        assert [memory.id for memory in streamed] == [memory.id for memory in expected]
+        assert [memory.similarity or 0.0 for memory in streamed] == pytest.approx(
+            [memory.similarity or 0.0 for memory in expected]
+        )
+
+def test_manager_counts_only_consumed_results(tmp_path):
+    """Test that stopping early leaves the remaining results unaccessed."""
+    manager = MemoryManager(
+        LLMConfig(provider="openai"),
+        DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db")),
+        track_access=True
+    )
+    for i in range(30):
+        manager.add_experience(f"Note {i}", MemoryLevel.TEAM)
+    
+    first = list(itertools.islice(manager.iter_search(MemoryQuery(content="note", max_results=20), 4), 5))
+    assert len(first) == 5 and all(memory.access_count == 1 for memory in first)
+    assert manager.access_tracker.pending() == 5
+    manager.close()
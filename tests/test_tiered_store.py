@@ -0,0 +1,100 @@
+"""Test the tiered memory store."""
+
+import pytest
+import numpy as np
+from datetime import datetime
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryStore,
+    TieredMemoryStore,
+    DatabaseConfig,
+    DatabaseProvider
+)
+
+class CountingStore(MemoryStore):
+    """SQLite store that counts the searches reaching it."""
+    
+    def __init__(self, path: str):
+        super().__init__(DatabaseConfig(provider=DatabaseProvider.SQLITE, database=path))
+        self.searches = 0
+    
+    def search_memories(self, *args, **kwargs):
+        self.searches += 1
+        return super().search_memories(*args, **kwargs)
+
+@pytest.fixture
+def backing_store(tmp_path):
+    """Create the backing store."""
+    store = CountingStore(str(tmp_path / "memories.db"))
+    yield store
+    store.close()
+
+def make_memory(i: int, relevance_score: float = 1.0) -> Memory:
+    """Create a test memory."""
+    return Memory(
+        id=f"memory-{i}",
+        content=f"Memory {i}",
+        embedding=[1.0, float(i), 0.0],
+        level=MemoryLevel.TEAM,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime(2024, 1, 1 + i),
+        relevance_score=relevance_score,
+        tags=[f"tag-{i}"]
+    )
+
+def test_hot_tier_serves_searches(backing_store):
+    """Test that searches the hot tier can answer skip the backing store."""
+    store = TieredMemoryStore(backing_store, promotion_batch_size=1)
+    store.store_memories([make_memory(i) for i in range(5)])
+    
+    results = store.search_memories(np.array([1.0, 2.0, 0.0]), max_results=2)
+    assert [memory.id for memory in results] == ["memory-2", "memory-3"]
+    assert backing_store.searches == 0
+    
+    # Too few hot matches fall through
+    store.search_memories(tags=["tag-1", "missing"], max_results=2)
+    assert backing_store.searches == 1
+    assert store.stats()["hot_hits"] == 1
+
+def test_demotion_keeps_most_valuable(backing_store):
+    """Test that the tier is trimmed by relevance, accesses and recency."""
+    store = TieredMemoryStore(backing_store, hot_capacity=2, promotion_batch_size=10)
+    store.store_memories([make_memory(i, relevance_score=0.1) for i in range(3)])
+    store.increment_access("memory-0", count=50)
+    store.store_memory(make_memory(3, relevance_score=2.0))
+    store.rebalance()
+    
+    assert "memory-0" in store.hot and "memory-3" in store.hot
+    assert len(store.hot) == 2
+    assert store.get_memories(["memory-1"])[0].access_count == 0
+
+def test_writes_reach_both_tiers(backing_store):
+    """Test that updates and deletes apply to the hot tier and the backing store."""
+    store = TieredMemoryStore(backing_store, promotion_batch_size=1)
+    store.store_memories([make_memory(i) for i in range(2)])
+    
+    assert store.update_fields("memory-0", {"content": "Changed"}) == 1
+    assert store.hot.get(["memory-0"])[0].content == "Changed"
+    assert backing_store.get_memories(["memory-0"])[0].content == "Changed"
+    
+    assert store.delete_memories(["memory-1"]) == 1
+    assert "memory-1" not in store.hot
+    assert backing_store.get_memories(["memory-1"]) == []
+
+def test_relevance_changed_behind_the_tier_is_reloaded(backing_store):
+    """Test that invalidated relevance scores are read again from the backing store."""
+    tiered = TieredMemoryStore(backing_store, hot_capacity=10)
+    tiered.store_memories([make_memory(i) for i in range(5)])
+    tiered.rebalance()
+    
+    backing_store.update_fields(["memory-0", "memory-1"], {"relevance_score": 0.1})
+    backing_store.delete_memories(["memory-2"])
+    tiered.invalidate_relevance()
+    
+    results = tiered.search_memories(query_embedding=np.array([1.0, 0.0, 0.0]), min_relevance=0.5, max_results=2)
+    assert {memory.id for memory in results} == {"memory-3", "memory-4"}
+    assert backing_store.searches == 0
+    assert len(tiered.hot) == 4
+    assert tiered.get_memories(["memory-0"])[0].relevance_score == pytest.approx(0.1)
@@ -0,0 +1,76 @@
+"""Test time-window filters and recency-weighted ranking."""
+
+from datetime import datetime, timedelta
+import numpy as np
+import pytest
+from memory_system import (
+    Memory,
+    MemoryLevel,
+    MemoryType,
+    MemoryQuery,
+    MemoryStore,
+    QueryCache,
+    DatabaseConfig,
+    DatabaseProvider
+)
+
+def make_memory(memory_id: str, embedding, age_days: float, relevance_score: float = 1.0) -> Memory:
+    """Create a memory of a given age."""
+    return Memory(
+        id=memory_id,
+        content=f"Memory {memory_id}",
+        embedding=np.asarray(embedding, dtype=np.float32),
+        level=MemoryLevel.TEAM,
+        memory_type=MemoryType.EXPERIENCE,
+        timestamp=datetime.now() - timedelta(days=age_days),
+        relevance_score=relevance_score
+    )
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Create an in-memory or SQLite store."""
+    if request.param == "memory":
+        config = DatabaseConfig(provider=DatabaseProvider.MEMORY)
+    else:
+        config = DatabaseConfig(provider=DatabaseProvider.SQLITE, database=str(tmp_path / "memories.db"))
+    store = MemoryStore(config)
+    store.store_memories([
+        # Closest to the query, but old
+        make_memory("old", [1.0, 0.0], 60),
+        make_memory("recent", [0.9, 0.4], 1),
+        make_memory("recent-irrelevant", [0.9, 0.4], 1, relevance_score=0.1),
+        make_memory("middle", [0.8, 0.6], 10)
+    ])
+    yield store
+    store.close()
+
+def test_time_window(store):
+    """Test that since and until bound both search modes."""
+    now = datetime.now()
+    window = {"since": now - timedelta(days=30), "until": now - timedelta(days=5)}
+    
+    assert [memory.id for memory in store.search_memories(**window)] == ["middle"]
+    assert [memory.id for memory in store.search_memories(np.array([1.0, 0.0]), **window)] == ["middle"]
+    assert len(store.search_memories(since=now - timedelta(days=30))) == 3
+
+def test_recency_weighted_ranking(store):
+    """Test that recency and relevance reorder similarity results."""
+    query = np.array([1.0, 0.0])
+    by_similarity = store.search_memories(query, max_results=4)
+    assert by_similarity[0].id == "old"
+    
+    blended = store.search_memories(query, max_results=4, recency_half_life=7 * 86400.0)
+    assert [memory.id for memory in blended] == ["recent", "middle", "recent-irrelevant", "old"]
+    expected = by_similarity[0].similarity * 2 ** (-60 / 7)
+    assert blended[-1].similarity == pytest.approx(expected, rel=1e-3)
+
+def test_cache_ignores_memories_outside_window():
+    """Test that storing a memory outside a cached window keeps the entry."""
+    cache = QueryCache()
+    since = datetime.now() - timedelta(days=7)
+    cache.put(MemoryQuery(content="deploy", since=since), [])
+    cache.put(MemoryQuery(content="deploy", recency_half_life=86400.0), [])
+    
+    assert cache.invalidate_memories([make_memory("old", [1.0, 0.0], 30)]) == 1
+    assert cache.get(MemoryQuery(content="deploy", since=since)) == []
+    assert cache.get(MemoryQuery(content="deploy")) is None
@@ -0,0 +1,47 @@
+"""Test vector encoding and scoring."""
+
+import pytest
+import numpy as np
+from memory_system.vectors import (
+    encode_embedding,
+    decode_embedding,
+    stack_embeddings,
+    cosine_scores,
+    top_k
+)
+
+def test_embedding_round_trip():
+    """Test encoding embeddings as float32 blobs."""
+    embedding = [0.5, -1.25, 3.0, 0.0]
+    blob = encode_embedding(embedding)
+    
+    assert len(blob) == 16
+    assert blob[:4] == np.float32(0.5).tobytes()
+    
+    decoded = decode_embedding(blob)
+    assert decoded.dtype == np.dtype('<f4')
+    assert decoded.tolist() == embedding
+    
+    # Legacy float lists are still accepted
+    assert decode_embedding(embedding).tolist() == embedding
+
+def test_stack_embeddings_mismatched_dimensions():
+    """Test stacking blobs whose dimension differs from the query."""
+    blobs = [encode_embedding([1.0, 0.0]), encode_embedding([1.0, 0.0, 0.0])]
+    matrix = stack_embeddings(blobs, 2)
+    
+    assert matrix.shape == (2, 2)
+    assert matrix[0].tolist() == [1.0, 0.0]
+    assert matrix[1].tolist() == [0.0, 0.0]
+
+def test_cosine_scores_and_top_k():
+    """Test vectorized scoring and ranking."""
+    matrix = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0], [0.0, 0.0]], dtype=np.float32)
+    scores = cosine_scores(matrix, [1.0, 0.0])
+    
+    assert scores[0] == pytest.approx(1.0)
+    assert scores[1] == pytest.approx(0.0)
+    assert scores[2] == pytest.approx(np.sqrt(0.5))
+    assert scores[3] == 0.0
+    assert top_k(scores, 2).tolist() == [0, 2]
+    assert top_k(scores, 10).tolist()[:2] == [0, 2]